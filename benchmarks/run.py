@@ -0,0 +1,196 @@
+"""
+Run the benchmark suite, recording results to a JSON history and
+flagging regressions against previous runs.
+
+The inputs of each benchmark are prepared in this process and its timed
+work runs in a fresh process, so that peak RSS is measured per benchmark
+and reflects the timed work rather than input generation. For example:
+
+    python benchmarks/run.py --scale small --history benchmarks/history.json
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import pathlib
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from suite import BENCHMARKS, SCALES
+
+# runs compared against when flagging regressions
+BASELINE_RUNS = 5
+
+
+def _peak_rss_mb() -> float:
+    """
+    Get the peak resident set size of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kibibytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run_benchmark(
+    name: str,
+    scale: str,
+    workdir: pathlib.Path,
+    inputs: Any,  # noqa: ANN401
+) -> Dict[str, float]:
+    """
+    Run the timed work of one benchmark on prepared inputs, returning
+    its throughput, latency percentiles and peak RSS.
+
+    Args:
+        name (str):
+            The benchmark name.
+        scale (str):
+            The scale of the synthetic inputs.
+        workdir (pathlib.Path):
+            The working directory the inputs were prepared in.
+        inputs (Any):
+            The inputs returned by the benchmark setup.
+
+    Returns:
+        Dict[str, float]:
+            The benchmark metrics.
+    """
+    measurement = BENCHMARKS[name].run(SCALES[scale], workdir, inputs)
+
+    latencies_ms = np.array(measurement.latencies) * 1000
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "items": measurement.items,
+        "seconds": measurement.seconds,
+        "throughput": measurement.items / measurement.seconds,
+        "latency_p50_ms": float(p50),
+        "latency_p95_ms": float(p95),
+        "latency_p99_ms": float(p99),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def find_regressions(
+    history: List[Dict], run: Dict, threshold: float = 0.1
+) -> List[str]:
+    """
+    Compare a run against the median of previous runs at the same scale.
+
+    Args:
+        history (List[Dict]):
+            Previous runs.
+        run (Dict):
+            The current run.
+        threshold (float, optional):
+            The relative change flagged as a regression. Defaults to 0.1.
+
+    Returns:
+        List[str]:
+            A description of each regression.
+    """
+    previous = [entry for entry in history if entry["scale"] == run["scale"]][
+        -BASELINE_RUNS:
+    ]
+    regressions = []
+    for name, metrics in run["results"].items():
+        baseline = [
+            entry["results"][name] for entry in previous if name in entry["results"]
+        ]
+        if not baseline:
+            continue
+        for metric, higher_is_better in (
+            ("throughput", True),
+            ("latency_p95_ms", False),
+            ("peak_rss_mb", False),
+        ):
+            expected = statistics.median(entry[metric] for entry in baseline)
+            change = (metrics[metric] - expected) / expected if expected else 0.0
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append(
+                    f"{name}: {metric} {metrics[metric]:.4g} "
+                    f"vs baseline {expected:.4g} ({change:+.1%})"
+                )
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    """
+    Get the current git commit, if available.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the benchmark suite from the command line.
+
+    Args:
+        argv (Optional[List[str]], optional):
+            The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int:
+            The exit code (1 if regressions were found and
+            --fail-on-regression was given).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument(
+        "--only", nargs="*", choices=sorted(BENCHMARKS), help="benchmarks to run"
+    )
+    parser.add_argument(
+        "--history",
+        type=pathlib.Path,
+        default=pathlib.Path(__file__).parent / "history.json",
+    )
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    run = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "results": {},
+    }
+    # a fresh process per benchmark isolates peak RSS, with inputs prepared
+    # beforehand so that they are not counted towards it
+    context = multiprocessing.get_context("spawn")
+    for name in args.only or BENCHMARKS:
+        with tempfile.TemporaryDirectory() as workdir:
+            inputs = BENCHMARKS[name].setup(SCALES[args.scale], pathlib.Path(workdir))
+            with context.Pool(1) as pool:
+                run["results"][name] = pool.apply(
+                    run_benchmark, (name, args.scale, pathlib.Path(workdir), inputs)
+                )
+        print(name, json.dumps(run["results"][name]))
+
+    history = json.loads(args.history.read_text()) if args.history.exists() else []
+    regressions = find_regressions(history, run, threshold=args.threshold)
+    run["regressions"] = regressions
+    args.history.write_text(json.dumps([*history, run], indent=2))
+
+    for regression in regressions:
+        print("REGRESSION", regression)
+    return int(bool(regressions) and args.fail_on_regression)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""
+Benchmarks for the ingest, gather and query hot paths.
+
+Each benchmark prepares its inputs (untimed) in one step and returns a
+Measurement of the timed work in another, so that the timed work may
+run in a fresh process whose peak RSS excludes input generation.
+"""
+
+import pathlib
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from synthetic import (
+    SYNTHETIC_METAPATHS,
+    FakeBoltDriver,
+    MockSearchAPI,
+    combinations,
+    synthetic_id_tables,
+    write_synthetic_pg_dump,
+)
+
+from hetionet_utils.combination import (
+    generate_combinations_for_bioprocs_genes_and_metapaths,
+    process_in_chunks_for_bioprocs_genes_and_metapaths,
+)
+from hetionet_utils.database import HetionetNeo4j
+from hetionet_utils.query import MetapathDataQuery
+from hetionet_utils.sql import extract_and_write_sql_block
+
+# sizes of the synthetic inputs for each scale
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny": {
+        "dump_rows": 2_000,
+        "bioprocesses": 20,
+        "genes": 50,
+        "requests": 50,
+        "query_rows": 10_000,
+        "lookups": 50,
+    },
+    "small": {
+        "dump_rows": 200_000,
+        "bioprocesses": 200,
+        "genes": 1_000,
+        "requests": 500,
+        "query_rows": 1_000_000,
+        "lookups": 500,
+    },
+    "large": {
+        "dump_rows": 5_000_000,
+        "bioprocesses": 1_000,
+        "genes": 5_000,
+        "requests": 2_000,
+        "query_rows": 20_000_000,
+        "lookups": 2_000,
+    },
+}
+
+
+class Measurement(NamedTuple):
+    """
+    The timed work of a benchmark.
+
+    Attributes:
+        items (int):
+            The number of items (rows, combinations or requests) processed.
+        seconds (float):
+            The total time taken.
+        latencies (List[float]):
+            Per-operation times in seconds.
+    """
+
+    items: int
+    seconds: float
+    latencies: List[float]
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmark split into untimed setup and timed work.
+
+    Attributes:
+        setup (Callable[[Dict[str, int], pathlib.Path], Any]):
+            Prepares the inputs for a scale (writing any files to the
+            working directory), returning picklable arguments for run.
+        run (Callable[[Dict[str, int], pathlib.Path, Any], Measurement]):
+            Performs and times the work on the prepared inputs.
+    """
+
+    setup: Callable[[Dict[str, int], pathlib.Path], Any]
+    run: Callable[[Dict[str, int], pathlib.Path, Any], Measurement]
+
+
+def timed_calls(func: Callable, calls: Iterable[tuple]) -> Measurement:
+    """
+    Time each call of a function.
+
+    Args:
+        func (Callable):
+            The function to call.
+        calls (Iterable[tuple]):
+            The arguments of each call.
+
+    Returns:
+        Measurement:
+            One item and latency per call.
+    """
+    latencies = []
+    start = time.perf_counter()
+    for args in calls:
+        call_start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - call_start)
+    return Measurement(len(latencies), time.perf_counter() - start, latencies)
+
+
+def setup_sql_extract(scale: Dict[str, int], workdir: pathlib.Path) -> pathlib.Path:
+    """
+    Write a synthetic gzip pg_dump.
+    """
+    return write_synthetic_pg_dump(workdir / "dump.sql.gz", rows=scale["dump_rows"])
+
+
+def bench_sql_extract(
+    scale: Dict[str, int], workdir: pathlib.Path, dump: pathlib.Path
+) -> Measurement:
+    """
+    Extract the pathcount COPY block from a synthetic gzip pg_dump.
+    """
+    start = time.perf_counter()
+    extract_and_write_sql_block(
+        sql_file=str(dump),
+        sql_start="COPY public.dj_hetmech_app_pathcount",
+        sql_end="\\.",
+        output_file=str(workdir / "copy_data.tsv"),
+    )
+    seconds = time.perf_counter() - start
+    return Measurement(scale["dump_rows"], seconds, [seconds])
+
+
+def setup_id_tables(
+    scale: Dict[str, int], workdir: pathlib.Path
+) -> Tuple[pa.Table, pa.Table, pa.Table]:
+    """
+    Make synthetic BP, Gene and metapath ID tables.
+    """
+    return synthetic_id_tables(scale["bioprocesses"], scale["genes"])
+
+
+def bench_chunker(
+    scale: Dict[str, int],
+    workdir: pathlib.Path,
+    tables: Tuple[pa.Table, pa.Table, pa.Table],
+) -> Measurement:
+    """
+    Generate and chunk every combination of synthetic ID tables.
+    """
+    # chunk one combination untimed, so that one-off imports made by the
+    # first conversion (pyarrow imports pandas) are not timed
+    next(
+        process_in_chunks_for_bioprocs_genes_and_metapaths(
+            generate_combinations_for_bioprocs_genes_and_metapaths(
+                *(table.slice(0, 1) for table in tables)
+            ),
+            chunk_size=1,
+        )
+    )
+
+    latencies = []
+    items = 0
+    start = time.perf_counter()
+    chunk_start = start
+    for chunk in process_in_chunks_for_bioprocs_genes_and_metapaths(
+        generate_combinations_for_bioprocs_genes_and_metapaths(*tables),
+        chunk_size=1000,
+    ):
+        items += chunk.num_rows
+        latencies.append(time.perf_counter() - chunk_start)
+        chunk_start = time.perf_counter()
+    return Measurement(items, time.perf_counter() - start, latencies)
+
+
+def setup_get_metapath_data(
+    scale: Dict[str, int], workdir: pathlib.Path
+) -> List[Tuple[str, int, str]]:
+    """
+    Take the combinations to request from synthetic ID tables.
+    """
+    return combinations(setup_id_tables(scale, workdir), scale["requests"])
+
+
+def bench_get_metapath_data(
+    scale: Dict[str, int],
+    workdir: pathlib.Path,
+    requests: List[Tuple[str, int, str]],
+) -> Measurement:
+    """
+    Request metapath data from a local mock search API and Bolt stand-in.
+    """
+    with MockSearchAPI() as api:
+        hetionet = HetionetNeo4j(uri="bolt://127.0.0.1:1")
+        hetionet.driver.close()
+        hetionet.driver = FakeBoltDriver()
+        hetionet.api_base_path = api.base_path
+        # make one request untimed, so that one-off imports and connection
+        # setup are not timed
+        hetionet.get_metapath_data(*requests[0])
+        return timed_calls(hetionet.get_metapath_data, requests)
+
+
+def setup_metapath_query(
+    scale: Dict[str, int], workdir: pathlib.Path
+) -> List[Tuple[int, int, str]]:
+    """
+    Write synthetic metapath Parquet data, returning the pairs to look up.
+    """
+    # every (source, target) pair has one row per synthetic metapath
+    rows = scale["query_rows"]
+    metapaths = np.array(SYNTHETIC_METAPATHS)
+    per_source = max(len(metapaths), rows // 1_000)
+    ids = np.arange(rows)
+    source_ids = ids // per_source
+    target_ids = (ids % per_source) // len(metapaths)
+    pq.write_table(
+        pa.table(
+            {
+                "id": ids,
+                "source_identifier": np.char.add("GO:", source_ids.astype(str)),
+                "target_identifier": target_ids.astype(str),
+                "metapath_id": metapaths[ids % len(metapaths)],
+                "adjusted_p_value": ids / rows,
+                "dwpc": ids / 7.0,
+                "source_id": source_ids,
+                "target_id": target_ids,
+            }
+        ),
+        workdir / "metapath_data.parquet",
+        row_group_size=100_000,
+    )
+
+    rng = np.random.default_rng(0)
+    return [
+        (int(source), int(target), "id")
+        for source, target in zip(
+            rng.integers(source_ids[-1] + 1, size=scale["lookups"]),
+            rng.integers(target_ids.max() + 1, size=scale["lookups"]),
+        )
+    ]
+
+
+def bench_metapath_query(
+    scale: Dict[str, int],
+    workdir: pathlib.Path,
+    lookups: List[Tuple[int, int, str]],
+) -> Measurement:
+    """
+    Look up (source, target) pairs in synthetic metapath Parquet data.
+    """
+    with MetapathDataQuery(workdir / "metapath_data.parquet") as query:
+        return timed_calls(query.pair, lookups)
+
+
+# benchmarks by name
+BENCHMARKS: Dict[str, Benchmark] = {
+    "sql_extract": Benchmark(setup_sql_extract, bench_sql_extract),
+    "chunker": Benchmark(setup_id_tables, bench_chunker),
+    "get_metapath_data": Benchmark(setup_get_metapath_data, bench_get_metapath_data),
+    "metapath_query": Benchmark(setup_metapath_query, bench_metapath_query),
+}
@@ -0,0 +1,302 @@
+"""
+Synthetic inputs and stand-ins for benchmarking.
+
+These mimic the shape of the real inputs (the connectivity-search
+pg_dump, the BP/Gene/metapath ID tables, the search API and the Neo4j
+Bolt driver) without network access or large downloads.
+"""
+
+import gzip
+import hashlib
+import json
+import pathlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Self, Tuple
+
+import pyarrow as pa
+
+# columns of the synthetic pathcount table (as in the real dump)
+PATHCOUNT_COLUMNS = (
+    "id",
+    "path_count",
+    "p_value",
+    "dwpc",
+    "dgp_id",
+    "metapath_id",
+    "source_id",
+    "target_id",
+)
+
+# metapaths used for synthetic rows and ID tables
+SYNTHETIC_METAPATHS = ("BPpG", "BPpGiG", "BPpGcG", "BPpGdAdG", "BPpGpPWpG")
+
+
+def write_synthetic_pg_dump(
+    path: pathlib.Path, rows: int, filler_tables: int = 3, seed: int = 0
+) -> pathlib.Path:
+    """
+    Write a gzip pg_dump with the layout of the connectivity-search dump.
+
+    The dump holds a `dj_hetmech_app_pathcount` table with `rows` rows of
+    COPY data, surrounded by smaller filler tables so that extraction has
+    to seek past unrelated blocks.
+
+    Args:
+        path (pathlib.Path):
+            The path to write the dump to.
+        rows (int):
+            The number of pathcount rows.
+        filler_tables (int, optional):
+            The number of unrelated tables. Defaults to 3.
+        seed (int, optional):
+            The random seed. Defaults to 0.
+
+    Returns:
+        pathlib.Path:
+            The path to the dump.
+    """
+    rng = random.Random(seed)
+    with gzip.open(path, "wt", compresslevel=1) as dump:
+        dump.write("--\n-- PostgreSQL database dump\n--\n\n")
+        for table in range(filler_tables):
+            dump.write(
+                f"CREATE TABLE public.filler_{table} (\n"
+                "    id integer NOT NULL,\n    value text NOT NULL\n);\n\n"
+            )
+        dump.write(
+            "CREATE TABLE public.dj_hetmech_app_pathcount (\n"
+            "    id integer NOT NULL,\n"
+            "    path_count integer NOT NULL,\n"
+            "    p_value double precision,\n"
+            "    dwpc double precision,\n"
+            "    dgp_id integer NOT NULL,\n"
+            "    metapath_id character varying(20) NOT NULL,\n"
+            "    source_id integer NOT NULL,\n"
+            "    target_id integer NOT NULL\n"
+            ");\n\n"
+        )
+        for table in range(filler_tables):
+            dump.write(f"COPY public.filler_{table} (id, value) FROM stdin;\n")
+            for row in range(max(1, rows // 10)):
+                dump.write(f"{row}\tvalue-{row}\n")
+            dump.write("\\.\n\n")
+
+        dump.write(
+            "COPY public.dj_hetmech_app_pathcount "
+            f"({', '.join(PATHCOUNT_COLUMNS)}) FROM stdin;\n"
+        )
+        for row in range(rows):
+            dump.write(
+                f"{row}\t{rng.randint(1, 500)}\t{rng.random():.6g}\t"
+                f"{rng.random() * 5:.6g}\t{rng.randint(1, 1000)}\t"
+                f"{rng.choice(SYNTHETIC_METAPATHS)}\t"
+                f"{rng.randint(1, 11000)}\t{rng.randint(1, 21000)}\n"
+            )
+        dump.write("\\.\n\n--\n-- PostgreSQL database dump complete\n--\n")
+    return path
+
+
+def synthetic_id_tables(
+    bioprocesses: int, genes: int, metapaths: int = len(SYNTHETIC_METAPATHS)
+) -> Tuple[pa.Table, pa.Table, pa.Table]:
+    """
+    Create bioprocess, gene and metapath tables shaped like the source CSVs.
+
+    Args:
+        bioprocesses (int):
+            The number of bioprocesses.
+        genes (int):
+            The number of genes.
+        metapaths (int, optional):
+            The number of metapaths (cycling through the synthetic
+            metapaths). Defaults to the number of synthetic metapaths.
+
+    Returns:
+        Tuple[pa.Table, pa.Table, pa.Table]:
+            The bioprocess, gene and metapath tables.
+    """
+    return (
+        pa.table({"id": [f"GO:{index:07d}" for index in range(bioprocesses)]}),
+        pa.table({"id": pa.array(range(1, genes + 1), type=pa.int64())}),
+        pa.table(
+            {
+                "metapath": [
+                    SYNTHETIC_METAPATHS[index % len(SYNTHETIC_METAPATHS)]
+                    for index in range(metapaths)
+                ]
+            }
+        ),
+    )
+
+
+def _stable_int(value: str) -> int:
+    """
+    Hash a value to a stable integer (unlike the builtin `hash`).
+    """
+    return int.from_bytes(
+        hashlib.blake2b(value.encode(), digest_size=4).digest(), "big"
+    )
+
+
+class _SearchAPIHandler(BaseHTTPRequestHandler):
+    """
+    Serves `/v1/paths/source/{id}/target/{id}/metapath/{metapath}` requests.
+    """
+
+    # set on subclasses created by MockSearchAPI
+    latency: float = 0.0
+    max_paths: int = 5
+
+    def do_GET(self: Self) -> None:
+        time.sleep(self.latency)
+        # most pairs return no paths, as with the real API
+        paths = [
+            {
+                "metapath": self.path.rsplit("/", 1)[-1],
+                "node_ids": [1, 2, 3],
+                "rel_ids": [4, 5],
+                "PDP": 0.01 * (index + 1),
+                "percent_of_DWPC": 100.0 / (index + 1),
+                "score": 1.5,
+                "PC": 2.0,
+                "DWPC": 0.05,
+            }
+            for index in range(
+                max(0, _stable_int(self.path) % (2 * self.max_paths) - self.max_paths)
+            )
+        ]
+        body = json.dumps({"paths": paths}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self: Self, *args: object) -> None:
+        """
+        Silence per-request logging.
+        """
+
+
+class MockSearchAPI:
+    """
+    A local stand-in for the Hetionet search API, served from a thread.
+
+    Attributes:
+        base_path (str):
+            The API base path to use in place of search-api.het.io/v1.
+    """
+
+    def __init__(self: Self, latency: float = 0.0, max_paths: int = 5) -> None:
+        """
+        Start the mock API on a free local port.
+
+        Args:
+            latency (float, optional):
+                Seconds to wait before each response. Defaults to 0.0.
+            max_paths (int, optional):
+                The maximum number of paths per response. Defaults to 5.
+        """
+        handler = type(
+            "Handler",
+            (_SearchAPIHandler,),
+            {"latency": latency, "max_paths": max_paths},
+        )
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.base_path = f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
+
+    def close(self: Self) -> None:
+        """
+        Stop the mock API.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _FakeSession:
+    """
+    A Bolt session stand-in returning records for node identifier lookups.
+    """
+
+    def __init__(self: Self, latency: float) -> None:
+        self.latency = latency
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
+
+    def close(self: Self) -> None:
+        pass
+
+    def run(
+        self: Self, query: str, parameters: Optional[Dict] = None
+    ) -> Iterator[Dict]:
+        time.sleep(self.latency)
+        identifier = (parameters or {}).get("identifier", "")
+        return iter(
+            [{"neo4j_id": _stable_int(str(identifier)), "identifier": identifier}]
+        )
+
+
+class FakeBoltDriver:
+    """
+    A stand-in for the Neo4j driver used by HetionetNeo4j.
+
+    Attributes:
+        latency (float):
+            Seconds to wait before each query returns.
+        sessions (int):
+            The number of sessions opened.
+    """
+
+    def __init__(self: Self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.sessions = 0
+
+    def session(self: Self, **config: object) -> _FakeSession:
+        self.sessions += 1
+        return _FakeSession(self.latency)
+
+    def close(self: Self) -> None:
+        pass
+
+
+def combinations(
+    tables: Tuple[pa.Table, pa.Table, pa.Table], limit: int
+) -> List[Tuple[str, int, str]]:
+    """
+    Take the first combinations of synthetic ID tables.
+
+    Args:
+        tables (Tuple[pa.Table, pa.Table, pa.Table]):
+            The bioprocess, gene and metapath tables.
+        limit (int):
+            The number of combinations.
+
+    Returns:
+        List[Tuple[str, int, str]]:
+            (bioprocess, gene, metapath) combinations.
+    """
+    bioprocesses, genes, metapaths = (table.column(0).to_pylist() for table in tables)
+    return [
+        (
+            bioprocesses[index % len(bioprocesses)],
+            genes[index % len(genes)],
+            metapaths[index % len(metapaths)],
+        )
+        for index in range(limit)
+    ]
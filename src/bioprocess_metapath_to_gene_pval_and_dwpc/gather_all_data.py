@@ -26,29 +26,24 @@
 # `metapaths_ignore.csv`.
 
 # +
-import pathlib
-
-import pandas as pd
-import pyarrow as pa
-from pyarrow import csv
-
+from hetionet_utils.cache import ResponseCache
 from hetionet_utils.database import HetionetNeo4j
+from hetionet_utils.estimate import estimate_gather
+from hetionet_utils.inputs import load_source_inputs
 
 # -
 
-# gather metapaths which are not in the metapaths_ignore.csv
-df_metapaths = pd.read_csv("data/sources/metapaths.csv")
-df_metapaths_ignore = pd.read_csv("data/sources/metapaths_ignore.csv")
-df_metapaths = df_metapaths[
-    ~df_metapaths["metapath"].isin(df_metapaths_ignore["metapath"])
-]
-df_metapaths.head()
+# load the inputs, removing metapaths which are in the metapaths_ignore.csv.
+# Inputs are cached as Arrow files keyed by the source file hashes so
+# later runs memory-map the cache instead of parsing CSV files.
+inputs = load_source_inputs("data/sources", cache_dir="data/cache/inputs")
+inputs.metapaths.to_pandas().head()
 
 # +
-# Load input CSV files into Arrow Tables
-table_bioprocesses = csv.read_csv("data/sources/BP.csv").select(["id"])
-table_genes = csv.read_csv("data/sources/Gene.csv").select(["id"])
-table_metapaths = pa.Table.from_pandas(df_metapaths)
+# select the inputs as Arrow Tables
+table_bioprocesses = inputs.bioprocesses.select(["id"])
+table_genes = inputs.genes.select(["id"])
+table_metapaths = inputs.metapaths
 
 print(
     "Expected number of queries: ",
@@ -60,8 +55,9 @@ print(
 )
 # -
 
-# build a sample result from HetionetNeo4j
-hetiocli = HetionetNeo4j()
+# build a sample result from HetionetNeo4j, caching responses on disk
+# so that repeated or overlapping runs avoid re-fetching results
+hetiocli = HetionetNeo4j(cache=ResponseCache("data/cache/search-api.sqlite"))
 sample_result = hetiocli.get_metapath_data(
     source_id=str(table_bioprocesses[0][0]),
     target_id=int(str(table_genes[0][0])),
@@ -69,25 +65,23 @@ sample_result = hetiocli.get_metapath_data(
 )
 sample_result
 
-# export to file and measure the size
-sample_result.to_parquet((filepath := "example_output.parquet"))
-print(
-    "Expected storage: ",
-    (
-        # bytes
-        pathlib.Path(filepath).stat().st_size
-        *
-        # multiplied by the number of expected queries we need to make
-        expected_queries
-    )
-    /
-    # kilobytes
-    1024
-    /
-    # megabytes
-    1024
-    /
-    # gigabytes
-    1024,
-    "GB",
+# estimate storage and wall-clock time from a random sample of
+# combinations, measuring rows per query (most pairs return no paths),
+# compressed bytes per row and latency, with 95% confidence intervals.
+# The sample is requested without the response cache, so that reruns
+# (which sample the same combinations) measure het.io rather than
+# cache reads.
+estimate_client = HetionetNeo4j()
+estimate = estimate_gather(
+    estimate_client.get_metapath_data,
+    table_bioprocesses,
+    table_genes,
+    table_metapaths,
+    n=200,
+    concurrency=3,
+    seed=0,
 )
+print("Rows per query: ", estimate.rows_per_query)
+print("Bytes per row: ", estimate.bytes_per_row)
+print("Expected storage (GB): ", estimate.storage_bytes.scale(1 / 1024**3))
+print("Expected wall-clock (hours): ", estimate.wall_clock_seconds.scale(1 / 3600))
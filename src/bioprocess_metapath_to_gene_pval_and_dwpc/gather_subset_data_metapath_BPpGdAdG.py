@@ -29,36 +29,41 @@
 # +
 import pathlib
 from functools import partial
+from itertools import islice
 
-import lancedb
-import pandas as pd
-import pyarrow as pa
-from joblib import Parallel, delayed
-from pyarrow import csv
-
+from hetionet_utils import instrumentation
+from hetionet_utils.cache import ResponseCache
 from hetionet_utils.combination import (
     generate_combinations_for_bioprocs_genes_and_metapaths,
-    process_in_chunks_for_bioprocs_genes_and_metapaths,
 )
+from hetionet_utils.concurrency import AdaptiveConcurrencyController
 from hetionet_utils.database import HetionetNeo4j
+from hetionet_utils.estimate import estimate_gather
+from hetionet_utils.gather import (
+    GATHER_COLUMNS,
+    gather_metapath_data,
+    sample_result_schema,
+)
+from hetionet_utils.inputs import load_source_inputs
+from hetionet_utils.sinks import open_sink
+from hetionet_utils.validate import validate_gather_results
 
 # -
 
-# gather metapaths which are not in the metapaths_ignore.csv
-df_metapaths = pd.read_csv("data/sources/metapaths.csv")
-df_metapaths_ignore = pd.read_csv("data/sources/metapaths_ignore.csv")
-df_metapaths = df_metapaths[
-    ~df_metapaths["metapath"].isin(df_metapaths_ignore["metapath"])
-]
-# filter to a single metapath (instead of all)
-df_metapaths = df_metapaths[df_metapaths["metapath"] == "BPpGdAdG"]
-df_metapaths.head()
+# load the inputs, removing metapaths which are in the metapaths_ignore.csv
+# and filtering to a single metapath (instead of all). Inputs are cached
+# as Arrow files keyed by the source file hashes so later runs
+# memory-map the cache instead of parsing CSV files.
+inputs = load_source_inputs(
+    "data/sources", metapaths=["BPpGdAdG"], cache_dir="data/cache/inputs"
+)
+inputs.metapaths.to_pandas().head()
 
 # +
-# Load input CSV files into Arrow Tables
-table_bioprocesses = csv.read_csv("data/sources/BP.csv").select(["id"])
-table_genes = csv.read_csv("data/sources/Gene.csv").select(["id"])
-table_metapaths = pa.Table.from_pandas(df_metapaths)
+# select the inputs as Arrow Tables
+table_bioprocesses = inputs.bioprocesses.select(["id"])
+table_genes = inputs.genes.select(["id"])
+table_metapaths = inputs.metapaths
 
 print(
     "Expected number of queries: ",
@@ -70,97 +75,136 @@ print(
 )
 # -
 
-# build a sample result from HetionetNeo4j
-hetiocli = HetionetNeo4j()
+# build a sample result from HetionetNeo4j, caching responses on disk
+# so that repeated or overlapping runs avoid re-fetching results
+hetiocli = HetionetNeo4j(cache=ResponseCache("data/cache/search-api.sqlite"))
 sample_result = hetiocli.get_metapath_data(
     source_id=str(table_bioprocesses[0][0]),
     target_id=int(str(table_genes[0][0])),
     metapath=str(table_metapaths[0][0]),
-    columns=["source_id", "target_id", "PDP", "DWPC"],
+    columns=GATHER_COLUMNS,
 )
 sample_result
 
-# export to file and measure the size
-sample_result.to_parquet((filepath := "example_output.parquet"))
-print(
-    "Expected storage: ",
-    (  # bytes
-        pathlib.Path(filepath).stat().st_size
-        /
-        # kilobytes
-        1024
-        /
-        # megabytes
-        1024
-        /
-        # gigabytes
-        1024
-    )
-    * expected_queries,
-    "GB",
+# estimate storage and wall-clock time from a random sample of
+# combinations, measuring rows per query (most pairs return no paths),
+# compressed bytes per row and latency, with 95% confidence intervals.
+# The sample is requested without the response cache, so that reruns
+# (which sample the same combinations) measure het.io rather than
+# cache reads.
+estimate_client = HetionetNeo4j()
+estimate = estimate_gather(
+    partial(estimate_client.get_metapath_data, columns=GATHER_COLUMNS),
+    table_bioprocesses,
+    table_genes,
+    table_metapaths,
+    n=200,
+    concurrency=3,
+    seed=0,
 )
-# remove the example file
-pathlib.Path(filepath).unlink()
+print("Rows per query: ", estimate.rows_per_query)
+print("Bytes per row: ", estimate.bytes_per_row)
+print("Expected storage (GB): ", estimate.storage_bytes.scale(1 / 1024**3))
+print("Expected wall-clock (hours): ", estimate.wall_clock_seconds.scale(1 / 3600))
 
 # +
 # create results folder
 pathlib.Path("data/results").mkdir(exist_ok=True)
 
-# Initialize your LanceDB database and table
-db = lancedb.connect("data/results/bioprocess_and_gene_metapaths")
+# choose where this run writes results: rolling Parquet files
+# ("parquet"), a DuckDB table ("duckdb") or a LanceDB table ("lancedb")
+sink_kind = "lancedb"
 table_name = "bioprocess_gene_metapath_scores"
+sink_options = {
+    "parquet": {"directory": f"data/results/{table_name}"},
+    "duckdb": {
+        "database": "data/results/bioprocess_and_gene_metapaths.duckdb",
+        "table_name": table_name,
+    },
+    "lancedb": {
+        "uri": "data/results/bioprocess_and_gene_metapaths",
+        "table_name": table_name,
+    },
+}
+# (typed from the sample result, including each result's metapath)
+results_schema = sample_result_schema(
+    hetiocli,
+    (table_bioprocesses[0][0], table_genes[0][0], table_metapaths[0][0]),
+)
 
-# create table, overwriting previous results
-db.create_table(
-    table_name,
-    schema=pa.Table.from_pandas(sample_result).schema,
-    mode="overwrite",
+# open the sink, overwriting previous results
+sink = open_sink(
+    sink_kind, schema=results_schema, mode="overwrite", **sink_options[sink_kind]
 )
 
-table = db.open_table(table_name)
+# resolve the Neo4j IDs of every bioprocess and gene up front with
+# batched UNWIND lookups (rather than one query per identifier),
+# caching them for the resolve stage below
+neo4j_ids = hetiocli.get_ids_from_identifiers(
+    table_bioprocesses["id"].to_pylist() + table_genes["id"].to_pylist()
+)
+print("Resolved Neo4j IDs: ", len(neo4j_ids))
 
 # +
 # Generate combinations
 generator = generate_combinations_for_bioprocs_genes_and_metapaths(
     table_bioprocesses, table_genes, table_metapaths
 )
-# set a class method reference for use with the requests
-get_metapath_data_with_pdp_and_dwpc = partial(
-    hetiocli.get_metapath_data, columns=["source_id", "target_id", "PDP", "DWPC"]
+# adapt the number of in-flight requests based on latency, errors and
+# rate limiting from het.io (starting from the previous fixed value)
+controller = AdaptiveConcurrencyController(
+    initial=3, minimum=1, maximum=16, latency_target=5.0
 )
 
-# create a counter for gathering data and running iterations
-count = 1
 
-# Process and print chunks
-for chunk_table in process_in_chunks_for_bioprocs_genes_and_metapaths(
-    generator, chunk_size=3
+# record timings, response sizes and retries for the gather run
+run_metrics = instrumentation.enable()
+
+# run combination generation, ID resolution, fetching, parsing (across
+# a pool of processes, as JSON decoding holds the GIL) and writing as
+# pipelined stages with bounded queues between them, so requests stay
+# in flight while earlier results are parsed and written, showing
+# progress for each written batch
+# (temporarily limited to one batch for feedback / testing)
+for count, written in enumerate(
+    gather_metapath_data(
+        hetiocli, islice(generator, 64), sink, controller=controller, batch_size=64
+    ),
+    start=1,
 ):
-    # add the chunk to the table
-    print(f"Processing chunk {count}")
-
-    # process threaded results
-    results = Parallel(n_jobs=3, backend="threading")(
-        delayed(get_metapath_data_with_pdp_and_dwpc)(source_id, target_id, metapath)
-        for source_id, target_id, metapath in zip(
-            chunk_table["source_id"].to_pylist(),
-            chunk_table["target_id"].to_pylist(),
-            chunk_table["metapath"].to_pylist(),
-        )
-    )
+    print(f"Wrote batch {count} ({written} results)")
 
-    # add a concatted dataframe of the results to the lancedb table
-    table.add(pd.concat(results))
+    # show the current concurrency and throughput
+    print(controller.metrics())
 
-    # increment the counter
-    count += 1
+# +
+# After writing all chunks, close the sink and show the shape of the results
+sink.close()
+num_rows = sink.rows_written
+num_columns = len(sink.schema.names)
 
-    # temporary break for feedback / testing
-    break
+print(f"Table shape: ({num_rows}, {num_columns})")
 
 # +
-# After inserting all chunks, show the shape of the table
-num_rows = table.count_rows()
-num_columns = len(table.schema.names)
+# cross-check a sample of the gathered DWPCs against the precalculated
+# PathCount data from get_tables.py (when the export is available),
+# reading the results back from whichever sink they were written to,
+# and show any mismatches. Combinations without any paths are not
+# gathered as rows, so they are not part of the sample.
+precalculated_data = pathlib.Path(
+    "../connectivity_search_PathCount_table/data/"
+    "connectivity-search-precalculated-metapath-data.parquet"
+)
+if precalculated_data.is_file():
+    validation = validate_gather_results(sink.read(), precalculated_data)
+    print(
+        f"Checked {validation.checked} combinations: {validation.matched} match, "
+        f"{validation.mismatched} mismatch, {validation.missing} missing"
+    )
+    print(validation.mismatches().to_pandas())
+# -
 
-print(f"Table shape: ({num_rows}, {num_columns})")
+# summarize where time went during the gather and export the metrics
+instrumentation.disable()
+run_metrics.write("data/results/gather_metrics.prom")
+print(run_metrics.summary())
@@ -18,40 +18,72 @@
 
 # +
 import duckdb
+import pyarrow.compute as pc
 
-metapath_ids = "../bioprocess_metapath_to_gene_pval_and_dwpc/data/sources/metapaths.csv"
+from hetionet_utils.matrix import ScoreMatrices, write_score_matrices
+from hetionet_utils.scan import scan_top_k
+from hetionet_utils.subset import refresh_metapath_partitions
+
+sources_dir = "../bioprocess_metapath_to_gene_pval_and_dwpc/data/sources"
+metapath_ids = f"{sources_dir}/metapaths.csv"
+metapath_ignore_ids = f"{sources_dir}/metapaths_ignore.csv"
 metapath_data = "./data/connectivity-search-precalculated-metapath-data.parquet"
+subset_dir = "data/bp_subset_metapaths"
+subset_data = f"{subset_dir}/*/*.parquet"
+matrix_dir = "data/bp_gene_matrices"
+# metapaths to write dense score matrices for (each writes two float32
+# BP x Gene arrays, roughly 88 GB for every metapath in metapaths.csv,
+# so only the metapaths being analysed are written; empty to skip)
+matrix_metapaths = ["BPpGdAdG"]
+significance_threshold = 0.05
+# -
 
-# +
-with duckdb.connect() as ddb:
-    # gather the metapath ids as a SQL formatted list
-    ids = (
-        "'"
-        + "','".join(
-            ddb.execute(
-                f"""
-                SELECT *
-                FROM read_csv('{metapath_ids}')
-                """
-            )
-            .df()["metapath"]
-            .to_list()
-        )
-        + "'"
-    )
+# search the full dataset for rows which match the metapath ids
+# (excluding ignored metapaths), streaming the results directly to
+# one parquet partition per metapath. A manifest of the partitions
+# means only metapaths added to or removed from the lists are
+# extracted or deleted when this is run again.
+refresh_metapath_partitions(
+    metapath_data=metapath_data,
+    metapaths=metapath_ids,
+    output_dir=subset_dir,
+    ignore=metapath_ignore_ids,
+)
 
-    # use the list to search the full dataset, returning the results
-    # which match the metapath ids
+# show an example of the results
+with duckdb.connect() as ddb:
     metapath_results = ddb.execute(
         f"""
         SELECT *
-        FROM read_parquet('{metapath_data}')
-        WHERE metapath_id in ({ids})
+        FROM read_parquet('{subset_data}')
+        LIMIT 5;
         """
     ).df()
-
 metapath_results
-# -
 
-# export the results to parquet
-metapath_results.to_parquet("data/bp_subset_metapaths.parquet")
+# write a float32 (BP x Gene) matrix of DWPCs and p-values for each of
+# the matrix metapaths (rows ordered by BP.csv and columns by Gene.csv)
+# which may be memory-mapped
+if matrix_metapaths:
+    write_score_matrices(
+        metapath_data=subset_data,
+        rows=f"{sources_dir}/BP.csv",
+        columns=f"{sources_dir}/Gene.csv",
+        output_dir=matrix_dir,
+        metapaths=matrix_metapaths,
+    )
+    matrices = ScoreMatrices(matrix_dir)
+    print(matrices.matrix(matrices.metapaths[0], "dwpc").shape)
+
+# stream the subset for the most significant genes of a bioprocess
+# with adjusted p-values below 0.05 across all metapaths
+# (memory use is bounded by the batch size rather than the subset size)
+scan_top_k(
+    subset_dir,
+    key="metapath_id",
+    k=10,
+    sort_by="adjusted_p_value",
+    predicate=(pc.field("source_identifier") == "GO:0000002")
+    & (pc.field("adjusted_p_value") < significance_threshold),
+    columns=["metapath_id", "target_identifier", "adjusted_p_value", "dwpc"],
+).to_pandas()
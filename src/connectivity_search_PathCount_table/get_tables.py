@@ -25,234 +25,125 @@
 # with `id` (internal versus external labels for data).
 
 # +
-import gzip
-import os
 import pathlib
 
-import duckdb
-import requests
-
-from hetionet_utils.sql import (
-    extract_and_write_sql_block,
-    remove_first_and_last_line_of_file,
+from hetionet_utils.buildcache import BuildCache
+from hetionet_utils.index import default_index_path
+from hetionet_utils.pathcount import (
+    PATHCOUNT_ARCHIVE_URL,
+    archive_step,
+    database_step,
+    export_step,
+    index_step,
+    list_dump_tables,
+    table_files,
+    table_steps,
 )
+from hetionet_utils.progress import print_progress
+from hetionet_utils.query import MetapathDataQuery
 
 # create the data dir
 pathlib.Path("data").mkdir(exist_ok=True)
 
 # url for source data
-url = (
-    "https://zenodo.org/records/3978766/files/"
-    "connectivity-search-pg_dump.sql.gz?download=1"
-)
+url = PATHCOUNT_ARCHIVE_URL
 
 # local archive file location
 sql_file = "data/connectivity-search-pg_dump.sql.gz"
 
-# expected number of tables within dump
-expected_table_count = 15
-
-# table which is targeted within the sql archive above
-target_pathcount_table_name = "public.dj_hetmech_app_pathcount"
-target_identifier_table_name = "public.dj_hetmech_app_node"
-
 # duckdb filename
 duckdb_filename = "data/connectivity-search.duckdb"
 
-# +
-# gather postgresql database archive
+# parquet export profile ("default" or "compact") and whether
+# the compact profile stores p-values and DWPCs as float32
+export_profile = "default"
+export_float32 = False
 
-# if the file doesn't exist, download it
-if not pathlib.Path(sql_file).exists():
-    # Download the file in streaming mode
-    response = requests.get(url, stream=True)
+# number of processes extracting tables from the archive
+# (each reads through the archive to find its table)
+extract_workers = 1
 
-    # Check if the request was successful
-    response.raise_for_status()
+# report progress, throughput and ETA for the long-running
+# extraction and loading steps (None to turn off)
+progress = print_progress
 
-    # Write the response content to a file in chunks
-    with open(sql_file, "wb") as file:
-        for chunk in response.iter_content(chunk_size=8192):
-            if chunk:
-                file.write(chunk)
+# record the checksums and parameters of each artifact built below
+# so that reruns only rebuild the steps which are stale (for example,
+# after a parameter changes or a file is damaged)
+build_cache = BuildCache("data/build-manifest.json")
+
+# +
+# gather postgresql database archive
+
+# download the archive unless it was already downloaded
+# (streaming to a partial file which is moved into place when complete,
+# and keeping an archive from an earlier run only if it is complete)
+build_cache.build([archive_step(sql_file, url)])
 
 pathlib.Path(sql_file).exists()
 # -
 
-# show the tables
-count = 0
-create_table_names = []
-with gzip.open(sql_file, "rt") as f:
-    for line in f:
-        # seek table creation lines
-        if "CREATE TABLE" in line:
-            # append a cleaned up line from the table creation statement
-            # so we may gather the table name.
-            create_table_names.append(
-                line.strip().replace(" (", "").replace("CREATE TABLE ", "")
-            )
-            count += 1
-            # there are roughly 15 tables
-            # so we break here to avoid further processing
-            if count == expected_table_count:
-                break
+# show the tables (there are roughly 15, listed before the data
+# so the archive is only read until they are found)
+create_table_names = list_dump_tables(sql_file)
 create_table_names
 
-# gather the create table statements for each table
-for table_name in create_table_names:
-    extract_and_write_sql_block(
-        sql_file=sql_file,
-        sql_start=f"CREATE TABLE {table_name}",
-        sql_end=";",
-        output_file=(create_pathcount_table_file := f"create_table.{table_name}.sql"),
-    )
-
-# show the create table statements
-for table_name in create_table_names:
-    with open(f"create_table.{table_name}.sql", "r") as table_create_sql:
-        table_sql = "".join(table_create_sql.readlines())
-
-    print(table_sql)
-
-# gather the data for populating the tables
+# gather the create table statements and data for populating each table
 # note: this can take a while!
 # (we're extracting large portions of TSV data
-# from a single file.)
-for table_name in create_table_names:
-    copy_data_file = f"copy_data.{table_name}.tsv"
-
-    # only create the file if we don't already have it.
-    if not pathlib.Path(copy_data_file).is_file():
-        extract_and_write_sql_block(
-            sql_file=sql_file,
-            sql_start=f"COPY {table_name}",
-            sql_end="\\.",
-            output_file=copy_data_file,
-        )
-        # replace the first and last lines of the copy files
-        # as these are the header and data termination lines
-        # which have no actual values.
-        remove_first_and_last_line_of_file(target_file=copy_data_file)
+# from a single file, so progress is reported.)
+# Only tables which are stale (not extracted from the current archive,
+# or changed since) are extracted, in parallel across the workers.
+build_cache.build(
+    table_steps(sql_file, create_table_names, progress=progress),
+    workers=extract_workers,
+)
 
-# create the tables within a duckdb database
-if not pathlib.Path(duckdb_filename).is_file():
-    with duckdb.connect(duckdb_filename) as ddb:
-        for table_name in create_table_names:
-            with open(f"create_table.{table_name}.sql", "r") as table_create_sql:
-                # read the table creation sql into duckdb execution
-                # replace "public." for table naming, and "jsonb" to
-                # align data typing from postrgres to duckdb (duckdb
-                # includes no "jsonb" type but is compatible with the
-                # insertion data in the form "json").
-                ddb.execute(
-                    "".join(table_create_sql.readlines())
-                    .replace("public.", "")
-                    .replace("jsonb", "json")
-                )
+# show the create table statements
+for table_name in create_table_names:
+    create_table_file, _ = table_files(table_name)
+    print(create_table_file.read_text())
 
-# # copy the data from the files to duckdb database
-# using tab-delimited files.
+# create the tables within a duckdb database and copy the data from
+# the tab-delimited files (rebuilding the database only when the
+# extracted tables changed).
 # note: this can take a while!
-# (we're ingesting data from TSV format into DuckDB)
-with duckdb.connect(duckdb_filename) as ddb:
-    for table_name in create_table_names:
-        # only copy data if we have data to copy
-        if os.path.getsize(copy_data_file := f"copy_data.{table_name}.tsv") > 0:
-            table_name = table_name.replace("public.", "")  # noqa: PLW2901
-
-            # only populate the table if it hasn't already been
-            # populated.
-            row_count = ddb.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
-            if row_count == 0:
-                ddb.execute(
-                    f"""
-                    COPY {table_name}
-                    FROM '{copy_data_file}'
-                    (DELIMITER '\t', HEADER false);
-                    """
-                )
+# (we're ingesting data from TSV format into DuckDB,
+# so progress is reported.)
+build_cache.build(
+    [database_step(duckdb_filename, create_table_names, progress=progress)]
+)
 
 # read and export data to parquet for simpler use
+# (the compact profile dictionary-encodes identifiers and downcasts counts,
+# optionally storing p-values and DWPCs as float32)
 target_file = "./data/connectivity-search-precalculated-metapath-data.parquet"
-with duckdb.connect(duckdb_filename) as ddb:
-    # copy data directly to Parquet from DuckDB
-    ddb.execute(
-        f"""
-        COPY (
-            SELECT
-                pathcount.id,
-                source.identifier AS source_identifier,
-                target.identifier AS target_identifier,
-                pathcount.metapath_id,
-                pathcount.path_count,
-                /* we build an adjusted p_value based on the implementation
-                found here:
-                https://github.com/greenelab/connectivity-search-backend/blob/main/dj_hetmech_app/models.py#L94
-                */
-                CASE
-                    WHEN pathcount.p_value * metapath.n_similar > 1.0 THEN 1.0
-                    ELSE pathcount.p_value * metapath.n_similar
-                END AS adjusted_p_value,
-                pathcount.p_value,
-                pathcount.dwpc,
-                degree.source_degree,
-                degree.target_degree,
-                degree.n_dwpcs,
-                degree.n_nonzero_dwpcs,
-                degree.nonzero_mean,
-                degree.nonzero_sd,
-                pathcount.source_id,
-                pathcount.target_id,
-                pathcount.dgp_id
-            FROM
-                dj_hetmech_app_pathcount as pathcount
-            LEFT JOIN dj_hetmech_app_node AS source ON
-                pathcount.source_id = source.id
-            LEFT JOIN dj_hetmech_app_node AS target ON
-                pathcount.target_id = target.id
-            LEFT JOIN dj_hetmech_app_degreegroupedpermutation as degree ON
-                pathcount.dgp_id = degree.id
-                AND pathcount.metapath_id = degree.metapath_id
-            LEFT JOIN dj_hetmech_app_metapath as metapath ON
-                pathcount.metapath_id = metapath.abbreviation
+build_cache.build(
+    [
+        export_step(
+            duckdb_filename, target_file, profile=export_profile, float32=export_float32
         )
-        TO '{target_file}'
-        (FORMAT parquet, COMPRESSION zstd);
-        """
-    )
-# confirm that we have the file
+    ]
+)
+export_report = build_cache.result("export")
+# build a sidecar index so lookups by source or target identifier
+# only read the row groups which contain them, then confirm that
+# we have the file
+build_cache.build([index_step(target_file)])
+index_file = default_index_path(target_file)
 pathlib.Path("./data/connectivity-search-precalculated-metapath-data.parquet").is_file()
 
 # show an row count using the parquet file output
-with duckdb.connect() as ddb:
-    count = ddb.execute(
-        f"""
-        SELECT COUNT(*)
-        FROM read_parquet('{target_file}')
-        """
-    ).df()
+# (opening a query service for the lookups which follow)
+query = MetapathDataQuery(target_file, index_file=index_file)
+count = query.query("SELECT COUNT(*) FROM metapath_data").to_pandas()
 count
 
 # show an example of using the parquet file output
-with duckdb.connect() as ddb:
-    sample = ddb.execute(
-        f"""
-        SELECT *
-        FROM read_parquet('{target_file}')
-        LIMIT 5;
-        """
-    ).df()
+sample = query.query("SELECT * FROM metapath_data LIMIT 5;").to_pandas()
 sample
 
 # show results in alignment with:
 # https://het.io/search/?source=34901&target=4145
-with duckdb.connect() as ddb:
-    sample = ddb.execute(
-        f"""
-        SELECT *
-        FROM read_parquet('{target_file}')
-        WHERE source_id = 34901
-        AND target_id = 4145;
-        """
-    ).df()
+sample = query.pair(source=34901, target=4145, by="id").to_pandas()
 sample
@@ -0,0 +1,333 @@
+"""
+Module for rebuilding derived artifacts only when they are stale.
+
+The PathCount workflow derives artifacts in stages (archive, extracted
+tables, DuckDB database, Parquet export and index). A build cache keeps
+a JSON manifest recording, for each build step, a key addressing the
+content of its inputs and its parameters, along with the digests of the
+outputs it wrote. A step is rebuilt when its key changes (an input or
+parameter changed) or an output is missing or no longer matches its
+digest (such as a truncated or half-written file), so neither stale nor
+damaged artifacts are reused. Independent steps may be rebuilt in
+parallel across processes.
+
+File digests are kept alongside the size and modification time of each
+file, so a file is only hashed again once it changes.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Self,
+    Sequence,
+    Union,
+)
+
+from hetionet_utils.lazy import lazy_import
+
+# inputs (which imports pyarrow) is imported on first use (see lazy.py)
+if TYPE_CHECKING:
+    from hetionet_utils import inputs
+else:
+    inputs = lazy_import("hetionet_utils.inputs")
+
+# version of the manifest layout
+MANIFEST_VERSION = 1
+
+
+class BuildStep(NamedTuple):
+    """
+    A step deriving output files from input files and parameters.
+
+    Attributes:
+        name (str):
+            A name identifying the step within the manifest.
+        func (Callable[[], Any]):
+            Builds the outputs (which must be picklable when steps are
+            built across processes, such as a functools.partial of a
+            module-level function).
+        inputs (Sequence[Union[str, pathlib.Path]]):
+            The files the outputs are derived from.
+        outputs (Sequence[Union[str, pathlib.Path]]):
+            The files written by func.
+        params (Optional[Dict[str, Any]]):
+            JSON-serializable parameters which change the outputs.
+        verify (Optional[Callable[[], bool]]):
+            Decides whether outputs found without a record (such as
+            those written before the cache was used) are kept rather
+            than rebuilt. If None, they are rebuilt.
+    """
+
+    name: str
+    func: Callable[[], Any]
+    inputs: Sequence[Union[str, pathlib.Path]] = ()
+    outputs: Sequence[Union[str, pathlib.Path]] = ()
+    params: Optional[Dict[str, Any]] = None
+    verify: Optional[Callable[[], bool]] = None
+
+
+class BuildCache:
+    """
+    A manifest of build steps and file digests, used to rebuild only
+    the steps which are stale.
+    """
+
+    def __init__(self: Self, manifest_file: Union[str, pathlib.Path]) -> None:
+        """
+        Initialize the build cache, reading the manifest if it exists.
+
+        Args:
+            manifest_file (Union[str, pathlib.Path]):
+                The JSON manifest file.
+        """
+        self.manifest_file = pathlib.Path(manifest_file)
+        self._lock = threading.RLock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        # names of the steps rebuilt through this cache
+        self.rebuilt: List[str] = []
+
+        if self.manifest_file.is_file():
+            manifest = json.loads(self.manifest_file.read_text())
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.files = manifest["files"]
+                self.steps = manifest["steps"]
+
+    def save(self: Self) -> None:
+        """
+        Write the manifest, replacing the previous manifest only once
+        it is complete.
+        """
+        with self._lock:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            partial_file = self.manifest_file.with_name(
+                f"{self.manifest_file.name}.part"
+            )
+            partial_file.write_text(
+                json.dumps(
+                    {
+                        "version": MANIFEST_VERSION,
+                        "files": self.files,
+                        "steps": self.steps,
+                    },
+                    indent=2,
+                    sort_keys=True,
+                )
+            )
+            partial_file.replace(self.manifest_file)
+
+    def digest(self: Self, path: Union[str, pathlib.Path]) -> str:
+        """
+        Get the SHA-256 digest of a file, hashing it only if its size or
+        modification time changed since it was last hashed.
+
+        Args:
+            path (Union[str, pathlib.Path]):
+                The file to hash.
+
+        Returns:
+            str:
+                The SHA-256 hex digest of the file.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self.files.get(key)
+            if (
+                entry is not None
+                and entry["size"] == stat.st_size
+                and entry["mtime_ns"] == stat.st_mtime_ns
+            ):
+                return entry["sha256"]
+
+        sha256 = inputs.file_digest(path)
+        with self._lock:
+            self.files[key] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+            }
+        return sha256
+
+    def key(self: Self, step: BuildStep) -> str:
+        """
+        Address a step by its name, parameters and the content of its
+        inputs (so moving or touching an input does not change the key).
+
+        Args:
+            step (BuildStep):
+                The step.
+
+        Returns:
+            str:
+                The SHA-256 hex digest addressing the step.
+        """
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "name": step.name,
+                    "params": step.params or {},
+                    "inputs": [self.digest(path) for path in step.inputs],
+                },
+                sort_keys=True,
+                default=str,
+            ).encode()
+        ).hexdigest()
+
+    def is_fresh(self: Self, step: BuildStep) -> bool:
+        """
+        Check whether a step's outputs were built from its current
+        inputs and parameters and are unchanged since.
+
+        Args:
+            step (BuildStep):
+                The step.
+
+        Returns:
+            bool:
+                True if the step need not be rebuilt.
+        """
+        record = self.steps.get(step.name)
+        return (
+            record is not None
+            and record["key"] == self.key(step)
+            and len(record["outputs"]) == len(step.outputs)
+            and all(
+                pathlib.Path(path).is_file() and self.digest(path) == sha256
+                for path, sha256 in zip(step.outputs, record["outputs"])
+            )
+        )
+
+    def record(self: Self, step: BuildStep, result: Any = None) -> None:  # noqa: ANN401
+        """
+        Record that a step's outputs were built from its current inputs
+        and parameters.
+
+        Args:
+            step (BuildStep):
+                The step.
+            result (Any, optional):
+                The value returned by the step, kept in the manifest
+                (as JSON, with other values as strings). Defaults to None.
+        """
+        record = {
+            "key": self.key(step),
+            "params": step.params or {},
+            "inputs": [os.path.abspath(path) for path in step.inputs],
+            "outputs": [self.digest(path) for path in step.outputs],
+            "result": json.loads(json.dumps(result, default=str)),
+            "built": time.time(),
+        }
+        with self._lock:
+            self.steps[step.name] = record
+            self.save()
+
+    def result(self: Self, name: str) -> Any:  # noqa: ANN401
+        """
+        Get the value returned when a step was last built.
+
+        Args:
+            name (str):
+                The name of the step.
+
+        Returns:
+            Any:
+                The recorded value, or None if the step is not recorded.
+        """
+        record = self.steps.get(name)
+        return None if record is None else record.get("result")
+
+    def invalidate(self: Self, name: str) -> None:
+        """
+        Forget a step so that it is rebuilt.
+
+        Args:
+            name (str):
+                The name of the step.
+        """
+        with self._lock:
+            if self.steps.pop(name, None) is not None:
+                self.save()
+
+    def _adopt(self: Self, step: BuildStep) -> bool:
+        """
+        Record the existing outputs of an unrecorded step if they verify.
+        """
+        if (
+            step.verify is None
+            or step.name in self.steps
+            or not all(pathlib.Path(path).is_file() for path in step.outputs)
+            or not step.verify()
+        ):
+            return False
+        self.record(step)
+        return True
+
+    def build(self: Self, steps: Sequence[BuildStep], workers: int = 1) -> List[str]:
+        """
+        Rebuild the stale steps among independent steps.
+
+        The outputs of stale steps are removed (and their records
+        forgotten) before they are rebuilt, so an interrupted build is
+        never mistaken for a complete one.
+
+        Args:
+            steps (Sequence[BuildStep]):
+                Steps which do not depend on one another.
+            workers (int, optional):
+                The number of worker processes. Defaults to 1, which
+                builds the steps in this process.
+
+        Returns:
+            List[str]:
+                The names of the steps which were rebuilt.
+        """
+        stale = [
+            step for step in steps if not self.is_fresh(step) and not self._adopt(step)
+        ]
+        if not stale:
+            return []
+
+        with self._lock:
+            for step in stale:
+                self.steps.pop(step.name, None)
+                for path in step.outputs:
+                    pathlib.Path(path).unlink(missing_ok=True)
+            self.save()
+
+        if workers <= 1 or len(stale) == 1:
+            for step in stale:
+                self.record(step, step.func())
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(stale)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = {executor.submit(step.func): step for step in stale}
+                # record every step which succeeds before raising the
+                # first failure, so those steps are not rebuilt again
+                error = None
+                for future in as_completed(futures):
+                    if future.exception() is None:
+                        self.record(futures[future], future.result())
+                    elif error is None:
+                        error = future.exception()
+                if error is not None:
+                    raise error
+
+        names = [step.name for step in stale]
+        self.rebuilt.extend(names)
+        return names
@@ -0,0 +1,169 @@
+"""
+Module for caching remote responses on local disk.
+"""
+
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Optional, Self, Union
+
+
+class ResponseCache:
+    """
+    A persistent, size-bounded key-value cache for response content
+    backed by an embedded SQLite database.
+
+    Entries older than `ttl` seconds are treated as missing and the
+    least recently used entries are evicted once the total size of
+    cached values exceeds `max_bytes`. The cache may be shared
+    between threads.
+
+    Attributes:
+        path (pathlib.Path):
+            The path to the SQLite database file.
+        max_bytes (int):
+            The maximum total size of cached values in bytes.
+        ttl (Optional[float]):
+            The time-to-live for entries in seconds (None for no expiry).
+    """
+
+    def __init__(
+        self: Self,
+        path: Union[str, pathlib.Path],
+        max_bytes: int = 1024**3,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """
+        Initialize the cache, creating the database if needed.
+
+        Args:
+            path (Union[str, pathlib.Path]):
+                The path to the SQLite database file.
+            max_bytes (int, optional):
+                The maximum total size of cached values in bytes.
+                Defaults to 1 GiB.
+            ttl (Optional[float], optional):
+                The time-to-live for entries in seconds.
+                If None, entries never expire. Defaults to None.
+        """
+        self.path = pathlib.Path(path)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed
+                ON responses (accessed);
+            """
+        )
+        self._size = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
+
+    def __len__(self: Self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+
+    @property
+    def size(self: Self) -> int:
+        """
+        The total size of cached values in bytes.
+        """
+        return self._size
+
+    def close(self: Self) -> None:
+        """
+        Close the connection to the cache database.
+        """
+        self._connection.close()
+
+    def get(self: Self, key: str) -> Optional[bytes]:
+        """
+        Get a cached value, refreshing its last access time.
+
+        Args:
+            key (str):
+                The key for the value (for example, a request URL).
+
+        Returns:
+            Optional[bytes]:
+                The cached value or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, size, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, size, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._size -= size
+                return None
+
+            self._connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            return value
+
+    def set(self: Self, key: str, value: bytes) -> None:
+        """
+        Cache a value, evicting the least recently used entries
+        when the cache exceeds its maximum size.
+
+        Args:
+            key (str):
+                The key for the value (for example, a request URL).
+            value (bytes):
+                The value to cache.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            previous = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                """
+                INSERT OR REPLACE INTO responses (key, value, size, created, accessed)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, value, len(value), now, now),
+            )
+            self._size += len(value) - (previous[0] if previous else 0)
+
+            # evict the least recently used entries until we fit
+            while self._size > self.max_bytes:
+                evicted = self._connection.execute(
+                    """
+                    DELETE FROM responses
+                    WHERE key = (
+                        SELECT key FROM responses ORDER BY accessed LIMIT 1
+                    )
+                    RETURNING size
+                    """
+                ).fetchone()
+                if evicted is None:
+                    break
+                self._size -= evicted[0]
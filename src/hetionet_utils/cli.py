@@ -0,0 +1,403 @@
+"""
+Command-line entry points for the extraction and gather workflows.
+
+Usage (installed as the `hetionet-utils` console script):
+
+    hetionet-utils extract --data-dir data --workers 4 --memory-limit 8GB
+    hetionet-utils subset --metapath-data data/...parquet --sources-dir ...
+    hetionet-utils gather --sources-dir data/sources --sink parquet ...
+    hetionet-utils validate results/ data/...parquet
+
+Workflow modules are imported when their command runs (see lazy.py),
+so that `--help` and each command only pay for what they use.
+"""
+
+import argparse
+import itertools
+import json
+import pathlib
+import sys
+from typing import TYPE_CHECKING, List, Optional
+
+from hetionet_utils.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import duckdb
+
+    from hetionet_utils import (
+        buildcache,
+        cache,
+        combination,
+        concurrency,
+        database,
+        gather,
+        inputs,
+        instrumentation,
+        matrix,
+        pathcount,
+        progress,
+        sinks,
+        subset,
+        validate,
+    )
+else:
+    duckdb = lazy_import("duckdb")
+    buildcache = lazy_import("hetionet_utils.buildcache")
+    cache = lazy_import("hetionet_utils.cache")
+    combination = lazy_import("hetionet_utils.combination")
+    concurrency = lazy_import("hetionet_utils.concurrency")
+    database = lazy_import("hetionet_utils.database")
+    gather = lazy_import("hetionet_utils.gather")
+    inputs = lazy_import("hetionet_utils.inputs")
+    instrumentation = lazy_import("hetionet_utils.instrumentation")
+    matrix = lazy_import("hetionet_utils.matrix")
+    pathcount = lazy_import("hetionet_utils.pathcount")
+    progress = lazy_import("hetionet_utils.progress")
+    sinks = lazy_import("hetionet_utils.sinks")
+    subset = lazy_import("hetionet_utils.subset")
+    validate = lazy_import("hetionet_utils.validate")
+
+# name of the precalculated metapath data exported by `extract`
+METAPATH_DATA_FILE = "connectivity-search-precalculated-metapath-data.parquet"
+
+# name of the manifest recording the steps built by `extract`
+BUILD_MANIFEST_FILE = "build-manifest.json"
+
+
+def _progress(args: argparse.Namespace) -> "Optional[progress.ProgressCallback]":
+    """
+    Get the progress callback requested by the arguments.
+    """
+    return None if args.quiet else progress.print_progress
+
+
+def run_extract(args: argparse.Namespace) -> int:
+    """
+    Restore the PathCount tables from the connectivity-search archive
+    into DuckDB and export them to Parquet with an identifier index,
+    rebuilding only the stale steps recorded in the build manifest.
+    """
+    data_dir = pathlib.Path(args.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    tables_dir = pathlib.Path(args.tables_dir or data_dir / "tables")
+    sql_file = data_dir / "connectivity-search-pg_dump.sql.gz"
+    duckdb_filename = data_dir / "connectivity-search.duckdb"
+    target_file = data_dir / METAPATH_DATA_FILE
+    config = pathcount.duckdb_config(args.threads, args.memory_limit)
+
+    build_cache = buildcache.BuildCache(data_dir / BUILD_MANIFEST_FILE)
+    for name in args.rebuild:
+        build_cache.invalidate(name)
+
+    build_cache.build([pathcount.archive_step(sql_file, args.url)])
+    table_names = pathcount.list_dump_tables(sql_file)
+    build_cache.build(
+        pathcount.table_steps(sql_file, table_names, tables_dir, _progress(args)),
+        workers=args.workers,
+    )
+    build_cache.build(
+        [
+            pathcount.database_step(
+                duckdb_filename, table_names, tables_dir, config, _progress(args)
+            )
+        ]
+    )
+    build_cache.build(
+        [
+            pathcount.export_step(
+                duckdb_filename,
+                target_file,
+                profile=args.export_profile,
+                float32=args.float32,
+                config=config,
+            )
+        ]
+    )
+    build_cache.build([pathcount.index_step(target_file)])
+
+    print(
+        json.dumps(
+            {"rebuilt": build_cache.rebuilt, "export": build_cache.result("export")},
+            indent=2,
+            default=str,
+        )
+    )
+    return 0
+
+
+def run_subset(args: argparse.Namespace) -> int:
+    """
+    Extract the metapaths of the sources from the precalculated data,
+    partitioned by metapath, and write BP x Gene score matrices.
+    """
+    sources_dir = pathlib.Path(args.sources_dir)
+    output_dir = pathlib.Path(args.output_dir)
+    config = pathcount.duckdb_config(args.threads, args.memory_limit)
+
+    with duckdb.connect(config=config) as ddb:
+        changes = subset.refresh_metapath_partitions(
+            metapath_data=args.metapath_data,
+            metapaths=sources_dir / "metapaths.csv",
+            output_dir=output_dir / "metapaths",
+            ignore=sources_dir / "metapaths_ignore.csv",
+            ddb=ddb,
+        )
+    print(json.dumps(changes, indent=2))
+
+    if not args.skip_matrices:
+        matrix.write_score_matrices(
+            metapath_data=output_dir / "metapaths" / "*" / "*.parquet",
+            rows=sources_dir / "BP.csv",
+            columns=sources_dir / "Gene.csv",
+            output_dir=output_dir / "matrices",
+            batch_size=args.chunk_size,
+        )
+    return 0
+
+
+def run_gather(args: argparse.Namespace) -> int:
+    """
+    Gather metapath data for the sources from the search API,
+    writing results to the chosen sink.
+    """
+    source_inputs = inputs.load_source_inputs(
+        args.sources_dir, metapaths=args.metapath, cache_dir=args.inputs_cache
+    )
+    hetiocli = database.HetionetNeo4j(
+        cache=None if args.cache is None else cache.ResponseCache(args.cache)
+    )
+    # the driver is closed (and metrics are written) even if the gather
+    # fails, when the metrics are most useful
+    try:
+        combinations = (
+            combination.generate_combinations_for_bioprocs_genes_and_metapaths(
+                source_inputs.bioprocesses, source_inputs.genes, source_inputs.metapaths
+            )
+        )
+        if args.limit is not None:
+            combinations = itertools.islice(combinations, args.limit)
+        combinations = iter(combinations)
+        first = next(combinations, None)
+        if first is None:
+            print("No combinations to gather.")
+            return 0
+
+        output = pathlib.Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        sink_options = {
+            "parquet": {"directory": output, "max_file_bytes": args.max_file_bytes},
+            "duckdb": {"database": output, "table_name": args.table_name},
+            "lancedb": {"uri": output, "table_name": args.table_name},
+        }[args.sink]
+        controller = concurrency.AdaptiveConcurrencyController(
+            initial=min(3, args.workers), minimum=1, maximum=args.workers
+        )
+
+        run_metrics = instrumentation.enable() if args.metrics else None
+        try:
+            with sinks.open_sink(
+                args.sink,
+                schema=gather.sample_result_schema(hetiocli, first),
+                mode=args.mode,
+                **sink_options,
+            ) as sink:
+                written = 0
+                for responses in gather.gather_metapath_data(
+                    hetiocli,
+                    itertools.chain([first], combinations),
+                    sink,
+                    controller=controller,
+                    parse_processes=args.parse_processes,
+                    batch_size=args.chunk_size,
+                ):
+                    written += responses
+                    if not args.quiet:
+                        print(
+                            f"Gathered {written} responses ({sink.rows_written} rows)",
+                            controller.metrics(),
+                        )
+        finally:
+            if run_metrics is not None:
+                instrumentation.disable()
+                run_metrics.write(args.metrics)
+                print(run_metrics.summary())
+    finally:
+        hetiocli.close()
+    return 0
+
+
+def run_validate(args: argparse.Namespace) -> int:
+    """
+    Compare a sample of gathered results with the precalculated data,
+    exiting with a non-zero status when any disagree.
+    """
+    report = validate.validate_gather_results(
+        args.gather_results,
+        args.metapath_data,
+        sample_size=args.sample_size,
+        metapath=args.metapath,
+        seed=args.seed,
+        threads=args.threads,
+    )
+    print(
+        f"Checked {report.checked} combinations: {report.matched} match, "
+        f"{report.mismatched} mismatch, {report.missing} missing"
+    )
+    print("Agreeing metapaths:", ", ".join(report.agreeing_metapaths()) or "none")
+    if report.mismatched:
+        print(report.mismatches().to_pandas().to_string(index=False))
+    return 1 if report.mismatched else 0
+
+
+def _add_duckdb_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add DuckDB resource arguments to a command.
+    """
+    parser.add_argument("--threads", type=int, help="DuckDB threads")
+    parser.add_argument("--memory-limit", help="DuckDB memory limit (for example 8GB)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the argument parser for the command-line interface.
+
+    Returns:
+        argparse.ArgumentParser:
+            The parser, with a subcommand for each workflow.
+    """
+    parser = argparse.ArgumentParser(
+        prog="hetionet-utils",
+        description="Extract and gather Hetionet metapath data.",
+    )
+    parser.add_argument("--quiet", action="store_true", help="do not report progress")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    extract = commands.add_parser(
+        "extract", help="restore and export the connectivity-search PathCount data"
+    )
+    extract.add_argument("--data-dir", default="data", help="output directory")
+    extract.add_argument(
+        "--tables-dir", help="directory for extracted tables (default DATA_DIR/tables)"
+    )
+    extract.add_argument("--url", default=pathcount.PATHCOUNT_ARCHIVE_URL)
+    extract.add_argument(
+        "--workers", type=int, default=1, help="processes extracting tables"
+    )
+    extract.add_argument(
+        "--export-profile", choices=["default", "compact"], default="default"
+    )
+    extract.add_argument(
+        "--float32",
+        action="store_true",
+        help="store p-values and DWPCs as float32 (compact profile)",
+    )
+    extract.add_argument(
+        "--rebuild",
+        action="append",
+        default=[],
+        metavar="STEP",
+        help="rebuild a step even if it is fresh (archive, table:NAME, "
+        "database, export or index); may be repeated",
+    )
+    _add_duckdb_arguments(extract)
+    extract.set_defaults(func=run_extract)
+
+    subset_parser = commands.add_parser(
+        "subset", help="extract source metapaths from the precalculated data"
+    )
+    subset_parser.add_argument("--metapath-data", default=f"data/{METAPATH_DATA_FILE}")
+    subset_parser.add_argument("--sources-dir", default="data/sources")
+    subset_parser.add_argument("--output-dir", default="data/subset")
+    subset_parser.add_argument(
+        "--chunk-size", type=int, default=1_000_000, help="rows per batch"
+    )
+    subset_parser.add_argument("--skip-matrices", action="store_true")
+    _add_duckdb_arguments(subset_parser)
+    subset_parser.set_defaults(func=run_subset)
+
+    gather_parser = commands.add_parser(
+        "gather", help="gather metapath data from the search API"
+    )
+    gather_parser.add_argument("--sources-dir", default="data/sources")
+    gather_parser.add_argument(
+        "--metapath",
+        action="append",
+        help="metapath to gather (may be repeated, default all)",
+    )
+    gather_parser.add_argument("--sink", choices=sorted(sinks.SINKS), default="parquet")
+    gather_parser.add_argument(
+        "--output", default="data/results/metapath_scores", help="sink location"
+    )
+    gather_parser.add_argument(
+        "--table-name", default="bioprocess_gene_metapath_scores"
+    )
+    gather_parser.add_argument(
+        "--mode", choices=list(sinks.SINK_MODES), default="overwrite"
+    )
+    gather_parser.add_argument(
+        "--workers", type=int, default=16, help="maximum concurrent requests"
+    )
+    gather_parser.add_argument(
+        "--parse-processes", type=int, help="parsing processes (default CPUs)"
+    )
+    gather_parser.add_argument(
+        "--chunk-size", type=int, default=64, help="responses per write"
+    )
+    gather_parser.add_argument(
+        "--max-file-bytes",
+        type=int,
+        default=256 * 1024**2,
+        help="size of each Parquet file",
+    )
+    gather_parser.add_argument(
+        "--limit", type=int, help="gather at most this many combinations"
+    )
+    gather_parser.add_argument(
+        "--cache", help="SQLite file caching search API responses"
+    )
+    gather_parser.add_argument(
+        "--inputs-cache", help="directory caching the loaded source inputs"
+    )
+    gather_parser.add_argument(
+        "--metrics", help="write gather metrics (.json or Prometheus text)"
+    )
+    gather_parser.set_defaults(func=run_gather)
+
+    validate_parser = commands.add_parser(
+        "validate", help="compare gathered results with the precalculated data"
+    )
+    validate_parser.add_argument(
+        "gather_results", help="Parquet file, glob or directory"
+    )
+    validate_parser.add_argument(
+        "metapath_data", nargs="?", default=f"data/{METAPATH_DATA_FILE}"
+    )
+    validate_parser.add_argument("--sample-size", type=int, default=1000)
+    validate_parser.add_argument(
+        "--metapath", help="metapath of results without a metapath column"
+    )
+    validate_parser.add_argument("--seed", type=int, default=0)
+    validate_parser.add_argument("--threads", type=int, help="DuckDB threads")
+    validate_parser.set_defaults(func=run_validate)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the command-line interface.
+
+    Args:
+        argv (Optional[List[str]], optional):
+            The arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        int:
+            The exit status.
+    """
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
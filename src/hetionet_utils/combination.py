@@ -3,13 +3,22 @@ Focuses on generating combinations from input data.
 """
 
 from itertools import product
-from typing import Generator, Iterator, Tuple
+from typing import TYPE_CHECKING, Generator, Iterator, List, Tuple
 
-import pyarrow as pa
+from hetionet_utils import instrumentation
+from hetionet_utils.lazy import lazy_import
+
+# pyarrow is imported on first use (see lazy.py)
+if TYPE_CHECKING:
+    import pyarrow as pa
+else:
+    pa = lazy_import("pyarrow")
 
 
 def generate_combinations_for_bioprocs_genes_and_metapaths(
-    table_bioprocesses: pa.Table, table_genes: pa.Table, table_metapaths: pa.Table
+    table_bioprocesses: "pa.Table",
+    table_genes: "pa.Table",
+    table_metapaths: "pa.Table",
 ) -> Generator[Tuple[str, str, str], None, None]:
     """
     Generates all possible combinations of IDs from three Arrow tables.
@@ -36,7 +45,7 @@ def generate_combinations_for_bioprocs_genes_and_metapaths(
 
 def process_in_chunks_for_bioprocs_genes_and_metapaths(
     generator: Iterator[Tuple[str, str, str]], chunk_size: int = 1000
-) -> Iterator[pa.Table]:
+) -> "Iterator[pa.Table]":
     """
     Processes combinations from a generator in smaller chunks
     as Arrow Tables.
@@ -58,21 +67,24 @@ def process_in_chunks_for_bioprocs_genes_and_metapaths(
 
         if (i + 1) % chunk_size == 0:
             # Create Arrow Table from the chunk
-            yield pa.table(
-                {
-                    "source_id": [row[0] for row in chunk],
-                    "target_id": [row[1] for row in chunk],
-                    "metapath": [row[2] for row in chunk],
-                }
-            )
+            yield _chunk_to_table(chunk)
             chunk = []
 
     # Yield any remaining combinations as an Arrow Table
     if chunk:
-        yield pa.table(
-            {
-                "source_id": [row[0] for row in chunk],
-                "target_id": [row[1] for row in chunk],
-                "metapath": [row[2] for row in chunk],
-            }
-        )
+        yield _chunk_to_table(chunk)
+
+
+@instrumentation.timed("chunk_build_seconds")
+def _chunk_to_table(chunk: List[Tuple[str, str, str]]) -> "pa.Table":
+    """
+    Build an Arrow Table from a chunk of combinations.
+    """
+    instrumentation.increment("combinations_total", len(chunk))
+    return pa.table(
+        {
+            "source_id": [row[0] for row in chunk],
+            "target_id": [row[1] for row in chunk],
+            "metapath": [row[2] for row in chunk],
+        }
+    )
@@ -0,0 +1,352 @@
+"""
+Module for adaptively controlling the concurrency of remote requests.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Self,
+    Tuple,
+)
+
+from hetionet_utils import instrumentation
+from hetionet_utils.lazy import lazy_import
+
+# requests and the neo4j driver are imported on first use (see lazy.py)
+if TYPE_CHECKING:
+    import neo4j
+    import requests
+else:
+    neo4j = lazy_import("neo4j")
+    requests = lazy_import("requests")
+
+# HTTP status code used by servers to signal rate limiting
+HTTP_TOO_MANY_REQUESTS = 429
+
+# HTTP status codes from this value up are server errors
+HTTP_SERVER_ERROR = 500
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    Determines whether an exception was caused by server-side rate limiting.
+
+    Args:
+        error (BaseException):
+            The exception raised by a request.
+
+    Returns:
+        bool:
+            True if the exception carries an HTTP 429 response.
+    """
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == HTTP_TOO_MANY_REQUESTS
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Determines whether an exception may succeed when the request is retried
+    (a connection failure, timeout, rate limit or server error) rather than
+    being deterministic (such as an unknown identifier or a malformed
+    response).
+
+    Args:
+        error (BaseException):
+            The exception raised by a request.
+
+    Returns:
+        bool:
+            True if the exception is a requests connection error or
+            timeout, an HTTP 429 or 5xx response, or a neo4j service,
+            session or transient error.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError):
+        status_code = getattr(error.response, "status_code", None)
+        return status_code is not None and (
+            status_code == HTTP_TOO_MANY_REQUESTS or status_code >= HTTP_SERVER_ERROR
+        )
+    return isinstance(
+        error,
+        (
+            neo4j.exceptions.ServiceUnavailable,
+            neo4j.exceptions.SessionExpired,
+            neo4j.exceptions.TransientError,
+        ),
+    )
+
+
+class AdaptiveConcurrencyController:
+    """
+    An additive-increase / multiplicative-decrease (AIMD) controller
+    for the number of in-flight requests.
+
+    The concurrency limit grows by one after a full window of
+    successful requests (one per slot) and is multiplied by
+    `decrease_factor` when a request fails transiently (see
+    `is_transient`, including rate limiting) or the smoothed latency
+    exceeds `latency_target`. Other failures are counted as errors
+    without changing the limit.
+    Only one decrease happens per window so a burst of failures
+    from requests that were already in flight is not over-penalized.
+
+    Attributes:
+        concurrency (int):
+            The current limit for in-flight requests.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        initial: int = 3,
+        minimum: int = 1,
+        maximum: int = 32,
+        latency_target: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        smoothing: float = 0.2,
+    ) -> None:
+        """
+        Initialize the controller.
+
+        Args:
+            initial (int, optional):
+                The starting concurrency limit. Defaults to 3.
+            minimum (int, optional):
+                The lowest concurrency limit. Defaults to 1.
+            maximum (int, optional):
+                The highest concurrency limit. Defaults to 32.
+            latency_target (Optional[float], optional):
+                Smoothed latency in seconds above which the limit is
+                decreased. If None, latency is only reported.
+                Defaults to None.
+            decrease_factor (float, optional):
+                Multiplier applied to the limit on congestion.
+                Defaults to 0.5.
+            smoothing (float, optional):
+                Weight of the newest sample within the exponentially
+                weighted moving average latency. Defaults to 0.2.
+        """
+        if not minimum <= initial <= maximum:
+            raise ValueError("Expected minimum <= initial <= maximum.")
+
+        self.concurrency = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.smoothing = smoothing
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._successes_in_window = 0
+        self._window_start = 0
+        self._started = 0
+        self._completed = 0
+        self._errors = 0
+        self._rate_limited = 0
+        self._latency_ewma: Optional[float] = None
+        self._created = time.monotonic()
+
+    def acquire(self: Self) -> int:
+        """
+        Block until a request slot is available and claim it.
+
+        Returns:
+            int:
+                A sequence number for the request, to be passed
+                to `release`.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self.concurrency)
+            self._in_flight += 1
+            self._started += 1
+            return self._started
+
+    def release(
+        self: Self,
+        sequence: int,
+        latency: float,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """
+        Release a request slot and adjust the limit based on the outcome.
+
+        Args:
+            sequence (int):
+                The sequence number returned by `acquire`.
+            latency (float):
+                The time in seconds the request took.
+            error (Optional[BaseException], optional):
+                The exception raised by the request, if any.
+                Defaults to None.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._latency_ewma = (
+                latency
+                if self._latency_ewma is None
+                else self.smoothing * latency
+                + (1 - self.smoothing) * self._latency_ewma
+            )
+
+            congested = (error is not None and is_transient(error)) or (
+                self.latency_target is not None
+                and self._latency_ewma > self.latency_target
+            )
+            if error is None:
+                self._completed += 1
+            else:
+                self._errors += 1
+                self._rate_limited += is_rate_limited(error)
+
+            if congested:
+                # requests started before the last decrease observed the old
+                # limit, so only decrease once for each window
+                if sequence > self._window_start:
+                    self.concurrency = max(
+                        self.minimum, int(self.concurrency * self.decrease_factor)
+                    )
+                    self._window_start = self._started
+                    self._successes_in_window = 0
+            else:
+                self._successes_in_window += 1
+                if self._successes_in_window >= self.concurrency:
+                    self.concurrency = min(self.maximum, self.concurrency + 1)
+                    self._successes_in_window = 0
+
+            self._condition.notify_all()
+
+    def call(self: Self, func: Callable, *args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        """
+        Call a function within a request slot, recording its outcome.
+
+        Args:
+            func (Callable):
+                The function to call.
+            *args (Any):
+                Positional arguments for the function.
+            **kwargs (Any):
+                Keyword arguments for the function.
+
+        Returns:
+            Any:
+                The return value of the function.
+        """
+        sequence = self.acquire()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            self.release(sequence, time.perf_counter() - start, error)
+            raise
+        self.release(sequence, time.perf_counter() - start)
+        return result
+
+    def call_with_retries(
+        self: Self,
+        func: Callable,
+        *args: Any,  # noqa: ANN401
+        max_retries: int = 3,
+        backoff: float = 1.0,
+    ) -> Any:  # noqa: ANN401
+        """
+        Call a function within a request slot, retrying transient
+        failures (see `is_transient`) with a linear backoff. Other
+        failures are raised at once.
+
+        Args:
+            func (Callable):
+                The function to call.
+            *args (Any):
+                Positional arguments for the function.
+            max_retries (int, optional):
+                The number of times a transiently failed call is retried
+                before its exception is raised. Defaults to 3.
+            backoff (float, optional):
+                Seconds to wait before a retry, multiplied by the
+                attempt number. Defaults to 1.0.
+
+        Returns:
+            Any:
+                The return value of the function.
+        """
+        for attempt in range(max_retries + 1):
+            try:
+                return self.call(func, *args)
+            except Exception as error:
+                if attempt == max_retries or not is_transient(error):
+                    raise
+                instrumentation.increment("request_retries_total")
+                time.sleep(backoff * (attempt + 1))
+
+    def map(
+        self: Self,
+        func: Callable,
+        iterable: Iterable[Tuple],
+        max_retries: int = 3,
+        backoff: float = 1.0,
+    ) -> Iterator[Any]:
+        """
+        Apply a function to each tuple of arguments using threads,
+        keeping at most `concurrency` calls in flight.
+
+        Args:
+            func (Callable):
+                The function to call.
+            iterable (Iterable[Tuple]):
+                Tuples of positional arguments for each call.
+            max_retries (int, optional):
+                The number of times a transiently failed call is retried
+                before its exception is raised. Defaults to 3.
+            backoff (float, optional):
+                Seconds to wait before a retry, multiplied by the
+                attempt number. Defaults to 1.0.
+
+        Yields:
+            Any:
+                The result of each call, in the order of `iterable`.
+        """
+        with ThreadPoolExecutor(max_workers=self.maximum) as executor:
+            futures = [
+                executor.submit(
+                    self.call_with_retries,
+                    func,
+                    *args,
+                    max_retries=max_retries,
+                    backoff=backoff,
+                )
+                for args in iterable
+            ]
+            for future in futures:
+                yield future.result()
+
+    def metrics(self: Self) -> Dict[str, float]:
+        """
+        Report the controller state and request statistics.
+
+        Returns:
+            Dict[str, float]:
+                The current concurrency limit, in-flight requests,
+                completed, failed and rate limited request counts,
+                throughput in requests per second and the smoothed
+                latency in seconds.
+        """
+        with self._condition:
+            elapsed = time.monotonic() - self._created
+            return {
+                "concurrency": self.concurrency,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "errors": self._errors,
+                "rate_limited": self._rate_limited,
+                "throughput": self._completed / elapsed if elapsed > 0 else 0.0,
+                "latency": self._latency_ewma or 0.0,
+            }
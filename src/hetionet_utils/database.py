@@ -2,11 +2,85 @@
 Modules for interacting with various databases.
 """
 
-from typing import List, Optional, Self
+import contextlib
+import json
+import threading
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Self
 
-import pandas as pd
-import requests
-from neo4j import GraphDatabase
+from hetionet_utils import instrumentation
+from hetionet_utils.cache import ResponseCache
+from hetionet_utils.lazy import lazy_import
+from hetionet_utils.metagraph import build_metapath_cypher
+
+# pandas, pyarrow, requests and the neo4j driver are imported on first use
+# (see lazy.py) so that importing this module stays fast
+if TYPE_CHECKING:
+    import neo4j
+    import pandas as pd
+    import pyarrow as pa
+    import requests
+else:
+    neo4j = lazy_import("neo4j")
+    pd = lazy_import("pandas")
+    pa = lazy_import("pyarrow")
+    requests = lazy_import("requests")
+
+
+def parse_metapath_content(
+    content: bytes,
+    source_id: str,
+    target_id: str,
+    columns: Optional[List[str]] = None,
+) -> "pd.DataFrame":
+    """
+    Parse the content of a REST API metapath response into a DataFrame.
+
+    Args:
+        content (bytes):
+            The JSON response content.
+        source_id (str):
+            The identifier for the source node.
+        target_id (str):
+            The identifier for the target node.
+        columns (Optional[List[str]], optional):
+            A list of specific columns to include in the result DataFrame.
+            If None, all columns are included. Defaults to None.
+
+    Returns:
+        pd.DataFrame:
+            A DataFrame containing the response paths with a 'source_id'
+            and 'target_id' column with the identifiers for context
+            (with no rows where the response has no paths).
+    """
+    with instrumentation.timer("json_decode_seconds"):
+        paths = json.loads(content)["paths"]
+
+    # gather response paths as dataframe, adding the source and target ids
+    with instrumentation.timer("dataframe_build_seconds"):
+        df_result = pd.DataFrame(paths)
+        df_result["source_id"] = source_id
+        df_result["target_id"] = target_id
+
+    if columns is None:
+        return df_result
+    # responses without paths have no path columns, so they become
+    # empty frames with the requested columns (rather than a KeyError)
+    return df_result[columns] if paths else df_result.reindex(columns=columns)
+
+
+def _rows_to_record_batch(
+    keys: List[str], rows: List[List[Any]], schema: "Optional[pa.Schema]" = None
+) -> "pa.RecordBatch":
+    """
+    Build an Arrow record batch from rows of record values.
+    """
+    columns = dict(zip(keys, map(list, zip(*rows))))
+    if schema is None:
+        return pa.RecordBatch.from_pydict(columns)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(columns[field.name], type=field.type) for field in schema],
+        schema=schema,
+    )
 
 
 class HetionetNeo4j:
@@ -18,11 +92,21 @@ class HetionetNeo4j:
             The Neo4j driver for database connection.
         query_node_identifier_to_neo4j_id (str):
             The Cypher query to get Neo4j ID from a node identifier.
+        query_node_identifiers_to_neo4j_ids (str):
+            The Cypher query to get Neo4j IDs from a list of node
+            identifiers (folded with UNWIND).
+        cache (Optional[ResponseCache]):
+            An optional on-disk cache for Neo4j ID lookups and
+            REST API responses.
+        fetch_size (int):
+            The number of records fetched from the server at a time.
     """
 
     def __init__(
         self: Self,
         uri: str = "bolt://neo4j.het.io:7687",
+        cache: Optional[ResponseCache] = None,
+        fetch_size: int = 1000,
     ) -> None:
         """
         Initialize the HetionetNeo4j class with a connection
@@ -31,8 +115,23 @@ class HetionetNeo4j:
         Args:
             uri (str):
                 The URI of the Neo4j database.
+            cache (Optional[ResponseCache], optional):
+                A cache used to serve repeated Neo4j ID lookups and
+                REST API responses from disk. Defaults to None.
+            fetch_size (int, optional):
+                The number of records fetched from the server at a time,
+                which bounds memory when streaming large results.
+                Defaults to 1000.
         """
-        self.driver = GraphDatabase.driver(uri, auth=None)
+        self.uri = uri
+        self.cache = cache
+        self.fetch_size = fetch_size
+        self.driver = neo4j.GraphDatabase.driver(uri, auth=None)
+        # sessions are reused within each thread (as sessions are not
+        # thread safe) and closed with the driver
+        self._local = threading.local()
+        self._sessions: "List[neo4j.Session]" = []
+        self._sessions_lock = threading.Lock()
         self.query_node_identifier_to_neo4j_id = """
             MATCH (node)
             WHERE
@@ -42,14 +141,65 @@ class HetionetNeo4j:
               node.identifier AS identifier
             ORDER BY neo4j_id
             """
+        self.query_node_identifiers_to_neo4j_ids = """
+            UNWIND $identifiers AS identifier
+            MATCH (node)
+            WHERE
+              node.identifier = identifier
+            RETURN
+              identifier,
+              min(id(node)) AS neo4j_id
+            """
         self.api_base_path = "https://search-api.het.io/v1"
 
     def close(self: Self) -> None:
         """
         Close the connection to the Neo4j database.
         """
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
         self.driver.close()
 
+    def _discard_session(self: Self) -> None:
+        """
+        Close and forget the session of the current thread.
+        """
+        if (session := getattr(self._local, "session", None)) is None:
+            return
+        self._local.session = None
+        with self._sessions_lock:
+            self._sessions.remove(session)
+        # the session may already be broken
+        with contextlib.suppress(Exception):
+            session.close()
+
+    @contextlib.contextmanager
+    def session(self: Self) -> "Iterator[neo4j.Session]":
+        """
+        Use the session of the current thread, opening one if needed.
+
+        Sessions are reused across queries (within a thread) rather than
+        opened for each query. A session is discarded if a query within
+        it raises, so that a broken connection is not reused.
+
+        Yields:
+            neo4j.Session:
+                The session.
+        """
+        if (session := getattr(self._local, "session", None)) is None:
+            session = self.driver.session(fetch_size=self.fetch_size)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        try:
+            yield session
+        except Exception:
+            self._discard_session()
+            raise
+
+    @instrumentation.timed("neo4j_query_seconds")
     def run_query(
         self: Self, query: str, parameters: Optional[dict] = None
     ) -> List[dict]:
@@ -68,10 +218,102 @@ class HetionetNeo4j:
                 A list of dictionaries containing the
                 query results with keys "neo4j_id" and "identifier".
         """
-        with self.driver.session() as session:
+        with self.session() as session:
             result = session.run(query, parameters)
             return list(result)
 
+    @instrumentation.timed("neo4j_batch_seconds")
+    def run_queries(
+        self: Self, query: str, parameters: Iterable[dict]
+    ) -> List[List[dict]]:
+        """
+        Run a parameterized Cypher query once for each set of parameters
+        within a single transaction.
+
+        Args:
+            query (str):
+                The Cypher query to run.
+            parameters (Iterable[dict]):
+                The parameters for each run of the query.
+
+        Returns:
+            List[List[dict]]:
+                The records of each run, in the order of `parameters`.
+        """
+        with self.session() as session, session.begin_transaction() as tx:
+            return [
+                list(tx.run(query, run_parameters)) for run_parameters in parameters
+            ]
+
+    def stream_query(
+        self: Self,
+        query: str,
+        parameters: Optional[dict] = None,
+        batch_size: Optional[int] = None,
+        schema: "Optional[pa.Schema]" = None,
+    ) -> "Iterator[pa.RecordBatch]":
+        """
+        Run a Cypher query, streaming its records as Arrow record batches.
+
+        Records are pulled from the server `fetch_size` at a time, so only
+        one batch is held in memory. The query runs in its own session
+        so that an abandoned stream does not hold up other queries.
+
+        Args:
+            query (str):
+                The Cypher query to run.
+            parameters (Optional[dict], optional):
+                The parameters for the Cypher query. Defaults to None.
+            batch_size (Optional[int], optional):
+                The number of records per batch. Defaults to `fetch_size`.
+            schema (Optional[pa.Schema], optional):
+                The schema of the batches. If None, types are inferred
+                for each batch. Defaults to None.
+
+        Yields:
+            pa.RecordBatch:
+                Batches of records with one column per returned key.
+        """
+        batch_size = batch_size or self.fetch_size
+        with self.driver.session(fetch_size=self.fetch_size) as session:
+            result = session.run(query, parameters)
+            keys = result.keys()
+            rows: List[Any] = []
+            for record in result:
+                rows.append(record.values())
+                if len(rows) == batch_size:
+                    yield _rows_to_record_batch(keys, rows, schema)
+                    rows = []
+            if rows:
+                yield _rows_to_record_batch(keys, rows, schema)
+
+    def query_arrow(
+        self: Self,
+        query: str,
+        parameters: Optional[dict] = None,
+        schema: "Optional[pa.Schema]" = None,
+    ) -> "pa.Table":
+        """
+        Run a Cypher query, gathering its records as an Arrow Table.
+
+        Args:
+            query (str):
+                The Cypher query to run.
+            parameters (Optional[dict], optional):
+                The parameters for the Cypher query. Defaults to None.
+            schema (Optional[pa.Schema], optional):
+                The schema of the table. If None, types are inferred.
+                Defaults to None.
+
+        Returns:
+            pa.Table:
+                The records with one column per returned key.
+        """
+        batches = list(self.stream_query(query, parameters, schema=schema))
+        if not batches:
+            return (schema or pa.schema([])).empty_table()
+        return pa.Table.from_batches(batches)
+
     def get_id_from_identifer(self: Self, identifier: str) -> int:
         """
         Get the Neo4j ID of a node from its identifier.
@@ -85,18 +327,130 @@ class HetionetNeo4j:
                 The Neo4j ID of the node.
         """
 
-        return self.run_query(
+        # identifiers may be strings or integers, so we use repr to
+        # keep them distinct within the cache key
+        cache_key = f"{self.uri}/identifier/{identifier!r}"
+        if self.cache is not None and (cached := self.cache.get(cache_key)):
+            instrumentation.increment("neo4j_id_cache_hits_total")
+            return int(cached)
+
+        neo4j_id = self.run_query(
             query=self.query_node_identifier_to_neo4j_id,
             parameters={"identifier": identifier},
         )[0]["neo4j_id"]
 
+        if self.cache is not None:
+            self.cache.set(cache_key, str(neo4j_id).encode())
+
+        return neo4j_id
+
+    def get_ids_from_identifiers(
+        self: Self, identifiers: Iterable, batch_size: int = 1000
+    ) -> Dict[Any, int]:
+        """
+        Get the Neo4j IDs of many nodes from their identifiers, folding
+        the lookups into one UNWIND query per batch.
+
+        Args:
+            identifiers (Iterable):
+                The identifiers of the nodes.
+            batch_size (int, optional):
+                The number of identifiers looked up per query.
+                Defaults to 1000.
+
+        Returns:
+            Dict[Any, int]:
+                The Neo4j ID for each identifier which was found.
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        neo4j_ids = {}
+        missing = []
+        for identifier in identifiers:
+            cache_key = f"{self.uri}/identifier/{identifier!r}"
+            if self.cache is not None and (cached := self.cache.get(cache_key)):
+                instrumentation.increment("neo4j_id_cache_hits_total")
+                neo4j_ids[identifier] = int(cached)
+            else:
+                missing.append(identifier)
+
+        for start in range(0, len(missing), batch_size):
+            for record in self.run_query(
+                query=self.query_node_identifiers_to_neo4j_ids,
+                parameters={"identifiers": missing[start : start + batch_size]},
+            ):
+                neo4j_ids[record["identifier"]] = record["neo4j_id"]
+                if self.cache is not None:
+                    self.cache.set(
+                        f"{self.uri}/identifier/{record['identifier']!r}",
+                        str(record["neo4j_id"]).encode(),
+                    )
+
+        return neo4j_ids
+
+    def get_api_content(self: Self, url: str) -> bytes:
+        """
+        Get the content of a REST API response, using the cache
+        when one is available.
+
+        Args:
+            url (str):
+                The URL to request.
+
+        Returns:
+            bytes:
+                The response content.
+        """
+
+        if self.cache is not None and (cached := self.cache.get(url)) is not None:
+            instrumentation.increment("api_cache_hits_total")
+            return cached
+
+        # raise for HTTP errors (for example, rate limiting)
+        # so callers may retry
+        with instrumentation.timer("http_request_seconds"):
+            response = requests.get(url)
+        instrumentation.observe(
+            "http_response_bytes", len(response.content), instrumentation.BYTE_BUCKETS
+        )
+        response.raise_for_status()
+
+        if self.cache is not None:
+            self.cache.set(url, response.content)
+
+        return response.content
+
+    def get_metapath_url(
+        self: Self, source_id: str, target_id: str, metapath: str
+    ) -> str:
+        """
+        Build the REST API URL for metapath data between a source
+        and target node, resolving their Neo4j IDs.
+
+        Args:
+            source_id (str):
+                The identifier for the source node.
+            target_id (str):
+                The identifier for the target node.
+            metapath (str):
+                The metapath pattern to query.
+
+        Returns:
+            str:
+                The REST API URL.
+        """
+        return (
+            f"{self.api_base_path}/paths/source/{self.get_id_from_identifer(source_id)}"
+            f"/target/{self.get_id_from_identifer(target_id)}/metapath/{metapath}"
+        )
+
+    @instrumentation.timed("metapath_request_seconds")
     def get_metapath_data(
         self: Self,
         source_id: str,
         target_id: str,
         metapath: str,
         columns: Optional[List[str]] = None,
-    ) -> pd.DataFrame:
+    ) -> "pd.DataFrame":
         """
         Retrieves metapath data between a source and target node from the
         Hetionet database via a REST API.
@@ -120,16 +474,92 @@ class HetionetNeo4j:
                 'source_id' and 'target_id' column with the identifiers for context.
         """
 
-        url = (
-            f"{self.api_base_path}/paths/source/{self.get_id_from_identifer(source_id)}"
-            f"/target/{self.get_id_from_identifer(target_id)}/metapath/{metapath}"
+        return parse_metapath_content(
+            self.get_api_content(self.get_metapath_url(source_id, target_id, metapath)),
+            source_id=source_id,
+            target_id=target_id,
+            columns=columns,
         )
 
-        # gather response paths as dataframe
-        df_result = pd.DataFrame(requests.get(url).json()["paths"])
+    @instrumentation.timed("metapath_source_request_seconds")
+    def get_metapath_data_for_source(
+        self: Self,
+        source_id: str,
+        metapath: str,
+        target_ids: Optional[Iterable] = None,
+        columns: Optional[List[str]] = None,
+    ) -> "pd.DataFrame":
+        """
+        Retrieves metapath data between a source node and every target
+        node reachable along the metapath using a single Cypher query.
+
+        This avoids one request per (source, target) pair when many
+        targets are needed for the same source and metapath.
+        Path-level values mirror those of `get_metapath_data`, though
+        the "score" column is omitted as it requires precomputed
+        p-values which are only available through the REST API.
 
-        # add the source and target ids
-        df_result["source_id"] = source_id
-        df_result["target_id"] = target_id
+        Args:
+            source_id (str):
+                The identifier for the source node.
+            metapath (str):
+                The metapath pattern to query, representing a specific path
+                through the network.
+            target_ids (Optional[Iterable], optional):
+                Identifiers for the target nodes to keep. Filtering
+                happens on the client after the query returns.
+                If None, all targets are included. Defaults to None.
+            columns (Optional[List[str]], optional):
+                A list of specific columns to include in the result DataFrame.
+                If None, all columns are included. Defaults to None.
+
+        Returns:
+            pd.DataFrame:
+                A DataFrame containing paths between the source and
+                each target based on the specified metapath, sorted by
+                target and descending PDP. The DataFrame includes a
+                'source_id' and 'target_id' column with the identifiers
+                for context.
+        """
+
+        df_result = pd.DataFrame(
+            [
+                dict(record)
+                for record in self.run_query(
+                    query=build_metapath_cypher(metapath),
+                    parameters={"source": source_id},
+                )
+            ],
+            columns=["target_id", "node_ids", "rel_ids", "PDP"],
+        )
+
+        # filter to the requested targets
+        if target_ids is not None:
+            df_result = df_result[df_result["target_id"].isin(list(target_ids))]
+
+        # summarize the paths for each target in the same way as the REST API
+        pdp_by_target = df_result.groupby("target_id")["PDP"]
+        df_result = df_result.assign(
+            metapath=metapath,
+            PC=pdp_by_target.transform("size").astype(float),
+            DWPC=pdp_by_target.transform("sum"),
+            source_id=source_id,
+        )
+        df_result["percent_of_DWPC"] = 100 * df_result["PDP"] / df_result["DWPC"]
+        df_result = df_result.sort_values(
+            ["target_id", "PDP"], ascending=[True, False], ignore_index=True
+        )[
+            [
+                "metapath",
+                "node_ids",
+                "rel_ids",
+                "PDP",
+                "percent_of_DWPC",
+                "PC",
+                "DWPC",
+                "source_id",
+                "target_id",
+            ]
+        ]
 
         return df_result if columns is None else df_result[columns]
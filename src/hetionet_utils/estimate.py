@@ -0,0 +1,368 @@
+"""
+Module for estimating the storage, request count and wall-clock time
+of gathering metapath data before running the full gather.
+
+Rather than extrapolating from a single response, a random sample of
+(bioprocess, gene, metapath) combinations is requested and the rows per
+query, bytes per row and latency are measured, with bootstrap confidence
+intervals for the projections.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, NamedTuple, Optional, Self, Tuple
+
+from hetionet_utils.lazy import lazy_import
+
+# numpy, pandas and pyarrow are imported on first use (see lazy.py)
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    pa = lazy_import("pyarrow")
+    pq = lazy_import("pyarrow.parquet")
+
+
+class Interval(NamedTuple):
+    """
+    A point estimate with a confidence interval.
+
+    Attributes:
+        value (float):
+            The point estimate.
+        low (float):
+            The lower bound of the interval.
+        high (float):
+            The upper bound of the interval.
+    """
+
+    value: float
+    low: float
+    high: float
+
+    def scale(self: Self, factor: float) -> Self:
+        """
+        Multiply the estimate and its bounds by a non-negative factor.
+
+        Args:
+            factor (float):
+                The factor to multiply by.
+
+        Returns:
+            Interval:
+                The scaled interval.
+        """
+        return Interval(self.value * factor, self.low * factor, self.high * factor)
+
+
+class GatherEstimate(NamedTuple):
+    """
+    Projections for gathering metapath data.
+
+    Attributes:
+        samples (int):
+            The number of sampled combinations which succeeded.
+        errors (int):
+            The number of sampled combinations which raised an error.
+        expected_queries (int):
+            The number of combinations (requests) to gather.
+        zero_row_fraction (float):
+            The fraction of sampled queries which returned no rows.
+        rows_per_query (Interval):
+            The mean number of rows returned per query.
+        bytes_per_row (Interval):
+            The compressed Parquet bytes per row of the sampled results.
+        storage_bytes (Interval):
+            The projected storage of all results (bootstrapped jointly
+            with rows per query and bytes per row).
+        concurrency (int):
+            The number of concurrent requests the projection assumes.
+        wall_clock_seconds (Interval):
+            The projected time to gather all results.
+    """
+
+    samples: int
+    errors: int
+    expected_queries: int
+    zero_row_fraction: float
+    rows_per_query: Interval
+    bytes_per_row: Interval
+    storage_bytes: Interval
+    concurrency: int
+    wall_clock_seconds: Interval
+
+
+def sample_combinations(
+    table_bioprocesses: "pa.Table",
+    table_genes: "pa.Table",
+    table_metapaths: "pa.Table",
+    n: int,
+    seed: Optional[int] = None,
+) -> "pa.Table":
+    """
+    Sample random combinations of bioprocesses, genes and metapaths.
+
+    Combinations are drawn uniformly (with replacement) from the same
+    space as generate_combinations_for_bioprocs_genes_and_metapaths
+    without enumerating it.
+
+    Args:
+        table_bioprocesses (pa.Table):
+            Arrow Table containing bioprocess IDs in an 'id' column.
+        table_genes (pa.Table):
+            Arrow Table containing gene IDs in an 'id' column.
+        table_metapaths (pa.Table):
+            Arrow Table containing metapath values in a 'metapath' column.
+        n (int):
+            The number of combinations to sample.
+        seed (Optional[int], optional):
+            The random seed. Defaults to None.
+
+    Returns:
+        pa.Table:
+            The sampled combinations with columns
+            ['source_id', 'target_id', 'metapath'].
+    """
+    rng = np.random.default_rng(seed)
+    return pa.table(
+        {
+            "source_id": table_bioprocesses["id"].take(
+                rng.integers(table_bioprocesses.num_rows, size=n)
+            ),
+            "target_id": table_genes["id"].take(
+                rng.integers(table_genes.num_rows, size=n)
+            ),
+            "metapath": table_metapaths["metapath"].take(
+                rng.integers(table_metapaths.num_rows, size=n)
+            ),
+        }
+    )
+
+
+def bootstrap_mean(
+    values: "np.ndarray",
+    confidence: float = 0.95,
+    resamples: int = 1000,
+    seed: Optional[int] = None,
+) -> Interval:
+    """
+    Estimate a mean with a percentile bootstrap confidence interval,
+    which suits skewed (for example zero-inflated) distributions.
+
+    Args:
+        values (np.ndarray):
+            The sampled values.
+        confidence (float, optional):
+            The confidence level. Defaults to 0.95.
+        resamples (int, optional):
+            The number of bootstrap resamples. Defaults to 1000.
+        seed (Optional[int], optional):
+            The random seed. Defaults to None.
+
+    Returns:
+        Interval:
+            The mean and its confidence interval.
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return Interval(float("nan"), float("nan"), float("nan"))
+
+    rng = np.random.default_rng(seed)
+    means = values[rng.integers(len(values), size=(resamples, len(values)))].mean(
+        axis=1
+    )
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return Interval(float(values.mean()), float(low), float(high))
+
+
+def parquet_bytes_per_row(
+    results: "List[pd.DataFrame]", compression: str = "zstd"
+) -> float:
+    """
+    Measure the compressed Parquet size per row of results written together.
+
+    Args:
+        results (List[pd.DataFrame]):
+            The results to measure.
+        compression (str, optional):
+            The Parquet compression codec. Defaults to "zstd".
+
+    Returns:
+        float:
+            The bytes per row, or 0.0 if there are no rows.
+    """
+    results = [result for result in results if len(result)]
+    if not results:
+        return 0.0
+
+    table = pa.Table.from_pandas(pd.concat(results), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression=compression)
+    return sink.getvalue().size / table.num_rows
+
+
+def bootstrap_storage(
+    results: "List[pd.DataFrame]",
+    expected_queries: int,
+    confidence: float = 0.95,
+    resamples: int = 200,
+    seed: Optional[int] = None,
+) -> Tuple[Interval, Interval]:
+    """
+    Estimate the compressed bytes per row and the storage of all results
+    with percentile bootstrap confidence intervals.
+
+    Each resample of the queries measures both its rows per query and
+    its Parquet bytes per row, so the storage interval reflects the
+    uncertainty of both (and their correlation, as compression varies
+    with the results written together).
+
+    Args:
+        results (List[pd.DataFrame]):
+            The sampled results, one per query (including empty results).
+        expected_queries (int):
+            The number of queries to project storage for.
+        confidence (float, optional):
+            The confidence level. Defaults to 0.95.
+        resamples (int, optional):
+            The number of bootstrap resamples, each written as Parquet.
+            Defaults to 200.
+        seed (Optional[int], optional):
+            The random seed. Defaults to None.
+
+    Returns:
+        Tuple[Interval, Interval]:
+            The bytes per row and the projected storage in bytes.
+    """
+    if not results:
+        nan = Interval(float("nan"), float("nan"), float("nan"))
+        return nan, nan
+
+    rows = np.array([len(result) for result in results], dtype=float)
+    bytes_per_row = parquet_bytes_per_row(results)
+
+    rng = np.random.default_rng(seed)
+    resampled_bytes_per_row = np.empty(resamples)
+    resampled_storage = np.empty(resamples)
+    for number, indices in enumerate(
+        rng.integers(len(results), size=(resamples, len(results)))
+    ):
+        resampled_bytes_per_row[number] = parquet_bytes_per_row(
+            [results[index] for index in indices]
+        )
+        resampled_storage[number] = (
+            rows[indices].mean() * resampled_bytes_per_row[number] * expected_queries
+        )
+
+    alpha = (1 - confidence) / 2
+    bounds = [alpha, 1 - alpha]
+    return (
+        Interval(
+            bytes_per_row, *map(float, np.quantile(resampled_bytes_per_row, bounds))
+        ),
+        Interval(
+            float(rows.mean()) * bytes_per_row * expected_queries,
+            *map(float, np.quantile(resampled_storage, bounds)),
+        ),
+    )
+
+
+def estimate_gather(  # noqa: PLR0913
+    func: "Callable[[str, int, str], pd.DataFrame]",
+    table_bioprocesses: "pa.Table",
+    table_genes: "pa.Table",
+    table_metapaths: "pa.Table",
+    n: int = 100,
+    concurrency: int = 3,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> GatherEstimate:
+    """
+    Estimate the storage, request count and wall-clock time of gathering
+    metapath data by requesting a random sample of combinations.
+
+    Sampled requests are made concurrently (at the given concurrency)
+    so that latencies reflect the load of the full gather. Wall-clock
+    time assumes each of `concurrency` workers completes one request per
+    mean latency, so func should make uncached requests (a response
+    cache would measure cache reads rather than the API).
+
+    Args:
+        func (Callable[[str, int, str], pd.DataFrame]):
+            The function gathering one combination, called with a
+            source ID, target ID and metapath (for example
+            HetionetNeo4j.get_metapath_data).
+        table_bioprocesses (pa.Table):
+            Arrow Table containing bioprocess IDs in an 'id' column.
+        table_genes (pa.Table):
+            Arrow Table containing gene IDs in an 'id' column.
+        table_metapaths (pa.Table):
+            Arrow Table containing metapath values in a 'metapath' column.
+        n (int, optional):
+            The number of combinations to sample. Defaults to 100.
+        concurrency (int, optional):
+            The number of concurrent requests. Defaults to 3.
+        confidence (float, optional):
+            The confidence level of the intervals. Defaults to 0.95.
+        seed (Optional[int], optional):
+            The random seed. Defaults to None.
+
+    Returns:
+        GatherEstimate:
+            The projections.
+    """
+    expected_queries = (
+        table_bioprocesses.num_rows * table_genes.num_rows * table_metapaths.num_rows
+    )
+    sample = sample_combinations(
+        table_bioprocesses, table_genes, table_metapaths, n=n, seed=seed
+    )
+
+    def timed(args: tuple) -> tuple:
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        # failures are counted rather than raised so that one failed
+        # request does not discard the rest of the sample
+        except Exception:
+            result = None
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(
+            executor.map(
+                timed,
+                zip(
+                    sample["source_id"].to_pylist(),
+                    sample["target_id"].to_pylist(),
+                    sample["metapath"].to_pylist(),
+                ),
+            )
+        )
+
+    results = [result for result, _ in outcomes if result is not None]
+    rows = np.array([len(result) for result in results], dtype=float)
+    latencies = np.array([latency for _, latency in outcomes], dtype=float)
+
+    rows_per_query = bootstrap_mean(rows, confidence=confidence, seed=seed)
+    bytes_per_row, storage_bytes = bootstrap_storage(
+        results, expected_queries, confidence=confidence, seed=seed
+    )
+    latency = bootstrap_mean(latencies, confidence=confidence, seed=seed)
+
+    return GatherEstimate(
+        samples=len(results),
+        errors=len(outcomes) - len(results),
+        expected_queries=expected_queries,
+        zero_row_fraction=float((rows == 0).mean()) if len(rows) else float("nan"),
+        rows_per_query=rows_per_query,
+        bytes_per_row=bytes_per_row,
+        storage_bytes=storage_bytes,
+        concurrency=concurrency,
+        wall_clock_seconds=latency.scale(expected_queries / concurrency),
+    )
@@ -0,0 +1,310 @@
+"""
+Module for exporting the connectivity-search PathCount data to Parquet.
+"""
+
+import pathlib
+from typing import Dict, List, Optional, Union
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from hetionet_utils.query import fetch_arrow_reader
+from hetionet_utils.sql import parquet_compression, quote_sql_string
+
+# profiles which may be used for exports
+EXPORT_PROFILES = ("default", "compact")
+
+# columns with many repeated strings, dictionary-encoded by the compact profile
+DICTIONARY_COLUMNS = ("source_identifier", "target_identifier", "metapath_id")
+
+# count columns, downcast by the compact profile
+INTEGER_COLUMNS = (
+    "path_count",
+    "source_degree",
+    "target_degree",
+    "n_dwpcs",
+    "n_nonzero_dwpcs",
+)
+
+# columns which may be stored as float32 by the compact profile
+FLOAT32_COLUMNS = ("adjusted_p_value", "p_value", "dwpc")
+
+# integer types in order of preference with their (inclusive) ranges
+INTEGER_TYPES = (
+    ("UTINYINT", 0, 2**8 - 1),
+    ("USMALLINT", 0, 2**16 - 1),
+    ("UINTEGER", 0, 2**32 - 1),
+    ("TINYINT", -(2**7), 2**7 - 1),
+    ("SMALLINT", -(2**15), 2**15 - 1),
+    ("INTEGER", -(2**31), 2**31 - 1),
+    ("BIGINT", -(2**63), 2**63 - 1),
+)
+
+# largest finite float32 value
+FLOAT32_MAX = 3.4028234663852886e38
+
+# join of the PathCount tables restored from the connectivity-search database
+PATHCOUNT_EXPORT_QUERY = """
+SELECT
+    pathcount.id,
+    source.identifier AS source_identifier,
+    target.identifier AS target_identifier,
+    pathcount.metapath_id,
+    pathcount.path_count,
+    /* we build an adjusted p_value based on the implementation
+    found here:
+    https://github.com/greenelab/connectivity-search-backend/blob/main/dj_hetmech_app/models.py#L94
+    */
+    CASE
+        WHEN pathcount.p_value * metapath.n_similar > 1.0 THEN 1.0
+        ELSE pathcount.p_value * metapath.n_similar
+    END AS adjusted_p_value,
+    pathcount.p_value,
+    pathcount.dwpc,
+    degree.source_degree,
+    degree.target_degree,
+    degree.n_dwpcs,
+    degree.n_nonzero_dwpcs,
+    degree.nonzero_mean,
+    degree.nonzero_sd,
+    pathcount.source_id,
+    pathcount.target_id,
+    pathcount.dgp_id
+FROM
+    dj_hetmech_app_pathcount as pathcount
+LEFT JOIN dj_hetmech_app_node AS source ON
+    pathcount.source_id = source.id
+LEFT JOIN dj_hetmech_app_node AS target ON
+    pathcount.target_id = target.id
+LEFT JOIN dj_hetmech_app_degreegroupedpermutation as degree ON
+    pathcount.dgp_id = degree.id
+    AND pathcount.metapath_id = degree.metapath_id
+LEFT JOIN dj_hetmech_app_metapath as metapath ON
+    pathcount.metapath_id = metapath.abbreviation
+"""
+
+
+def smallest_integer_type(minimum: int, maximum: int) -> str:
+    """
+    Find the smallest DuckDB integer type which can hold a range of values.
+
+    Args:
+        minimum (int):
+            The smallest value.
+        maximum (int):
+            The largest value.
+
+    Returns:
+        str:
+            The name of the DuckDB integer type.
+
+    Raises:
+        ValueError:
+            If no integer type can hold the range.
+    """
+    for name, lower, upper in INTEGER_TYPES:
+        if lower <= minimum and maximum <= upper:
+            return name
+    raise ValueError(f"No integer type holds values from {minimum} to {maximum}.")
+
+
+def _integer_report(
+    ddb: duckdb.DuckDBPyConnection, relation: str, columns: List[str]
+) -> Dict[str, Dict]:
+    """
+    Find the range of each integer column and the smallest type holding it.
+    """
+    row = ddb.execute(
+        "SELECT "
+        + ", ".join(f"min({column}), max({column})" for column in columns)
+        + f" FROM {relation}"
+    ).fetchone()
+
+    report = {}
+    for position, column in enumerate(columns):
+        # columns which are entirely null are given the smallest type
+        minimum = row[2 * position] or 0
+        maximum = row[2 * position + 1] or 0
+        report[column] = {
+            "min": minimum,
+            "max": maximum,
+            "type": smallest_integer_type(minimum, maximum),
+        }
+    return report
+
+
+def _float32_report(
+    ddb: duckdb.DuckDBPyConnection, relation: str, columns: List[str]
+) -> Dict[str, Dict]:
+    """
+    Measure the precision lost by storing float columns as float32.
+    """
+    aggregates = []
+    for column in columns:
+        # values out of the float32 range cannot be cast at all
+        rounded = (
+            f"(CASE WHEN abs({column}) <= {FLOAT32_MAX} "
+            f"THEN {column}::FLOAT::DOUBLE END)"
+        )
+        aggregates += [
+            f"max(abs({column} - {rounded}))",
+            f"max(abs({column} - {rounded}) / abs({column})) "
+            f"FILTER (WHERE {column} != 0)",
+            f"count(*) FILTER (WHERE {column} != 0 AND {rounded} = 0)",
+            f"count(*) FILTER (WHERE abs({column}) > {FLOAT32_MAX})",
+        ]
+    row = ddb.execute(f"SELECT {', '.join(aggregates)} FROM {relation}").fetchone()
+
+    return {
+        column: {
+            "type": "FLOAT",
+            "max_abs_error": row[4 * position] or 0.0,
+            "max_rel_error": row[4 * position + 1] or 0.0,
+            "underflow": row[4 * position + 2],
+            "out_of_range": row[4 * position + 3],
+        }
+        for position, column in enumerate(columns)
+    }
+
+
+def export_pathcount_parquet(  # noqa: PLR0913
+    duckdb_filename: Union[str, pathlib.Path],
+    target_file: Union[str, pathlib.Path],
+    profile: str = "default",
+    float32: bool = False,
+    compression: str = "zstd",
+    batch_size: int = 1_000_000,
+    config: Optional[Dict[str, Union[str, int]]] = None,
+) -> Dict:
+    """
+    Export the PathCount data restored into DuckDB as a Parquet file.
+
+    The "default" profile copies the data directly from DuckDB with its
+    original types. The "compact" profile dictionary-encodes identifier
+    and metapath columns and downcasts count columns to the smallest
+    integer width which holds their values, reducing file size and scan
+    bandwidth. Integer downcasts are lossless; float32 storage of p-values
+    and DWPCs is opt-in and its precision loss is measured in the report.
+
+    Args:
+        duckdb_filename (Union[str, pathlib.Path]):
+            Path to the DuckDB database holding the restored tables.
+        target_file (Union[str, pathlib.Path]):
+            Path to the Parquet file to write.
+        profile (str, optional):
+            The export profile, "default" or "compact".
+            Defaults to "default".
+        float32 (bool, optional):
+            Whether the compact profile stores p-values and DWPCs
+            as float32. Defaults to False.
+        compression (str, optional):
+            The Parquet compression codec (see PARQUET_COMPRESSIONS).
+            Defaults to "zstd".
+        batch_size (int, optional):
+            The number of rows streamed at a time by the compact profile.
+            Defaults to 1_000_000.
+        config (Optional[Dict[str, Union[str, int]]], optional):
+            DuckDB configuration, such as threads or a memory limit.
+            Defaults to None.
+
+    Returns:
+        Dict:
+            A validation report with the profile, row count, file size and
+            (for the compact profile) the type chosen for each column with
+            the precision lost by float32 storage.
+
+    Raises:
+        ValueError:
+            If the profile or compression codec is unknown, float32 is
+            requested without the compact profile or float values are
+            out of the float32 range.
+    """
+    if profile not in EXPORT_PROFILES:
+        raise ValueError(f"Expected profile to be one of {EXPORT_PROFILES}.")
+    if float32 and profile != "compact":
+        raise ValueError("float32 storage requires the compact profile.")
+    compression = parquet_compression(compression)
+
+    target_file = pathlib.Path(target_file)
+    report: Dict = {"profile": profile, "float32": float32, "columns": {}}
+
+    # the database is only read, so that exporting leaves it unchanged
+    with duckdb.connect(
+        str(duckdb_filename), read_only=True, config=config or {}
+    ) as ddb:
+        if profile == "default":
+            # copy data directly to Parquet from DuckDB
+            report["rows"] = ddb.execute(
+                f"""
+                COPY ({PATHCOUNT_EXPORT_QUERY})
+                TO {quote_sql_string(target_file)}
+                (FORMAT parquet, COMPRESSION {compression});
+                """
+            ).fetchone()[0]
+            report["file_bytes"] = target_file.stat().st_size
+            return report
+
+        ddb.execute(
+            f"CREATE OR REPLACE TEMPORARY VIEW pathcount_export AS "
+            f"{PATHCOUNT_EXPORT_QUERY}"
+        )
+        report["columns"].update(
+            _integer_report(ddb, "pathcount_export", list(INTEGER_COLUMNS))
+        )
+        casts = {column: spec["type"] for column, spec in report["columns"].items()}
+
+        if float32:
+            float_report = _float32_report(
+                ddb, "pathcount_export", list(FLOAT32_COLUMNS)
+            )
+            out_of_range = [
+                column for column, spec in float_report.items() if spec["out_of_range"]
+            ]
+            if out_of_range:
+                raise ValueError(
+                    f"Values out of the float32 range in columns {out_of_range}."
+                )
+            report["columns"].update(float_report)
+            casts.update(dict.fromkeys(FLOAT32_COLUMNS, "FLOAT"))
+
+        replace = ", ".join(
+            f"{column}::{dtype} AS {column}" for column, dtype in casts.items()
+        )
+        reader = fetch_arrow_reader(
+            ddb.execute(f"SELECT * REPLACE ({replace}) FROM pathcount_export"),
+            batch_size,
+        )
+
+        # identifiers and metapaths are stored as dictionaries so that
+        # readers receive them as categorical (dictionary) arrays
+        schema = reader.schema
+        for column in DICTIONARY_COLUMNS:
+            schema = schema.set(
+                schema.get_field_index(column),
+                pa.field(column, pa.dictionary(pa.int32(), pa.string())),
+            )
+            report["columns"][column] = {"type": "DICTIONARY"}
+
+        rows = 0
+        with pq.ParquetWriter(
+            target_file,
+            schema,
+            # pyarrow names the uncompressed codec "none"
+            compression="none" if compression == "uncompressed" else compression,
+            use_dictionary=True,
+        ) as writer:
+            for batch in reader:
+                columns = [
+                    pc.dictionary_encode(batch[name])
+                    if name in DICTIONARY_COLUMNS
+                    else batch[name]
+                    for name in schema.names
+                ]
+                writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+                rows += batch.num_rows
+
+    report["rows"] = rows
+    report["file_bytes"] = target_file.stat().st_size
+    return report
@@ -0,0 +1,153 @@
+"""
+Module for gathering metapath data from the Hetionet search API.
+
+Combinations of (bioprocess, gene, metapath) are resolved into search
+API URLs, fetched, parsed into Arrow tables and written to a sink as
+pipelined stages, so requests stay in flight while earlier results are
+parsed and written. This is used by the gather notebooks and the
+`hetionet-utils gather` command.
+"""
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import pyarrow as pa
+
+from hetionet_utils.concurrency import AdaptiveConcurrencyController
+from hetionet_utils.database import HetionetNeo4j
+from hetionet_utils.parsing import ArrowParsePool
+from hetionet_utils.pipeline import Pipeline, Stage
+from hetionet_utils.sinks import ResultSink
+
+# columns kept from each search API path (including the metapath, so
+# results gathered for many metapaths can be told apart)
+GATHER_COLUMNS = ["source_id", "target_id", "metapath", "PDP", "DWPC"]
+
+# types of gathered columns, used where a sample response has no
+# paths to infer them from
+GATHER_TYPES = {
+    "source_id": pa.string(),
+    "target_id": pa.int64(),
+    "metapath": pa.string(),
+    "PDP": pa.float64(),
+    "DWPC": pa.float64(),
+}
+
+
+def sample_result_schema(
+    hetiocli: HetionetNeo4j,
+    combination: Tuple[str, str, str],
+    columns: Optional[List[str]] = None,
+) -> pa.Schema:
+    """
+    Find the schema of gathered results from a sample request.
+
+    The columns of a sample without paths take their types from
+    GATHER_TYPES (or string, for other columns).
+
+    Args:
+        hetiocli (HetionetNeo4j):
+            The client used for requests.
+        combination (Tuple[str, str, str]):
+            A bioprocess ID, gene ID and metapath to request.
+        columns (Optional[List[str]], optional):
+            The columns to keep. Defaults to GATHER_COLUMNS.
+
+    Returns:
+        pa.Schema:
+            The schema of the sample result.
+    """
+    source_id, target_id, metapath = combination
+    sample_result = hetiocli.get_metapath_data(
+        source_id=str(source_id),
+        target_id=int(str(target_id)),
+        metapath=str(metapath),
+        columns=columns or GATHER_COLUMNS,
+    )
+    if sample_result.empty:
+        return pa.schema(
+            [
+                (name, GATHER_TYPES.get(name, pa.string()))
+                for name in sample_result.columns
+            ]
+        )
+    return pa.Table.from_pandas(sample_result, preserve_index=False).schema
+
+
+def gather_metapath_data(  # noqa: PLR0913
+    hetiocli: HetionetNeo4j,
+    combinations: Iterable[Tuple[str, str, str]],
+    sink: ResultSink,
+    controller: Optional[AdaptiveConcurrencyController] = None,
+    parse_processes: Optional[int] = None,
+    batch_size: int = 64,
+    queue_size: int = 256,
+) -> Iterator[int]:
+    """
+    Gather metapath data for combinations, writing results to a sink.
+
+    Combinations are resolved into search API URLs, fetched (within the
+    concurrency of the controller), parsed across a pool of processes
+    (as JSON decoding holds the GIL) and written to the sink in batches.
+
+    Args:
+        hetiocli (HetionetNeo4j):
+            The client used to resolve IDs and fetch results.
+        combinations (Iterable[Tuple[str, str, str]]):
+            Bioprocess IDs, gene IDs and metapaths to gather.
+        sink (ResultSink):
+            Where results are written. Parsed results are conformed to
+            the sink schema where it is set.
+        controller (Optional[AdaptiveConcurrencyController], optional):
+            The controller limiting in-flight requests. Defaults to an
+            adaptive controller starting from 3 requests.
+        parse_processes (Optional[int], optional):
+            The number of parsing processes. Defaults to the number
+            of CPUs.
+        batch_size (int, optional):
+            The number of responses concatenated for each write.
+            Defaults to 64.
+        queue_size (int, optional):
+            The maximum number of items waiting before each stage.
+            Defaults to 256.
+
+    Yields:
+        int:
+            The number of responses written by each batch.
+    """
+    if controller is None:
+        controller = AdaptiveConcurrencyController(
+            initial=3, minimum=1, maximum=16, latency_target=5.0
+        )
+
+    def resolve(combination: tuple) -> tuple:
+        """Resolve the Neo4j IDs of a combination into a search API URL."""
+        return combination, hetiocli.get_metapath_url(*combination)
+
+    def fetch(item: tuple) -> tuple:
+        """Request the search API content for a combination."""
+        combination, url = item
+        return combination, controller.call_with_retries(hetiocli.get_api_content, url)
+
+    with ArrowParsePool(processes=parse_processes, schema=sink.schema) as parse_pool:
+
+        def parse(item: tuple) -> pa.Table:
+            """Parse the search API content for a combination in the pool."""
+            (source_id, target_id, _), content = item
+            return parse_pool.parse(content, source_id, target_id)
+
+        def write(results: list) -> int:
+            """Write the concatenated results to the sink."""
+            sink.write(pa.concat_tables(results))
+            return len(results)
+
+        # the controller limits the fetch workers to its current concurrency
+        pipeline = Pipeline(
+            [
+                Stage("resolve", resolve, workers=4),
+                Stage("fetch", fetch, workers=controller.maximum),
+                Stage("parse", parse, workers=parse_pool.processes),
+                Stage("write", write, batch_size=batch_size),
+            ],
+            queue_size=queue_size,
+        )
+        yield from pipeline.run(combinations)
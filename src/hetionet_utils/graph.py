@@ -0,0 +1,537 @@
+"""
+Module for an embedded, local Hetionet graph store.
+
+The store keeps node attributes and typed compressed sparse row (CSR)
+adjacency arrays as NumPy files which are memory-mapped when opened,
+so lookups and path retrieval never touch the network.
+"""
+
+import bz2
+import gzip
+import json
+import pathlib
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Self, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from hetionet_utils.metagraph import METAEDGES, METANODES, MetapathStep, parse_metapath
+from hetionet_utils.paths import MetapathPathEnumerator, MetapathPaths
+
+# version of the on-disk layout written by build_local_graph
+LOCAL_GRAPH_FORMAT_VERSION = 1
+
+# columns returned by path retrieval, aligned with the search API except
+# that edges are identified by "edge_indices" (positions within the
+# Hetionet JSON edge list) rather than Neo4j "rel_ids", which the JSON
+# does not include, so local paths are not mistaken for API results
+METAPATH_DATA_COLUMNS = [
+    "metapath",
+    "node_ids",
+    "edge_indices",
+    "PDP",
+    "percent_of_DWPC",
+    "PC",
+    "DWPC",
+    "source_id",
+    "target_id",
+]
+
+
+def _open_hetionet_json(path: Union[str, pathlib.Path]) -> Dict[str, Any]:
+    """
+    Read a Hetionet JSON file which may be bz2 or gzip compressed.
+    """
+    path = pathlib.Path(path)
+    opener = {".bz2": bz2.open, ".gz": gzip.open}.get(path.suffix, open)
+    with opener(path, "rt") as file:
+        return json.load(file)
+
+
+def _build_csr(
+    sources: np.ndarray, targets: np.ndarray, edge_ids: np.ndarray, n_nodes: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build CSR adjacency arrays (indptr, indices, edge indices) from edge
+    lists, with neighbors sorted within each row.
+    """
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=n_nodes), out=indptr[1:])
+    return indptr, targets[order].astype(np.int32), edge_ids[order].astype(np.int64)
+
+
+def build_local_graph(
+    hetionet_json: Union[str, pathlib.Path],
+    directory: Union[str, pathlib.Path],
+    neo4j_ids: Optional[Mapping[Tuple[str, str], int]] = None,
+) -> pathlib.Path:
+    """
+    Build a local graph store from a Hetionet JSON file
+    (for example, hetionet-v1.0.json.bz2).
+
+    Args:
+        hetionet_json (Union[str, pathlib.Path]):
+            Path to the Hetionet JSON file (optionally .bz2 or .gz).
+        directory (Union[str, pathlib.Path]):
+            Directory to write the store to.
+        neo4j_ids (Optional[Mapping[Tuple[str, str], int]], optional):
+            Mapping from (node kind, identifier as a string) to the node ID
+            used by Neo4j and the search API (for example, from the
+            pg_dump node table). If None, node IDs are the position of
+            each node within the JSON file. Defaults to None. Edges are
+            always identified by their position within the JSON file
+            (see METAPATH_DATA_COLUMNS).
+
+    Returns:
+        pathlib.Path:
+            The directory containing the store.
+    """
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    hetnet = _open_hetionet_json(hetionet_json)
+
+    kind_to_code = {kind: code for code, kind in enumerate(METANODES.values())}
+    nodes = hetnet["nodes"]
+    identifiers = np.array([str(node["identifier"]) for node in nodes])
+    kinds = np.array([kind_to_code[node["kind"]] for node in nodes], dtype=np.int8)
+    node_ids = np.array(
+        [
+            neo4j_ids[(node["kind"], str(node["identifier"]))]
+            if neo4j_ids is not None
+            else position
+            for position, node in enumerate(nodes)
+        ],
+        dtype=np.int64,
+    )
+    identifier_order = np.argsort(identifiers, kind="stable")
+
+    np.save(directory / "nodes.identifier.npy", identifiers)
+    np.save(
+        directory / "nodes.identifier_is_int.npy",
+        np.array([isinstance(node["identifier"], int) for node in nodes]),
+    )
+    np.save(directory / "nodes.identifier_sorted.npy", identifiers[identifier_order])
+    np.save(directory / "nodes.identifier_order.npy", identifier_order)
+    np.save(directory / "nodes.name.npy", np.array([node["name"] for node in nodes]))
+    np.save(directory / "nodes.kind.npy", kinds)
+    np.save(directory / "nodes.id.npy", node_ids)
+
+    # group edges by canonical metaedge abbreviation
+    position_by_node = {
+        (node["kind"], node["identifier"]): position
+        for position, node in enumerate(nodes)
+    }
+    abbrev_by_kind = {kind: abbrev for abbrev, kind in METANODES.items()}
+    canonical_metaedges = {
+        f"{source}{abbrev}{target}" for source, abbrev, target, _ in METAEDGES
+    }
+    edge_lists: Dict[str, List[Tuple[int, int, int]]] = {}
+    for edge_id, edge in enumerate(hetnet["edges"]):
+        source_kind, source_identifier = edge["source_id"]
+        target_kind, target_identifier = edge["target_id"]
+        source_position = position_by_node[(source_kind, source_identifier)]
+        target_position = position_by_node[(target_kind, target_identifier)]
+        # edge kinds are abbreviated by their first letter within Hetionet
+        metaedge = (
+            f"{abbrev_by_kind[source_kind]}{edge['kind'][0]}"
+            f"{abbrev_by_kind[target_kind]}"
+        )
+        if metaedge not in canonical_metaedges:
+            # undirected edges may be stored against the canonical order
+            metaedge = (
+                f"{abbrev_by_kind[target_kind]}{edge['kind'][0]}"
+                f"{abbrev_by_kind[source_kind]}"
+            )
+            source_position, target_position = target_position, source_position
+        edge_lists.setdefault(metaedge, []).append(
+            (source_position, target_position, edge_id)
+        )
+
+    metaedges = []
+    for source, abbrev, target, directed in METAEDGES:
+        metaedge = f"{source}{abbrev}{target}"
+        edge_array = np.array(edge_lists.get(metaedge, []), dtype=np.int64).reshape(
+            -1, 3
+        )
+        sources, targets, edge_ids = edge_array.T
+        if source == target and not directed:
+            # undirected edges between the same kind are symmetric
+            sources, targets, edge_ids = (
+                np.concatenate([sources, targets]),
+                np.concatenate([targets, sources]),
+                np.concatenate([edge_ids, edge_ids]),
+            )
+        for direction, (row, col) in {
+            "forward": (sources, targets),
+            "backward": (targets, sources),
+        }.items():
+            for name, array in zip(
+                ["indptr", "indices", "edge_ids"],
+                _build_csr(row, col, edge_ids, len(nodes)),
+            ):
+                np.save(directory / f"edges.{metaedge}.{direction}.{name}.npy", array)
+        metaedges.append(metaedge)
+
+    (directory / "metadata.json").write_text(
+        json.dumps(
+            {
+                "format_version": LOCAL_GRAPH_FORMAT_VERSION,
+                "n_nodes": len(nodes),
+                "n_edges": len(hetnet["edges"]),
+                "metanodes": list(METANODES),
+                "metaedges": metaedges,
+            },
+            indent=2,
+        )
+    )
+
+    return directory
+
+
+class HetionetLocalGraph:
+    """
+    A local, memory-mapped Hetionet graph store offering the same
+    lookups and path retrieval as HetionetNeo4j without network access.
+
+    Attributes:
+        directory (pathlib.Path):
+            The directory containing the store written by build_local_graph.
+        metadata (dict):
+            Metadata describing the store.
+        enumerator (MetapathPathEnumerator):
+            The path enumerator used for path retrieval.
+    """
+
+    def __init__(self: Self, directory: Union[str, pathlib.Path]) -> None:
+        """
+        Open a local graph store, memory-mapping its arrays.
+
+        Args:
+            directory (Union[str, pathlib.Path]):
+                The directory containing the store written by
+                build_local_graph.
+        """
+        self.directory = pathlib.Path(directory)
+        self.metadata = json.loads((self.directory / "metadata.json").read_text())
+        if self.metadata["format_version"] != LOCAL_GRAPH_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported local graph format {self.metadata['format_version']}."
+            )
+
+        self._nodes = {
+            name: self._load(f"nodes.{name}.npy")
+            for name in [
+                "identifier",
+                "identifier_is_int",
+                "identifier_sorted",
+                "identifier_order",
+                "name",
+                "kind",
+                "id",
+            ]
+        }
+        # node IDs are only sorted when positions are used as IDs
+        self._node_id_order = np.argsort(self._nodes["id"], kind="stable")
+        self._adjacency: Dict[Tuple[str, str], Tuple[np.ndarray, ...]] = {}
+        self.enumerator = MetapathPathEnumerator(self)
+
+    def _load(self: Self, filename: str) -> np.ndarray:
+        """
+        Memory-map an array from the store.
+        """
+        return np.load(self.directory / filename, mmap_mode="r")
+
+    def close(self: Self) -> None:
+        """
+        Release the memory-mapped arrays.
+        """
+        self._nodes.clear()
+        self._adjacency.clear()
+
+    def adjacency(
+        self: Self, metaedge: str, direction: str
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the CSR adjacency arrays for a metaedge.
+
+        Args:
+            metaedge (str):
+                The canonical metaedge abbreviation (for example "GpBP").
+            direction (str):
+                "forward" to walk from the metaedge source kind or
+                "backward" to walk from the metaedge target kind.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+                The indptr, indices (node positions) and edge ID arrays.
+        """
+        if (metaedge, direction) not in self._adjacency:
+            self._adjacency[(metaedge, direction)] = tuple(
+                self._load(f"edges.{metaedge}.{direction}.{name}.npy")
+                for name in ["indptr", "indices", "edge_ids"]
+            )
+        return self._adjacency[(metaedge, direction)]
+
+    def step_adjacency(
+        self: Self, step: MetapathStep
+    ) -> Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+        """
+        Get the adjacency arrays for walking a metapath step alongside
+        the indptr of the opposite direction (used for target degrees).
+
+        Args:
+            step (MetapathStep):
+                The metapath step to walk.
+
+        Returns:
+            Tuple[Tuple[np.ndarray, ...], np.ndarray]:
+                The (indptr, indices, edge IDs) arrays for the step and the
+                indptr of the opposite direction.
+        """
+        if step.direction == "both":
+            walk = "backward" if step.reverse else "forward"
+        else:
+            walk = step.direction
+        opposite = "backward" if walk == "forward" else "forward"
+        return (
+            self.adjacency(step.metaedge, walk),
+            self.adjacency(step.metaedge, opposite)[0],
+        )
+
+    def _position_from_identifier(
+        self: Self, identifier: Union[str, int], metanode: Optional[str] = None
+    ) -> int:
+        """
+        Find the position of the node with the lowest ID for an identifier,
+        optionally only among nodes of a metanode (raising ValueError if
+        the identifier only belongs to nodes of other kinds).
+        """
+        identifier = str(identifier)
+        sorted_identifiers = self._nodes["identifier_sorted"]
+        start = np.searchsorted(sorted_identifiers, identifier, side="left")
+        end = np.searchsorted(sorted_identifiers, identifier, side="right")
+        if start == end:
+            raise KeyError(f"No node found with identifier {identifier!r}.")
+
+        positions = self._nodes["identifier_order"][start:end]
+        if metanode is not None:
+            positions = positions[
+                self._nodes["kind"][positions] == list(METANODES).index(metanode)
+            ]
+            if not len(positions):
+                raise ValueError(
+                    f"Node {identifier!r} is not a {METANODES[metanode]} node."
+                )
+        return int(positions[np.argmin(self._nodes["id"][positions])])
+
+    def _position_from_id(self: Self, node_id: int) -> int:
+        """
+        Find the position of a node from its ID.
+        """
+        order = self._node_id_order
+        index = np.searchsorted(self._nodes["id"][order], node_id)
+        if index == len(order) or self._nodes["id"][order[index]] != node_id:
+            raise KeyError(f"No node found with ID {node_id}.")
+        return int(order[index])
+
+    def get_id_from_identifer(self: Self, identifier: Union[str, int]) -> int:
+        """
+        Get the ID of a node from its identifier.
+
+        Args:
+            identifier (Union[str, int]):
+                The identifier of the node.
+
+        Returns:
+            int:
+                The ID of the node.
+        """
+        return int(self._nodes["id"][self._position_from_identifier(identifier)])
+
+    def metanode(self: Self, position: int) -> str:
+        """
+        Get the metanode abbreviation of a node from its position.
+
+        Args:
+            position (int):
+                The position of the node within the store.
+
+        Returns:
+            str:
+                The metanode abbreviation (for example "BP").
+        """
+        return list(METANODES)[self._nodes["kind"][position]]
+
+    def get_node(self: Self, node_id: int) -> dict:
+        """
+        Get the attributes of a node from its ID.
+
+        Args:
+            node_id (int):
+                The ID of the node.
+
+        Returns:
+            dict:
+                A dictionary with keys "neo4j_id", "identifier",
+                "name" and "kind".
+        """
+        position = self._position_from_id(node_id)
+        identifier = str(self._nodes["identifier"][position])
+        return {
+            "neo4j_id": node_id,
+            "identifier": int(identifier)
+            if self._nodes["identifier_is_int"][position]
+            else identifier,
+            "name": str(self._nodes["name"][position]),
+            "kind": list(METANODES.values())[self._nodes["kind"][position]],
+        }
+
+    def _identifiers(self: Self, positions: np.ndarray) -> List[Union[str, int]]:
+        """
+        Get identifiers for node positions, restoring integer identifiers.
+        """
+        return [
+            int(identifier) if is_int else str(identifier)
+            for identifier, is_int in zip(
+                self._nodes["identifier"][positions],
+                self._nodes["identifier_is_int"][positions],
+            )
+        ]
+
+    def _paths_to_frame(
+        self: Self,
+        paths: MetapathPaths,
+        source_id: Union[str, int],
+        metapath: str,
+        columns: Optional[List[str]],
+    ) -> pd.DataFrame:
+        """
+        Build a DataFrame with the search API columns (with edge indices
+        rather than relationship IDs) from enumerated paths.
+        """
+        df_result = pd.DataFrame(
+            {
+                "metapath": metapath,
+                "node_ids": list(np.asarray(self._nodes["id"])[paths.nodes]),
+                "edge_indices": list(paths.edge_indices),
+                "PDP": paths.pdp,
+                "percent_of_DWPC": 100 * paths.pdp / paths.dwpc,
+                "PC": paths.path_count,
+                "DWPC": paths.dwpc,
+                "source_id": source_id,
+                "target_id": self._identifiers(paths.nodes[:, -1]),
+            },
+            columns=METAPATH_DATA_COLUMNS,
+        ).sort_values(["target_id", "PDP"], ascending=[True, False], ignore_index=True)
+
+        return df_result if columns is None else df_result[columns]
+
+    def get_metapath_data_for_source(  # noqa: PLR0913
+        self: Self,
+        source_id: Union[str, int],
+        metapath: str,
+        target_ids: Optional[Iterable] = None,
+        columns: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        min_pdp: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Retrieves metapath data between a source node and every target
+        node reachable along the metapath.
+
+        Args:
+            source_id (Union[str, int]):
+                The identifier for the source node.
+            metapath (str):
+                The metapath pattern to query.
+            target_ids (Optional[Iterable], optional):
+                Identifiers for the target nodes to keep.
+                If None, all targets are included. Defaults to None.
+            columns (Optional[List[str]], optional):
+                A list of specific columns to include in the result DataFrame.
+                If None, all columns are included. Defaults to None.
+            top_k (Optional[int], optional):
+                Keep only the k paths with the highest PDP for each target.
+                Defaults to None.
+            min_pdp (Optional[float], optional):
+                Stop extending paths once their PDP falls below this value.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame:
+                A DataFrame containing paths between the source and
+                each target, sorted by target and descending PDP.
+
+        Raises:
+            ValueError:
+                If the source node is not of the metapath's source metanode.
+        """
+        steps = parse_metapath(metapath)
+        paths = self.enumerator.enumerate(
+            self._position_from_identifier(source_id, steps[0].source),
+            metapath,
+            top_k=top_k,
+            min_pdp=min_pdp,
+        )
+
+        # identifiers are compared as strings so that integer gene
+        # identifiers match regardless of the type they are given as
+        if target_ids is not None:
+            keep = np.isin(
+                self._nodes["identifier"][paths.nodes[:, -1]],
+                [str(target_id) for target_id in target_ids],
+            )
+            paths = MetapathPaths(*(array[keep] for array in paths))
+
+        return self._paths_to_frame(paths, source_id, metapath, columns)
+
+    def get_metapath_data(  # noqa: PLR0913
+        self: Self,
+        source_id: Union[str, int],
+        target_id: Union[str, int],
+        metapath: str,
+        columns: Optional[List[str]] = None,
+        top_k: Optional[int] = None,
+        min_pdp: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Retrieves metapath data between a source and target node.
+
+        Args:
+            source_id (Union[str, int]):
+                The identifier for the source node.
+            target_id (Union[str, int]):
+                The identifier for the target node.
+            metapath (str):
+                The metapath pattern to query.
+            columns (Optional[List[str]], optional):
+                A list of specific columns to include in the result DataFrame.
+                If None, all columns are included. Defaults to None.
+            top_k (Optional[int], optional):
+                Keep only the k paths with the highest PDP.
+                Defaults to None.
+            min_pdp (Optional[float], optional):
+                Stop extending paths once their PDP falls below this value.
+                Defaults to None.
+
+        Returns:
+            pd.DataFrame:
+                A DataFrame containing paths between the source and
+                target based on the specified metapath.
+
+        Raises:
+            ValueError:
+                If the source or target node is not of the metapath's
+                source or target metanode.
+        """
+        steps = parse_metapath(metapath)
+        paths = self.enumerator.enumerate(
+            self._position_from_identifier(source_id, steps[0].source),
+            metapath,
+            target_position=self._position_from_identifier(target_id, steps[-1].target),
+            top_k=top_k,
+            min_pdp=min_pdp,
+        )
+
+        return self._paths_to_frame(paths, source_id, metapath, columns)
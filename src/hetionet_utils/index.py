@@ -0,0 +1,314 @@
+"""
+Module for identifier-level secondary indexes over Parquet data.
+
+The precalculated metapath dataset is ordered by `pathcount.id`, so
+row-group statistics cannot narrow lookups by `source_identifier` or
+`target_identifier`. A sidecar index maps each identifier to the row
+groups containing it so that only those row groups are read.
+
+Indexed files are recorded relative to the index (so the index may be
+used from any working directory) along with their size and modification
+time, so that an index left behind by a re-export is refused rather than
+pointing lookups at the wrong row groups.
+"""
+
+import base64
+import json
+import os
+import pathlib
+from typing import Dict, List, Optional, Self, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# version of the index layout
+INDEX_VERSION = 2
+
+# columns indexed by default
+INDEX_COLUMNS = ("source_identifier", "target_identifier")
+
+# separates the column name from the identifier within index keys
+_KEY_SEPARATOR = "\t"
+
+# index metadata key recording the Arrow schema of the indexed data
+_SCHEMA_METADATA_KEY = b"hetionet_utils.data_schema"
+
+# index metadata key recording the layout version and indexed files
+_FILES_METADATA_KEY = b"hetionet_utils.indexed_files"
+
+# schema of the index itself
+_INDEX_SCHEMA = pa.schema(
+    [
+        ("column", pa.string()),
+        ("identifier", pa.string()),
+        ("file", pa.string()),
+        ("row_group", pa.int32()),
+    ]
+)
+
+
+def default_index_path(metapath_data: Union[str, pathlib.Path]) -> pathlib.Path:
+    """
+    Get the default sidecar index path for a Parquet file.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path]):
+            Path to the Parquet file.
+
+    Returns:
+        pathlib.Path:
+            The sidecar index path (for example, "data.index.parquet"
+            for "data.parquet").
+    """
+    return pathlib.Path(metapath_data).with_suffix(".index.parquet")
+
+
+def _fingerprint(path: Union[str, pathlib.Path]) -> Dict[str, int]:
+    """
+    Get the size and modification time of a file, or an empty
+    fingerprint if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def build_identifier_index(
+    metapath_data: Union[str, pathlib.Path, Sequence[Union[str, pathlib.Path]]],
+    index_file: Optional[Union[str, pathlib.Path]] = None,
+    columns: Sequence[str] = INDEX_COLUMNS,
+) -> pathlib.Path:
+    """
+    Build a sidecar index mapping identifiers to the Parquet row groups
+    which contain them.
+
+    The Arrow schema of the first file is recorded in the index metadata
+    so that lookups against an index without entries (such as one built
+    over an empty export) return empty tables with that schema.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path, Sequence[...]]):
+            Path to a Parquet file or a sequence of Parquet files.
+        index_file (Optional[Union[str, pathlib.Path]], optional):
+            Path to write the index to. If None, the default sidecar path
+            of the first file is used. Defaults to None.
+        columns (Sequence[str], optional):
+            The identifier columns to index.
+            Defaults to source_identifier and target_identifier.
+
+    Returns:
+        pathlib.Path:
+            The path to the index.
+    """
+    files = (
+        [metapath_data]
+        if isinstance(metapath_data, (str, pathlib.Path))
+        else list(metapath_data)
+    )
+    index_file = pathlib.Path(
+        default_index_path(files[0]) if index_file is None else index_file
+    )
+
+    data_schema = pq.read_schema(files[0]).remove_metadata()
+    entries: List[pa.Table] = [_INDEX_SCHEMA.empty_table()]
+    fingerprints: Dict[str, Dict[str, int]] = {}
+    for file in files:
+        # files are recorded relative to the directory of the index
+        relative_file = pathlib.Path(
+            os.path.relpath(os.path.abspath(file), os.path.abspath(index_file.parent))
+        ).as_posix()
+        fingerprints[relative_file] = _fingerprint(file)
+        parquet_file = pq.ParquetFile(file)
+        for row_group in range(parquet_file.num_row_groups):
+            table = parquet_file.read_row_group(row_group, columns=list(columns))
+            for column in columns:
+                identifiers = pc.unique(table[column]).cast(pa.string())
+                entries.append(
+                    pa.table(
+                        {
+                            "column": pa.array([column] * len(identifiers)),
+                            "identifier": identifiers,
+                            "file": pa.array([relative_file] * len(identifiers)),
+                            "row_group": pa.array(
+                                [row_group] * len(identifiers), type=pa.int32()
+                            ),
+                        },
+                        schema=_INDEX_SCHEMA,
+                    )
+                )
+
+    index = (
+        pa.concat_tables(entries)
+        .sort_by([("column", "ascending"), ("identifier", "ascending")])
+        .replace_schema_metadata(
+            {
+                _SCHEMA_METADATA_KEY: base64.b64encode(
+                    data_schema.serialize().to_pybytes()
+                ),
+                _FILES_METADATA_KEY: json.dumps(
+                    {"version": INDEX_VERSION, "files": fingerprints}
+                ),
+            }
+        )
+    )
+    pq.write_table(index, index_file, compression="zstd")
+    return index_file
+
+
+class IdentifierIndex:
+    """
+    A sidecar index mapping identifiers to Parquet row groups,
+    used to read only the row groups which may match a lookup.
+
+    Attributes:
+        index_file (pathlib.Path):
+            The path to the sidecar index.
+    """
+
+    def __init__(self: Self, index_file: Union[str, pathlib.Path]) -> None:
+        """
+        Load a sidecar index written by build_identifier_index.
+
+        Args:
+            index_file (Union[str, pathlib.Path]):
+                The path to the sidecar index.
+
+        Raises:
+            ValueError:
+                If the index predates the current layout or an indexed
+                file changed since the index was built.
+        """
+        self.index_file = pathlib.Path(index_file)
+        index = pq.read_table(self.index_file)
+
+        metadata = index.schema.metadata or {}
+        recorded = json.loads(metadata.get(_FILES_METADATA_KEY, b"{}"))
+        if recorded.get("version") != INDEX_VERSION:
+            raise ValueError(
+                f"{self.index_file} predates the current index layout; "
+                "rebuild it with build_identifier_index."
+            )
+        for file, fingerprint in recorded["files"].items():
+            if _fingerprint(self.index_file.parent / file) != fingerprint:
+                raise ValueError(
+                    f"{self.index_file} is stale ({file} changed since it "
+                    "was indexed); rebuild it with build_identifier_index."
+                )
+        self._schema = pa.ipc.read_schema(
+            pa.py_buffer(base64.b64decode(metadata[_SCHEMA_METADATA_KEY]))
+        )
+
+        # keys are sorted so that lookups may bisect
+        keys = np.char.add(
+            np.char.add(
+                index["column"].to_numpy(zero_copy_only=False).astype(str),
+                _KEY_SEPARATOR,
+            ),
+            index["identifier"].to_numpy(zero_copy_only=False).astype(str),
+        )
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._row_groups = index["row_group"].to_numpy()[order]
+        self._parquet_files: Dict[str, pq.ParquetFile] = {}
+
+        # indexed files are resolved against the directory of the index
+        files, inverse = np.unique(
+            index["file"].to_numpy(zero_copy_only=False).astype(str),
+            return_inverse=True,
+        )
+        self._files = np.array(
+            [str(self.index_file.parent / file) for file in files], dtype=object
+        )[inverse][order]
+
+    def row_groups(self: Self, column: str, identifier: Union[str, int]) -> set:
+        """
+        Get the row groups which contain an identifier.
+
+        Args:
+            column (str):
+                The indexed column (for example "source_identifier").
+            identifier (Union[str, int]):
+                The identifier to look up.
+
+        Returns:
+            set:
+                A set of (file, row group) tuples.
+        """
+        key = f"{column}{_KEY_SEPARATOR}{identifier}"
+        start = np.searchsorted(self._keys, key, side="left")
+        end = np.searchsorted(self._keys, key, side="right")
+        return set(
+            zip(self._files[start:end].tolist(), self._row_groups[start:end].tolist())
+        )
+
+    def _parquet_file(self: Self, file: str) -> pq.ParquetFile:
+        """
+        Open (and cache) a Parquet file so that its footer is read once.
+        """
+        if file not in self._parquet_files:
+            self._parquet_files[file] = pq.ParquetFile(file)
+        return self._parquet_files[file]
+
+    def read(
+        self: Self,
+        filters: Dict[str, Union[str, int]],
+        columns: Optional[List[str]] = None,
+    ) -> pa.Table:
+        """
+        Read the rows matching identifier filters, reading only the
+        row groups which contain every filtered identifier.
+
+        Args:
+            filters (Dict[str, Union[str, int]]):
+                Mapping of indexed column to identifier
+                (for example {"source_identifier": "GO:0000002"}).
+            columns (Optional[List[str]], optional):
+                The columns to read. If None, all columns are read.
+                Defaults to None.
+
+        Returns:
+            pa.Table:
+                The matching rows.
+        """
+        row_groups = set.intersection(
+            *(self.row_groups(column, value) for column, value in filters.items())
+        )
+
+        by_file: Dict[str, List[int]] = {}
+        for file, row_group in sorted(row_groups):
+            by_file.setdefault(file, []).append(row_group)
+
+        # filtered columns are always read so rows can be matched
+        read_columns = (
+            None if columns is None else list(dict.fromkeys([*columns, *filters]))
+        )
+        tables = [
+            self._parquet_file(file).read_row_groups(groups, columns=read_columns)
+            for file, groups in by_file.items()
+        ]
+        table = (
+            pa.concat_tables(tables)
+            if tables
+            else self.schema().empty_table().select(read_columns or self.schema().names)
+        )
+
+        mask = pa.array(np.ones(table.num_rows, dtype=bool))
+        for column, value in filters.items():
+            mask = pc.and_(mask, pc.equal(table[column].cast(pa.string()), str(value)))
+        table = table.filter(mask)
+
+        return table if columns is None else table.select(columns)
+
+    def schema(self: Self) -> pa.Schema:
+        """
+        Get the Arrow schema of the indexed data.
+
+        Returns:
+            pa.Schema:
+                The schema recorded in the index.
+        """
+        return self._schema
@@ -0,0 +1,170 @@
+"""
+Module for loading the source inputs (bioprocesses, genes and metapaths)
+used to gather metapath data.
+
+Inputs are read with Arrow and may be cached as uncompressed Feather
+(Arrow IPC) files keyed by the hashes of the source files, so that
+later loads memory-map the cache instead of parsing the CSV files.
+"""
+
+import hashlib
+import json
+import pathlib
+from typing import Dict, NamedTuple, Optional, Sequence, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv, feather
+
+# source files within the sources directory
+SOURCE_FILES = {
+    "bioprocesses": "BP.csv",
+    "genes": "Gene.csv",
+    "metapaths": "metapaths.csv",
+    "metapaths_ignore": "metapaths_ignore.csv",
+}
+
+# incremented when the cached tables change for the same sources
+INPUTS_CACHE_VERSION = 1
+
+
+class SourceInputs(NamedTuple):
+    """
+    The source inputs used to gather metapath data.
+
+    Attributes:
+        bioprocesses (pa.Table):
+            Bioprocesses (sources) with `id` and `name` columns.
+        genes (pa.Table):
+            Genes (targets) with `id` and `name` columns.
+        metapaths (pa.Table):
+            Metapaths with a `metapath` column, excluding ignored metapaths.
+    """
+
+    bioprocesses: pa.Table
+    genes: pa.Table
+    metapaths: pa.Table
+
+
+def file_digest(path: Union[str, pathlib.Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Hash the contents of a file.
+
+    Args:
+        path (Union[str, pathlib.Path]):
+            The file to hash.
+        chunk_size (int, optional):
+            The number of bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        str:
+            The SHA-256 hex digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_source_inputs(
+    sources_dir: pathlib.Path, metapaths: Optional[Sequence[str]]
+) -> SourceInputs:
+    """
+    Read the source CSV files and filter the metapaths.
+    """
+    tables = {
+        name: csv.read_csv(sources_dir / filename)
+        for name, filename in SOURCE_FILES.items()
+    }
+
+    # anti-join against the ignored metapaths (a membership filter keeps
+    # the original order, unlike a hash join)
+    table_metapaths = tables["metapaths"].filter(
+        pc.invert(
+            pc.is_in(
+                tables["metapaths"]["metapath"],
+                value_set=tables["metapaths_ignore"]["metapath"],
+            )
+        )
+    )
+    if metapaths is not None:
+        table_metapaths = table_metapaths.filter(
+            pc.is_in(
+                table_metapaths["metapath"],
+                value_set=pa.array(list(metapaths), type=pa.string()),
+            )
+        )
+
+    return SourceInputs(
+        bioprocesses=tables["bioprocesses"],
+        genes=tables["genes"],
+        metapaths=table_metapaths,
+    )
+
+
+def load_source_inputs(
+    sources_dir: Union[str, pathlib.Path] = "data/sources",
+    metapaths: Optional[Sequence[str]] = None,
+    cache_dir: Optional[Union[str, pathlib.Path]] = None,
+) -> SourceInputs:
+    """
+    Load the bioprocesses, genes and metapaths used to gather metapath data.
+
+    Metapaths found within `metapaths_ignore.csv` are removed.
+
+    Args:
+        sources_dir (Union[str, pathlib.Path], optional):
+            The directory holding BP.csv, Gene.csv, metapaths.csv and
+            metapaths_ignore.csv. Defaults to "data/sources".
+        metapaths (Optional[Sequence[str]], optional):
+            If provided, only these metapaths are kept. Defaults to None.
+        cache_dir (Optional[Union[str, pathlib.Path]], optional):
+            A directory for Feather caches of the loaded tables, keyed by
+            the hashes of the source files and the metapath filter.
+            If None, nothing is cached. Defaults to None.
+
+    Returns:
+        SourceInputs:
+            The loaded tables.
+    """
+    sources_dir = pathlib.Path(sources_dir)
+    if cache_dir is None:
+        return _read_source_inputs(sources_dir, metapaths)
+
+    key = hashlib.sha256(
+        json.dumps(
+            {
+                "version": INPUTS_CACHE_VERSION,
+                "sources": {
+                    name: file_digest(sources_dir / filename)
+                    for name, filename in SOURCE_FILES.items()
+                },
+                "metapaths": None if metapaths is None else list(metapaths),
+            },
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
+
+    cache_dir = pathlib.Path(cache_dir)
+    cache_files: Dict[str, pathlib.Path] = {
+        name: cache_dir / f"{key}.{name}.arrow" for name in SourceInputs._fields
+    }
+    if all(path.exists() for path in cache_files.values()):
+        return SourceInputs(
+            **{
+                name: feather.read_table(path, memory_map=True)
+                for name, path in cache_files.items()
+            }
+        )
+
+    inputs = _read_source_inputs(sources_dir, metapaths)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    for name, path in cache_files.items():
+        # write then rename so that readers never see a partial file
+        partial = path.with_suffix(".arrow.tmp")
+        feather.write_feather(
+            getattr(inputs, name), partial, compression="uncompressed"
+        )
+        partial.replace(path)
+    return inputs
@@ -0,0 +1,484 @@
+"""
+Module for opt-in instrumentation of hot paths.
+
+Timings, byte counts and retry counts are recorded into fixed-bucket
+histograms and counters while instrumentation is enabled. When it is
+disabled (the default) the hooks return immediately, so instrumented
+code pays only a global lookup per call.
+
+For example:
+
+    with instrument("data/results/metrics.prom"):
+        ...  # gather data
+
+writes Prometheus text metrics and prints a summary when the run ends.
+"""
+
+import bisect
+import contextlib
+import functools
+import json
+import math
+import pathlib
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Self, Sequence, Union
+
+# histogram bucket upper bounds for durations in seconds (100us to ~100s)
+TIME_BUCKETS = tuple(0.0001 * 2**exponent for exponent in range(21))
+# histogram bucket upper bounds for sizes in bytes (64B to 64MiB)
+BYTE_BUCKETS = tuple(64 * 4**exponent for exponent in range(11))
+
+# prefix for exported Prometheus metric names
+METRIC_PREFIX = "hetionet_"
+
+
+class Histogram:
+    """
+    A thread-safe histogram with fixed bucket upper bounds.
+
+    Attributes:
+        buckets (Sequence[float]):
+            The bucket upper bounds, in ascending order.
+        count (int):
+            The number of observations.
+        total (float):
+            The sum of observations.
+        minimum (float):
+            The smallest observation.
+        maximum (float):
+            The largest observation.
+    """
+
+    def __init__(self: Self, buckets: Sequence[float] = TIME_BUCKETS) -> None:
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets (Sequence[float], optional):
+                The bucket upper bounds, in ascending order.
+                Defaults to TIME_BUCKETS.
+        """
+        self.buckets = tuple(buckets)
+        # one count per bucket, plus one for values above the last bound
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def observe(self: Self, value: float) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value (float):
+                The observed value.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.minimum = min(self.minimum, value)
+            self.maximum = max(self.maximum, value)
+
+    def cumulative_counts(self: Self) -> List[int]:
+        """
+        Count the observations at or below each bucket bound.
+
+        Returns:
+            List[int]:
+                Cumulative counts for each bucket followed by the
+                total count (the +Inf bucket).
+        """
+        with self._lock:
+            counts = list(self._counts)
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative
+
+    def quantile(self: Self, q: float) -> float:
+        """
+        Estimate a quantile by interpolating within its bucket.
+
+        Args:
+            q (float):
+                The quantile, between 0 and 1.
+
+        Returns:
+            float:
+                The estimated quantile, or NaN without observations.
+        """
+        if self.count == 0:
+            return math.nan
+
+        cumulative = self.cumulative_counts()
+        rank = q * cumulative[-1]
+        index = bisect.bisect_left(cumulative, rank)
+        lower = self.buckets[index - 1] if index > 0 else self.minimum
+        upper = self.buckets[index] if index < len(self.buckets) else self.maximum
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bucket = cumulative[index] - below
+        fraction = (rank - below) / in_bucket if in_bucket else 0.0
+        estimate = lower + (upper - lower) * fraction
+        return min(max(estimate, self.minimum), self.maximum)
+
+    def to_dict(self: Self) -> Dict[str, Any]:
+        """
+        Summarize the histogram.
+
+        Returns:
+            Dict[str, Any]:
+                The count, sum, min, max, mean, estimated p50/p95/p99
+                and the bucket bounds with cumulative counts.
+        """
+        cumulative = self.cumulative_counts()
+        empty = self.count == 0
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": None if empty else self.minimum,
+            "max": None if empty else self.maximum,
+            "mean": None if empty else self.total / self.count,
+            "p50": None if empty else self.quantile(0.5),
+            "p95": None if empty else self.quantile(0.95),
+            "p99": None if empty else self.quantile(0.99),
+            "buckets": dict(zip([*map(str, self.buckets), "+Inf"], cumulative)),
+        }
+
+
+class Instrumentation:
+    """
+    A registry of named histograms and counters for one run.
+
+    Attributes:
+        started (float):
+            The wall-clock time the run started, as a UNIX timestamp.
+    """
+
+    def __init__(self: Self) -> None:
+        """
+        Initialize an empty registry.
+        """
+        self.started = time.time()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self: Self, name: str, buckets: Sequence[float] = TIME_BUCKETS
+    ) -> Histogram:
+        """
+        Get a histogram by name, creating it if needed.
+
+        Args:
+            name (str):
+                The metric name.
+            buckets (Sequence[float], optional):
+                The bucket upper bounds used if the histogram is created.
+                Defaults to TIME_BUCKETS.
+
+        Returns:
+            Histogram:
+                The histogram.
+        """
+        if (histogram := self._histograms.get(name)) is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(buckets))
+        return histogram
+
+    def observe(
+        self: Self, name: str, value: float, buckets: Sequence[float] = TIME_BUCKETS
+    ) -> None:
+        """
+        Record an observation in a histogram.
+
+        Args:
+            name (str):
+                The metric name.
+            value (float):
+                The observed value.
+            buckets (Sequence[float], optional):
+                The bucket upper bounds used if the histogram is created.
+                Defaults to TIME_BUCKETS.
+        """
+        self.histogram(name, buckets).observe(value)
+
+    def increment(self: Self, name: str, amount: float = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str):
+                The metric name.
+            amount (float, optional):
+                The amount to increase by. Defaults to 1.
+        """
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextlib.contextmanager
+    def timer(self: Self, name: str) -> Iterator[None]:
+        """
+        Record the duration of a block in seconds.
+
+        Args:
+            name (str):
+                The metric name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def to_dict(self: Self) -> Dict[str, Any]:
+        """
+        Summarize every metric.
+
+        Returns:
+            Dict[str, Any]:
+                The run start and duration with the counters and
+                histogram summaries by name.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+        return {
+            "started": self.started,
+            "duration": time.time() - self.started,
+            "counters": dict(sorted(counters.items())),
+            "histograms": {
+                name: histograms[name].to_dict() for name in sorted(histograms)
+            },
+        }
+
+    def to_prometheus(self: Self, prefix: str = METRIC_PREFIX) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Args:
+            prefix (str, optional):
+                A prefix for metric names. Defaults to METRIC_PREFIX.
+
+        Returns:
+            str:
+                The metrics as Prometheus text.
+        """
+        metrics = self.to_dict()
+        lines = []
+        for name, value in metrics["counters"].items():
+            lines += [f"# TYPE {prefix}{name} counter", f"{prefix}{name} {value}"]
+        for name, histogram in metrics["histograms"].items():
+            lines.append(f"# TYPE {prefix}{name} histogram")
+            lines += [
+                f'{prefix}{name}_bucket{{le="{bound}"}} {count}'
+                for bound, count in histogram["buckets"].items()
+            ]
+            lines += [
+                f"{prefix}{name}_sum {histogram['sum']}",
+                f"{prefix}{name}_count {histogram['count']}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self: Self, path: Union[str, pathlib.Path]) -> pathlib.Path:
+        """
+        Write every metric to a file, as JSON for a `.json` suffix and
+        as Prometheus text otherwise.
+
+        Args:
+            path (Union[str, pathlib.Path]):
+                The file to write.
+
+        Returns:
+            pathlib.Path:
+                The path written to.
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(self.to_dict(), indent=2)
+            if path.suffix == ".json"
+            else self.to_prometheus()
+        )
+        return path
+
+    def summary(self: Self) -> str:
+        """
+        Summarize the run as human-readable text.
+
+        Returns:
+            str:
+                One line per counter and histogram.
+        """
+        metrics = self.to_dict()
+        lines = [f"Instrumented run of {metrics['duration']:.1f}s"]
+        lines += [f"  {name}: {value:g}" for name, value in metrics["counters"].items()]
+        lines += [
+            f"  {name}: n={histogram['count']} sum={histogram['sum']:.4g} "
+            f"p50={histogram['p50']:.4g} p95={histogram['p95']:.4g} "
+            f"p99={histogram['p99']:.4g} max={histogram['max']:.4g}"
+            for name, histogram in metrics["histograms"].items()
+            if histogram["count"]
+        ]
+        return "\n".join(lines)
+
+
+# the active registry (None when instrumentation is disabled)
+_active: Optional[Instrumentation] = None
+# a reusable no-op context manager returned by timer when disabled
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def enable(instrumentation: Optional[Instrumentation] = None) -> Instrumentation:
+    """
+    Enable instrumentation, recording into the given or a new registry.
+
+    Args:
+        instrumentation (Optional[Instrumentation], optional):
+            The registry to record into. Defaults to a new registry.
+
+    Returns:
+        Instrumentation:
+            The active registry.
+    """
+    global _active  # noqa: PLW0603
+    _active = instrumentation if instrumentation is not None else Instrumentation()
+    return _active
+
+
+def disable() -> Optional[Instrumentation]:
+    """
+    Disable instrumentation.
+
+    Returns:
+        Optional[Instrumentation]:
+            The registry which was active, if any.
+    """
+    global _active
+    instrumentation, _active = _active, None
+    return instrumentation
+
+
+def active() -> Optional[Instrumentation]:
+    """
+    Get the active registry.
+
+    Returns:
+        Optional[Instrumentation]:
+            The active registry, or None when disabled.
+    """
+    return _active
+
+
+def timer(name: str) -> contextlib.AbstractContextManager:
+    """
+    Record the duration of a block when instrumentation is enabled.
+
+    Args:
+        name (str):
+            The metric name.
+
+    Returns:
+        contextlib.AbstractContextManager:
+            A context manager timing the block (a no-op when disabled).
+    """
+    instrumentation = _active
+    return _NULL_TIMER if instrumentation is None else instrumentation.timer(name)
+
+
+def observe(name: str, value: float, buckets: Sequence[float] = TIME_BUCKETS) -> None:
+    """
+    Record an observation when instrumentation is enabled.
+
+    Args:
+        name (str):
+            The metric name.
+        value (float):
+            The observed value.
+        buckets (Sequence[float], optional):
+            The bucket upper bounds used if the histogram is created.
+            Defaults to TIME_BUCKETS.
+    """
+    if (instrumentation := _active) is not None:
+        instrumentation.observe(name, value, buckets)
+
+
+def increment(name: str, amount: float = 1) -> None:
+    """
+    Increase a counter when instrumentation is enabled.
+
+    Args:
+        name (str):
+            The metric name.
+        amount (float, optional):
+            The amount to increase by. Defaults to 1.
+    """
+    if (instrumentation := _active) is not None:
+        instrumentation.increment(name, amount)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorate a function to record the duration of each call when
+    instrumentation is enabled.
+
+    Args:
+        name (str):
+            The metric name.
+
+    Returns:
+        Callable[[Callable], Callable]:
+            The decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+            if (instrumentation := _active) is None:
+                return func(*args, **kwargs)
+            with instrumentation.timer(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+@contextlib.contextmanager
+def instrument(
+    path: Optional[Union[str, pathlib.Path]] = None, summary: bool = True
+) -> Iterator[Instrumentation]:
+    """
+    Enable instrumentation for a block, then write the metrics and
+    print a summary of the run.
+
+    Args:
+        path (Optional[Union[str, pathlib.Path]], optional):
+            A file to write the metrics to (JSON for a `.json` suffix,
+            Prometheus text otherwise). Defaults to None.
+        summary (bool, optional):
+            Whether to print a summary when the block ends.
+            Defaults to True.
+
+    Yields:
+        Instrumentation:
+            The registry recording the block.
+    """
+    previous = _active
+    instrumentation = enable()
+    try:
+        yield instrumentation
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+        if path is not None:
+            instrumentation.write(path)
+        if summary:
+            print(instrumentation.summary())
@@ -0,0 +1,81 @@
+"""
+Module for deferring imports of heavy dependencies until first use.
+
+Importing pandas, requests or the neo4j driver takes up to a second
+each, which is paid by every worker process and command even when
+only a lightweight module (such as combination or sql) is used. A
+module imported with lazy_import is loaded on first attribute access.
+
+Modules use the lazy module at runtime while type checkers see the
+real module, with annotations quoted so they are not evaluated when
+functions are defined:
+
+    if TYPE_CHECKING:
+        import pandas as pd
+    else:
+        pd = lazy_import("pandas")
+"""
+
+import importlib
+import sys
+import threading
+import types
+from typing import Any, Self
+
+# serializes first imports, which may happen from many threads
+_import_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """
+    A module which is imported on first attribute access.
+
+    Attribute access is always passed on to the imported module (rather
+    than copying its attributes) so that later changes to the module,
+    such as patches in tests, are seen through the lazy module.
+    """
+
+    def __init__(self: Self, name: str) -> None:
+        """
+        Initialize the lazy module without importing it.
+
+        Args:
+            name (str):
+                The absolute name of the module to import.
+        """
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self: Self) -> types.ModuleType:
+        """
+        Import the module on first use.
+        """
+        if (module := self.__dict__["_module"]) is None:
+            with _import_lock:
+                module = importlib.import_module(self.__name__)
+                self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self: Self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self._load(), name)
+
+    def __dir__(self: Self) -> list:
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Import a module lazily, on first attribute access.
+
+    Args:
+        name (str):
+            The absolute name of the module (for example "pandas" or
+            "pyarrow.parquet").
+
+    Returns:
+        types.ModuleType:
+            The module if it has already been imported, otherwise a
+            LazyModule which imports it when first used.
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,305 @@
+"""
+Module for exporting metapath scores as dense (source x target) matrices.
+
+Each matrix is a float32 `.npy` file which may be memory-mapped so that
+analyses can slice rows (sources) without a query engine. An axis index
+(`axes.json`) records the row, column and metapath order and the file
+which holds each matrix.
+"""
+
+import json
+import pathlib
+import urllib.parse
+from typing import Dict, List, Optional, Self, Sequence, Tuple, Union
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+from pyarrow import csv
+
+from hetionet_utils.query import fetch_arrow_reader
+from hetionet_utils.sql import quote_sql_string
+from hetionet_utils.subset import Metapaths, register_metapaths
+
+# score columns written as matrices by default
+SCORE_COLUMNS = ("dwpc", "p_value")
+
+# name of the axis index within a matrix directory
+AXES_FILE = "axes.json"
+
+# types accepted as an axis (a CSV file with an `id` column or identifiers)
+Axis = Union[str, pathlib.Path, List[str]]
+
+
+def read_axis(axis: Axis) -> List[str]:
+    """
+    Read the identifiers of a matrix axis.
+
+    Args:
+        axis (Axis):
+            A path to a CSV file with an `id` column
+            (for example BP.csv or Gene.csv) or a list of identifiers.
+
+    Returns:
+        List[str]:
+            The identifiers, as strings, in their original order.
+    """
+    if isinstance(axis, (str, pathlib.Path)):
+        # identifiers are read as strings (including Entrez gene IDs)
+        return csv.read_csv(
+            axis, convert_options=csv.ConvertOptions(column_types={"id": pa.string()})
+        )["id"].to_pylist()
+    return [str(identifier) for identifier in axis]
+
+
+def matrix_filename(metapath: str, value: str) -> str:
+    """
+    Get the filename of a matrix, quoting characters such as `>`
+    which are used by directed metapath abbreviations.
+
+    Args:
+        metapath (str):
+            The metapath abbreviation.
+        value (str):
+            The score column (for example "dwpc").
+
+    Returns:
+        str:
+            The matrix filename.
+    """
+    return f"{urllib.parse.quote(metapath, safe='')}.{value}.npy"
+
+
+def write_score_matrices(  # noqa: PLR0913
+    metapath_data: Union[str, pathlib.Path],
+    rows: Axis,
+    columns: Axis,
+    output_dir: Union[str, pathlib.Path],
+    metapaths: Optional[Metapaths] = None,
+    values: Sequence[str] = SCORE_COLUMNS,
+    fill: float = np.nan,
+    batch_size: int = 1_000_000,
+) -> pathlib.Path:
+    """
+    Write one dense float32 matrix per metapath and score column from
+    the precalculated metapath data.
+
+    The data is scanned once and streamed in batches into memory-mapped
+    matrices, so memory use does not depend on the size of the data.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path]):
+            Path (or glob) for the precalculated metapath Parquet data.
+        rows (Axis):
+            The source identifiers for the matrix rows, as a CSV file
+            with an `id` column (for example BP.csv) or a list.
+        columns (Axis):
+            The target identifiers for the matrix columns, as a CSV file
+            with an `id` column (for example Gene.csv) or a list.
+        output_dir (Union[str, pathlib.Path]):
+            The directory to write the matrices and axis index to.
+        metapaths (Optional[Metapaths], optional):
+            The metapaths to write. If None, every metapath in the data
+            is written. Defaults to None.
+        values (Sequence[str], optional):
+            The score columns to write. Defaults to dwpc and p_value.
+        fill (float, optional):
+            The value for pairs without a row in the data.
+            Defaults to NaN.
+        batch_size (int, optional):
+            The number of rows streamed at a time. Defaults to 1_000_000.
+
+    Returns:
+        pathlib.Path:
+            The path to the axis index.
+    """
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    row_ids = read_axis(rows)
+    column_ids = read_axis(columns)
+    source = f"read_parquet({quote_sql_string(metapath_data)})"
+
+    with duckdb.connect() as ddb:
+        if metapaths is None:
+            metapath_ids = [
+                metapath
+                for (metapath,) in ddb.execute(
+                    f"SELECT DISTINCT metapath_id FROM {source} ORDER BY metapath_id"
+                ).fetchall()
+            ]
+        else:
+            table = register_metapaths(ddb, metapaths)
+            metapath_ids = list(
+                dict.fromkeys(
+                    metapath
+                    for (metapath,) in ddb.execute(
+                        f"SELECT metapath FROM {table}"
+                    ).fetchall()
+                )
+            )
+
+        for name, identifiers in (
+            ("row_axis", row_ids),
+            ("column_axis", column_ids),
+            ("metapath_axis", metapath_ids),
+        ):
+            ddb.register(
+                name,
+                pa.table(
+                    {
+                        "identifier": pa.array(identifiers, type=pa.string()),
+                        "position": pa.array(range(len(identifiers)), type=pa.int32()),
+                    }
+                ),
+            )
+
+        shape = (len(row_ids), len(column_ids))
+        files: Dict[str, Dict[str, str]] = {}
+        matrices: Dict[Tuple[int, str], np.memmap] = {}
+        for metapath_position, metapath in enumerate(metapath_ids):
+            files[metapath] = {}
+            for value in values:
+                files[metapath][value] = matrix_filename(metapath, value)
+                matrix = np.lib.format.open_memmap(
+                    output_dir / files[metapath][value],
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=shape,
+                )
+                matrix[:] = fill
+                matrices[(metapath_position, value)] = matrix
+
+        reader = fetch_arrow_reader(
+            ddb.execute(
+                f"""
+                SELECT
+                    metapath_axis.position AS metapath_position,
+                    row_axis.position AS row_position,
+                    column_axis.position AS column_position,
+                    {", ".join(f"data.{value}" for value in values)}
+                FROM {source} AS data
+                JOIN metapath_axis ON
+                    data.metapath_id = metapath_axis.identifier
+                JOIN row_axis ON
+                    CAST(data.source_identifier AS VARCHAR) = row_axis.identifier
+                JOIN column_axis ON
+                    CAST(data.target_identifier AS VARCHAR) = column_axis.identifier
+                """
+            ),
+            batch_size,
+        )
+        for batch in reader:
+            metapath_positions = batch["metapath_position"].to_numpy()
+            row_positions = batch["row_position"].to_numpy()
+            column_positions = batch["column_position"].to_numpy()
+            for metapath_position in np.unique(metapath_positions):
+                mask = metapath_positions == metapath_position
+                for value in values:
+                    matrices[(metapath_position, value)][
+                        row_positions[mask], column_positions[mask]
+                    ] = batch[value].to_numpy(zero_copy_only=False)[mask]
+
+    for matrix in matrices.values():
+        matrix.flush()
+
+    axes_file = output_dir / AXES_FILE
+    axes_file.write_text(
+        json.dumps(
+            {
+                "dtype": "float32",
+                "shape": list(shape),
+                "values": list(values),
+                "rows": row_ids,
+                "columns": column_ids,
+                "metapaths": files,
+            }
+        )
+    )
+    return axes_file
+
+
+class ScoreMatrices:
+    """
+    Read-only access to matrices written by write_score_matrices.
+
+    Attributes:
+        directory (pathlib.Path):
+            The directory holding the matrices and axis index.
+        rows (List[str]):
+            The source identifiers, in row order.
+        columns (List[str]):
+            The target identifiers, in column order.
+        metapaths (List[str]):
+            The metapaths with matrices.
+    """
+
+    def __init__(self: Self, directory: Union[str, pathlib.Path]) -> None:
+        """
+        Load the axis index of a matrix directory.
+
+        Args:
+            directory (Union[str, pathlib.Path]):
+                The directory holding the matrices and axis index.
+        """
+        self.directory = pathlib.Path(directory)
+        axes = json.loads((self.directory / AXES_FILE).read_text())
+        self.rows = axes["rows"]
+        self.columns = axes["columns"]
+        self.metapaths = list(axes["metapaths"])
+        self._files = axes["metapaths"]
+        self._row_positions = {row: position for position, row in enumerate(self.rows)}
+        self._column_positions = {
+            column: position for position, column in enumerate(self.columns)
+        }
+
+    def matrix(self: Self, metapath: str, value: str = "dwpc") -> np.ndarray:
+        """
+        Memory-map the matrix for a metapath and score column.
+
+        Args:
+            metapath (str):
+                The metapath abbreviation.
+            value (str, optional):
+                The score column. Defaults to "dwpc".
+
+        Returns:
+            np.ndarray:
+                The read-only (sources x targets) matrix.
+        """
+        return np.load(self.directory / self._files[metapath][value], mmap_mode="r")
+
+    def row(
+        self: Self, metapath: str, identifier: Union[str, int], value: str = "dwpc"
+    ) -> np.ndarray:
+        """
+        Get the scores of one source for every target.
+
+        Args:
+            metapath (str):
+                The metapath abbreviation.
+            identifier (Union[str, int]):
+                The source identifier (for example "GO:0000002").
+            value (str, optional):
+                The score column. Defaults to "dwpc".
+
+        Returns:
+            np.ndarray:
+                The scores, ordered by the column axis.
+        """
+        return np.asarray(
+            self.matrix(metapath, value)[self._row_positions[str(identifier)]]
+        )
+
+    def column_position(self: Self, identifier: Union[str, int]) -> int:
+        """
+        Get the column position of a target identifier.
+
+        Args:
+            identifier (Union[str, int]):
+                The target identifier (for example an Entrez gene ID).
+
+        Returns:
+            int:
+                The column position.
+        """
+        return self._column_positions[str(identifier)]
@@ -0,0 +1,243 @@
+"""
+Module for working with the Hetionet metagraph (node kinds, edge kinds and
+metapath abbreviations).
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Tuple
+
+# abbreviations for each Hetionet node kind (metanode)
+METANODES: Dict[str, str] = {
+    "A": "Anatomy",
+    "BP": "Biological Process",
+    "C": "Compound",
+    "CC": "Cellular Component",
+    "D": "Disease",
+    "G": "Gene",
+    "MF": "Molecular Function",
+    "PC": "Pharmacologic Class",
+    "PW": "Pathway",
+    "S": "Symptom",
+    "SE": "Side Effect",
+}
+
+# canonical Hetionet edge kinds (metaedges) as
+# (source abbreviation, edge abbreviation, target abbreviation, directed)
+METAEDGES: List[Tuple[str, str, str, bool]] = [
+    ("A", "d", "G", False),
+    ("A", "e", "G", False),
+    ("A", "u", "G", False),
+    ("C", "b", "G", False),
+    ("C", "c", "SE", False),
+    ("C", "d", "G", False),
+    ("C", "p", "D", False),
+    ("C", "r", "C", False),
+    ("C", "t", "D", False),
+    ("C", "u", "G", False),
+    ("D", "a", "G", False),
+    ("D", "d", "G", False),
+    ("D", "l", "A", False),
+    ("D", "p", "S", False),
+    ("D", "r", "D", False),
+    ("D", "u", "G", False),
+    ("G", "c", "G", False),
+    ("G", "i", "G", False),
+    ("G", "p", "BP", False),
+    ("G", "p", "CC", False),
+    ("G", "p", "MF", False),
+    ("G", "p", "PW", False),
+    ("G", "r", "G", True),
+    ("PC", "i", "C", False),
+]
+
+# full names for the edge abbreviations, used to build relationship types
+EDGE_NAMES: Dict[str, str] = {
+    "a": "ASSOCIATES",
+    "b": "BINDS",
+    "c": "COVARIES",
+    "d": "DOWNREGULATES",
+    "e": "EXPRESSES",
+    "i": "INTERACTS",
+    "l": "LOCALIZES",
+    "p": "PARTICIPATES",
+    "r": "REGULATES",
+    "t": "TREATS",
+    "u": "UPREGULATES",
+}
+
+# edge abbreviations which differ based on the pair of node kinds
+EDGE_NAME_OVERRIDES: Dict[Tuple[str, str, str], str] = {
+    ("C", "c", "SE"): "CAUSES",
+    ("C", "p", "D"): "PALLIATES",
+    ("C", "r", "C"): "RESEMBLES",
+    ("D", "p", "S"): "PRESENTS",
+    ("D", "r", "D"): "RESEMBLES",
+    ("PC", "i", "C"): "INCLUDES",
+}
+
+# splits a metapath abbreviation into node and edge tokens
+_METAPATH_TOKEN_PATTERN = re.compile(r"[A-Z]+|<?[a-z]+>?")
+
+
+class MetapathStep(NamedTuple):
+    """
+    A single edge traversal along a metapath.
+
+    Attributes:
+        source (str):
+            Abbreviation of the node kind the step starts from.
+        target (str):
+            Abbreviation of the node kind the step ends at.
+        metaedge (str):
+            Canonical metaedge abbreviation (for example "AdG").
+        rel_type (str):
+            Neo4j relationship type for the metaedge
+            (for example "DOWNREGULATES_AdG").
+        direction (str):
+            One of "both", "forward" (canonical source to canonical
+            target) or "backward".
+        reverse (bool):
+            Whether the step walks the canonical metaedge from its
+            target towards its source.
+    """
+
+    source: str
+    target: str
+    metaedge: str
+    rel_type: str
+    direction: str
+    reverse: bool
+
+
+def _find_metaedge(
+    source: str, edge: str, target: str
+) -> Tuple[Tuple[str, str, str, bool], bool]:
+    """
+    Finds the canonical metaedge for a pair of node kinds and an
+    edge abbreviation, returning it alongside whether it was reversed.
+    """
+    for metaedge in METAEDGES:
+        if metaedge[:3] == (source, edge, target):
+            return metaedge, False
+        if metaedge[:3] == (target, edge, source):
+            return metaedge, True
+
+    raise ValueError(f"Unknown metaedge {source}{edge}{target}.")
+
+
+def parse_metapath(metapath: str) -> List[MetapathStep]:
+    """
+    Parses a metapath abbreviation (for example "BPpGr>G") into steps.
+
+    Args:
+        metapath (str):
+            The metapath abbreviation to parse.
+
+    Returns:
+        List[MetapathStep]:
+            One step per edge within the metapath, in traversal order.
+
+    Raises:
+        ValueError:
+            If the abbreviation is malformed or references an
+            unknown node or edge kind.
+    """
+    tokens = _METAPATH_TOKEN_PATTERN.findall(metapath)
+    if (
+        "".join(tokens) != metapath
+        or len(tokens) < 3  # noqa: PLR2004
+        or len(tokens) % 2 == 0
+    ):
+        raise ValueError(f"Malformed metapath abbreviation {metapath!r}.")
+
+    steps = []
+    for source, edge, target in zip(tokens[0::2], tokens[1::2], tokens[2::2]):
+        for node in (source, target):
+            if node not in METANODES:
+                raise ValueError(f"Unknown metanode {node!r} in {metapath!r}.")
+
+        edge_abbrev = edge.strip("<>")
+        (meta_source, _, meta_target, directed), reverse = _find_metaedge(
+            source, edge_abbrev, target
+        )
+        # directed edges must declare a direction and undirected must not
+        if directed != (edge != edge_abbrev):
+            raise ValueError(f"Invalid edge direction {edge!r} in {metapath!r}.")
+
+        direction = "both"
+        if directed:
+            direction = "forward" if edge.endswith(">") else "backward"
+
+        name = EDGE_NAME_OVERRIDES.get(
+            (meta_source, edge_abbrev, meta_target), EDGE_NAMES[edge_abbrev]
+        )
+        steps.append(
+            MetapathStep(
+                source=source,
+                target=target,
+                metaedge=f"{meta_source}{edge_abbrev}{meta_target}",
+                rel_type=f"{name}_{meta_source}{edge_abbrev}{meta_target}",
+                direction=direction,
+                reverse=reverse,
+            )
+        )
+
+    return steps
+
+
+def build_metapath_cypher(metapath: str, damping: float = 0.5) -> str:
+    """
+    Builds a Cypher query which returns every path from a source node
+    along a metapath, alongside each path's degree-weighted
+    path product (PDP).
+
+    The query expects a `$source` parameter containing the source
+    node identifier and returns one record per path with the keys
+    "target_id", "node_ids", "rel_ids" and "PDP". Paths which visit
+    the same node more than once are excluded.
+
+    Args:
+        metapath (str):
+            The metapath abbreviation to build a query for.
+        damping (float, optional):
+            The damping exponent applied to node degrees.
+            Defaults to 0.5.
+
+    Returns:
+        str:
+            The Cypher query.
+    """
+    steps = parse_metapath(metapath)
+
+    pattern = f"(n0:`{METANODES[steps[0].source]}`)"
+    degrees = []
+    for i, step in enumerate(steps):
+        left, right = "-", "-"
+        if step.direction == "forward":
+            right = "->"
+        elif step.direction == "backward":
+            left = "<-"
+        rel = f"{left}[:{step.rel_type}]{right}"
+        pattern += f"{rel}(n{i + 1}:`{METANODES[step.target]}`)"
+        degrees.extend(
+            [
+                f"size([(n{i}){rel}() | 1])",
+                f"size([(){rel}(n{i + 1}) | 1])",
+            ]
+        )
+
+    return f"""
+        MATCH path = {pattern}
+        WHERE
+          n0.identifier = $source
+          AND ALL(x IN nodes(path) WHERE single(y IN nodes(path) WHERE y = x))
+        WITH
+          path,
+          n{len(steps)}.identifier AS target_id,
+          [{", ".join(degrees)}] AS degrees
+        RETURN
+          target_id,
+          [node IN nodes(path) | id(node)] AS node_ids,
+          [rel IN relationships(path) | id(rel)] AS rel_ids,
+          reduce(pdp = 1.0, degree IN degrees | pdp * degree ^ -{damping}) AS PDP
+        """
@@ -0,0 +1,260 @@
+"""
+Module for parsing search API responses into Arrow tables
+within a pool of processes.
+
+JSON decoding and table building hold the GIL, so parsing in threads
+is limited to about one core. Here responses are parsed in worker
+processes which write Arrow IPC streams into shared memory. The parent
+memory-maps each stream (zero-copy where the platform exposes shared
+memory as files, such as /dev/shm on Linux) rather than receiving
+pickled results.
+"""
+
+import json
+import multiprocessing
+import os
+import pathlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Iterable, Iterator, Optional, Self, Tuple, Union
+
+import pyarrow as pa
+
+# directory where POSIX shared memory blocks are visible as files
+SHARED_MEMORY_DIR = pathlib.Path("/dev/shm")
+
+
+def metapath_content_to_arrow(
+    content: bytes,
+    source_id: Union[str, int],
+    target_id: Union[str, int],
+    schema: Optional[pa.Schema] = None,
+) -> pa.Table:
+    """
+    Parse the content of a REST API metapath response into an Arrow Table.
+
+    Args:
+        content (bytes):
+            The JSON response content.
+        source_id (Union[str, int]):
+            The identifier for the source node.
+        target_id (Union[str, int]):
+            The identifier for the target node.
+        schema (Optional[pa.Schema], optional):
+            A schema to conform the table to, selecting and casting its
+            columns (columns missing from the response are null).
+            If None, all columns are included with inferred types.
+            Defaults to None.
+
+    Returns:
+        pa.Table:
+            The response paths with a 'source_id' and 'target_id'
+            column with the identifiers for context.
+    """
+    paths = json.loads(content)["paths"]
+    table = pa.Table.from_pylist(paths)
+    table = table.append_column(
+        "source_id", pa.array([source_id] * len(paths))
+    ).append_column("target_id", pa.array([target_id] * len(paths)))
+    if schema is None:
+        return table
+
+    return pa.table(
+        {
+            field.name: (
+                table[field.name].cast(field.type)
+                if field.name in table.column_names
+                else pa.nulls(len(paths), field.type)
+            )
+            for field in schema
+        },
+        schema=schema.remove_metadata(),
+    )
+
+
+def _parse_to_shared_memory(
+    content: bytes,
+    source_id: Union[str, int],
+    target_id: Union[str, int],
+    schema: Optional[pa.Schema],
+) -> Tuple[str, int]:
+    """
+    Parse a response in a worker process, writing the table as an Arrow
+    IPC stream into a new shared memory block.
+
+    Returns the name of the block and the size of the stream. The block
+    is left for the parent to read and unlink.
+    """
+    table = metapath_content_to_arrow(content, source_id, target_id, schema)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    stream = sink.getvalue()
+
+    block = shared_memory.SharedMemory(create=True, size=max(stream.size, 1))
+    try:
+        block.buf[: stream.size] = memoryview(stream).cast("B")
+    except BaseException:
+        block.unlink()
+        raise
+    finally:
+        block.close()
+    return block.name, stream.size
+
+
+def _read_shared_memory(name: str, size: int) -> pa.Table:
+    """
+    Read an Arrow IPC stream from a shared memory block and unlink it.
+
+    Where the block is visible as a file it is memory-mapped, so the
+    table references the shared memory without copying and the memory
+    is released once the table is garbage collected. Otherwise the
+    stream is copied out of the block.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        if (path := SHARED_MEMORY_DIR / name).exists():
+            source = pa.memory_map(str(path))
+        else:
+            source = pa.py_buffer(bytes(block.buf[:size]))
+        with pa.ipc.open_stream(source) as reader:
+            return reader.read_all()
+    finally:
+        block.close()
+        block.unlink()
+
+
+class ArrowParsePool:
+    """
+    A pool of processes parsing search API responses into Arrow tables.
+
+    Attributes:
+        processes (int):
+            The number of worker processes.
+        schema (Optional[pa.Schema]):
+            The schema parsed tables are conformed to, if any.
+    """
+
+    def __init__(
+        self: Self,
+        processes: Optional[int] = None,
+        schema: Optional[pa.Schema] = None,
+        context: str = "spawn",
+    ) -> None:
+        """
+        Start the pool.
+
+        Args:
+            processes (Optional[int], optional):
+                The number of worker processes.
+                Defaults to the number of CPUs.
+            schema (Optional[pa.Schema], optional):
+                A schema to conform parsed tables to (see
+                metapath_content_to_arrow). Defaults to None.
+            context (str, optional):
+                The multiprocessing start method. Defaults to "spawn",
+                which is safe to use from threaded programs.
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.schema = schema
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context(context),
+        )
+
+    def submit(
+        self: Self,
+        content: bytes,
+        source_id: Union[str, int],
+        target_id: Union[str, int],
+    ) -> "Future[Tuple[str, int]]":
+        """
+        Submit a response for parsing.
+
+        Args:
+            content (bytes):
+                The JSON response content.
+            source_id (Union[str, int]):
+                The identifier for the source node.
+            target_id (Union[str, int]):
+                The identifier for the target node.
+
+        Returns:
+            Future[Tuple[str, int]]:
+                A future for the shared memory block holding the
+                result, to be passed to `result`.
+        """
+        return self._executor.submit(
+            _parse_to_shared_memory, content, source_id, target_id, self.schema
+        )
+
+    @staticmethod
+    def result(future: "Future[Tuple[str, int]]") -> pa.Table:
+        """
+        Wait for a submitted response and read its table.
+
+        Args:
+            future (Future[Tuple[str, int]]):
+                The future returned by `submit`.
+
+        Returns:
+            pa.Table:
+                The parsed table.
+        """
+        return _read_shared_memory(*future.result())
+
+    def parse(
+        self: Self,
+        content: bytes,
+        source_id: Union[str, int],
+        target_id: Union[str, int],
+    ) -> pa.Table:
+        """
+        Parse a response in a worker process, blocking until it is done.
+
+        This may be called from many threads (for example from a
+        pipeline stage with one worker per process).
+
+        Args:
+            content (bytes):
+                The JSON response content.
+            source_id (Union[str, int]):
+                The identifier for the source node.
+            target_id (Union[str, int]):
+                The identifier for the target node.
+
+        Returns:
+            pa.Table:
+                The parsed table.
+        """
+        return self.result(self.submit(content, source_id, target_id))
+
+    def map(
+        self: Self, responses: Iterable[Tuple[bytes, Union[str, int], Union[str, int]]]
+    ) -> Iterator[pa.Table]:
+        """
+        Parse responses across the pool.
+
+        Args:
+            responses (Iterable[Tuple[bytes, Union[str, int], Union[str, int]]]):
+                Tuples of response content, source ID and target ID.
+
+        Yields:
+            pa.Table:
+                The parsed table for each response, in order.
+        """
+        futures = [self.submit(*response) for response in responses]
+        for future in futures:
+            yield self.result(future)
+
+    def close(self: Self) -> None:
+        """
+        Shut down the worker processes.
+        """
+        self._executor.shutdown()
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
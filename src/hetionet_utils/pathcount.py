@@ -0,0 +1,541 @@
+"""
+Module for restoring the connectivity-search PathCount tables from the
+PostgreSQL database archive (connectivity-search-pg_dump.sql.gz) into
+DuckDB.
+
+The stages (download, table extraction, loading, Parquet export and
+indexing) are used by get_tables.py and the `hetionet-utils extract`
+command, which build them as steps of a BuildCache (see buildcache.py)
+so that only stale stages are rebuilt.
+"""
+
+import functools
+import gzip
+import multiprocessing
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple, Union
+
+from hetionet_utils.buildcache import BuildStep
+from hetionet_utils.lazy import lazy_import
+from hetionet_utils.progress import ProgressCallback, execute_with_progress
+from hetionet_utils.sql import (
+    extract_and_write_sql_block,
+    remove_first_and_last_line_of_file,
+)
+
+# duckdb, requests and the export modules are imported on first use
+# (see lazy.py)
+if TYPE_CHECKING:
+    import duckdb
+    import requests
+
+    from hetionet_utils import export, index
+else:
+    duckdb = lazy_import("duckdb")
+    requests = lazy_import("requests")
+    export = lazy_import("hetionet_utils.export")
+    index = lazy_import("hetionet_utils.index")
+
+# url for the connectivity-search database archive
+# (see https://zenodo.org/records/3978766)
+PATHCOUNT_ARCHIVE_URL = (
+    "https://zenodo.org/records/3978766/files/"
+    "connectivity-search-pg_dump.sql.gz?download=1"
+)
+
+# expected number of tables within the archive
+EXPECTED_TABLE_COUNT = 15
+
+
+def duckdb_config(
+    threads: Optional[int] = None, memory_limit: Optional[str] = None
+) -> Dict[str, Union[str, int]]:
+    """
+    Build a DuckDB configuration from optional settings.
+
+    Args:
+        threads (Optional[int], optional):
+            The number of DuckDB threads. If None, DuckDB decides.
+            Defaults to None.
+        memory_limit (Optional[str], optional):
+            The DuckDB memory limit (for example "4GB").
+            If None, DuckDB decides. Defaults to None.
+
+    Returns:
+        Dict[str, Union[str, int]]:
+            The configuration for duckdb.connect.
+    """
+    config: Dict[str, Union[str, int]] = {}
+    if threads is not None:
+        config["threads"] = threads
+    if memory_limit is not None:
+        config["memory_limit"] = memory_limit
+    return config
+
+
+def download_archive(
+    url: str, sql_file: Union[str, pathlib.Path], chunk_size: int = 8192
+) -> pathlib.Path:
+    """
+    Download the database archive.
+
+    The archive is streamed to a temporary file which is moved into
+    place once complete, so an interrupted download leaves no archive.
+
+    Args:
+        url (str):
+            The url of the archive.
+        sql_file (Union[str, pathlib.Path]):
+            Where to write the archive.
+        chunk_size (int, optional):
+            The number of bytes written at a time. Defaults to 8192.
+
+    Returns:
+        pathlib.Path:
+            The path to the archive.
+    """
+    sql_file = pathlib.Path(sql_file)
+    partial_file = sql_file.with_name(f"{sql_file.name}.part")
+
+    response = requests.get(url, stream=True)
+    response.raise_for_status()
+    with open(partial_file, "wb") as file:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                file.write(chunk)
+    partial_file.replace(sql_file)
+    return sql_file
+
+
+def verify_archive(
+    sql_file: Union[str, pathlib.Path], chunk_size: int = 1 << 20
+) -> bool:
+    """
+    Check that the database archive decompresses to its end, which a
+    truncated download does not.
+
+    Args:
+        sql_file (Union[str, pathlib.Path]):
+            The path to the archive.
+        chunk_size (int, optional):
+            The number of bytes decompressed at a time.
+            Defaults to 1 MiB.
+
+    Returns:
+        bool:
+            True if the archive is complete.
+    """
+    try:
+        with gzip.open(sql_file, "rb") as f:
+            while f.read(chunk_size):
+                pass
+    except (EOFError, OSError):
+        return False
+    return True
+
+
+def list_dump_tables(
+    sql_file: Union[str, pathlib.Path],
+    expected_table_count: int = EXPECTED_TABLE_COUNT,
+) -> List[str]:
+    """
+    List the tables created within the database archive.
+
+    Args:
+        sql_file (Union[str, pathlib.Path]):
+            The path to the archive.
+        expected_table_count (int, optional):
+            The number of tables to find before reading stops (the
+            table definitions precede the data). Defaults to 15.
+
+    Returns:
+        List[str]:
+            The table names (for example "public.dj_hetmech_app_node").
+    """
+    table_names = []
+    with gzip.open(sql_file, "rt") as f:
+        for line in f:
+            # gather a cleaned up table name from the creation statements
+            if "CREATE TABLE" in line:
+                table_names.append(
+                    line.strip().replace(" (", "").replace("CREATE TABLE ", "")
+                )
+                if len(table_names) == expected_table_count:
+                    break
+    return table_names
+
+
+def table_files(
+    table_name: str, tables_dir: Union[str, pathlib.Path] = "."
+) -> Tuple[pathlib.Path, pathlib.Path]:
+    """
+    Get the paths of the files extracted for a table.
+
+    Args:
+        table_name (str):
+            The table name.
+        tables_dir (Union[str, pathlib.Path], optional):
+            The directory holding the extracted files. Defaults to ".".
+
+    Returns:
+        Tuple[pathlib.Path, pathlib.Path]:
+            The table creation SQL file and tab-delimited data file.
+    """
+    tables_dir = pathlib.Path(tables_dir)
+    return (
+        tables_dir / f"create_table.{table_name}.sql",
+        tables_dir / f"copy_data.{table_name}.tsv",
+    )
+
+
+def extract_dump_table(
+    sql_file: Union[str, pathlib.Path],
+    table_name: str,
+    tables_dir: Union[str, pathlib.Path] = ".",
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[pathlib.Path, pathlib.Path]:
+    """
+    Extract the creation statement and data of a table from the archive.
+
+    Args:
+        sql_file (Union[str, pathlib.Path]):
+            The path to the archive.
+        table_name (str):
+            The table name.
+        tables_dir (Union[str, pathlib.Path], optional):
+            The directory to write the extracted files to.
+            Defaults to ".".
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates while the archive is
+            read. Defaults to None.
+
+    Returns:
+        Tuple[pathlib.Path, pathlib.Path]:
+            The table creation SQL file and tab-delimited data file.
+    """
+    create_file, copy_file = table_files(table_name, tables_dir)
+    create_file.parent.mkdir(parents=True, exist_ok=True)
+    extract_and_write_sql_block(
+        sql_file=str(sql_file),
+        sql_start=f"CREATE TABLE {table_name}",
+        sql_end=";",
+        output_file=str(create_file),
+    )
+    if extract_and_write_sql_block(
+        sql_file=str(sql_file),
+        sql_start=f"COPY {table_name}",
+        sql_end="\\.",
+        output_file=str(copy_file),
+        progress=progress,
+    ):
+        # remove the header and data termination lines of the copy block
+        remove_first_and_last_line_of_file(str(copy_file), progress=progress)
+    else:
+        copy_file.write_text("")
+    return create_file, copy_file
+
+
+def extract_dump_tables(
+    sql_file: Union[str, pathlib.Path],
+    table_names: Sequence[str],
+    tables_dir: Union[str, pathlib.Path] = ".",
+    workers: int = 1,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Tuple[pathlib.Path, pathlib.Path]]:
+    """
+    Extract the creation statements and data of tables from the archive.
+
+    Each table is found by reading the archive, so tables may be
+    extracted in parallel across worker processes.
+
+    Args:
+        sql_file (Union[str, pathlib.Path]):
+            The path to the archive.
+        table_names (Sequence[str]):
+            The tables to extract.
+        tables_dir (Union[str, pathlib.Path], optional):
+            The directory to write the extracted files to.
+            Defaults to ".".
+        workers (int, optional):
+            The number of worker processes. Defaults to 1, which
+            extracts the tables in this process.
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates while the archive is
+            read (which must be picklable when workers > 1).
+            Defaults to None.
+
+    Returns:
+        List[Tuple[pathlib.Path, pathlib.Path]]:
+            The files extracted for each table, in order.
+    """
+    if workers <= 1:
+        return [
+            extract_dump_table(sql_file, table_name, tables_dir, progress)
+            for table_name in table_names
+        ]
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(
+                extract_dump_table, sql_file, table_name, tables_dir, progress
+            )
+            for table_name in table_names
+        ]
+        return [future.result() for future in futures]
+
+
+def load_dump_tables(
+    duckdb_filename: Union[str, pathlib.Path],
+    table_names: Sequence[str],
+    tables_dir: Union[str, pathlib.Path] = ".",
+    config: Optional[Dict[str, Union[str, int]]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Dict[str, int]:
+    """
+    Create and populate tables within a DuckDB database from the files
+    extracted by extract_dump_tables.
+
+    Tables which already exist are not created again and tables which
+    already hold rows are not populated again.
+
+    Args:
+        duckdb_filename (Union[str, pathlib.Path]):
+            The DuckDB database file.
+        table_names (Sequence[str]):
+            The tables to load.
+        tables_dir (Union[str, pathlib.Path], optional):
+            The directory holding the extracted files. Defaults to ".".
+        config (Optional[Dict[str, Union[str, int]]], optional):
+            DuckDB configuration (see duckdb_config). Defaults to None.
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates while data is loaded.
+            Defaults to None.
+
+    Returns:
+        Dict[str, int]:
+            The number of rows in each table (named without "public.").
+    """
+    row_counts = {}
+    with duckdb.connect(str(duckdb_filename), config=config or {}) as ddb:
+        existing = {row[0] for row in ddb.execute("SHOW TABLES").fetchall()}
+        for table_name in table_names:
+            create_file, copy_file = table_files(table_name, tables_dir)
+            name = table_name.replace("public.", "")
+            if name not in existing:
+                # replace "public." for table naming, and "jsonb" to
+                # align data typing from postgres to duckdb (duckdb
+                # includes no "jsonb" type but is compatible with the
+                # insertion data in the form "json").
+                ddb.execute(
+                    create_file.read_text()
+                    .replace("public.", "")
+                    .replace("jsonb", "json")
+                )
+
+            # only populate the table if it is empty and we have data
+            row_counts[name] = ddb.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+            if row_counts[name] == 0 and os.path.getsize(copy_file) > 0:
+                execute_with_progress(
+                    ddb,
+                    f"""
+                    COPY {name}
+                    FROM '{copy_file}'
+                    (DELIMITER '\t', HEADER false);
+                    """,
+                    progress=progress,
+                    total=os.path.getsize(copy_file),
+                    label=f"load {name}",
+                )
+                row_counts[name] = ddb.execute(
+                    f"SELECT COUNT(*) FROM {name}"
+                ).fetchone()[0]
+    return row_counts
+
+
+def archive_step(
+    sql_file: Union[str, pathlib.Path], url: str = PATHCOUNT_ARCHIVE_URL
+) -> BuildStep:
+    """
+    Describe downloading the database archive as a build step.
+
+    An archive downloaded before the build cache was used is kept if it
+    is complete (see verify_archive).
+
+    Args:
+        sql_file (Union[str, pathlib.Path]):
+            Where to write the archive.
+        url (str, optional):
+            The url of the archive. Defaults to PATHCOUNT_ARCHIVE_URL.
+
+    Returns:
+        BuildStep:
+            The download step.
+    """
+    return BuildStep(
+        name="archive",
+        func=functools.partial(download_archive, url, sql_file),
+        outputs=[sql_file],
+        params={"url": url},
+        verify=functools.partial(verify_archive, sql_file),
+    )
+
+
+def table_steps(
+    sql_file: Union[str, pathlib.Path],
+    table_names: Sequence[str],
+    tables_dir: Union[str, pathlib.Path] = ".",
+    progress: Optional[ProgressCallback] = None,
+) -> List[BuildStep]:
+    """
+    Describe extracting each table from the archive as a build step.
+
+    The steps are independent, so stale tables may be extracted in
+    parallel (see BuildCache.build).
+
+    Args:
+        sql_file (Union[str, pathlib.Path]):
+            The path to the archive.
+        table_names (Sequence[str]):
+            The tables to extract.
+        tables_dir (Union[str, pathlib.Path], optional):
+            The directory to write the extracted files to.
+            Defaults to ".".
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates while the archive is
+            read (which must be picklable when built in parallel).
+            Defaults to None.
+
+    Returns:
+        List[BuildStep]:
+            An extraction step for each table.
+    """
+    return [
+        BuildStep(
+            name=f"table:{table_name}",
+            func=functools.partial(
+                extract_dump_table, sql_file, table_name, tables_dir, progress
+            ),
+            inputs=[sql_file],
+            outputs=table_files(table_name, tables_dir),
+            params={"table_name": table_name},
+        )
+        for table_name in table_names
+    ]
+
+
+def database_step(
+    duckdb_filename: Union[str, pathlib.Path],
+    table_names: Sequence[str],
+    tables_dir: Union[str, pathlib.Path] = ".",
+    config: Optional[Dict[str, Union[str, int]]] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> BuildStep:
+    """
+    Describe loading the extracted tables into DuckDB as a build step.
+
+    The database is removed before it is rebuilt, so every table is
+    created and populated from the current extracted files.
+
+    Args:
+        duckdb_filename (Union[str, pathlib.Path]):
+            The DuckDB database file.
+        table_names (Sequence[str]):
+            The tables to load.
+        tables_dir (Union[str, pathlib.Path], optional):
+            The directory holding the extracted files. Defaults to ".".
+        config (Optional[Dict[str, Union[str, int]]], optional):
+            DuckDB configuration (see duckdb_config), which does not
+            change the database. Defaults to None.
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates while data is loaded.
+            Defaults to None.
+
+    Returns:
+        BuildStep:
+            The loading step.
+    """
+    return BuildStep(
+        name="database",
+        func=functools.partial(
+            load_dump_tables, duckdb_filename, table_names, tables_dir, config, progress
+        ),
+        inputs=[
+            path
+            for table_name in table_names
+            for path in table_files(table_name, tables_dir)
+        ],
+        outputs=[duckdb_filename],
+        params={"table_names": list(table_names)},
+    )
+
+
+def export_step(
+    duckdb_filename: Union[str, pathlib.Path],
+    target_file: Union[str, pathlib.Path],
+    profile: str = "default",
+    float32: bool = False,
+    config: Optional[Dict[str, Union[str, int]]] = None,
+) -> BuildStep:
+    """
+    Describe exporting the PathCount data to Parquet as a build step
+    (see export.export_pathcount_parquet, whose report is the result).
+
+    Args:
+        duckdb_filename (Union[str, pathlib.Path]):
+            The DuckDB database holding the restored tables.
+        target_file (Union[str, pathlib.Path]):
+            The Parquet file to write.
+        profile (str, optional):
+            The export profile, "default" or "compact".
+            Defaults to "default".
+        float32 (bool, optional):
+            Whether the compact profile stores p-values and DWPCs
+            as float32. Defaults to False.
+        config (Optional[Dict[str, Union[str, int]]], optional):
+            DuckDB configuration, which does not change the export.
+            Defaults to None.
+
+    Returns:
+        BuildStep:
+            The export step.
+    """
+    return BuildStep(
+        name="export",
+        func=functools.partial(
+            export.export_pathcount_parquet,
+            duckdb_filename,
+            target_file,
+            profile=profile,
+            float32=float32,
+            config=config,
+        ),
+        inputs=[duckdb_filename],
+        outputs=[target_file],
+        params={"profile": profile, "float32": float32},
+    )
+
+
+def index_step(target_file: Union[str, pathlib.Path]) -> BuildStep:
+    """
+    Describe building the identifier index of the Parquet export as a
+    build step (see index.build_identifier_index).
+
+    Args:
+        target_file (Union[str, pathlib.Path]):
+            The exported Parquet file.
+
+    Returns:
+        BuildStep:
+            The indexing step.
+    """
+    return BuildStep(
+        name="index",
+        func=functools.partial(index.build_identifier_index, target_file),
+        inputs=[target_file],
+        outputs=[index.default_index_path(target_file)],
+        params={"columns": list(index.INDEX_COLUMNS), "version": index.INDEX_VERSION},
+    )
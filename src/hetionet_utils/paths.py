@@ -0,0 +1,320 @@
+"""
+Module for enumerating metapath paths over typed CSR adjacency arrays.
+"""
+
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Self, Tuple
+
+import numpy as np
+
+from hetionet_utils.metagraph import MetapathStep, parse_metapath
+
+if TYPE_CHECKING:
+    from hetionet_utils.graph import HetionetLocalGraph
+
+
+class MetapathPaths(NamedTuple):
+    """
+    Paths along a metapath, one row per path.
+
+    Attributes:
+        nodes (np.ndarray):
+            Node positions for each path (paths x nodes).
+        edge_indices (np.ndarray):
+            Edge indices for each path (paths x edges): positions of the
+            edges within the Hetionet JSON edge list, which are not the
+            relationship IDs of Neo4j or the search API.
+        pdp (np.ndarray):
+            The degree-weighted path product of each path.
+        path_count (np.ndarray):
+            The number of paths between each path's source and target,
+            counted before any top-k selection.
+        dwpc (np.ndarray):
+            The degree-weighted path count between each path's source
+            and target, summed before any top-k selection.
+    """
+
+    nodes: np.ndarray
+    edge_indices: np.ndarray
+    pdp: np.ndarray
+    path_count: np.ndarray
+    dwpc: np.ndarray
+
+
+def reverse_step(step: MetapathStep) -> MetapathStep:
+    """
+    Reverse a metapath step so that it walks from its target to its source.
+
+    Args:
+        step (MetapathStep):
+            The step to reverse.
+
+    Returns:
+        MetapathStep:
+            The reversed step.
+    """
+    return step._replace(
+        source=step.target,
+        target=step.source,
+        direction={"both": "both", "forward": "backward", "backward": "forward"}[
+            step.direction
+        ],
+        # metaedges between the same kind are never walked in reverse,
+        # their direction (if any) carries the orientation instead
+        reverse=step.reverse if step.source == step.target else not step.reverse,
+    )
+
+
+def _unique_node_mask(nodes: np.ndarray) -> np.ndarray:
+    """
+    Find the paths which visit each node at most once.
+    """
+    mask = np.ones(len(nodes), dtype=bool)
+    for i in range(nodes.shape[1]):
+        for j in range(i + 1, nodes.shape[1]):
+            mask &= nodes[:, i] != nodes[:, j]
+    return mask
+
+
+def _expand_ranges(starts: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Expand ranges (start, count) into parent indices and flat positions.
+    """
+    parents = np.repeat(np.arange(len(starts)), counts)
+    positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(
+        counts.sum()
+    )
+    return parents, positions
+
+
+class MetapathPathEnumerator:
+    """
+    Enumerates paths along metapaths over the typed CSR adjacency arrays
+    of a local graph store, computing degree-weighted path products (PDP)
+    with NumPy.
+
+    Paths between a single source and target are enumerated from both
+    ends and joined at the middle of the metapath, which avoids
+    expanding every path from the source. Paths which visit the same
+    node more than once are excluded.
+
+    Attributes:
+        graph (HetionetLocalGraph):
+            The local graph store providing adjacency arrays.
+        damping (float):
+            The damping exponent applied to node degrees.
+    """
+
+    def __init__(self: Self, graph: "HetionetLocalGraph", damping: float = 0.5) -> None:
+        """
+        Initialize the enumerator.
+
+        Args:
+            graph (HetionetLocalGraph):
+                The local graph store providing adjacency arrays.
+            damping (float, optional):
+                The damping exponent applied to node degrees.
+                Defaults to 0.5.
+        """
+        self.graph = graph
+        self.damping = damping
+        self._weights: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _degree_weights(self: Self, indptr: np.ndarray) -> np.ndarray:
+        """
+        Compute (and cache) degree ** -damping for each node of a CSR array.
+        """
+        # keep a reference to the indptr so that its id is not reused
+        if id(indptr) not in self._weights:
+            degrees = np.diff(indptr).astype(float)
+            self._weights[id(indptr)] = (
+                indptr,
+                np.power(
+                    degrees,
+                    -self.damping,
+                    out=np.zeros_like(degrees),
+                    where=degrees > 0,
+                ),
+            )
+        return self._weights[id(indptr)][1]
+
+    def _expand(
+        self: Self,
+        paths: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        step: MetapathStep,
+        min_pdp: Optional[float],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Extend partial paths by one metapath step.
+        """
+        nodes, edges, pdp = paths
+        (indptr, indices, edge_ids), opposite_indptr = self.graph.step_adjacency(step)
+
+        last = nodes[:, -1]
+        parents, positions = _expand_ranges(
+            indptr[last], indptr[last + 1] - indptr[last]
+        )
+        neighbors = indices[positions].astype(np.int64)
+
+        pdp = (
+            pdp[parents]
+            * self._degree_weights(indptr)[last[parents]]
+            * self._degree_weights(opposite_indptr)[neighbors]
+        )
+        nodes = np.column_stack([nodes[parents], neighbors])
+        edges = np.column_stack([edges[parents], edge_ids[positions]])
+
+        # every weight is at most one, so a partial path below the cut-off
+        # can never complete above it
+        keep = (nodes[:, :-1] != neighbors[:, None]).all(axis=1)
+        if min_pdp is not None:
+            keep &= pdp >= min_pdp
+
+        return nodes[keep], edges[keep], pdp[keep]
+
+    def walk(
+        self: Self,
+        source_position: int,
+        steps: List[MetapathStep],
+        min_pdp: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Walk metapath steps from a source node, returning every partial path.
+
+        Args:
+            source_position (int):
+                The position of the source node within the store.
+            steps (List[MetapathStep]):
+                The metapath steps to walk.
+            min_pdp (Optional[float], optional):
+                Drop paths whose PDP falls below this value.
+                Defaults to None.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+                The node positions, edge IDs and PDP of each path.
+        """
+        paths = (
+            np.array([[source_position]], dtype=np.int64),
+            np.empty((1, 0), dtype=np.int64),
+            np.ones(1),
+        )
+        for step in steps:
+            paths = self._expand(paths, step, min_pdp)
+        return paths
+
+    def _meet_in_the_middle(
+        self: Self,
+        source_position: int,
+        target_position: int,
+        steps: List[MetapathStep],
+        min_pdp: Optional[float],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Enumerate paths between two nodes by walking from each end and
+        joining the partial paths on their shared middle node.
+        """
+        middle = (len(steps) + 1) // 2
+        head_nodes, head_edges, head_pdp = self.walk(
+            source_position, steps[:middle], min_pdp
+        )
+        tail_nodes, tail_edges, tail_pdp = self.walk(
+            target_position,
+            [reverse_step(step) for step in reversed(steps[middle:])],
+            min_pdp,
+        )
+
+        # orient the tail paths from the middle node to the target
+        tail_nodes, tail_edges = tail_nodes[:, ::-1], tail_edges[:, ::-1]
+        order = np.argsort(tail_nodes[:, 0], kind="stable")
+        tail_nodes, tail_edges, tail_pdp = (
+            tail_nodes[order],
+            tail_edges[order],
+            tail_pdp[order],
+        )
+
+        starts = np.searchsorted(tail_nodes[:, 0], head_nodes[:, -1], side="left")
+        ends = np.searchsorted(tail_nodes[:, 0], head_nodes[:, -1], side="right")
+        parents, positions = _expand_ranges(starts, ends - starts)
+
+        nodes = np.column_stack([head_nodes[parents], tail_nodes[positions, 1:]])
+        edges = np.column_stack([head_edges[parents], tail_edges[positions]])
+        pdp = head_pdp[parents] * tail_pdp[positions]
+
+        keep = _unique_node_mask(nodes)
+        if min_pdp is not None:
+            keep &= pdp >= min_pdp
+
+        return nodes[keep], edges[keep], pdp[keep]
+
+    def enumerate(
+        self: Self,
+        source_position: int,
+        metapath: str,
+        target_position: Optional[int] = None,
+        top_k: Optional[int] = None,
+        min_pdp: Optional[float] = None,
+    ) -> MetapathPaths:
+        """
+        Enumerate paths along a metapath from a source node.
+
+        Args:
+            source_position (int):
+                The position of the source node within the store.
+            metapath (str):
+                The metapath abbreviation to walk.
+            target_position (Optional[int], optional):
+                The position of a single target node. If None, paths to
+                every reachable target are returned. Defaults to None.
+            top_k (Optional[int], optional):
+                Keep only the k paths with the highest PDP for each target.
+                Path counts and DWPC still reflect all enumerated paths.
+                Defaults to None.
+            min_pdp (Optional[float], optional):
+                Stop extending paths once their PDP falls below this value.
+                Path counts and DWPC then only reflect the retained paths.
+                Defaults to None.
+
+        Returns:
+            MetapathPaths:
+                The paths, sorted by target position and descending PDP.
+
+        Raises:
+            ValueError:
+                If the source or target node is not of the metapath's
+                source or target metanode.
+        """
+        steps = parse_metapath(metapath)
+        # walking from a node of another kind would follow the metaedges
+        # from the wrong node type rather than finding no paths
+        for position, metanode in (
+            (source_position, steps[0].source),
+            (target_position, steps[-1].target),
+        ):
+            if position is not None and self.graph.metanode(position) != metanode:
+                raise ValueError(
+                    f"Node at position {position} is a "
+                    f"{self.graph.metanode(position)} node rather than "
+                    f"{metanode}, as metapath {metapath} requires."
+                )
+        if target_position is None:
+            nodes, edges, pdp = self.walk(source_position, steps, min_pdp)
+        else:
+            nodes, edges, pdp = self._meet_in_the_middle(
+                source_position, target_position, steps, min_pdp
+            )
+
+        # sort by target and descending PDP, then summarize each target
+        order = np.lexsort((-pdp, nodes[:, -1]))
+        nodes, edges, pdp = nodes[order], edges[order], pdp[order]
+        _, group_starts, group = np.unique(
+            nodes[:, -1], return_index=True, return_inverse=True
+        )
+        path_count = np.bincount(group)[group].astype(float)
+        dwpc = np.bincount(group, weights=pdp)[group]
+
+        if top_k is not None:
+            keep = np.arange(len(pdp)) - group_starts[group] < top_k
+            nodes, edges, pdp = nodes[keep], edges[keep], pdp[keep]
+            path_count, dwpc = path_count[keep], dwpc[keep]
+
+        return MetapathPaths(nodes, edges, pdp, path_count, dwpc)
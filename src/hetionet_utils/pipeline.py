@@ -0,0 +1,264 @@
+"""
+Module for running staged producer/consumer pipelines.
+
+Each stage runs its own pool of worker threads and stages are connected
+by bounded queues, so that (for example) requests are in flight while
+earlier results are parsed and written. A full queue blocks the stage
+feeding it, which bounds the memory held between stages.
+"""
+
+import queue
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Self,
+)
+
+from hetionet_utils import instrumentation
+
+# marks the end of a stage's input
+_DONE = object()
+
+# seconds between checks for a stopped pipeline while blocked on a queue
+POLL_INTERVAL = 0.1
+
+
+class Stage(NamedTuple):
+    """
+    A pipeline stage.
+
+    Attributes:
+        name (str):
+            The stage name, used for metrics.
+        func (Callable[[Any], Any]):
+            The function applied to each item (or to each list of items
+            when batch_size is set). Its return value is passed to the
+            next stage.
+        workers (int):
+            The number of threads running the stage.
+        batch_size (Optional[int]):
+            If set, items are grouped into lists of up to this many
+            items for each call (for example, to write in batches).
+    """
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    batch_size: Optional[int] = None
+
+
+class Pipeline:
+    """
+    Runs items through stages connected by bounded queues.
+
+    Items may complete out of order when a stage has more than one
+    worker. If any stage raises, the pipeline stops and the error is
+    raised to the consumer of `run`.
+
+    Attributes:
+        stages (List[Stage]):
+            The stages, in order.
+        queue_size (int):
+            The maximum number of items waiting before each stage.
+    """
+
+    def __init__(self: Self, stages: Iterable[Stage], queue_size: int = 64) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages (Iterable[Stage]):
+                The stages, in order.
+            queue_size (int, optional):
+                The maximum number of items waiting before each stage
+                (and for the consumer). Defaults to 64.
+        """
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        if not self.stages:
+            raise ValueError("Expected at least one stage.")
+        if any(stage.workers < 1 for stage in self.stages):
+            raise ValueError("Expected at least one worker per stage.")
+
+        self._lock = threading.Lock()
+        self._items = dict.fromkeys((stage.name for stage in self.stages), 0)
+        self._busy = dict.fromkeys((stage.name for stage in self.stages), 0.0)
+        self._queues: List[queue.Queue] = []
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._running: List[int] = []
+
+    def _fail(self: Self, error: BaseException) -> None:
+        """
+        Record the first error and stop the pipeline.
+        """
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._stop.set()
+
+    def _put(self: Self, index: int, item: Any) -> bool:  # noqa: ANN401
+        """
+        Put an item on a queue, returning False if the pipeline stopped
+        while waiting for space.
+        """
+        while not self._stop.is_set():
+            try:
+                self._queues[index].put(item, timeout=POLL_INTERVAL)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def _get(self: Self, index: int) -> Any:  # noqa: ANN401
+        """
+        Get an item from a queue, returning _DONE if the pipeline stopped
+        while waiting for an item.
+        """
+        while not self._stop.is_set():
+            try:
+                return self._queues[index].get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _finish_worker(self: Self, index: int) -> None:
+        """
+        Mark a worker of a stage as finished, ending the input of the
+        next stage once every worker has finished.
+        """
+        with self._lock:
+            self._running[index] -= 1
+            last = self._running[index] == 0
+        if last:
+            downstream = (
+                self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+            )
+            for _ in range(downstream):
+                self._put(index + 1, _DONE)
+
+    def _feed(self: Self, source: Iterable) -> None:
+        """
+        Put items from the source on the first queue.
+        """
+        try:
+            for item in source:
+                if not self._put(0, item):
+                    return
+        except Exception as error:
+            self._fail(error)
+            return
+        for _ in range(self.stages[0].workers):
+            self._put(0, _DONE)
+
+    def _call(self: Self, stage: Stage, index: int, item: Any) -> bool:  # noqa: ANN401
+        """
+        Apply a stage to an item and pass the result on, returning False
+        if the pipeline stopped.
+        """
+        start = time.perf_counter()
+        try:
+            with instrumentation.timer(f"pipeline_{stage.name}_seconds"):
+                result = stage.func(item)
+        except Exception as error:
+            self._fail(error)
+            return False
+        with self._lock:
+            self._items[stage.name] += len(item) if stage.batch_size else 1
+            self._busy[stage.name] += time.perf_counter() - start
+        return self._put(index + 1, result)
+
+    def _work(self: Self, index: int) -> None:
+        """
+        Run one worker of a stage until its input ends.
+        """
+        stage = self.stages[index]
+        batch = []
+        while (item := self._get(index)) is not _DONE:
+            if stage.batch_size is None:
+                if not self._call(stage, index, item):
+                    return
+                continue
+            batch.append(item)
+            if len(batch) >= stage.batch_size:
+                if not self._call(stage, index, batch):
+                    return
+                batch = []
+
+        if batch and not self._stop.is_set() and not self._call(stage, index, batch):
+            return
+        if not self._stop.is_set():
+            self._finish_worker(index)
+
+    def run(self: Self, source: Iterable) -> Iterator[Any]:
+        """
+        Run items from a source through the stages.
+
+        Closing the returned iterator early stops the pipeline.
+
+        Args:
+            source (Iterable):
+                The items for the first stage (read from a thread).
+
+        Yields:
+            Any:
+                The results of the last stage.
+
+        Raises:
+            Exception:
+                The first error raised by the source or a stage.
+        """
+        self._queues = [
+            queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        self._stop.clear()
+        self._error = None
+        self._running = [stage.workers for stage in self.stages]
+
+        threads = [threading.Thread(target=self._feed, args=(source,), daemon=True)]
+        threads += [
+            threading.Thread(target=self._work, args=(index,), daemon=True)
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while (result := self._get(len(self.stages))) is not _DONE:
+                yield result
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        if self._error is not None:
+            raise self._error
+
+    def metrics(self: Self) -> Dict[str, Dict[str, float]]:
+        """
+        Report the work done by each stage.
+
+        Returns:
+            Dict[str, Dict[str, float]]:
+                For each stage, the items processed, the total seconds
+                spent in the stage function (across workers) and the
+                number of items waiting in its input queue.
+        """
+        with self._lock:
+            return {
+                stage.name: {
+                    "items": self._items[stage.name],
+                    "busy_seconds": self._busy[stage.name],
+                    "queued": self._queues[index].qsize() if self._queues else 0,
+                }
+                for index, stage in enumerate(self.stages)
+            }
@@ -0,0 +1,366 @@
+"""
+Module for reporting the progress, throughput and ETA of long-running
+extraction and loading steps.
+
+Progress is measured in bytes consumed from an input file (for gzip
+archives, compressed bytes) against the size of the file. Callbacks
+are throttled to one call per interval, and when no callback is given
+the input is read directly so there is no overhead.
+"""
+
+import datetime
+import os
+import threading
+import time
+from typing import IO, TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Self
+
+from hetionet_utils.lazy import lazy_import
+
+# sql (which imports this module) is imported on first use (see lazy.py)
+if TYPE_CHECKING:
+    import duckdb
+
+    from hetionet_utils import sql
+else:
+    sql = lazy_import("hetionet_utils.sql")
+
+
+class ProgressUpdate(NamedTuple):
+    """
+    A snapshot of progress through a step.
+
+    Attributes:
+        label (str):
+            A description of the step.
+        done (int):
+            The number of bytes consumed.
+        total (int):
+            The total number of bytes.
+        elapsed (float):
+            Seconds since the step started.
+        finished (bool):
+            Whether the step has finished.
+    """
+
+    label: str
+    done: int
+    total: int
+    elapsed: float
+    finished: bool = False
+
+    @property
+    def fraction(self: Self) -> float:
+        """
+        The fraction of bytes consumed (1.0 for an empty input).
+        """
+        return min(self.done / self.total, 1.0) if self.total else 1.0
+
+    @property
+    def rate(self: Self) -> float:
+        """
+        The throughput in bytes per second.
+        """
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self: Self) -> Optional[float]:
+        """
+        The estimated seconds remaining (None until there is a rate).
+        """
+        if self.finished:
+            return 0.0
+        return (self.total - self.done) / self.rate if self.rate > 0 else None
+
+
+# a function receiving progress updates
+ProgressCallback = Callable[[ProgressUpdate], None]
+
+
+def format_progress(update: ProgressUpdate) -> str:
+    """
+    Format a progress update as human-readable text.
+
+    Args:
+        update (ProgressUpdate):
+            The progress update.
+
+    Returns:
+        str:
+            For example "label: 12.0/100.0 MB (12.0%) at 4.0 MB/s, ETA 0:00:22".
+    """
+    eta = (
+        "unknown"
+        if update.eta is None
+        else str(datetime.timedelta(seconds=round(update.eta)))
+    )
+    return (
+        f"{update.label}: {update.done / 1e6:.1f}/{update.total / 1e6:.1f} MB "
+        f"({update.fraction:.1%}) at {update.rate / 1e6:.1f} MB/s, "
+        + (
+            f"done in {datetime.timedelta(seconds=round(update.elapsed))}"
+            if update.finished
+            else f"ETA {eta}"
+        )
+    )
+
+
+def print_progress(update: ProgressUpdate) -> None:
+    """
+    Print a progress update.
+
+    Args:
+        update (ProgressUpdate):
+            The progress update.
+    """
+    print(format_progress(update), flush=True)
+
+
+class ProgressTracker:
+    """
+    Tracks progress through a step, passing throttled updates to a callback.
+
+    Attributes:
+        total (int):
+            The total number of bytes.
+        label (str):
+            A description of the step.
+        interval (float):
+            The minimum seconds between updates.
+        done (int):
+            The number of bytes consumed.
+    """
+
+    def __init__(
+        self: Self,
+        total: int,
+        callback: ProgressCallback,
+        label: str = "progress",
+        interval: float = 5.0,
+    ) -> None:
+        """
+        Initialize the tracker, starting the step clock.
+
+        Args:
+            total (int):
+                The total number of bytes.
+            callback (ProgressCallback):
+                The function receiving progress updates.
+            label (str, optional):
+                A description of the step. Defaults to "progress".
+            interval (float, optional):
+                The minimum seconds between updates. Defaults to 5.0.
+        """
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.done = 0
+        self._callback = callback
+        self._started = time.monotonic()
+        self._next_update = self._started + interval
+        self._finished = False
+
+    def update(self: Self, done: int) -> None:
+        """
+        Record the bytes consumed, calling back if the interval has passed.
+
+        Args:
+            done (int):
+                The number of bytes consumed so far.
+        """
+        self.done = done
+        if (now := time.monotonic()) >= self._next_update:
+            self._next_update = now + self.interval
+            self._callback(
+                ProgressUpdate(self.label, done, self.total, now - self._started)
+            )
+
+    def advance(self: Self, amount: int) -> None:
+        """
+        Record additional bytes consumed.
+
+        Args:
+            amount (int):
+                The number of bytes consumed since the last update.
+        """
+        self.update(self.done + amount)
+
+    def finish(self: Self) -> None:
+        """
+        Call back with a final update (only once).
+        """
+        if not self._finished:
+            self._finished = True
+            self._callback(
+                ProgressUpdate(
+                    self.label,
+                    self.done,
+                    self.total,
+                    time.monotonic() - self._started,
+                    finished=True,
+                )
+            )
+
+
+class ProgressReader:
+    """
+    A binary file wrapper reporting the bytes read to a ProgressTracker.
+
+    Attributes delegate to the wrapped file, so the reader may be passed
+    to gzip.open or io.TextIOWrapper in its place. Closing the reader
+    closes the wrapped file and sends a final update.
+    """
+
+    def __init__(self: Self, file: IO[bytes], tracker: ProgressTracker) -> None:
+        """
+        Wrap a binary file.
+
+        Args:
+            file (IO[bytes]):
+                The binary file to read from.
+            tracker (ProgressTracker):
+                The tracker to report to.
+        """
+        self._file = file
+        self.tracker = tracker
+
+    def read(self: Self, size: int = -1) -> bytes:
+        """
+        Read up to `size` bytes, reporting them to the tracker.
+        """
+        data = self._file.read(size)
+        self.tracker.advance(len(data))
+        return data
+
+    def read1(self: Self, size: int = -1) -> bytes:
+        """
+        Read up to `size` bytes with at most one raw read, reporting
+        them to the tracker.
+        """
+        data = self._file.read1(size)
+        self.tracker.advance(len(data))
+        return data
+
+    def readinto(self: Self, buffer: bytearray) -> int:
+        """
+        Read into a buffer, reporting the bytes read to the tracker.
+        """
+        count = self._file.readinto(buffer)
+        self.tracker.advance(count or 0)
+        return count
+
+    def close(self: Self) -> None:
+        """
+        Close the wrapped file and send a final update.
+        """
+        self._file.close()
+        self.tracker.finish()
+
+    def __getattr__(self: Self, name: str) -> Any:  # noqa: ANN401
+        return getattr(self._file, name)
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
+
+
+def open_with_progress(
+    path: str,
+    progress: Optional[ProgressCallback] = None,
+    label: Optional[str] = None,
+    interval: float = 5.0,
+) -> IO[bytes]:
+    """
+    Open a file for binary reading, reporting progress if a callback
+    is given.
+
+    Args:
+        path (str):
+            The path to the file.
+        progress (Optional[ProgressCallback], optional):
+            The function receiving progress updates. If None, the file
+            is returned unwrapped. Defaults to None.
+        label (Optional[str], optional):
+            A description of the step. Defaults to the path.
+        interval (float, optional):
+            The minimum seconds between updates. Defaults to 5.0.
+
+    Returns:
+        IO[bytes]:
+            The opened file.
+    """
+    file = open(path, "rb")  # noqa: SIM115
+    if progress is None:
+        return file
+
+    total = os.fstat(file.fileno()).st_size
+    return ProgressReader(
+        file,
+        ProgressTracker(total, progress, label=label or str(path), interval=interval),
+    )
+
+
+def execute_with_progress(  # noqa: PLR0913
+    ddb: "duckdb.DuckDBPyConnection",
+    query: str,
+    progress: Optional[ProgressCallback] = None,
+    total: int = 0,
+    label: str = "query",
+    interval: float = 5.0,
+) -> None:
+    """
+    Execute a DuckDB statement, polling its progress from another thread.
+
+    DuckDB reports progress as a percentage, which is scaled to `total`
+    (for example the size of a file being loaded with COPY) to report
+    throughput. DuckDB's progress tracking is enabled (without its
+    printed progress bar) while the statement runs, and the connection's
+    settings are restored afterwards.
+
+    Args:
+        ddb (duckdb.DuckDBPyConnection):
+            The DuckDB connection.
+        query (str):
+            The statement to execute.
+        progress (Optional[ProgressCallback], optional):
+            The function receiving progress updates. If None, the
+            statement is executed directly. Defaults to None.
+        total (int, optional):
+            The number of bytes the statement processes. Defaults to 0.
+        label (str, optional):
+            A description of the step. Defaults to "query".
+        interval (float, optional):
+            The seconds between updates. Defaults to 5.0.
+    """
+    if progress is None:
+        ddb.execute(query)
+        return
+
+    tracker = ProgressTracker(total, progress, label=label, interval=interval)
+    finished = threading.Event()
+    errors = []
+
+    def run() -> None:
+        try:
+            ddb.execute(query)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            finished.set()
+
+    progress_bar = sql.duckdb_setting(ddb, "enable_progress_bar", True)
+    progress_bar_print = sql.duckdb_setting(ddb, "enable_progress_bar_print", False)
+    with progress_bar, progress_bar_print:
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        while not finished.wait(interval):
+            # query_progress is -1 when no query is running
+            if (percent := ddb.query_progress()) >= 0:
+                tracker.update(int(total * percent / 100))
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    tracker.done = total
+    tracker.finish()
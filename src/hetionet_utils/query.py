@@ -0,0 +1,287 @@
+"""
+Module for querying the precalculated metapath dataset.
+"""
+
+import pathlib
+from typing import Dict, List, Optional, Self, Union
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from hetionet_utils.index import IdentifierIndex
+from hetionet_utils.sql import quote_sql_string, sql_literal
+
+# columns which may be used to identify sources and targets
+ID_KINDS = ("identifier", "id")
+
+
+def fetch_arrow_table(result: duckdb.DuckDBPyConnection) -> pa.Table:
+    """
+    Fetch the result of a DuckDB query as an Arrow table.
+
+    Args:
+        result (duckdb.DuckDBPyConnection):
+            The connection (or relation) holding the query result.
+
+    Returns:
+        pa.Table:
+            The query result.
+    """
+    # `fetch_arrow_table` is deprecated in newer versions of DuckDB
+    if hasattr(result, "to_arrow_table"):
+        return result.to_arrow_table()
+    return result.fetch_arrow_table()
+
+
+def fetch_arrow_reader(
+    result: duckdb.DuckDBPyConnection, batch_size: int = 1_000_000
+) -> pa.RecordBatchReader:
+    """
+    Fetch the result of a DuckDB query as a stream of Arrow record batches.
+
+    Args:
+        result (duckdb.DuckDBPyConnection):
+            The connection (or relation) holding the query result.
+        batch_size (int, optional):
+            The number of rows per batch. Defaults to 1_000_000.
+
+    Returns:
+        pa.RecordBatchReader:
+            A reader over the query result.
+    """
+    # `fetch_record_batch` is deprecated in newer versions of DuckDB
+    if hasattr(result, "to_arrow_reader"):
+        return result.to_arrow_reader(batch_size)
+    return result.fetch_record_batch(batch_size)
+
+
+class MetapathDataQuery:
+    """
+    A long-lived query service over the precalculated metapath Parquet data.
+
+    A single DuckDB connection is kept open with Parquet metadata caching
+    enabled and each lookup uses a statement prepared once, so repeated
+    point lookups avoid re-reading file metadata and re-planning queries.
+
+    When an identifier index is provided, lookups by identifier only
+    read the row groups which contain the requested identifiers.
+
+    Attributes:
+        metapath_data (str):
+            Path (or glob) for the precalculated metapath Parquet data.
+        connection (duckdb.DuckDBPyConnection):
+            The DuckDB connection used for queries.
+        index (Optional[IdentifierIndex]):
+            The identifier index used for lookups by identifier, if any.
+    """
+
+    def __init__(
+        self: Self,
+        metapath_data: Union[str, pathlib.Path],
+        threads: Optional[int] = None,
+        memory_limit: Optional[str] = None,
+        index_file: Optional[Union[str, pathlib.Path]] = None,
+    ) -> None:
+        """
+        Initialize the query service.
+
+        Args:
+            metapath_data (Union[str, pathlib.Path]):
+                Path (or glob) for the precalculated metapath Parquet data.
+            threads (Optional[int], optional):
+                The number of DuckDB threads. If None, DuckDB decides.
+                Defaults to None.
+            memory_limit (Optional[str], optional):
+                The DuckDB memory limit (for example "4GB").
+                If None, DuckDB decides. Defaults to None.
+            index_file (Optional[Union[str, pathlib.Path]], optional):
+                A sidecar index written by build_identifier_index.
+                If None, lookups scan the data. Defaults to None.
+        """
+        self.metapath_data = str(metapath_data)
+        self.index = None if index_file is None else IdentifierIndex(index_file)
+        config: Dict[str, Union[str, int]] = {}
+        if threads is not None:
+            config["threads"] = threads
+        if memory_limit is not None:
+            config["memory_limit"] = memory_limit
+        self.connection = duckdb.connect(config=config)
+
+        # cache parquet metadata between queries (the setting was renamed
+        # between DuckDB versions)
+        for setting in ("parquet_metadata_cache", "enable_object_cache"):
+            try:
+                self.connection.execute(f"SET {setting} = true")
+                break
+            except duckdb.CatalogException:
+                continue
+
+        self.connection.execute(
+            f"""
+            CREATE VIEW metapath_data AS
+            SELECT * FROM read_parquet({quote_sql_string(self.metapath_data)})
+            """
+        )
+        self._prepare_statements()
+
+    def _prepare_statements(self: Self) -> None:
+        """
+        Prepare the statements used by the typed lookup methods.
+        """
+        for kind in ID_KINDS:
+            self.connection.execute(
+                f"""
+                PREPARE pair_by_{kind} AS
+                SELECT * FROM metapath_data
+                WHERE source_{kind} = $1 AND target_{kind} = $2
+                ORDER BY metapath_id
+                """
+            )
+            self.connection.execute(
+                f"""
+                PREPARE top_targets_by_{kind} AS
+                SELECT * FROM metapath_data
+                WHERE source_{kind} = $1 AND metapath_id = $2
+                ORDER BY adjusted_p_value ASC, dwpc DESC
+                LIMIT $3
+                """
+            )
+        self.connection.execute(
+            """
+            PREPARE by_metapath AS
+            SELECT * FROM metapath_data
+            WHERE metapath_id = $1
+            """
+        )
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
+
+    def close(self: Self) -> None:
+        """
+        Close the DuckDB connection.
+        """
+        self.connection.close()
+
+    def _execute(self: Self, statement: str, *args: Union[str, int]) -> pa.Table:
+        """
+        Execute a prepared statement, returning the result as an Arrow table.
+        """
+        return fetch_arrow_table(
+            self.connection.execute(
+                f"EXECUTE {statement}({', '.join(sql_literal(arg) for arg in args)})"
+            )
+        )
+
+    @staticmethod
+    def _normalize(value: Union[str, int], by: str) -> Union[str, int]:
+        """
+        Normalize a source or target for lookups by identifier or ID.
+        """
+        if by not in ID_KINDS:
+            raise ValueError(f"Expected by to be one of {ID_KINDS}.")
+        # identifiers are stored as strings (including Entrez gene IDs)
+        return str(value) if by == "identifier" else int(value)
+
+    def query(self: Self, sql: str, parameters: Optional[List] = None) -> pa.Table:
+        """
+        Run an arbitrary query against the `metapath_data` view.
+
+        Args:
+            sql (str):
+                The SQL query to run.
+            parameters (Optional[List], optional):
+                The parameters for the query. Defaults to None.
+
+        Returns:
+            pa.Table:
+                The query result.
+        """
+        return fetch_arrow_table(self.connection.execute(sql, parameters))
+
+    def pair(
+        self: Self,
+        source: Union[str, int],
+        target: Union[str, int],
+        by: str = "identifier",
+    ) -> pa.Table:
+        """
+        Get every metapath row between a source and target.
+
+        Args:
+            source (Union[str, int]):
+                The source identifier (for example "GO:0000002") or ID.
+            target (Union[str, int]):
+                The target identifier (for example an Entrez gene ID) or ID.
+            by (str, optional):
+                Whether source and target are "identifier" values or
+                internal "id" values. Defaults to "identifier".
+
+        Returns:
+            pa.Table:
+                The matching rows, ordered by metapath.
+        """
+        if self.index is not None and by == "identifier":
+            return self.index.read(
+                {"source_identifier": source, "target_identifier": target}
+            ).sort_by("metapath_id")
+
+        return self._execute(
+            f"pair_by_{by}", self._normalize(source, by), self._normalize(target, by)
+        )
+
+    def top_targets(
+        self: Self,
+        source: Union[str, int],
+        metapath: str,
+        k: int = 10,
+        by: str = "identifier",
+    ) -> pa.Table:
+        """
+        Get the k most significant targets for a source along a metapath.
+
+        Args:
+            source (Union[str, int]):
+                The source identifier (for example "GO:0000002") or ID.
+            metapath (str):
+                The metapath abbreviation.
+            k (int, optional):
+                The number of targets to return. Defaults to 10.
+            by (str, optional):
+                Whether the source is an "identifier" value or
+                internal "id" value. Defaults to "identifier".
+
+        Returns:
+            pa.Table:
+                The matching rows, ordered by ascending adjusted p-value
+                and descending DWPC.
+        """
+        if self.index is not None and by == "identifier":
+            result = self.index.read({"source_identifier": source})
+            return (
+                result.filter(pc.equal(result["metapath_id"], metapath))
+                .sort_by([("adjusted_p_value", "ascending"), ("dwpc", "descending")])
+                .slice(0, int(k))
+            )
+
+        return self._execute(
+            f"top_targets_by_{by}", self._normalize(source, by), metapath, int(k)
+        )
+
+    def by_metapath(self: Self, metapath: str) -> pa.Table:
+        """
+        Get every row for a metapath.
+
+        Args:
+            metapath (str):
+                The metapath abbreviation.
+
+        Returns:
+            pa.Table:
+                The matching rows.
+        """
+        return self._execute("by_metapath", metapath)
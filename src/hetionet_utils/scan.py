@@ -0,0 +1,292 @@
+"""
+Module for streaming threshold and top-k queries over Parquet data.
+
+Batches are read one at a time with predicates pushed down to the
+Parquet reader, so memory use is bounded by the batch size (and, for
+top-k queries, by the number of keys times k) rather than by the size
+of the dataset.
+"""
+
+import pathlib
+from typing import Iterator, List, Optional, Self, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+
+def _dataset(
+    metapath_data: Union[str, pathlib.Path, List[Union[str, pathlib.Path]]],
+) -> ds.Dataset:
+    """
+    Open Parquet data as a dataset, restoring columns from hive partition
+    directories (such as the `metapath_id=...` partitions of
+    subset.refresh_metapath_partitions).
+    """
+    return ds.dataset(
+        [str(path) for path in metapath_data]
+        if isinstance(metapath_data, list)
+        else str(metapath_data),
+        format="parquet",
+        partitioning="hive",
+    )
+
+
+def scan_batches(
+    metapath_data: Union[str, pathlib.Path, List[Union[str, pathlib.Path]]],
+    predicate: Optional[pc.Expression] = None,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 65_536,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream the rows of Parquet data which match a predicate.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path, List[...]]):
+            Path to a Parquet file, a directory of Parquet files
+            or a list of Parquet files.
+        predicate (Optional[pc.Expression], optional):
+            A filter such as `pc.field("adjusted_p_value") < 0.05`.
+            If None, every row is returned. Defaults to None.
+        columns (Optional[List[str]], optional):
+            The columns to read. If None, all columns are read.
+            Defaults to None.
+        batch_size (int, optional):
+            The maximum number of rows per batch. Defaults to 65_536.
+
+    Yields:
+        pa.RecordBatch:
+            Batches of matching rows.
+    """
+    for batch in _dataset(metapath_data).to_batches(
+        columns=columns,
+        filter=predicate,
+        batch_size=batch_size,
+        # read ahead at most one batch and file to keep memory bounded
+        batch_readahead=1,
+        fragment_readahead=1,
+    ):
+        if batch.num_rows:
+            yield batch
+
+
+class TopKAccumulator:
+    """
+    Keeps the k best rows for each key of a stream of batches.
+
+    Kept rows are merged with each new batch and trimmed back to k rows
+    per key, so memory is bounded by the number of keys times k plus
+    one batch.
+
+    Attributes:
+        key (Optional[str]):
+            The column to group by. If None, the k best rows overall
+            are kept.
+        k (int):
+            The number of rows to keep per key.
+        sort_by (str):
+            The column to rank by.
+        ascending (bool):
+            Whether smaller values of sort_by rank first.
+    """
+
+    def __init__(
+        self: Self,
+        key: Optional[str],
+        k: int,
+        sort_by: str,
+        ascending: bool = True,
+    ) -> None:
+        """
+        Initialize the accumulator.
+
+        Args:
+            key (Optional[str]):
+                The column to group by. If None, the k best rows overall
+                are kept.
+            k (int):
+                The number of rows to keep per key.
+            sort_by (str):
+                The column to rank by.
+            ascending (bool, optional):
+                Whether smaller values of sort_by rank first.
+                Defaults to True.
+        """
+        if k < 1:
+            raise ValueError("Expected k to be at least 1.")
+        self.key = key
+        self.k = k
+        self.sort_by = sort_by
+        self.ascending = ascending
+        self._kept: Optional[pa.Table] = None
+
+    def update(self: Self, batch: Union[pa.RecordBatch, pa.Table]) -> Self:
+        """
+        Merge a batch into the kept rows.
+
+        Args:
+            batch (Union[pa.RecordBatch, pa.Table]):
+                The rows to merge.
+
+        Returns:
+            Self:
+                The accumulator.
+        """
+        table = (
+            pa.Table.from_batches([batch])
+            if isinstance(batch, pa.RecordBatch)
+            else batch
+        )
+        if self._kept is not None:
+            table = pa.concat_tables([self._kept, table])
+
+        order = "ascending" if self.ascending else "descending"
+        if self.key is None:
+            self._kept = table.sort_by([(self.sort_by, order)]).slice(0, self.k)
+            return self
+
+        # dictionary-encoded keys (such as those of the compact export
+        # profile) are sorted and ranked by their values, since Arrow
+        # cannot sort dictionary arrays and chunks may differ in dictionary
+        keys = table[self.key]
+        if pa.types.is_dictionary(keys.type):
+            keys = keys.cast(keys.type.value_type)
+        indices = pc.sort_indices(
+            pa.table({"key": keys, "sort_by": table[self.sort_by]}),
+            sort_keys=[("key", "ascending"), ("sort_by", order)],
+        )
+        table = table.take(indices)
+
+        # rank rows within each key (keys are adjacent once sorted)
+        codes = (
+            pc.dictionary_encode(keys.take(indices).combine_chunks())
+            .indices.to_numpy(zero_copy_only=False)
+            .astype(np.int64)
+        )
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ranks = np.arange(len(codes)) - np.repeat(
+            starts, np.diff(np.r_[starts, len(codes)])
+        )
+        self._kept = table.filter(pa.array(ranks < self.k))
+        return self
+
+    def result(self: Self) -> Optional[pa.Table]:
+        """
+        Get the kept rows, ordered by key and rank.
+
+        Returns:
+            Optional[pa.Table]:
+                The kept rows, or None if no rows have been merged.
+        """
+        return self._kept
+
+
+def iter_top_k(  # noqa: PLR0913
+    metapath_data: Union[str, pathlib.Path, List[Union[str, pathlib.Path]]],
+    key: Optional[str],
+    k: int,
+    sort_by: str,
+    ascending: bool = True,
+    predicate: Optional[pc.Expression] = None,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 65_536,
+) -> Iterator[pa.Table]:
+    """
+    Stream a per-key top-k query, yielding the current result after
+    each batch so that partial results are available incrementally.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path, List[...]]):
+            Path to a Parquet file, a directory of Parquet files
+            or a list of Parquet files.
+        key (Optional[str]):
+            The column to group by (for example "source_identifier").
+            If None, the k best rows overall are kept.
+        k (int):
+            The number of rows to keep per key.
+        sort_by (str):
+            The column to rank by (for example "adjusted_p_value").
+        ascending (bool, optional):
+            Whether smaller values of sort_by rank first.
+            Defaults to True.
+        predicate (Optional[pc.Expression], optional):
+            A filter applied before ranking. Defaults to None.
+        columns (Optional[List[str]], optional):
+            The columns to return. If None, all columns are returned.
+            Defaults to None.
+        batch_size (int, optional):
+            The maximum number of rows per batch. Defaults to 65_536.
+
+    Yields:
+        pa.Table:
+            The top-k rows for each key seen so far.
+    """
+    read_columns = (
+        None
+        if columns is None
+        else list(dict.fromkeys([*columns, sort_by, *([key] if key else [])]))
+    )
+    accumulator = TopKAccumulator(key=key, k=k, sort_by=sort_by, ascending=ascending)
+    for batch in scan_batches(
+        metapath_data, predicate=predicate, columns=read_columns, batch_size=batch_size
+    ):
+        result = accumulator.update(batch).result()
+        yield result if columns is None else result.select(columns)
+
+
+def scan_top_k(  # noqa: PLR0913
+    metapath_data: Union[str, pathlib.Path, List[Union[str, pathlib.Path]]],
+    key: Optional[str],
+    k: int,
+    sort_by: str,
+    ascending: bool = True,
+    predicate: Optional[pc.Expression] = None,
+    columns: Optional[List[str]] = None,
+    batch_size: int = 65_536,
+) -> pa.Table:
+    """
+    Run a per-key top-k query, streaming over the data.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path, List[...]]):
+            Path to a Parquet file, a directory of Parquet files
+            or a list of Parquet files.
+        key (Optional[str]):
+            The column to group by (for example "source_identifier").
+            If None, the k best rows overall are kept.
+        k (int):
+            The number of rows to keep per key.
+        sort_by (str):
+            The column to rank by (for example "adjusted_p_value").
+        ascending (bool, optional):
+            Whether smaller values of sort_by rank first.
+            Defaults to True.
+        predicate (Optional[pc.Expression], optional):
+            A filter applied before ranking. Defaults to None.
+        columns (Optional[List[str]], optional):
+            The columns to return. If None, all columns are returned.
+            Defaults to None.
+        batch_size (int, optional):
+            The maximum number of rows per batch. Defaults to 65_536.
+
+    Returns:
+        pa.Table:
+            The top-k rows for each key, ordered by key and rank
+            (empty, with the requested columns, if no rows match
+            the predicate).
+    """
+    schema = _dataset(metapath_data).schema
+    result = schema.empty_table().select(columns or schema.names)
+    for result in iter_top_k(
+        metapath_data,
+        key=key,
+        k=k,
+        sort_by=sort_by,
+        ascending=ascending,
+        predicate=predicate,
+        columns=columns,
+        batch_size=batch_size,
+    ):
+        pass
+    return result
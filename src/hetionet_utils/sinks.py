@@ -0,0 +1,455 @@
+"""
+Module for writing gather results to interchangeable output sinks.
+
+Each sink accepts Arrow tables and is chosen per run (see open_sink),
+so that results may be written as rolling Parquet files for columnar
+consumers, appended to a DuckDB table for SQL or added to a LanceDB
+table.
+"""
+
+import abc
+import pathlib
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Self, Type, Union
+
+from hetionet_utils.lazy import lazy_import
+
+# duckdb, pyarrow and query are imported on first use (see lazy.py)
+if TYPE_CHECKING:
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    from hetionet_utils import query
+else:
+    duckdb = lazy_import("duckdb")
+    pa = lazy_import("pyarrow")
+    pq = lazy_import("pyarrow.parquet")
+    query = lazy_import("hetionet_utils.query")
+
+# modes for handling existing results when a sink is opened
+SINK_MODES = ("overwrite", "append")
+
+
+def _quote_identifier(name: str) -> str:
+    """
+    Quote a SQL identifier, escaping double quotes.
+    """
+    return '"' + name.replace('"', '""') + '"'
+
+
+class ResultSink(abc.ABC):
+    """
+    A destination for gather results.
+
+    Subclasses implement `_write` and `read` (and optionally `_close`);
+    writes are serialized so a sink may be shared between threads.
+
+    Attributes:
+        schema (Optional[pa.Schema]):
+            The schema results are conformed to (set from the first
+            write if not given).
+        rows_written (int):
+            The number of rows written.
+    """
+
+    def __init__(
+        self: Self, schema: "Optional[pa.Schema]" = None, mode: str = "overwrite"
+    ) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            schema (Optional[pa.Schema], optional):
+                The schema results are conformed to. Defaults to the
+                schema of the first write.
+            mode (str, optional):
+                "overwrite" to replace existing results or "append" to
+                add to them. Defaults to "overwrite".
+        """
+        if mode not in SINK_MODES:
+            raise ValueError(f"Expected mode to be one of {SINK_MODES}.")
+        self.schema = schema.remove_metadata() if schema is not None else None
+        self.mode = mode
+        self.rows_written = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self: Self, table: "pa.Table") -> None:
+        """
+        Write results, conforming them to the sink schema.
+
+        Args:
+            table (pa.Table):
+                The results to write.
+        """
+        with self._lock:
+            if self._closed:
+                raise ValueError("Cannot write to a closed sink.")
+            if self.schema is None:
+                self.schema = table.schema.remove_metadata()
+            table = table.select(self.schema.names).cast(self.schema)
+            if table.num_rows:
+                self._write(table)
+                self.rows_written += table.num_rows
+
+    def close(self: Self) -> None:
+        """
+        Flush and close the sink.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._close()
+
+    @abc.abstractmethod
+    def read(self: Self) -> "pa.Table":
+        """
+        Read the results held by the sink's destination (including
+        results from earlier runs in append mode), for example to
+        validate them. Results still buffered by an open sink are
+        included once it is closed.
+
+        Returns:
+            pa.Table:
+                The results.
+        """
+
+    @abc.abstractmethod
+    def _write(self: Self, table: "pa.Table") -> None:
+        """
+        Write results already conformed to the sink schema.
+        """
+
+    def _close(self: Self) -> None:
+        pass
+
+    def __enter__(self: Self) -> Self:
+        return self
+
+    def __exit__(self: Self, *args: object) -> None:
+        self.close()
+
+
+class ParquetDatasetSink(ResultSink):
+    """
+    Writes results to a directory of size-bounded Parquet files.
+
+    A new file is started once the current file reaches `max_file_rows`
+    rows or `max_file_bytes` bytes. Files are written under a temporary
+    name and renamed when complete, so readers of the directory (for
+    example pyarrow.dataset or DuckDB globs) only see complete files.
+
+    Attributes:
+        directory (pathlib.Path):
+            The directory of Parquet files.
+        files (List[pathlib.Path]):
+            The files written by this sink.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self: Self,
+        directory: Union[str, pathlib.Path],
+        schema: "Optional[pa.Schema]" = None,
+        mode: str = "overwrite",
+        max_file_rows: int = 10_000_000,
+        max_file_bytes: int = 256 * 1024**2,
+        compression: str = "zstd",
+    ) -> None:
+        """
+        Initialize the sink.
+
+        Args:
+            directory (Union[str, pathlib.Path]):
+                The directory to write Parquet files to.
+            schema (Optional[pa.Schema], optional):
+                The schema results are conformed to. Defaults to the
+                schema of existing part files when appending, otherwise
+                the schema of the first write.
+            mode (str, optional):
+                "overwrite" to remove existing part files or "append"
+                to add files after them. Defaults to "overwrite".
+            max_file_rows (int, optional):
+                The number of rows after which a new file is started.
+                Defaults to 10,000,000.
+            max_file_bytes (int, optional):
+                The file size after which a new file is started.
+                Defaults to 256 MiB.
+            compression (str, optional):
+                The Parquet compression codec. Defaults to "zstd".
+        """
+        super().__init__(schema=schema, mode=mode)
+        self.directory = pathlib.Path(directory)
+        self.max_file_rows = max_file_rows
+        self.max_file_bytes = max_file_bytes
+        self.compression = compression
+        self.files: List[pathlib.Path] = []
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = sorted(self.directory.glob("part-*.parquet"))
+        if mode == "overwrite":
+            # temporary files left by interrupted runs are removed too
+            for path in [*existing, *self.directory.glob("part-*.parquet.tmp")]:
+                path.unlink()
+            existing = []
+        elif existing and self.schema is None:
+            # appended files keep the schema of the existing files
+            self.schema = pq.read_schema(existing[-1]).remove_metadata()
+        self._next_index = (
+            int(existing[-1].stem.removeprefix("part-")) + 1 if existing else 0
+        )
+        self._writer: "Optional[pq.ParquetWriter]" = None
+        self._file: "Optional[pa.OSFile]" = None
+        self._file_rows = 0
+
+    def _roll(self: Self) -> None:
+        """
+        Finish the current file, if any, moving it into place.
+        """
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._file.close()
+        path = self.directory / f"part-{self._next_index:05d}.parquet"
+        path.with_suffix(".parquet.tmp").replace(path)
+        self.files.append(path)
+        self._next_index += 1
+        self._writer = self._file = None
+        self._file_rows = 0
+
+    def _write(self: Self, table: "pa.Table") -> None:
+        if self._writer is None:
+            path = self.directory / f"part-{self._next_index:05d}.parquet.tmp"
+            self._file = pa.OSFile(str(path), "wb")
+            self._writer = pq.ParquetWriter(
+                self._file, self.schema, compression=self.compression
+            )
+        self._writer.write_table(table)
+        self._file_rows += table.num_rows
+        if (
+            self._file_rows >= self.max_file_rows
+            or self._file.tell() >= self.max_file_bytes
+        ):
+            self._roll()
+
+    def _close(self: Self) -> None:
+        self._roll()
+
+    def read(self: Self) -> "pa.Table":
+        # only complete part files (not .tmp files) hold results
+        tables = [
+            pq.read_table(path)
+            for path in sorted(self.directory.glob("part-*.parquet"))
+        ]
+        if tables:
+            return pa.concat_tables(tables)
+        return self.schema.empty_table() if self.schema is not None else pa.table({})
+
+
+class DuckDBSink(ResultSink):
+    """
+    Appends results to a DuckDB table.
+
+    Attributes:
+        database (str):
+            The DuckDB database file.
+        table_name (str):
+            The table results are appended to.
+    """
+
+    def __init__(
+        self: Self,
+        database: Union[str, pathlib.Path],
+        table_name: str,
+        schema: "Optional[pa.Schema]" = None,
+        mode: str = "overwrite",
+    ) -> None:
+        """
+        Initialize the sink, connecting to the database.
+
+        Args:
+            database (Union[str, pathlib.Path]):
+                The DuckDB database file.
+            table_name (str):
+                The table to append results to (created from the schema
+                if it does not exist).
+            schema (Optional[pa.Schema], optional):
+                The schema results are conformed to. Defaults to the
+                schema of the first write.
+            mode (str, optional):
+                "overwrite" to replace an existing table or "append"
+                to add to it. Defaults to "overwrite".
+        """
+        super().__init__(schema=schema, mode=mode)
+        self.database = str(database)
+        self.table_name = table_name
+        self._ddb = duckdb.connect(self.database)
+        if mode == "overwrite":
+            self._ddb.execute(f"DROP TABLE IF EXISTS {_quote_identifier(table_name)}")
+        if self.schema is not None:
+            self._create_table(self.schema.empty_table())
+
+    def _create_table(self: Self, table: "pa.Table") -> None:
+        """
+        Create the table with the schema of an Arrow table, if needed.
+        """
+        self._ddb.register("sink_batch", table)
+        self._ddb.execute(
+            f"CREATE TABLE IF NOT EXISTS {_quote_identifier(self.table_name)} "
+            "AS SELECT * FROM sink_batch LIMIT 0"
+        )
+        self._ddb.unregister("sink_batch")
+
+    def _write(self: Self, table: "pa.Table") -> None:
+        self._create_table(table)
+        self._ddb.register("sink_batch", table)
+        self._ddb.execute(
+            f"INSERT INTO {_quote_identifier(self.table_name)} BY NAME "
+            "SELECT * FROM sink_batch"
+        )
+        self._ddb.unregister("sink_batch")
+
+    def _close(self: Self) -> None:
+        self._ddb.close()
+
+    def read(self: Self) -> "pa.Table":
+        if not self._closed:
+            return query.fetch_arrow_table(
+                self._ddb.execute(f"FROM {_quote_identifier(self.table_name)}")
+            )
+        with duckdb.connect(self.database, read_only=True) as ddb:
+            return query.fetch_arrow_table(
+                ddb.execute(f"FROM {_quote_identifier(self.table_name)}")
+            )
+
+
+class LanceDBSink(ResultSink):
+    """
+    Adds results to a LanceDB table.
+
+    LanceDB creates a new table version for each add, so results are
+    buffered and added at least `min_rows_per_add` rows at a time.
+
+    Attributes:
+        uri (str):
+            The LanceDB database location.
+        table_name (str):
+            The table results are added to.
+    """
+
+    def __init__(
+        self: Self,
+        uri: Union[str, pathlib.Path],
+        table_name: str,
+        schema: "Optional[pa.Schema]" = None,
+        mode: str = "overwrite",
+        min_rows_per_add: int = 100_000,
+    ) -> None:
+        """
+        Initialize the sink, connecting to the database.
+
+        Args:
+            uri (Union[str, pathlib.Path]):
+                The LanceDB database location.
+            table_name (str):
+                The table to add results to.
+            schema (Optional[pa.Schema], optional):
+                The schema results are conformed to. Defaults to the
+                schema of an existing table when appending, otherwise
+                the schema of the first write.
+            mode (str, optional):
+                "overwrite" to replace an existing table or "append"
+                to add to it. Defaults to "overwrite".
+            min_rows_per_add (int, optional):
+                The number of rows buffered before each add.
+                Defaults to 100,000.
+        """
+        # imported here so that other sinks do not require lancedb
+        import lancedb  # noqa: PLC0415
+
+        super().__init__(schema=schema, mode=mode)
+        self.uri = str(uri)
+        self.table_name = table_name
+        self.min_rows_per_add = min_rows_per_add
+        self._db = lancedb.connect(self.uri)
+        self._table = None
+        self._buffer: "List[pa.Table]" = []
+        self._buffered_rows = 0
+
+        # an existing table is opened or replaced now (rather than on the
+        # first write), so it is read or removed even if nothing is written
+        exists = self.table_name in self._db.table_names()
+        if exists and mode == "append":
+            self._table = self._db.open_table(self.table_name)
+            if self.schema is None:
+                # appended results keep the schema of the existing table
+                self.schema = self._table.schema.remove_metadata()
+        elif self.schema is not None:
+            self._create_table()
+        elif exists:
+            # without a schema the table is created on the first write
+            self._db.drop_table(self.table_name)
+
+    def _create_table(self: Self) -> None:
+        """
+        Create the table with the sink schema, replacing any existing table.
+        """
+        self._table = self._db.create_table(
+            self.table_name, schema=self.schema, mode="overwrite"
+        )
+
+    def _flush(self: Self) -> None:
+        """
+        Add the buffered results to the table.
+        """
+        if self._buffer:
+            self._table.add(pa.concat_tables(self._buffer))
+            self._buffer = []
+            self._buffered_rows = 0
+
+    def _write(self: Self, table: "pa.Table") -> None:
+        if self._table is None:
+            self._create_table()
+        self._buffer.append(table)
+        self._buffered_rows += table.num_rows
+        if self._buffered_rows >= self.min_rows_per_add:
+            self._flush()
+
+    def _close(self: Self) -> None:
+        if self._table is None and self.schema is not None:
+            self._create_table()
+        self._flush()
+
+    def read(self: Self) -> "pa.Table":
+        if self._table is None:
+            return (
+                self.schema.empty_table() if self.schema is not None else pa.table({})
+            )
+        return self._table.to_arrow()
+
+
+# sinks by name, for choosing a sink per run
+SINKS: Dict[str, Type[ResultSink]] = {
+    "parquet": ParquetDatasetSink,
+    "duckdb": DuckDBSink,
+    "lancedb": LanceDBSink,
+}
+
+
+def open_sink(kind: str, **options: Any) -> ResultSink:  # noqa: ANN401
+    """
+    Open a sink by name.
+
+    Args:
+        kind (str):
+            The sink name ("parquet", "duckdb" or "lancedb").
+        **options (Any):
+            Options for the sink (see each sink class).
+
+    Returns:
+        ResultSink:
+            The opened sink.
+    """
+    if kind not in SINKS:
+        raise ValueError(f"Unknown sink {kind!r}, expected one of {sorted(SINKS)}.")
+    return SINKS[kind](**options)
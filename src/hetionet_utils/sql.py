@@ -2,12 +2,48 @@
 Module for dealing with SQL-specific operations
 """
 
+import contextlib
 import gzip
+import io
 import pathlib
+from typing import IO, TYPE_CHECKING, Iterator, Optional, Union
 
+from hetionet_utils import instrumentation
+from hetionet_utils.progress import ProgressCallback, open_with_progress
 
+if TYPE_CHECKING:
+    import duckdb
+
+# Parquet compression codecs accepted by `COPY ... (COMPRESSION ...)`
+PARQUET_COMPRESSIONS = (
+    "uncompressed",
+    "snappy",
+    "gzip",
+    "zstd",
+    "brotli",
+    "lz4",
+    "lz4_raw",
+)
+
+
+def _record_gzip_position(f: IO[str]) -> None:
+    """
+    Count the compressed and decompressed bytes read so far from a
+    gzip text file (as of its last buffered read).
+    """
+    if instrumentation.active() is None:
+        return
+    instrumentation.increment("sql_compressed_bytes_total", f.buffer.fileobj.tell())
+    instrumentation.increment("sql_decompressed_bytes_total", f.buffer.tell())
+
+
+@instrumentation.timed("sql_extract_seconds")
 def extract_and_write_sql_block(
-    sql_file: str, sql_start: str, sql_end: str, output_file: str
+    sql_file: str,
+    sql_start: str,
+    sql_end: str,
+    output_file: str,
+    progress: Optional[ProgressCallback] = None,
 ) -> bool:
     """
     Extracts a block of SQL statements from a compressed SQL dump file
@@ -22,13 +58,19 @@ def extract_and_write_sql_block(
             The end pattern to identify the end of the SQL block.
         output_file (str):
             The path to the output file where the block will be written.
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates based on the compressed
+            bytes read (for example progress.print_progress).
+            Defaults to None.
 
     Returns:
         bool:
             True if the SQL block was successfully written to the file,
             False if the block was not found or incomplete.
     """
-    with gzip.open(sql_file, "rt") as f:
+    with open_with_progress(
+        sql_file, progress, label=f"extract {sql_start}"
+    ) as sql_dump, gzip.open(sql_dump, "rt") as f:
         in_sql_block = False  # Flag to track whether we are inside the block
         temp_content = []  # Temporarily store the lines of the block
 
@@ -43,13 +85,19 @@ def extract_and_write_sql_block(
                 # Write the collected lines to the output file
                 with open(output_file, "w") as out_file:
                     out_file.writelines(temp_content)
+                _record_gzip_position(f)
                 return True  # Block successfully written
 
+        _record_gzip_position(f)
+
     # If we exit the loop without finding the end, the block is incomplete
     return False
 
 
-def remove_first_and_last_line_of_file(target_file: str) -> str:
+@instrumentation.timed("sql_trim_seconds")
+def remove_first_and_last_line_of_file(
+    target_file: str, progress: Optional[ProgressCallback] = None
+) -> str:
     """
     Removes the first and last lines of a file.
 
@@ -63,6 +111,9 @@ def remove_first_and_last_line_of_file(target_file: str) -> str:
     Args:
         target_file (str):
             Path to the target file to be processed.
+        progress (Optional[ProgressCallback], optional):
+            A function receiving progress updates based on the bytes
+            read. Defaults to None.
 
     Returns:
         str:
@@ -71,7 +122,9 @@ def remove_first_and_last_line_of_file(target_file: str) -> str:
     input_file = pathlib.Path(target_file)
     temp_file = input_file.with_suffix(".tmp")
 
-    with input_file.open("r") as infile, temp_file.open("w") as outfile:
+    with io.TextIOWrapper(
+        open_with_progress(target_file, progress, label=f"trim {target_file}")
+    ) as infile, temp_file.open("w") as outfile:
         # Skip the first line
         first_line = next(infile, None)
 
@@ -91,3 +144,105 @@ def remove_first_and_last_line_of_file(target_file: str) -> str:
     temp_file.replace(input_file)
 
     return target_file
+
+
+def quote_sql_string(value: Union[str, pathlib.Path]) -> str:
+    """
+    Quote a value as a SQL string literal, escaping single quotes.
+
+    This is used for statements which do not accept prepared
+    parameters, such as the destination of `COPY ... TO`.
+
+    Args:
+        value (Union[str, pathlib.Path]):
+            The value to quote.
+
+    Returns:
+        str:
+            The quoted SQL string literal.
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def sql_literal(value: Union[None, bool, int, float, str]) -> str:
+    """
+    Render a Python value as a SQL literal.
+
+    This is used to pass arguments to `EXECUTE` for statements
+    created with `PREPARE`, which do not accept client-side parameters.
+
+    Args:
+        value (Union[None, bool, int, float, str]):
+            The value to render.
+
+    Returns:
+        str:
+            The SQL literal.
+
+    Raises:
+        TypeError:
+            If the value has an unsupported type.
+    """
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, str):
+        return quote_sql_string(value)
+    raise TypeError(f"Unsupported SQL literal type {type(value).__name__}.")
+
+
+def parquet_compression(compression: str) -> str:
+    """
+    Check a Parquet compression codec before it is written into a
+    `COPY ... TO` statement (which does not accept parameters).
+
+    Args:
+        compression (str):
+            The codec name, in any case.
+
+    Returns:
+        str:
+            The codec name in lower case.
+
+    Raises:
+        ValueError:
+            If the codec is not one of PARQUET_COMPRESSIONS.
+    """
+    if str(compression).lower() not in PARQUET_COMPRESSIONS:
+        raise ValueError(f"Expected compression to be one of {PARQUET_COMPRESSIONS}.")
+    return str(compression).lower()
+
+
+@contextlib.contextmanager
+def duckdb_setting(
+    ddb: "duckdb.DuckDBPyConnection", name: str, value: Union[bool, int, float, str]
+) -> Iterator[None]:
+    """
+    Change a DuckDB setting within a block, restoring its previous value
+    afterwards so that a connection passed in by a caller is left as it
+    was (settings are shared by the cursors of a connection).
+
+    Args:
+        ddb (duckdb.DuckDBPyConnection):
+            The DuckDB connection.
+        name (str):
+            The setting name (for example "preserve_insertion_order").
+        value (Union[bool, int, float, str]):
+            The value within the block.
+
+    Yields:
+        None
+    """
+    if not name.isidentifier():
+        raise ValueError(f"Unexpected setting name {name!r}.")
+    previous = ddb.execute("SELECT current_setting(?)", [name]).fetchone()[0]
+    ddb.execute(f"SET {name} = {sql_literal(value)}")
+    try:
+        yield
+    finally:
+        ddb.execute(f"SET {name} = {sql_literal(previous)}")
@@ -0,0 +1,300 @@
+"""
+Module for extracting subsets of the precalculated metapath dataset.
+"""
+
+import glob
+import json
+import pathlib
+import shutil
+import urllib.parse
+from typing import Dict, List, Optional, Union
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import csv
+
+from hetionet_utils.sql import duckdb_setting, parquet_compression, quote_sql_string
+
+# types accepted as a list of metapaths
+Metapaths = Union[str, pathlib.Path, pa.Table, List[str]]
+
+# name of the manifest within a partitioned subset directory
+# (prefixed so that Parquet dataset readers skip it)
+MANIFEST_FILE = "_manifest.json"
+
+
+def register_metapaths(
+    ddb: duckdb.DuckDBPyConnection, metapaths: Metapaths, name: str = "metapaths"
+) -> str:
+    """
+    Register a list of metapaths as a table with a single `metapath` column.
+
+    Args:
+        ddb (duckdb.DuckDBPyConnection):
+            The DuckDB connection to register the table with.
+        metapaths (Metapaths):
+            A path to a CSV file with a `metapath` column, an Arrow table
+            with a `metapath` column or a list of metapath abbreviations.
+        name (str, optional):
+            The name of the table. Defaults to "metapaths".
+
+    Returns:
+        str:
+            The name of the table.
+    """
+    if isinstance(metapaths, (str, pathlib.Path)):
+        metapaths = csv.read_csv(metapaths)
+    elif isinstance(metapaths, list):
+        metapaths = pa.table({"metapath": pa.array(metapaths, type=pa.string())})
+
+    ddb.register(name, metapaths.select(["metapath"]))
+    return name
+
+
+def extract_metapath_subset(
+    metapath_data: Union[str, pathlib.Path],
+    metapaths: Metapaths,
+    output_file: Union[str, pathlib.Path],
+    compression: str = "zstd",
+    ddb: Optional[duckdb.DuckDBPyConnection] = None,
+) -> int:
+    """
+    Extract the rows of the precalculated metapath dataset which match
+    a list of metapaths, streaming them directly to a Parquet file.
+
+    The metapath list is semi-joined against the Parquet data within
+    DuckDB and written using `COPY ... TO`, so results never pass through
+    Python and memory use does not depend on the size of the subset.
+
+    Args:
+        metapath_data (Union[str, pathlib.Path]):
+            Path (or glob) for the precalculated metapath Parquet data.
+        metapaths (Metapaths):
+            A path to a CSV file with a `metapath` column, an Arrow table
+            with a `metapath` column or a list of metapath abbreviations.
+        output_file (Union[str, pathlib.Path]):
+            Path to the Parquet file to write.
+        compression (str, optional):
+            The Parquet compression codec (see PARQUET_COMPRESSIONS).
+            Defaults to "zstd".
+        ddb (Optional[duckdb.DuckDBPyConnection], optional):
+            An existing DuckDB connection to use. If None, a new in-memory
+            connection is created and closed afterwards. Defaults to None.
+
+    Returns:
+        int:
+            The number of rows written.
+
+    Raises:
+        ValueError:
+            If the compression codec is unknown.
+    """
+    compression = parquet_compression(compression)
+    connection = duckdb.connect() if ddb is None else ddb
+    try:
+        table = register_metapaths(connection, metapaths)
+        # row order is not needed, which lets DuckDB stream the copy
+        with duckdb_setting(connection, "preserve_insertion_order", False):
+            return connection.execute(
+                f"""
+                COPY (
+                    SELECT metapath_data.*
+                    FROM read_parquet({quote_sql_string(metapath_data)})
+                        AS metapath_data
+                    SEMI JOIN {table}
+                        ON metapath_data.metapath_id = {table}.metapath
+                )
+                TO {quote_sql_string(output_file)}
+                (FORMAT parquet, COMPRESSION {compression});
+                """
+            ).fetchone()[0]
+    finally:
+        if ddb is None:
+            connection.close()
+
+
+def _source_fingerprint(metapath_data: Union[str, pathlib.Path]) -> List[List]:
+    """
+    Describe the files of the source data so that changes can be detected.
+    """
+    return [
+        [path, (stat := pathlib.Path(path).stat()).st_size, stat.st_mtime_ns]
+        for path in sorted(glob.glob(str(metapath_data)))
+    ]
+
+
+def _partition_metapath(partition: pathlib.Path) -> str:
+    """
+    Get the metapath of a `metapath_id=...` partition directory.
+    """
+    return urllib.parse.unquote(partition.name.split("=", 1)[1])
+
+
+def _extract_partitions(
+    ddb: duckdb.DuckDBPyConnection,
+    metapath_data: Union[str, pathlib.Path],
+    metapaths: List[str],
+    output_dir: pathlib.Path,
+    compression: str,
+) -> Dict[str, Dict]:
+    """
+    Extract one partition per metapath with a single scan of the source
+    data, returning the manifest entries of the new partitions.
+    """
+    # partitions are written to a staging directory and then moved
+    # into place so that a failed extraction leaves no partial data.
+    # The partition files hold metapath_id only in their directory name
+    # (writing it into the files needs DuckDB 1.2), which DuckDB and
+    # pyarrow.dataset readers restore as a column through hive partitioning.
+    staging = output_dir / ".staging"
+    shutil.rmtree(staging, ignore_errors=True)
+    table = register_metapaths(ddb, metapaths, name="metapaths_added")
+    with duckdb_setting(ddb, "preserve_insertion_order", False):
+        ddb.execute(
+            f"""
+            COPY (
+                SELECT metapath_data.*
+                FROM read_parquet({quote_sql_string(metapath_data)}) AS metapath_data
+                SEMI JOIN {table}
+                    ON metapath_data.metapath_id = {table}.metapath
+            )
+            TO {quote_sql_string(staging)}
+            (
+                FORMAT parquet,
+                COMPRESSION {compression},
+                PARTITION_BY (metapath_id)
+            );
+            """
+        )
+
+    # metapaths without any rows are recorded without a partition
+    # so that they are not extracted again
+    entries = {metapath: {"partition": None, "rows": 0} for metapath in metapaths}
+    for partition in sorted(staging.glob("metapath_id=*")):
+        destination = output_dir / partition.name
+        shutil.rmtree(destination, ignore_errors=True)
+        partition.rename(destination)
+        entries[_partition_metapath(partition)] = {
+            "partition": partition.name,
+            "rows": sum(
+                pq.ParquetFile(file).metadata.num_rows
+                for file in destination.glob("*.parquet")
+            ),
+        }
+    shutil.rmtree(staging, ignore_errors=True)
+    return entries
+
+
+def _write_manifest(manifest_file: pathlib.Path, manifest: Dict) -> None:
+    """
+    Write a partition manifest atomically.
+    """
+    manifest_tmp = manifest_file.with_name(f"{manifest_file.name}.tmp")
+    manifest_tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    manifest_tmp.replace(manifest_file)
+
+
+def refresh_metapath_partitions(  # noqa: PLR0913
+    metapath_data: Union[str, pathlib.Path],
+    metapaths: Metapaths,
+    output_dir: Union[str, pathlib.Path],
+    ignore: Optional[Metapaths] = None,
+    compression: str = "zstd",
+    ddb: Optional[duckdb.DuckDBPyConnection] = None,
+) -> Dict[str, List[str]]:
+    """
+    Incrementally maintain a subset of the precalculated metapath dataset
+    partitioned by metapath (`output_dir/metapath_id=.../*.parquet`).
+
+    A manifest records which metapaths the partitions hold. When the
+    metapath lists change, only the partitions of added metapaths are
+    extracted (with a single scan of the source data) and the partitions
+    of removed metapaths are deleted. If the source data changes, every
+    partition is rebuilt.
+
+    Partition files do not hold the `metapath_id` column themselves; it is
+    restored from the partition directories by hive-partitioned readers
+    (for example DuckDB `read_parquet` or `pyarrow.dataset` with
+    `partitioning="hive"`).
+
+    Args:
+        metapath_data (Union[str, pathlib.Path]):
+            Path (or glob) for the precalculated metapath Parquet data.
+        metapaths (Metapaths):
+            A path to a CSV file with a `metapath` column, an Arrow table
+            with a `metapath` column or a list of metapath abbreviations.
+        output_dir (Union[str, pathlib.Path]):
+            The directory holding the partitions and manifest.
+        ignore (Optional[Metapaths], optional):
+            Metapaths to exclude, in any form accepted for metapaths
+            (for example metapaths_ignore.csv). Defaults to None.
+        compression (str, optional):
+            The Parquet compression codec (see PARQUET_COMPRESSIONS).
+            Defaults to "zstd".
+        ddb (Optional[duckdb.DuckDBPyConnection], optional):
+            An existing DuckDB connection to use. If None, a new in-memory
+            connection is created and closed afterwards. Defaults to None.
+
+    Returns:
+        Dict[str, List[str]]:
+            The metapaths which were "added", "removed" or left "unchanged".
+
+    Raises:
+        ValueError:
+            If the compression codec is unknown.
+    """
+    compression = parquet_compression(compression)
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_dir / MANIFEST_FILE
+    fingerprint = _source_fingerprint(metapath_data)
+
+    manifest = {"source": fingerprint, "partitions": {}}
+    if manifest_file.exists():
+        previous = json.loads(manifest_file.read_text())
+        # partitions extracted from different source data are rebuilt
+        if previous["source"] == fingerprint:
+            manifest["partitions"] = previous["partitions"]
+
+    connection = duckdb.connect() if ddb is None else ddb
+    try:
+        table = register_metapaths(connection, metapaths)
+        query = f"SELECT DISTINCT metapath FROM {table}"
+        if ignore is not None:
+            ignored = register_metapaths(connection, ignore, name="metapaths_ignore")
+            query += f" ANTI JOIN {ignored} USING (metapath)"
+        wanted = {metapath for (metapath,) in connection.execute(query).fetchall()}
+
+        added = sorted(wanted - set(manifest["partitions"]))
+        removed = sorted(set(manifest["partitions"]) - wanted)
+
+        for metapath in removed:
+            manifest["partitions"].pop(metapath)
+
+        # the manifest is written before partitions are deleted and after
+        # they are added, so it never lists a partition which does not
+        # exist; partitions it does not list (those removed, extracted
+        # from other source data or left by an interrupted run) are deleted
+        _write_manifest(manifest_file, manifest)
+        listed = {entry["partition"] for entry in manifest["partitions"].values()}
+        for partition in output_dir.glob("metapath_id=*"):
+            if partition.name not in listed:
+                shutil.rmtree(partition)
+
+        if added:
+            manifest["partitions"].update(
+                _extract_partitions(
+                    connection, metapath_data, added, output_dir, compression
+                )
+            )
+            _write_manifest(manifest_file, manifest)
+    finally:
+        if ddb is None:
+            connection.close()
+
+    return {
+        "added": added,
+        "removed": removed,
+        "unchanged": sorted(wanted - set(added)),
+    }
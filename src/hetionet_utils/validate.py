@@ -0,0 +1,267 @@
+"""
+Module for cross-validating gathered search API results against the
+precalculated metapath data exported by get_tables.py.
+
+Both sources describe the DWPC of each (source, target, metapath)
+combination. Rather than gathering everything twice, a random sample of
+the gathered combinations is joined against the precalculated Parquet
+data within DuckDB (which scans and joins across its threads) and each
+DWPC is compared within a tolerance.
+
+Only combinations with gathered rows can be sampled, as a combination
+for which the API returned no paths leaves no row behind. A pair the
+API returns empty but the precalculated data holds is therefore not
+reported as a mismatch; checking those needs the combinations rather
+than the gathered rows.
+"""
+
+import math
+import pathlib
+from typing import Dict, List, NamedTuple, Optional, Self, Union
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from hetionet_utils.query import fetch_arrow_table
+from hetionet_utils.sql import quote_sql_string, sql_literal
+
+# statuses given to each sampled combination
+VALIDATION_STATUSES = ("match", "mismatch", "missing")
+
+
+class ValidationReport(NamedTuple):
+    """
+    The result of comparing sampled gather results with the
+    precalculated metapath data.
+
+    Attributes:
+        comparisons (pa.Table):
+            One row per sampled combination with the API and
+            precalculated DWPC and path counts and a status of "match",
+            "mismatch" or "missing" (no precalculated row).
+        by_metapath (pa.Table):
+            The number of sampled combinations with each status
+            for each metapath.
+        checked (int):
+            The number of sampled combinations.
+        matched (int):
+            The number of combinations which agree.
+        mismatched (int):
+            The number of combinations which disagree.
+        missing (int):
+            The number of combinations without precalculated data.
+    """
+
+    comparisons: pa.Table
+    by_metapath: pa.Table
+    checked: int
+    matched: int
+    mismatched: int
+    missing: int
+
+    @property
+    def agreement(self: Self) -> float:
+        """
+        The fraction of comparable combinations which agree
+        (NaN if none were comparable).
+        """
+        compared = self.matched + self.mismatched
+        return self.matched / compared if compared else math.nan
+
+    def mismatches(self: Self) -> pa.Table:
+        """
+        Get the sampled combinations which disagree.
+
+        Returns:
+            pa.Table:
+                The mismatched comparisons, largest difference first.
+        """
+        return self.comparisons.filter(
+            pc.equal(self.comparisons["status"], "mismatch")
+        ).sort_by([("abs_difference", "descending")])
+
+    def agreeing_metapaths(self: Self, min_matched: int = 1) -> List[str]:
+        """
+        List the metapaths where every compared combination agrees, for
+        which the precalculated data may be used instead of the API.
+
+        Args:
+            min_matched (int, optional):
+                The number of matching combinations a metapath needs.
+                Defaults to 1.
+
+        Returns:
+            List[str]:
+                The agreeing metapaths.
+        """
+        return [
+            row["metapath_id"]
+            for row in self.by_metapath.to_pylist()
+            if row["mismatch"] == 0 and row["match"] >= min_matched
+        ]
+
+
+def _gather_relation(
+    ddb: duckdb.DuckDBPyConnection, gather_results: Union[str, pathlib.Path, pa.Table]
+) -> str:
+    """
+    Register gather results (an Arrow table, Parquet file, glob or
+    directory of Parquet files) as the `gather` view.
+    """
+    if isinstance(gather_results, pa.Table):
+        ddb.register("gather", gather_results)
+        return "gather"
+
+    if pathlib.Path(gather_results).is_dir():
+        gather_results = pathlib.Path(gather_results) / "*.parquet"
+    ddb.execute(
+        "CREATE VIEW gather AS SELECT * FROM "
+        f"read_parquet({quote_sql_string(gather_results)})"
+    )
+    return "gather"
+
+
+def validate_gather_results(  # noqa: PLR0913
+    gather_results: Union[str, pathlib.Path, pa.Table],
+    metapath_data: Union[str, pathlib.Path],
+    sample_size: int = 1000,
+    metapath: Optional[str] = None,
+    rtol: float = 1e-4,
+    atol: float = 1e-8,
+    seed: int = 0,
+    threads: Optional[int] = None,
+) -> ValidationReport:
+    """
+    Compare a random sample of gathered results with the precalculated
+    metapath data, joining on (source, target, metapath).
+
+    Gathered rows are paths, so they are first grouped by combination.
+    The API DWPC of a combination is its `DWPC` column where present
+    and otherwise the sum of its path `PDP` values. Combinations the
+    API returned without paths have no rows, so they are not sampled
+    (and cannot be reported as mismatches against precalculated data).
+
+    Args:
+        gather_results (Union[str, pathlib.Path, pa.Table]):
+            Gathered results with `source_id` (bioprocess identifier),
+            `target_id` (gene identifier) and `PDP` and/or `DWPC`
+            columns, as an Arrow table or a Parquet file, glob or
+            directory (such as the output of ParquetDatasetSink).
+        metapath_data (Union[str, pathlib.Path]):
+            Path (or glob) for the precalculated metapath Parquet data.
+        sample_size (int, optional):
+            The number of combinations to compare. Defaults to 1000.
+        metapath (Optional[str], optional):
+            The metapath of every result, for results without a
+            `metapath` column. Defaults to None.
+        rtol (float, optional):
+            The relative tolerance for DWPC values. Defaults to 1e-4,
+            which allows for DWPCs exported as float32.
+        atol (float, optional):
+            The absolute tolerance for DWPC values. Defaults to 1e-8.
+        seed (int, optional):
+            The seed for sampling combinations. Defaults to 0.
+        threads (Optional[int], optional):
+            The number of DuckDB threads. If None, DuckDB decides.
+            Defaults to None.
+
+    Returns:
+        ValidationReport:
+            The comparisons and counts of each status.
+    """
+    config: Dict[str, int] = {} if threads is None else {"threads": threads}
+    with duckdb.connect(config=config) as ddb:
+        relation = _gather_relation(ddb, gather_results)
+        columns = [
+            column[0]
+            for column in ddb.execute(f"SELECT * FROM {relation} LIMIT 0").description
+        ]
+        if metapath is not None:
+            metapath_expression = sql_literal(metapath)
+        elif "metapath" in columns:
+            metapath_expression = "metapath"
+        else:
+            raise ValueError(
+                "Expected a metapath column in the gather results or a metapath."
+            )
+        dwpc_expressions = [
+            expression
+            for column, expression in (("DWPC", "any_value(DWPC)"), ("PDP", "sum(PDP)"))
+            if column in columns
+        ]
+        if not dwpc_expressions:
+            raise ValueError("Expected a PDP or DWPC column in the gather results.")
+        dwpc_expression = f"coalesce({', '.join(dwpc_expressions)})"
+
+        comparisons = fetch_arrow_table(
+            ddb.execute(
+                f"""
+                WITH api AS (
+                    SELECT
+                        CAST(source_id AS VARCHAR) AS source_identifier,
+                        CAST(target_id AS VARCHAR) AS target_identifier,
+                        {metapath_expression} AS metapath_id,
+                        {dwpc_expression}::DOUBLE AS api_dwpc,
+                        count(*) AS api_paths
+                    FROM {relation}
+                    GROUP BY ALL
+                ),
+                -- sample by a seeded hash of each combination, which
+                -- (unlike reservoir sampling) is repeatable across threads
+                sample AS (
+                    SELECT * FROM api
+                    ORDER BY hash(
+                        source_identifier, target_identifier, metapath_id, {int(seed)}
+                    )
+                    LIMIT {int(sample_size)}
+                )
+                SELECT
+                    sample.*,
+                    precalculated.dwpc::DOUBLE AS precalculated_dwpc,
+                    precalculated.path_count AS precalculated_paths,
+                    abs(sample.api_dwpc - precalculated.dwpc) AS abs_difference,
+                    CASE
+                        WHEN precalculated.dwpc IS NULL THEN 'missing'
+                        WHEN abs(sample.api_dwpc - precalculated.dwpc)
+                            <= {float(atol)} + {float(rtol)} * abs(precalculated.dwpc)
+                            THEN 'match'
+                        ELSE 'mismatch'
+                    END AS status
+                FROM sample
+                LEFT JOIN read_parquet(
+                    {quote_sql_string(metapath_data)}
+                ) AS precalculated
+                    ON CAST(precalculated.source_identifier AS VARCHAR)
+                        = sample.source_identifier
+                    AND CAST(precalculated.target_identifier AS VARCHAR)
+                        = sample.target_identifier
+                    AND CAST(precalculated.metapath_id AS VARCHAR)
+                        = sample.metapath_id
+                ORDER BY ALL
+                """
+            )
+        )
+        ddb.register("comparisons", comparisons)
+        by_metapath = fetch_arrow_table(
+            ddb.execute(
+                "SELECT metapath_id, "
+                + ", ".join(
+                    f"count(*) FILTER (status = '{status}') AS {status}"
+                    for status in VALIDATION_STATUSES
+                )
+                + " FROM comparisons GROUP BY metapath_id ORDER BY metapath_id"
+            )
+        )
+
+    counts = {
+        status: sum(by_metapath[status].to_pylist()) for status in VALIDATION_STATUSES
+    }
+    return ValidationReport(
+        comparisons=comparisons,
+        by_metapath=by_metapath,
+        checked=comparisons.num_rows,
+        matched=counts["match"],
+        mismatched=counts["mismatch"],
+        missing=counts["missing"],
+    )
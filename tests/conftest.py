@@ -4,9 +4,18 @@ See here for more information:
 https://docs.pytest.org/en/stable/explanation/fixtures.html
 """
 
+import bz2
+import gzip
+import json
+import pathlib
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
 from hetionet_utils.database import HetionetNeo4j
+from hetionet_utils.graph import HetionetLocalGraph, build_local_graph
 
 
 @pytest.fixture
@@ -21,3 +30,223 @@ def fixture_HetionetNeo4j() -> HetionetNeo4j:
 
     # close the connection
     hetionet.close()
+
+
+@pytest.fixture
+def fixture_hetionet_json(tmp_path: pathlib.Path) -> pathlib.Path:
+    """
+    Creates a small Hetionet JSON file (bz2 compressed) for testing.
+    """
+
+    nodes = [
+        ("Biological Process", "GO:0000001", "process one"),
+        ("Gene", 1, "GENE1"),
+        ("Gene", 2, "GENE2"),
+        ("Gene", 3, "GENE3"),
+        ("Anatomy", "UBERON:0000001", "anatomy one"),
+    ]
+    edges = [
+        (("Gene", 1), ("Biological Process", "GO:0000001"), "participates", "both"),
+        (("Gene", 2), ("Biological Process", "GO:0000001"), "participates", "both"),
+        (("Gene", 1), ("Gene", 3), "interacts", "both"),
+        (("Gene", 2), ("Gene", 3), "interacts", "both"),
+        (("Gene", 1), ("Gene", 2), "regulates", "forward"),
+        # stored against the canonical Anatomy to Gene order
+        (("Gene", 3), ("Anatomy", "UBERON:0000001"), "downregulates", "both"),
+        (("Anatomy", "UBERON:0000001"), ("Gene", 1), "downregulates", "both"),
+    ]
+
+    with bz2.open(path := tmp_path / "hetionet.json.bz2", "wt") as file:
+        json.dump(
+            {
+                "nodes": [
+                    {"kind": kind, "identifier": identifier, "name": name, "data": {}}
+                    for kind, identifier, name in nodes
+                ],
+                "edges": [
+                    {
+                        "source_id": list(source),
+                        "target_id": list(target),
+                        "kind": kind,
+                        "direction": direction,
+                        "data": {},
+                    }
+                    for source, target, kind, direction in edges
+                ],
+            },
+            file,
+        )
+
+    return path
+
+
+@pytest.fixture
+def fixture_HetionetLocalGraph(
+    fixture_hetionet_json: pathlib.Path, tmp_path: pathlib.Path
+) -> HetionetLocalGraph:
+    """
+    Creates a HetionetLocalGraph from a small Hetionet JSON file.
+    Closes the store after work is completed.
+    """
+
+    # build and open the store
+    build_local_graph(fixture_hetionet_json, tmp_path / "graph")
+    yield (graph := HetionetLocalGraph(tmp_path / "graph"))
+
+    # release the memory-mapped arrays
+    graph.close()
+
+
+@pytest.fixture
+def fixture_metapath_data(tmp_path: pathlib.Path) -> pathlib.Path:
+    """
+    Creates a small precalculated metapath Parquet file with the columns
+    exported by get_tables.py, written with small row groups.
+    """
+
+    rows = [
+        (source, target, metapath)
+        for source in range(3)
+        for target in range(4)
+        for metapath in ["BPpG", "BPpGiG", "BPpGcG"]
+    ]
+    pq.write_table(
+        pa.table(
+            {
+                "id": range(1, len(rows) + 1),
+                "source_identifier": [f"GO:000000{row[0]}" for row in rows],
+                "target_identifier": [str(row[1] + 1) for row in rows],
+                "metapath_id": [row[2] for row in rows],
+                "path_count": [(i * 7) % 5 for i in range(len(rows))],
+                "adjusted_p_value": [((i * 11) % 36) / 35 for i in range(len(rows))],
+                "p_value": [((i * 11) % 36) / 70 for i in range(len(rows))],
+                "dwpc": [((i * 5) % 9) / 3 for i in range(len(rows))],
+                "source_degree": [row[0] + 10 for row in rows],
+                "target_degree": [row[1] + 20 for row in rows],
+                "n_dwpcs": [1000 + row[1] for row in rows],
+                "n_nonzero_dwpcs": [500 + row[1] for row in rows],
+                "nonzero_mean": [0.5 + row[0] / 10 for row in rows],
+                "nonzero_sd": [0.25 + row[1] / 100 for row in rows],
+                "source_id": [100 + row[0] for row in rows],
+                "target_id": [row[1] + 1 for row in rows],
+                "dgp_id": [row[0] * 4 + row[1] for row in rows],
+            }
+        ),
+        path := tmp_path / "connectivity-search-precalculated-metapath-data.parquet",
+        row_group_size=6,
+    )
+
+    return path
+
+
+@pytest.fixture
+def fixture_pathcount_duckdb(tmp_path: pathlib.Path) -> pathlib.Path:
+    """
+    Creates a small DuckDB database with the connectivity-search
+    PathCount tables for testing.
+    """
+
+    path = tmp_path / "connectivity-search.duckdb"
+    with duckdb.connect(str(path)) as ddb:
+        ddb.execute(
+            """
+            CREATE TABLE dj_hetmech_app_node AS
+            SELECT * FROM (VALUES
+                (1, 'GO:0000001'), (2, 'GO:0000002'),
+                (3, '1'), (4, '2'), (5, '3')
+            ) AS node(id, identifier);
+            CREATE TABLE dj_hetmech_app_metapath AS
+            SELECT * FROM (VALUES ('BPpG', 1), ('BPpGiG', 400))
+                AS metapath(abbreviation, n_similar);
+            CREATE TABLE dj_hetmech_app_degreegroupedpermutation AS
+            SELECT
+                id, metapath_id, id AS source_degree, 300 * id AS target_degree,
+                200 AS n_dwpcs, 20 AS n_nonzero_dwpcs,
+                0.5 AS nonzero_mean, 0.1 AS nonzero_sd
+            FROM (VALUES (1, 'BPpG'), (2, 'BPpG'), (1, 'BPpGiG'), (2, 'BPpGiG'))
+                AS degree(id, metapath_id);
+            CREATE TABLE dj_hetmech_app_pathcount AS
+            SELECT
+                row_number() OVER () AS id,
+                source_id, target_id, metapath_id,
+                (source_id * target_id)::BIGINT AS path_count,
+                CASE WHEN target_id = 5 THEN 1e-60 ELSE 0.1 / target_id END
+                    AS p_value,
+                1.0 / (source_id + target_id) AS dwpc,
+                source_id AS dgp_id
+            FROM (VALUES (1), (2)) AS source(source_id),
+                (VALUES (3), (4), (5)) AS target(target_id),
+                (VALUES ('BPpG'), ('BPpGiG')) AS metapath(metapath_id);
+            """
+        )
+    return path
+
+
+@pytest.fixture
+def fixture_sources_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    """
+    Creates a small sources directory for testing.
+    """
+
+    sources_dir = tmp_path / "sources"
+    sources_dir.mkdir()
+    (sources_dir / "BP.csv").write_text(
+        "id,name\nGO:0000002,process two\nGO:0000012,process twelve\n"
+    )
+    (sources_dir / "Gene.csv").write_text("id,name\n1,A1BG\n10,NAT2\n100,ADA\n")
+    (sources_dir / "metapaths.csv").write_text(
+        "metapath\nBPpGdAdG\nBPpG\nBPpGcG\nBPpGr>G\n"
+    )
+    (sources_dir / "metapaths_ignore.csv").write_text("metapath\nBPpG\nBPpGr>G\n")
+    return sources_dir
+
+
+@pytest.fixture
+def fixture_pg_dump(tmp_path: pathlib.Path) -> pathlib.Path:
+    """
+    Creates a small gzipped PostgreSQL dump with the connectivity-search
+    PathCount tables for testing.
+    """
+
+    tables = {
+        "dj_hetmech_app_node": (
+            "id integer NOT NULL,\n    identifier character varying(50) NOT NULL",
+            [(1, "GO:0000001"), (2, "GO:0000002"), (3, "1"), (4, "2")],
+        ),
+        "dj_hetmech_app_metapath": (
+            "abbreviation character varying(20) NOT NULL,\n    n_similar integer",
+            [("BPpG", 1), ("BPpGiG", 400)],
+        ),
+        "dj_hetmech_app_degreegroupedpermutation": (
+            "id integer NOT NULL,\n    metapath_id character varying(20),\n"
+            "    source_degree integer,\n    target_degree integer,\n"
+            "    n_dwpcs integer,\n    n_nonzero_dwpcs integer,\n"
+            "    nonzero_mean double precision,\n    nonzero_sd double precision",
+            [(1, "BPpG", 1, 2, 200, 20, 0.5, 0.1)],
+        ),
+        "dj_hetmech_app_pathcount": (
+            "id integer NOT NULL,\n    source_id integer,\n    target_id integer,\n"
+            "    metapath_id character varying(20),\n    path_count bigint,\n"
+            "    p_value double precision,\n    dwpc double precision,\n"
+            "    dgp_id integer",
+            [
+                (1, 1, 3, "BPpG", 2, 0.01, 0.25, 1),
+                (2, 2, 4, "BPpG", 1, 0.5, 0.125, 1),
+                (3, 1, 4, "BPpGiG", 3, 0.001, 1.5, 1),
+            ],
+        ),
+        "dj_hetmech_app_empty": ("id integer NOT NULL", []),
+    }
+
+    lines = ["--\n-- PostgreSQL database dump\n--\n"]
+    for name, (columns, _) in tables.items():
+        lines.append(f"CREATE TABLE public.{name} (\n    {columns}\n);\n\n")
+    for name, (_, rows) in tables.items():
+        lines.append(f"COPY public.{name} FROM stdin;\n")
+        lines.extend("\t".join(map(str, row)) + "\n" for row in rows)
+        lines.append("\\.\n\n")
+
+    path = tmp_path / "connectivity-search-pg_dump.sql.gz"
+    with gzip.open(path, "wt") as f:
+        f.writelines(lines)
+    return path
@@ -0,0 +1,152 @@
+"""
+Tests for buildcache.py
+"""
+
+import functools
+import json
+import pathlib
+from typing import List
+
+import pytest
+
+from hetionet_utils.buildcache import BuildCache, BuildStep
+
+
+def _copy_upper(
+    source: pathlib.Path, target: pathlib.Path, calls: List[str], suffix: str = ""
+) -> int:
+    """
+    Write the uppercased source to the target, noting the call.
+    """
+    calls.append(target.name)
+    target.write_text(source.read_text().upper() + suffix)
+    return len(calls)
+
+
+def test_build_cache_digest(tmp_path: pathlib.Path):
+    """
+    Tests BuildCache.digest
+    """
+    path = tmp_path / "file.txt"
+    path.write_text("a")
+    cache = BuildCache(tmp_path / "manifest.json")
+    digest = cache.digest(path)
+    assert digest == cache.digest(path)
+    assert len(cache.files) == 1
+
+    path.write_text("bb")
+    assert cache.digest(path) != digest
+
+
+def test_build_cache_build(tmp_path: pathlib.Path):
+    """
+    Tests BuildCache.build rebuilding only stale steps
+    """
+    source = tmp_path / "source.txt"
+    source.write_text("a")
+    target = tmp_path / "target.txt"
+    manifest_file = tmp_path / "manifest.json"
+    calls: List[str] = []
+
+    def step(suffix: str = "") -> BuildStep:
+        return BuildStep(
+            name="upper",
+            func=functools.partial(_copy_upper, source, target, calls, suffix),
+            inputs=[source],
+            outputs=[target],
+            params={"suffix": suffix},
+        )
+
+    cache = BuildCache(manifest_file)
+    assert cache.build([step()]) == ["upper"]
+    assert target.read_text() == "A"
+    assert cache.result("upper") == 1
+    assert cache.build([step()]) == []
+
+    # the manifest is kept between caches
+    assert json.loads(manifest_file.read_text())["steps"]["upper"]["result"] == 1
+    cache = BuildCache(manifest_file)
+    assert cache.build([step()]) == []
+
+    # changed parameters, inputs and damaged outputs are each rebuilt
+    assert cache.build([step("!")]) == ["upper"]
+    assert target.read_text() == "A!"
+    source.write_text("b")
+    assert cache.build([step("!")]) == ["upper"]
+    assert target.read_text() == "B!"
+    target.write_text("B")
+    assert cache.build([step("!")]) == ["upper"]
+    target.unlink()
+    assert cache.build([step("!")]) == ["upper"]
+    assert target.read_text() == "B!"
+
+    cache.invalidate("upper")
+    assert cache.build([step("!")]) == ["upper"]
+    assert len(calls) == 6
+    assert cache.rebuilt == ["upper"] * 5
+
+
+def test_build_cache_build_verify(tmp_path: pathlib.Path):
+    """
+    Tests BuildCache.build keeping unrecorded outputs which verify
+    """
+    target = tmp_path / "target.txt"
+    target.write_text("existing")
+    cache = BuildCache(tmp_path / "manifest.json")
+
+    def step(verified: bool) -> BuildStep:
+        return BuildStep(
+            name="write",
+            func=functools.partial(target.write_text, "built"),
+            outputs=[target],
+            verify=lambda: verified,
+        )
+
+    assert cache.build([step(verified=True)]) == []
+    assert target.read_text() == "existing"
+
+    cache.invalidate("write")
+    assert cache.build([step(verified=False)]) == ["write"]
+    assert target.read_text() == "built"
+
+
+def test_build_cache_build_parallel(tmp_path: pathlib.Path):
+    """
+    Tests BuildCache.build across worker processes
+    """
+    targets = [tmp_path / f"target_{number}.txt" for number in range(3)]
+    steps = [
+        BuildStep(
+            name=target.name,
+            func=functools.partial(pathlib.Path.write_text, target, target.name),
+            outputs=[target],
+        )
+        for target in targets
+    ]
+    cache = BuildCache(tmp_path / "manifest.json")
+    targets[0].write_text("stale")
+    cache.build(steps[:1])
+    assert sorted(cache.build(steps, workers=2)) == [
+        target.name for target in targets[1:]
+    ]
+    assert [target.read_text() for target in targets] == [
+        target.name for target in targets
+    ]
+
+
+def test_build_cache_build_failure(tmp_path: pathlib.Path):
+    """
+    Tests BuildCache.build not recording a failed step
+    """
+    target = tmp_path / "target.txt"
+    target.write_text("stale")
+
+    def fail() -> None:
+        target.write_text("partial")
+        raise RuntimeError("failed")
+
+    cache = BuildCache(tmp_path / "manifest.json")
+    with pytest.raises(RuntimeError):
+        cache.build([BuildStep(name="fail", func=fail, outputs=[target])])
+    assert "fail" not in cache.steps
+    assert "fail" not in BuildCache(tmp_path / "manifest.json").steps
@@ -0,0 +1,72 @@
+"""
+Tests for cache.py
+"""
+
+import pathlib
+
+import pytest
+
+from hetionet_utils import cache as cache_module
+from hetionet_utils.cache import ResponseCache
+
+
+def test_response_cache_get_set_and_persist(tmp_path: pathlib.Path):
+    """
+    Tests ResponseCache get, set and persistence across connections
+    """
+    path = tmp_path / "cache.sqlite"
+
+    with ResponseCache(path) as cache:
+        assert cache.get("missing") is None
+        cache.set("a", b"123")
+        cache.set("a", b"12345")
+        assert cache.get("a") == b"12345"
+        assert cache.size == 5
+        assert len(cache) == 1
+
+    # values are served from disk by a new cache object
+    with ResponseCache(path) as cache:
+        assert cache.get("a") == b"12345"
+        assert cache.size == 5
+
+
+def test_response_cache_ttl(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Tests ResponseCache expiring entries after the ttl
+    """
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    with ResponseCache(tmp_path / "cache.sqlite", ttl=60) as cache:
+        cache.set("a", b"value")
+        now[0] += 30
+        assert cache.get("a") == b"value"
+        now[0] += 31
+        assert cache.get("a") is None
+        assert cache.size == 0
+        assert len(cache) == 0
+
+
+def test_response_cache_eviction(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Tests ResponseCache evicting least recently used entries
+    """
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+
+    with ResponseCache(tmp_path / "cache.sqlite", max_bytes=10) as cache:
+        for key in ["a", "b"]:
+            cache.set(key, b"12345")
+            now[0] += 1
+
+        # touch "a" so that "b" is the least recently used
+        cache.get("a")
+        now[0] += 1
+        cache.set("c", b"123")
+
+        assert cache.get("a") == b"12345"
+        assert cache.get("b") is None
+        assert cache.get("c") == b"123"
+        assert cache.size == 8
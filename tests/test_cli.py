@@ -0,0 +1,198 @@
+"""
+Tests for cli.py
+"""
+
+import json
+import pathlib
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils import database, gather, instrumentation
+from hetionet_utils.cli import METAPATH_DATA_FILE, build_parser, main
+
+
+def test_build_parser():
+    """
+    Tests build_parser
+    """
+    parser = build_parser()
+    args = parser.parse_args(
+        ["gather", "--sink", "duckdb", "--workers", "4", "--metapath", "BPpG"]
+    )
+    assert (args.sink, args.workers, args.metapath) == ("duckdb", 4, ["BPpG"])
+
+    with pytest.raises(SystemExit):
+        parser.parse_args([])
+    with pytest.raises(SystemExit):
+        parser.parse_args(["gather", "--sink", "csv"])
+
+
+def test_main_extract(
+    fixture_pg_dump: pathlib.Path,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture,
+):
+    """
+    Tests the extract command with an existing archive
+    """
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    shutil.copy(fixture_pg_dump, data_dir / fixture_pg_dump.name)
+
+    assert (
+        main(
+            [
+                "--quiet",
+                "extract",
+                "--data-dir",
+                str(data_dir),
+                "--threads",
+                "1",
+                "--memory-limit",
+                "256MB",
+            ]
+        )
+        == 0
+    )
+    report = json.loads(capsys.readouterr().out)
+    assert report["export"]["rows"] == 3
+    # the existing archive is complete, so it is kept rather than downloaded
+    assert "archive" not in report["rebuilt"]
+    assert "database" in report["rebuilt"]
+
+    table = pq.read_table(data_dir / METAPATH_DATA_FILE)
+    assert sorted(table["source_identifier"].to_pylist()) == [
+        "GO:0000001",
+        "GO:0000001",
+        "GO:0000002",
+    ]
+    assert (data_dir / "tables" / "copy_data.public.dj_hetmech_app_node.tsv").is_file()
+    assert list(data_dir.glob("*.index*"))
+
+    # a second run finds every step fresh, unless asked to rebuild
+    assert main(["--quiet", "extract", "--data-dir", str(data_dir)]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report == {"rebuilt": [], "export": {**report["export"], "rows": 3}}
+    assert (
+        main(["--quiet", "extract", "--data-dir", str(data_dir), "--rebuild", "index"])
+        == 0
+    )
+    assert json.loads(capsys.readouterr().out)["rebuilt"] == ["index"]
+
+
+def test_main_subset(
+    fixture_metapath_data: pathlib.Path,
+    fixture_sources_dir: pathlib.Path,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture,
+):
+    """
+    Tests the subset command
+    """
+    output_dir = tmp_path / "subset"
+    assert (
+        main(
+            [
+                "subset",
+                "--metapath-data",
+                str(fixture_metapath_data),
+                "--sources-dir",
+                str(fixture_sources_dir),
+                "--output-dir",
+                str(output_dir),
+                "--threads",
+                "1",
+            ]
+        )
+        == 0
+    )
+    assert json.loads(capsys.readouterr().out)["added"] == ["BPpGcG", "BPpGdAdG"]
+    assert list((output_dir / "metapaths").glob("metapath_id=BPpGcG/*.parquet"))
+    assert any((output_dir / "matrices").iterdir())
+
+
+def test_main_gather_failure(
+    fixture_sources_dir: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """
+    Tests the gather command closes the driver and writes metrics
+    when the gather fails
+    """
+    closed = []
+
+    class FakeHetionetNeo4j:
+        def __init__(self, cache: object = None) -> None:
+            pass
+
+        def close(self) -> None:
+            closed.append(True)
+
+    def fail(*args: object, **kwargs: object) -> None:
+        instrumentation.increment("combinations_total")
+        raise RuntimeError("gather failed")
+        yield
+
+    monkeypatch.setattr(database, "HetionetNeo4j", FakeHetionetNeo4j)
+    monkeypatch.setattr(
+        gather,
+        "sample_result_schema",
+        lambda *args: pa.schema([("source_id", pa.string())]),
+    )
+    monkeypatch.setattr(gather, "gather_metapath_data", fail)
+
+    metrics_file = tmp_path / "metrics.json"
+    with pytest.raises(RuntimeError, match="gather failed"):
+        main(
+            [
+                "--quiet",
+                "gather",
+                "--sources-dir",
+                str(fixture_sources_dir),
+                "--output",
+                str(tmp_path / "results"),
+                "--metrics",
+                str(metrics_file),
+            ]
+        )
+    assert closed == [True]
+    assert instrumentation.active() is None
+    assert json.loads(metrics_file.read_text())["counters"]["combinations_total"] == 1
+
+
+def test_main_validate(
+    fixture_metapath_data: pathlib.Path,
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture,
+):
+    """
+    Tests the validate command exit status
+    """
+    rows = pq.read_table(fixture_metapath_data).to_pylist()
+    gather_file = tmp_path / "gather.parquet"
+    pq.write_table(
+        pa.Table.from_pylist(
+            [
+                {
+                    "source_id": row["source_identifier"],
+                    "target_id": int(row["target_identifier"]),
+                    "metapath": row["metapath_id"],
+                    "PDP": row["dwpc"],
+                }
+                for row in rows
+            ]
+        ),
+        gather_file,
+    )
+    assert main(["validate", str(gather_file), str(fixture_metapath_data)]) == 0
+    assert "36 match, 0 mismatch" in capsys.readouterr().out
+
+    pq.write_table(
+        pq.read_table(gather_file).set_column(3, "PDP", pa.array([100.0] * len(rows))),
+        gather_file,
+    )
+    assert main(["validate", str(gather_file), str(fixture_metapath_data)]) == 1
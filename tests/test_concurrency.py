@@ -0,0 +1,181 @@
+"""
+Tests for concurrency.py
+"""
+
+import threading
+
+import neo4j
+import pytest
+import requests
+
+from hetionet_utils.concurrency import (
+    AdaptiveConcurrencyController,
+    is_rate_limited,
+    is_transient,
+)
+
+
+def make_http_error(status_code: int) -> requests.HTTPError:
+    """Create an HTTPError carrying a response with the given status code."""
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(response=response)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (make_http_error(429), True),
+        (make_http_error(500), False),
+        (ValueError("not http"), False),
+    ],
+)
+def test_is_rate_limited(error: BaseException, expected: bool):
+    """
+    Tests is_rate_limited
+    """
+    assert is_rate_limited(error) == expected
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (make_http_error(429), True),
+        (make_http_error(503), True),
+        (make_http_error(404), False),
+        (requests.ConnectionError(), True),
+        (requests.Timeout(), True),
+        (neo4j.exceptions.ServiceUnavailable(), True),
+        (IndexError("unknown identifier"), False),
+        (KeyError("DWPC"), False),
+    ],
+)
+def test_is_transient(error: BaseException, expected: bool):
+    """
+    Tests is_transient
+    """
+    assert is_transient(error) == expected
+
+
+def test_controller_additive_increase_and_maximum():
+    """
+    Tests AdaptiveConcurrencyController increasing by one per window
+    """
+    controller = AdaptiveConcurrencyController(initial=2, maximum=3)
+
+    # a window of two successes increases the limit by one
+    for _ in range(2):
+        controller.release(controller.acquire(), latency=0.01)
+    assert controller.concurrency == 3
+
+    # the limit is capped at the maximum
+    for _ in range(10):
+        controller.release(controller.acquire(), latency=0.01)
+    assert controller.concurrency == 3
+
+
+def test_controller_multiplicative_decrease_once_per_window():
+    """
+    Tests AdaptiveConcurrencyController decreasing once for a burst of errors
+    """
+    controller = AdaptiveConcurrencyController(initial=8, minimum=1, maximum=8)
+    sequences = [controller.acquire() for _ in range(4)]
+
+    # all in-flight requests are rate limited, but we only halve once
+    for sequence in sequences:
+        controller.release(sequence, latency=0.01, error=make_http_error(429))
+    assert controller.concurrency == 4
+
+    # a new failure after the decrease halves again, down to the minimum
+    controller.release(
+        controller.acquire(), latency=0.01, error=requests.ConnectionError()
+    )
+    assert controller.concurrency == 2
+    for _ in range(3):
+        controller.release(
+            controller.acquire(), latency=0.01, error=make_http_error(503)
+        )
+    assert controller.concurrency == 1
+
+    metrics = controller.metrics()
+    assert metrics["errors"] == 8
+    assert metrics["rate_limited"] == 4
+    assert metrics["in_flight"] == 0
+
+    # deterministic failures are counted without decreasing the limit
+    controller = AdaptiveConcurrencyController(initial=8, maximum=8)
+    controller.release(controller.acquire(), latency=0.01, error=ValueError())
+    assert controller.concurrency == 8
+    assert controller.metrics()["errors"] == 1
+
+
+def test_controller_latency_target():
+    """
+    Tests AdaptiveConcurrencyController decreasing on high latency
+    """
+    controller = AdaptiveConcurrencyController(
+        initial=4, maximum=8, latency_target=0.5, smoothing=1.0
+    )
+    controller.release(controller.acquire(), latency=1.0)
+    assert controller.concurrency == 2
+    assert controller.metrics()["latency"] == 1.0
+
+
+def test_controller_map():
+    """
+    Tests AdaptiveConcurrencyController.map ordering, limits and retries
+    """
+    controller = AdaptiveConcurrencyController(initial=2, maximum=2)
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0, "failed": set()}
+
+    def work(value: int) -> int:
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        try:
+            # fail the first attempt for odd values
+            if value % 2 and value not in state["failed"]:
+                state["failed"].add(value)
+                raise make_http_error(429)
+            return value * 10
+        finally:
+            with lock:
+                state["in_flight"] -= 1
+
+    results = list(controller.map(work, [(i,) for i in range(6)], backoff=0))
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    assert state["peak"] <= 2
+    assert controller.metrics()["completed"] == 6
+    assert controller.metrics()["rate_limited"] == 3
+
+
+def test_controller_map_raises_after_retries():
+    """
+    Tests AdaptiveConcurrencyController.map raising after exhausting retries
+    """
+
+    def fail() -> None:
+        raise requests.ConnectionError("always fails")
+
+    controller = AdaptiveConcurrencyController()
+    with pytest.raises(requests.ConnectionError, match="always fails"):
+        list(controller.map(fail, [()], max_retries=1, backoff=0))
+    assert controller.metrics()["errors"] == 2
+
+
+def test_controller_map_raises_deterministic_errors():
+    """
+    Tests AdaptiveConcurrencyController.map raising deterministic errors
+    without retrying them
+    """
+
+    def fail() -> None:
+        raise IndexError("unknown identifier")
+
+    controller = AdaptiveConcurrencyController(initial=3)
+    with pytest.raises(IndexError, match="unknown identifier"):
+        list(controller.map(fail, [()], max_retries=3, backoff=10))
+    assert controller.metrics()["errors"] == 1
+    assert controller.concurrency == 3
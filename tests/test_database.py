@@ -2,7 +2,16 @@
 Tests for database.py
 """
 
-from hetionet_utils.database import HetionetNeo4j
+import pathlib
+from typing import List, Optional
+
+import neo4j
+import pyarrow as pa
+import pytest
+import requests
+
+from hetionet_utils.cache import ResponseCache
+from hetionet_utils.database import HetionetNeo4j, parse_metapath_content
 
 
 def test_get_id_from_gene_ontology_identifer(fixture_HetionetNeo4j: HetionetNeo4j):
@@ -65,3 +74,250 @@ def test_run_query(fixture_HetionetNeo4j: HetionetNeo4j):
         "identifier": 1,
         "node_url": "http://identifiers.org/ncbigene/1",
     }
+
+
+def test_get_metapath_data_for_source(
+    fixture_HetionetNeo4j: HetionetNeo4j, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Tests HetionetNeo4j.get_metapath_data_for_source
+    """
+
+    queries = []
+
+    def run_query(query: str, parameters: dict) -> list:
+        queries.append((query, parameters))
+        return [
+            {"target_id": 2, "node_ids": [1, 3, 2], "rel_ids": [7, 8], "PDP": 0.1},
+            {"target_id": 1, "node_ids": [1, 4, 1], "rel_ids": [5, 6], "PDP": 0.2},
+            {"target_id": 2, "node_ids": [1, 5, 2], "rel_ids": [9, 10], "PDP": 0.3},
+        ]
+
+    monkeypatch.setattr(fixture_HetionetNeo4j, "run_query", run_query)
+
+    result = fixture_HetionetNeo4j.get_metapath_data_for_source(
+        source_id="GO:0000002", metapath="BPpGiG", target_ids=[2, 3]
+    )
+
+    # a single query is made for all targets
+    assert len(queries) == 1
+    assert queries[0][1] == {"source": "GO:0000002"}
+
+    # only requested targets remain, summarized per target
+    assert result[["target_id", "PDP", "PC"]].to_dict(orient="list") == {
+        "target_id": [2, 2],
+        "PDP": [0.3, 0.1],
+        "PC": [2.0, 2.0],
+    }
+    assert result["DWPC"].tolist() == pytest.approx([0.4, 0.4])
+    assert result["percent_of_DWPC"].tolist() == pytest.approx([75.0, 25.0])
+    assert set(result["source_id"]) == {"GO:0000002"}
+    assert set(result["metapath"]) == {"BPpGiG"}
+
+    # columns may be selected
+    assert fixture_HetionetNeo4j.get_metapath_data_for_source(
+        source_id="GO:0000002",
+        metapath="BPpGiG",
+        columns=["source_id", "target_id", "DWPC"],
+    ).columns.tolist() == ["source_id", "target_id", "DWPC"]
+
+
+def test_get_metapath_data_cached(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Tests HetionetNeo4j.get_metapath_data serving repeats from a cache
+    """
+
+    calls = {"query": 0, "request": 0}
+
+    def run_query(query: str, parameters: dict) -> list:
+        calls["query"] += 1
+        return [{"neo4j_id": len(str(parameters["identifier"]))}]
+
+    def get(url: str) -> requests.Response:
+        calls["request"] += 1
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"paths": [{"PDP": 0.5, "DWPC": 1.0}]}'
+        return response
+
+    monkeypatch.setattr(requests, "get", get)
+
+    with ResponseCache(tmp_path / "cache.sqlite") as cache:
+        for _ in range(2):
+            hetionet = HetionetNeo4j(cache=cache)
+            monkeypatch.setattr(hetionet, "run_query", run_query)
+            result = hetionet.get_metapath_data(
+                source_id="GO:0000002", target_id=1, metapath="BPpG"
+            )
+            hetionet.close()
+
+            assert result.to_dict(orient="records") == [
+                {"PDP": 0.5, "DWPC": 1.0, "source_id": "GO:0000002", "target_id": 1}
+            ]
+
+        # the second object was served entirely from the cache
+        assert calls == {"query": 2, "request": 1}
+        assert cache.get(
+            f"{hetionet.api_base_path}/paths/source/10/target/1/metapath/BPpG"
+        )
+
+
+def test_parse_metapath_content():
+    """
+    Tests parse_metapath_content
+    """
+    content = b'{"paths": [{"PDP": 0.5, "DWPC": 1.0}, {"PDP": 0.25, "DWPC": 1.0}]}'
+    assert parse_metapath_content(
+        content, source_id="GO:0000002", target_id=1, columns=["target_id", "PDP"]
+    ).to_dict(orient="records") == [
+        {"target_id": 1, "PDP": 0.5},
+        {"target_id": 1, "PDP": 0.25},
+    ]
+    assert parse_metapath_content(b'{"paths": []}', "GO:0000002", 1).empty
+    empty = parse_metapath_content(
+        b'{"paths": []}', "GO:0000002", 1, columns=["source_id", "PDP", "DWPC"]
+    )
+    assert empty.empty
+    assert list(empty.columns) == ["source_id", "PDP", "DWPC"]
+
+
+class FakeResult:
+    """A stand-in for a neo4j.Result yielding records for each parameter."""
+
+    def __init__(self, parameters: Optional[dict]) -> None:
+        self.records = [
+            neo4j.Record([("identifier", identifier), ("neo4j_id", len(identifier))])
+            for identifier in (parameters or {}).get("identifiers", ["a", "bb", "ccc"])
+        ]
+
+    def keys(self) -> List[str]:
+        return ["identifier", "neo4j_id"]
+
+    def __iter__(self):  # noqa: ANN204
+        return iter(self.records)
+
+
+class FakeSession:
+    """A stand-in for a neo4j.Session recording the queries run."""
+
+    def __init__(self, driver: "FakeDriver") -> None:
+        self.driver = driver
+        self.closed = False
+
+    def run(self, query: str, parameters: Optional[dict] = None) -> FakeResult:
+        self.driver.queries.append((query, parameters))
+        return FakeResult(parameters)
+
+    def begin_transaction(self) -> "FakeSession":
+        return self
+
+    def close(self) -> None:
+        self.closed = True
+
+    def __enter__(self) -> "FakeSession":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class FakeDriver:
+    """A stand-in for a neo4j.Driver recording the sessions opened."""
+
+    def __init__(self) -> None:
+        self.sessions = []
+        self.queries = []
+
+    def session(self, **config: object) -> FakeSession:
+        self.sessions.append(session := FakeSession(self))
+        return session
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_hetionet() -> HetionetNeo4j:
+    """
+    Creates a HetionetNeo4j object using a fake driver.
+    """
+    hetionet = HetionetNeo4j(fetch_size=2)
+    hetionet.driver.close()
+    hetionet.driver = FakeDriver()
+    yield hetionet
+    hetionet.close()
+
+
+def test_run_query_reuses_session(fake_hetionet: HetionetNeo4j):
+    """
+    Tests HetionetNeo4j.run_query and run_queries reuse a session
+    """
+    for _ in range(3):
+        assert len(fake_hetionet.run_query("RETURN 1")) == 3
+    assert [
+        [record["neo4j_id"] for record in records]
+        for records in fake_hetionet.run_queries(
+            "RETURN 1", [{"identifiers": ["a"]}, {"identifiers": ["bb", "c"]}]
+        )
+    ] == [[1], [2, 1]]
+    assert len(fake_hetionet.driver.sessions) == 1
+
+    # a session which raises is discarded
+    def fail(query: str, parameters: Optional[dict] = None) -> None:
+        raise neo4j.exceptions.ServiceUnavailable("lost connection")
+
+    fake_hetionet.driver.sessions[0].run = fail
+    with pytest.raises(neo4j.exceptions.ServiceUnavailable):
+        fake_hetionet.run_query("RETURN 1")
+    assert fake_hetionet.driver.sessions[0].closed
+    assert len(fake_hetionet.run_query("RETURN 1")) == 3
+    assert len(fake_hetionet.driver.sessions) == 2
+
+
+def test_get_ids_from_identifiers(fake_hetionet: HetionetNeo4j, tmp_path: pathlib.Path):
+    """
+    Tests HetionetNeo4j.get_ids_from_identifiers
+    """
+    with ResponseCache(tmp_path / "cache.sqlite") as cache:
+        fake_hetionet.cache = cache
+        assert fake_hetionet.get_ids_from_identifiers(
+            ["a", "bb", "a", "ccc"], batch_size=2
+        ) == {"a": 1, "bb": 2, "ccc": 3}
+        assert [parameters for _, parameters in fake_hetionet.driver.queries] == [
+            {"identifiers": ["a", "bb"]},
+            {"identifiers": ["ccc"]},
+        ]
+
+        # cached identifiers are not queried again
+        assert fake_hetionet.get_ids_from_identifiers(["ccc", "dddd"]) == {
+            "ccc": 3,
+            "dddd": 4,
+        }
+        assert fake_hetionet.driver.queries[-1][1] == {"identifiers": ["dddd"]}
+        assert fake_hetionet.get_id_from_identifer("bb") == 2
+
+
+def test_stream_query(fake_hetionet: HetionetNeo4j):
+    """
+    Tests HetionetNeo4j.stream_query and query_arrow
+    """
+    batches = list(fake_hetionet.stream_query("RETURN 1"))
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert batches[0].schema.names == ["identifier", "neo4j_id"]
+
+    schema = pa.schema([("neo4j_id", pa.int32()), ("identifier", pa.string())])
+    table = fake_hetionet.query_arrow("RETURN 1", schema=schema)
+    assert table.schema == schema
+    assert table.to_pydict() == {
+        "neo4j_id": [1, 2, 3],
+        "identifier": ["a", "bb", "ccc"],
+    }
+
+    empty = fake_hetionet.query_arrow("RETURN 1", {"identifiers": []}, schema=schema)
+    assert empty.schema == schema
+    assert empty.num_rows == 0
+
+    # streams use their own sessions, which are closed
+    assert all(session.closed for session in fake_hetionet.driver.sessions)
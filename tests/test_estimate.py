@@ -0,0 +1,143 @@
+"""
+Tests for estimate.py
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from hetionet_utils.database import parse_metapath_content
+from hetionet_utils.estimate import (
+    Interval,
+    bootstrap_mean,
+    bootstrap_storage,
+    estimate_gather,
+    parquet_bytes_per_row,
+    sample_combinations,
+)
+
+
+@pytest.fixture
+def fixture_input_tables() -> tuple:
+    """
+    Creates small bioprocess, gene and metapath tables for testing.
+    """
+    return (
+        pa.table({"id": ["GO:0000001", "GO:0000002"]}),
+        pa.table({"id": [1, 2, 3]}),
+        pa.table({"metapath": ["BPpG", "BPpGiG"]}),
+    )
+
+
+def test_sample_combinations(fixture_input_tables: tuple):
+    """
+    Tests sample_combinations
+    """
+    sample = sample_combinations(*fixture_input_tables, n=50, seed=0)
+
+    assert sample.num_rows == 50
+    assert sample.schema.names == ["source_id", "target_id", "metapath"]
+    assert set(sample["source_id"].to_pylist()) <= {"GO:0000001", "GO:0000002"}
+    assert set(sample["target_id"].to_pylist()) <= {1, 2, 3}
+    assert sample.equals(sample_combinations(*fixture_input_tables, n=50, seed=0))
+
+
+def test_bootstrap_mean():
+    """
+    Tests bootstrap_mean
+    """
+    values = np.r_[np.zeros(90), np.full(10, 10.0)]
+    interval = bootstrap_mean(values, seed=0)
+
+    assert interval.value == pytest.approx(1.0)
+    assert interval.low < interval.value < interval.high
+    assert bootstrap_mean(np.full(5, 2.0), seed=0) == Interval(2.0, 2.0, 2.0)
+    assert np.isnan(bootstrap_mean(np.array([])).value)
+
+
+def test_parquet_bytes_per_row():
+    """
+    Tests parquet_bytes_per_row
+    """
+    assert parquet_bytes_per_row([]) == 0.0
+    assert parquet_bytes_per_row([pd.DataFrame({"a": []})]) == 0.0
+
+    small = parquet_bytes_per_row([pd.DataFrame({"a": [1.0]})])
+    large = parquet_bytes_per_row([pd.DataFrame({"a": [1.0] * 1000})])
+    # fixed overhead is amortized over more rows
+    assert 0 < large < small
+
+
+def test_bootstrap_storage():
+    """
+    Tests bootstrap_storage
+    """
+    results = [
+        pd.DataFrame({"a": np.arange(size, dtype=float)}) for size in [0, 4, 0, 8]
+    ]
+    bytes_per_row, storage = bootstrap_storage(results, 100, resamples=50, seed=0)
+
+    assert bytes_per_row.value == parquet_bytes_per_row(results)
+    assert bytes_per_row.low <= bytes_per_row.value <= bytes_per_row.high
+    assert storage.value == pytest.approx(3 * 100 * bytes_per_row.value)
+    assert storage.low < storage.high
+    assert np.isnan(bootstrap_storage([], 100)[1].value)
+
+
+def test_estimate_gather_empty_responses(fixture_input_tables: tuple):
+    """
+    Tests estimate_gather counting responses without paths as zero rows
+    """
+
+    def gather(source_id: str, target_id: int, metapath: str) -> pd.DataFrame:
+        # only one metapath returns paths
+        content = (
+            b'{"paths": [{"PDP": 0.5, "DWPC": 1.0}, {"PDP": 0.5, "DWPC": 1.0}]}'
+            if metapath == "BPpG"
+            else b'{"paths": []}'
+        )
+        return parse_metapath_content(
+            content, source_id, target_id, columns=["source_id", "PDP", "DWPC"]
+        )
+
+    estimate = estimate_gather(gather, *fixture_input_tables, n=200, seed=0)
+
+    assert (estimate.samples, estimate.errors) == (200, 0)
+    assert estimate.zero_row_fraction == pytest.approx(0.5, abs=0.1)
+    assert estimate.rows_per_query.value == pytest.approx(
+        2 * (1 - estimate.zero_row_fraction)
+    )
+
+
+def test_estimate_gather(fixture_input_tables: tuple):
+    """
+    Tests estimate_gather
+    """
+
+    def gather(source_id: str, target_id: int, metapath: str) -> pd.DataFrame:
+        if metapath == "BPpGiG" and target_id == 3:
+            raise ValueError("failed")
+        # only one metapath returns rows, two per query
+        return pd.DataFrame(
+            {"source_id": [source_id] * 2, "target_id": [target_id] * 2, "DWPC": 0.5}
+        ).iloc[: 2 if metapath == "BPpG" else 0]
+
+    estimate = estimate_gather(
+        gather, *fixture_input_tables, n=200, concurrency=4, seed=0
+    )
+
+    assert estimate.expected_queries == 12
+    assert estimate.samples + estimate.errors == 200
+    assert estimate.errors > 0
+    assert 0 < estimate.zero_row_fraction < 1
+    assert estimate.rows_per_query.low <= estimate.rows_per_query.value
+    assert estimate.rows_per_query.value <= estimate.rows_per_query.high
+    assert estimate.bytes_per_row.value > 0
+    assert estimate.storage_bytes.value == pytest.approx(
+        estimate.rows_per_query.value * 12 * estimate.bytes_per_row.value
+    )
+    assert estimate.storage_bytes.low <= estimate.storage_bytes.value
+    assert estimate.storage_bytes.value <= estimate.storage_bytes.high
+    assert estimate.concurrency == 4
+    assert estimate.wall_clock_seconds.value > 0
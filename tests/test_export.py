@@ -0,0 +1,136 @@
+"""
+Tests for export.py
+"""
+
+import pathlib
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils.export import export_pathcount_parquet, smallest_integer_type
+
+
+@pytest.mark.parametrize(
+    "minimum, maximum, expected",
+    [
+        (0, 0, "UTINYINT"),
+        (0, 255, "UTINYINT"),
+        (0, 256, "USMALLINT"),
+        (0, 2**32 - 1, "UINTEGER"),
+        (-1, 100, "TINYINT"),
+        (-1, 2**15, "INTEGER"),
+        (-1, 2**40, "BIGINT"),
+    ],
+)
+def test_smallest_integer_type(minimum: int, maximum: int, expected: str):
+    """
+    Tests smallest_integer_type
+    """
+    assert smallest_integer_type(minimum, maximum) == expected
+
+
+def test_smallest_integer_type_out_of_range():
+    """
+    Tests smallest_integer_type with values no integer type holds
+    """
+    with pytest.raises(ValueError):
+        smallest_integer_type(0, 2**64)
+
+
+def test_export_pathcount_parquet_default(
+    fixture_pathcount_duckdb: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests export_pathcount_parquet with the default profile
+    """
+    target_file = tmp_path / "default.parquet"
+    report = export_pathcount_parquet(fixture_pathcount_duckdb, target_file)
+    table = pq.read_table(target_file)
+
+    assert report["rows"] == table.num_rows == 12
+    assert report["file_bytes"] == target_file.stat().st_size
+    assert table.schema.field("source_identifier").type == pa.string()
+    assert table.schema.field("path_count").type == pa.int64()
+
+    # adjusted p-values are capped at 1.0
+    row = table.filter(pc.equal(table["id"], 4)).to_pylist()[0]
+    assert row["metapath_id"] == "BPpGiG"
+    assert row["adjusted_p_value"] == 1.0
+
+
+@pytest.mark.parametrize("float32", [False, True])
+def test_export_pathcount_parquet_compact(
+    fixture_pathcount_duckdb: pathlib.Path, tmp_path: pathlib.Path, float32: bool
+):
+    """
+    Tests export_pathcount_parquet with the compact profile
+    """
+    export_pathcount_parquet(fixture_pathcount_duckdb, tmp_path / "default.parquet")
+    report = export_pathcount_parquet(
+        fixture_pathcount_duckdb,
+        tmp_path / "compact.parquet",
+        profile="compact",
+        float32=float32,
+    )
+    default = pq.read_table(tmp_path / "default.parquet").sort_by("id")
+    compact = pq.read_table(tmp_path / "compact.parquet").sort_by("id")
+
+    assert report["rows"] == compact.num_rows == default.num_rows
+    assert compact.schema.names == default.schema.names
+
+    schema = compact.schema
+    for column in ("source_identifier", "target_identifier", "metapath_id"):
+        assert pa.types.is_dictionary(schema.field(column).type)
+        assert compact[column].cast(pa.string()).equals(default[column])
+    assert schema.field("path_count").type == pa.uint8()
+    assert schema.field("source_degree").type == pa.uint8()
+    assert schema.field("target_degree").type == pa.uint16()
+    assert report["columns"]["target_degree"] == {
+        "min": 300,
+        "max": 600,
+        "type": "USMALLINT",
+    }
+    for column in ("path_count", "source_degree", "target_degree", "n_dwpcs"):
+        assert compact[column].to_pylist() == default[column].to_pylist()
+
+    if not float32:
+        assert schema.field("p_value").type == pa.float64()
+        assert compact["p_value"].equals(default["p_value"])
+        assert "p_value" not in report["columns"]
+        return
+
+    assert schema.field("p_value").type == pa.float32()
+    assert schema.field("dwpc").type == pa.float32()
+    assert 0 < report["columns"]["dwpc"]["max_rel_error"] < 1e-7
+    # 1e-60 is below the float32 range and is rounded to zero
+    assert report["columns"]["p_value"]["underflow"] == 4
+    assert report["columns"]["dwpc"]["underflow"] == 0
+    assert compact["dwpc"].cast(pa.float64()).to_pylist() == pytest.approx(
+        default["dwpc"].to_pylist(), rel=1e-7
+    )
+
+
+@pytest.mark.parametrize(
+    "profile, float32, compression",
+    [("unknown", False, "zstd"), ("default", True, "zstd"), ("default", False, "x")],
+)
+def test_export_pathcount_parquet_invalid(
+    fixture_pathcount_duckdb: pathlib.Path,
+    tmp_path: pathlib.Path,
+    profile: str,
+    float32: bool,
+    compression: str,
+):
+    """
+    Tests export_pathcount_parquet with invalid options
+    """
+    with pytest.raises(ValueError):
+        export_pathcount_parquet(
+            fixture_pathcount_duckdb,
+            tmp_path / "out.parquet",
+            profile=profile,
+            float32=float32,
+            compression=compression,
+        )
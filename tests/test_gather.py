@@ -0,0 +1,131 @@
+"""
+Tests for gather.py
+"""
+
+import json
+import pathlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from hetionet_utils.concurrency import AdaptiveConcurrencyController
+from hetionet_utils.database import parse_metapath_content
+from hetionet_utils.gather import (
+    GATHER_COLUMNS,
+    gather_metapath_data,
+    sample_result_schema,
+)
+from hetionet_utils.sinks import ParquetDatasetSink
+
+SCHEMA = pa.schema(
+    [
+        ("source_id", pa.string()),
+        ("target_id", pa.int64()),
+        ("PDP", pa.float64()),
+        ("DWPC", pa.float64()),
+    ]
+)
+
+
+class FakeHetionet:
+    """
+    A stand-in for HetionetNeo4j returning as many paths as the gene ID.
+    """
+
+    def get_metapath_url(self, source_id: str, target_id: int, metapath: str) -> str:
+        return f"{source_id}/{target_id}/{metapath}"
+
+    def get_api_content(self, url: str) -> bytes:
+        _, target_id, metapath = url.split("/")
+        pdp = int(target_id) / 10
+        paths = [
+            {"metapath": metapath, "PDP": pdp, "DWPC": pdp * int(target_id)}
+        ] * int(target_id)
+        return json.dumps({"paths": paths}).encode()
+
+    def get_metapath_data(
+        self, source_id: str, target_id: int, metapath: str, columns: list
+    ) -> pd.DataFrame:
+        return parse_metapath_content(
+            self.get_api_content(self.get_metapath_url(source_id, target_id, metapath)),
+            source_id,
+            target_id,
+            columns=columns,
+        )
+
+
+def test_sample_result_schema():
+    """
+    Tests sample_result_schema
+    """
+    schema = sample_result_schema(
+        FakeHetionet(), ("GO:0000002", "1", "BPpG"), ["source_id", "target_id", "PDP"]
+    )
+    assert schema.names == ["source_id", "target_id", "PDP"]
+    assert schema.field("target_id").type == pa.int64()
+
+    # a sample without paths still gives typed path columns
+    schema = sample_result_schema(FakeHetionet(), ("GO:0000002", "0", "BPpG"))
+    assert schema.names == GATHER_COLUMNS
+    assert [field.type for field in schema] == [
+        pa.string(),
+        pa.int64(),
+        pa.string(),
+        pa.float64(),
+        pa.float64(),
+    ]
+
+
+def test_gather_metapath_data(tmp_path: pathlib.Path):
+    """
+    Tests gather_metapath_data writes every response to the sink
+    """
+    combinations = [
+        (source_id, target_id, "BPpG")
+        for source_id in ["GO:0000001", "GO:0000002"]
+        for target_id in range(1, 6)
+    ]
+    with ParquetDatasetSink(tmp_path / "results", schema=SCHEMA) as sink:
+        written = list(
+            gather_metapath_data(
+                FakeHetionet(),
+                combinations,
+                sink,
+                controller=AdaptiveConcurrencyController(initial=2, maximum=4),
+                parse_processes=1,
+                batch_size=4,
+            )
+        )
+    assert sum(written) == len(combinations)
+    assert all(count <= 4 for count in written)
+
+    table = ds.dataset(tmp_path / "results").to_table()
+    assert table.schema == SCHEMA
+    assert table.num_rows == 2 * sum(range(1, 6))
+    assert table["DWPC"].null_count == 0
+
+
+def test_gather_metapath_data_metapaths(tmp_path: pathlib.Path):
+    """
+    Tests gather_metapath_data keeps the metapath of each result
+    """
+    combinations = [
+        ("GO:0000001", target_id, metapath)
+        for target_id in range(1, 4)
+        for metapath in ["BPpG", "BPpGiG"]
+    ]
+    schema = sample_result_schema(FakeHetionet(), combinations[0])
+    with ParquetDatasetSink(tmp_path / "results", schema=schema) as sink:
+        for _ in gather_metapath_data(
+            FakeHetionet(), combinations, sink, parse_processes=1
+        ):
+            pass
+
+    table = ds.dataset(tmp_path / "results").to_table()
+    assert table.schema.names == GATHER_COLUMNS
+    counts = table.group_by("metapath").aggregate([("PDP", "count")])
+    assert sorted(counts.to_pylist(), key=lambda row: row["metapath"]) == [
+        {"metapath": "BPpG", "PDP_count": 6},
+        {"metapath": "BPpGiG", "PDP_count": 6},
+    ]
@@ -0,0 +1,184 @@
+"""
+Tests for graph.py
+"""
+
+import pathlib
+
+import numpy as np
+import pytest
+
+from hetionet_utils.graph import HetionetLocalGraph, build_local_graph
+
+
+def test_build_local_graph(fixture_hetionet_json: pathlib.Path, tmp_path: pathlib.Path):
+    """
+    Tests build_local_graph with custom node IDs
+    """
+    directory = build_local_graph(
+        fixture_hetionet_json,
+        tmp_path / "graph",
+        neo4j_ids={
+            ("Biological Process", "GO:0000001"): 40,
+            ("Gene", "1"): 10,
+            ("Gene", "2"): 20,
+            ("Gene", "3"): 30,
+            ("Anatomy", "UBERON:0000001"): 50,
+        },
+    )
+
+    graph = HetionetLocalGraph(directory)
+    assert graph.metadata["n_nodes"] == 5
+    assert graph.metadata["n_edges"] == 7
+
+    # arrays are memory-mapped rather than read into memory
+    indptr, indices, edge_ids = graph.adjacency("AdG", "forward")
+    assert isinstance(indptr, np.memmap)
+
+    # both Anatomy to Gene edges are stored in canonical order
+    assert indices.tolist() == [1, 3]
+    assert edge_ids.tolist() == [6, 5]
+
+    assert graph.get_id_from_identifer(2) == 20
+    assert graph.get_node(40) == {
+        "neo4j_id": 40,
+        "identifier": "GO:0000001",
+        "name": "process one",
+        "kind": "Biological Process",
+    }
+    graph.close()
+
+
+def test_get_id_from_identifer(fixture_HetionetLocalGraph: HetionetLocalGraph):
+    """
+    Tests HetionetLocalGraph.get_id_from_identifer and get_node
+    """
+    assert fixture_HetionetLocalGraph.get_id_from_identifer("GO:0000001") == 0
+    assert fixture_HetionetLocalGraph.get_id_from_identifer(3) == 3
+    assert fixture_HetionetLocalGraph.get_id_from_identifer("3") == 3
+    assert fixture_HetionetLocalGraph.get_node(3)["identifier"] == 3
+
+    with pytest.raises(KeyError):
+        fixture_HetionetLocalGraph.get_id_from_identifer("GO:9999999")
+    with pytest.raises(KeyError):
+        fixture_HetionetLocalGraph.get_node(100)
+
+
+@pytest.mark.parametrize(
+    "metapath, expected",
+    [
+        # Case 1: undirected edges, two paths to the same target
+        (
+            "BPpGiG",
+            [
+                {
+                    "target_id": 3,
+                    "node_ids": [0, 1, 3],
+                    "edge_indices": [0, 2],
+                    "PDP": 0.5,
+                },
+                {
+                    "target_id": 3,
+                    "node_ids": [0, 2, 3],
+                    "edge_indices": [1, 3],
+                    "PDP": 0.5,
+                },
+            ],
+        ),
+        # Case 2: forward directed edge
+        (
+            "BPpGr>G",
+            [
+                {
+                    "target_id": 2,
+                    "node_ids": [0, 1, 2],
+                    "edge_indices": [0, 4],
+                    "PDP": 2**-0.5,
+                }
+            ],
+        ),
+        # Case 3: backward directed edge
+        (
+            "BPpG<rG",
+            [
+                {
+                    "target_id": 1,
+                    "node_ids": [0, 2, 1],
+                    "edge_indices": [1, 4],
+                    "PDP": 2**-0.5,
+                }
+            ],
+        ),
+        # Case 4: paths revisiting a node are excluded
+        (
+            "BPpGiGiG",
+            [
+                {
+                    "target_id": 1,
+                    "node_ids": [0, 2, 3, 1],
+                    "edge_indices": [1, 3, 2],
+                    "PDP": 0.5 * 2**-0.5,
+                },
+                {
+                    "target_id": 2,
+                    "node_ids": [0, 1, 3, 2],
+                    "edge_indices": [0, 2, 3],
+                    "PDP": 0.5 * 2**-0.5,
+                },
+            ],
+        ),
+    ],
+)
+def test_get_metapath_data_for_source(
+    fixture_HetionetLocalGraph: HetionetLocalGraph, metapath: str, expected: list
+):
+    """
+    Tests HetionetLocalGraph.get_metapath_data_for_source
+    """
+    result = fixture_HetionetLocalGraph.get_metapath_data_for_source(
+        source_id="GO:0000001", metapath=metapath
+    )
+
+    assert result["target_id"].tolist() == [row["target_id"] for row in expected]
+    assert [list(node_ids) for node_ids in result["node_ids"]] == [
+        row["node_ids"] for row in expected
+    ]
+    assert [list(edge_indices) for edge_indices in result["edge_indices"]] == [
+        row["edge_indices"] for row in expected
+    ]
+    assert result["PDP"].tolist() == pytest.approx([row["PDP"] for row in expected])
+    assert set(result["metapath"]) == {metapath}
+
+
+def test_get_metapath_data(fixture_HetionetLocalGraph: HetionetLocalGraph):
+    """
+    Tests HetionetLocalGraph.get_metapath_data
+    """
+    result = fixture_HetionetLocalGraph.get_metapath_data(
+        source_id="GO:0000001", target_id="3", metapath="BPpGiG"
+    )
+
+    assert result["PC"].tolist() == [2.0, 2.0]
+    assert result["DWPC"].tolist() == pytest.approx([1.0, 1.0])
+    assert result["percent_of_DWPC"].tolist() == pytest.approx([50.0, 50.0])
+
+    # targets without paths return no rows
+    assert fixture_HetionetLocalGraph.get_metapath_data(
+        source_id="GO:0000001", target_id=1, metapath="BPpGiG"
+    ).empty
+
+
+def test_get_metapath_data_wrong_metanode(
+    fixture_HetionetLocalGraph: HetionetLocalGraph,
+):
+    """
+    Tests HetionetLocalGraph raising for nodes which are not of the
+    metapath's source or target metanode
+    """
+    with pytest.raises(ValueError, match="not a Biological Process"):
+        fixture_HetionetLocalGraph.get_metapath_data_for_source(
+            source_id=1, metapath="BPpGiG"
+        )
+    with pytest.raises(ValueError, match="not a Gene"):
+        fixture_HetionetLocalGraph.get_metapath_data(
+            source_id="GO:0000001", target_id="UBERON:0000001", metapath="BPpGiG"
+        )
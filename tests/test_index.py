@@ -0,0 +1,136 @@
+"""
+Tests for index.py
+"""
+
+import os
+import pathlib
+import shutil
+
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils.index import (
+    IdentifierIndex,
+    build_identifier_index,
+    default_index_path,
+)
+
+
+def test_default_index_path():
+    """
+    Tests default_index_path
+    """
+    assert default_index_path("data/metapaths.parquet") == pathlib.Path(
+        "data/metapaths.index.parquet"
+    )
+
+
+def test_build_identifier_index(fixture_metapath_data: pathlib.Path):
+    """
+    Tests build_identifier_index and IdentifierIndex.row_groups
+    """
+    index = IdentifierIndex(build_identifier_index(fixture_metapath_data))
+    assert index.index_file == default_index_path(fixture_metapath_data)
+
+    # each source spans two row groups of six rows (4 targets x 3 metapaths)
+    assert index.row_groups("source_identifier", "GO:0000001") == {
+        (str(fixture_metapath_data), 2),
+        (str(fixture_metapath_data), 3),
+    }
+    # targets appear in one row group per source
+    assert len(index.row_groups("target_identifier", 1)) == 3
+    assert index.row_groups("source_identifier", "GO:9999999") == set()
+
+
+def test_identifier_index_read(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests IdentifierIndex.read against filtering the full table
+    """
+    index = IdentifierIndex(
+        build_identifier_index(
+            [fixture_metapath_data], index_file=tmp_path / "custom.index.parquet"
+        )
+    )
+    expected = [
+        row["id"]
+        for row in pq.read_table(fixture_metapath_data).to_pylist()
+        if row["source_identifier"] == "GO:0000002" and row["target_identifier"] == "3"
+    ]
+
+    result = index.read(
+        {"source_identifier": "GO:0000002", "target_identifier": 3},
+        columns=["id", "dwpc"],
+    )
+    assert result.column_names == ["id", "dwpc"]
+    assert sorted(result["id"].to_pylist()) == expected
+
+    # unmatched lookups return an empty table with the requested columns
+    empty = index.read({"source_identifier": "GO:9999999"}, columns=["id"])
+    assert empty.num_rows == 0
+    assert empty.column_names == ["id"]
+
+
+def test_identifier_index_read_empty(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests IdentifierIndex.read on an index built over an empty file
+    """
+    schema = pq.read_schema(fixture_metapath_data).remove_metadata()
+    empty_file = tmp_path / "empty.parquet"
+    pq.write_table(schema.empty_table(), empty_file)
+
+    index = IdentifierIndex(build_identifier_index(empty_file))
+    assert index.row_groups("source_identifier", "GO:0000001") == set()
+    assert index.schema() == schema
+
+    result = index.read({"source_identifier": "GO:0000001"})
+    assert result.num_rows == 0
+    assert result.schema == schema
+    assert index.read(
+        {"source_identifier": "GO:0000001"}, columns=["id"]
+    ).column_names == ["id"]
+
+
+def test_identifier_index_relative_paths(
+    fixture_metapath_data: pathlib.Path,
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """
+    Tests IdentifierIndex resolving files relative to the index
+    """
+    (tmp_path / "data").mkdir()
+    shutil.copy2(fixture_metapath_data, tmp_path / "data" / "metapaths.parquet")
+    monkeypatch.chdir(tmp_path)
+    index_file = build_identifier_index("./data/metapaths.parquet")
+
+    # the index may be used from another working directory
+    monkeypatch.chdir(tmp_path / "data")
+    index = IdentifierIndex(tmp_path / index_file)
+    assert index.row_groups("source_identifier", "GO:0000001") == {
+        (str(tmp_path / "data" / "metapaths.parquet"), 2),
+        (str(tmp_path / "data" / "metapaths.parquet"), 3),
+    }
+    assert index.read({"source_identifier": "GO:0000001"}).num_rows == 12
+
+
+def test_identifier_index_stale(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests IdentifierIndex refusing indexes of changed files
+    """
+    index_file = build_identifier_index(fixture_metapath_data)
+    stat = os.stat(fixture_metapath_data)
+    os.utime(fixture_metapath_data, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    with pytest.raises(ValueError, match="stale"):
+        IdentifierIndex(index_file)
+
+    # indexes without recorded files are refused
+    legacy_file = tmp_path / "legacy.index.parquet"
+    pq.write_table(pq.read_table(index_file).replace_schema_metadata(), legacy_file)
+    with pytest.raises(ValueError, match="predates"):
+        IdentifierIndex(legacy_file)
@@ -0,0 +1,72 @@
+"""
+Tests for inputs.py
+"""
+
+import pathlib
+from typing import List, Optional
+
+import pytest
+
+from hetionet_utils.inputs import file_digest, load_source_inputs
+
+
+def test_file_digest(tmp_path: pathlib.Path):
+    """
+    Tests file_digest
+    """
+    (path := tmp_path / "file.txt").write_text("abc")
+    assert file_digest(path, chunk_size=2) == (
+        "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"
+    )
+
+
+@pytest.mark.parametrize(
+    "metapaths, expected",
+    [
+        (None, ["BPpGdAdG", "BPpGcG"]),
+        (["BPpGdAdG"], ["BPpGdAdG"]),
+        (["BPpG"], []),
+    ],
+)
+def test_load_source_inputs(
+    fixture_sources_dir: pathlib.Path,
+    metapaths: Optional[List[str]],
+    expected: List[str],
+):
+    """
+    Tests load_source_inputs
+    """
+    inputs = load_source_inputs(fixture_sources_dir, metapaths=metapaths)
+
+    assert inputs.bioprocesses["id"].to_pylist() == ["GO:0000002", "GO:0000012"]
+    assert inputs.genes["id"].to_pylist() == [1, 10, 100]
+    assert inputs.metapaths["metapath"].to_pylist() == expected
+
+
+def test_load_source_inputs_cache(
+    fixture_sources_dir: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests load_source_inputs caches tables keyed by the source files
+    """
+    cache_dir = tmp_path / "cache"
+    inputs = load_source_inputs(fixture_sources_dir, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.arrow"))) == 3
+
+    cached = load_source_inputs(fixture_sources_dir, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.arrow"))) == 3
+    for name in inputs._fields:
+        assert getattr(cached, name).equals(getattr(inputs, name))
+
+    # a different metapath filter uses a different cache entry
+    load_source_inputs(fixture_sources_dir, metapaths=["BPpGcG"], cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("*.arrow"))) == 6
+
+    # changes to the source files are picked up
+    (fixture_sources_dir / "metapaths_ignore.csv").write_text("metapath\nBPpGcG\n")
+    changed = load_source_inputs(fixture_sources_dir, cache_dir=cache_dir)
+    assert changed.metapaths["metapath"].to_pylist() == [
+        "BPpGdAdG",
+        "BPpG",
+        "BPpGr>G",
+    ]
@@ -0,0 +1,132 @@
+"""
+Tests for instrumentation.py
+"""
+
+import gzip
+import json
+import math
+import pathlib
+
+import pyarrow as pa
+import pytest
+import requests
+
+from hetionet_utils import instrumentation
+from hetionet_utils.combination import (
+    generate_combinations_for_bioprocs_genes_and_metapaths,
+    process_in_chunks_for_bioprocs_genes_and_metapaths,
+)
+from hetionet_utils.concurrency import AdaptiveConcurrencyController
+from hetionet_utils.instrumentation import Histogram, Instrumentation, instrument
+from hetionet_utils.sql import extract_and_write_sql_block
+
+
+def test_histogram():
+    """
+    Tests Histogram
+    """
+    histogram = Histogram(buckets=[1, 2, 4, 8])
+    assert math.isnan(histogram.quantile(0.5))
+    assert histogram.to_dict()["p50"] is None
+
+    for value in [0.5, 1.5, 1.5, 3, 3, 3, 3, 6, 7, 20]:
+        histogram.observe(value)
+
+    assert histogram.count == 10
+    assert histogram.total == pytest.approx(48.5)
+    assert histogram.cumulative_counts() == [1, 3, 7, 9, 10]
+    assert 2 <= histogram.quantile(0.5) <= 4
+    assert histogram.quantile(0) == 0.5
+    assert histogram.quantile(1) == 20
+    assert histogram.to_dict()["buckets"] == {
+        "1": 1,
+        "2": 3,
+        "4": 7,
+        "8": 9,
+        "+Inf": 10,
+    }
+
+
+def test_instrumentation_export(tmp_path: pathlib.Path):
+    """
+    Tests Instrumentation exports as Prometheus text and JSON
+    """
+    metrics = Instrumentation()
+    metrics.increment("request_retries_total", 2)
+    metrics.observe("http_response_bytes", 100, buckets=[64, 256])
+    with metrics.timer("http_request_seconds"):
+        pass
+
+    prometheus = metrics.write(tmp_path / "metrics.prom").read_text()
+    assert "# TYPE hetionet_request_retries_total counter" in prometheus
+    assert "hetionet_request_retries_total 2" in prometheus
+    assert 'hetionet_http_response_bytes_bucket{le="64"} 0' in prometheus
+    assert 'hetionet_http_response_bytes_bucket{le="256"} 1' in prometheus
+    assert 'hetionet_http_response_bytes_bucket{le="+Inf"} 1' in prometheus
+    assert "hetionet_http_request_seconds_count 1" in prometheus
+
+    exported = json.loads(metrics.write(tmp_path / "metrics.json").read_text())
+    assert exported["counters"] == {"request_retries_total": 2}
+    assert exported["histograms"]["http_response_bytes"]["sum"] == 100
+
+    summary = metrics.summary()
+    assert "request_retries_total: 2" in summary
+    assert "http_request_seconds: n=1" in summary
+
+
+def test_hooks_disabled():
+    """
+    Tests module-level hooks are no-ops unless enabled
+    """
+    assert instrumentation.active() is None
+    with instrumentation.timer("noop_seconds"):
+        instrumentation.increment("noop_total")
+        instrumentation.observe("noop_bytes", 1)
+    assert instrumentation.active() is None
+
+
+def test_instrument(tmp_path: pathlib.Path, capsys: pytest.CaptureFixture):
+    """
+    Tests instrument records the chunker, sql extractor and retries
+    """
+    dump = tmp_path / "dump.sql.gz"
+    with gzip.open(dump, "wt") as f:
+        f.write("header\nCOPY public.table (a) FROM stdin;\n1\n2\n\\.\nfooter\n")
+
+    calls = []
+
+    def flaky(value: int) -> int:
+        calls.append(value)
+        if len(calls) == 1:
+            raise requests.ConnectionError("first call fails")
+        return value
+
+    with instrument(tmp_path / "metrics.json") as metrics:
+        chunks = list(
+            process_in_chunks_for_bioprocs_genes_and_metapaths(
+                generate_combinations_for_bioprocs_genes_and_metapaths(
+                    pa.table({"id": ["GO:1", "GO:2"]}),
+                    pa.table({"id": [1, 2, 3]}),
+                    pa.table({"metapath": ["BPpG"]}),
+                ),
+                chunk_size=4,
+            )
+        )
+        assert extract_and_write_sql_block(
+            str(dump), "COPY public.table", "\\.", str(tmp_path / "block.tsv")
+        )
+        controller = AdaptiveConcurrencyController()
+        assert list(controller.map(flaky, [(1,)], backoff=0)) == [1]
+
+    assert len(chunks) == 2
+    assert instrumentation.active() is None
+
+    exported = json.loads((tmp_path / "metrics.json").read_text())
+    assert exported["counters"]["combinations_total"] == 6
+    assert exported["counters"]["request_retries_total"] == 1
+    assert exported["counters"]["sql_compressed_bytes_total"] == dump.stat().st_size
+    assert exported["counters"]["sql_decompressed_bytes_total"] > 0
+    assert exported["histograms"]["chunk_build_seconds"]["count"] == 2
+    assert exported["histograms"]["sql_extract_seconds"]["count"] == 1
+    assert metrics.to_dict()["counters"] == exported["counters"]
+    assert "Instrumented run" in capsys.readouterr().out
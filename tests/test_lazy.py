@@ -0,0 +1,99 @@
+"""
+Tests for lazy.py
+"""
+
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from hetionet_utils.lazy import LazyModule, lazy_import
+
+# cumulative import time budget for lightweight modules, well above
+# their measured import time but far below that of their dependencies
+IMPORT_BUDGET_SECONDS = 0.25
+
+# heavy dependencies which importing a lightweight module must not load
+HEAVY_MODULES = ["duckdb", "neo4j", "numpy", "pandas", "pyarrow", "requests"]
+
+
+def test_lazy_import(monkeypatch: pytest.MonkeyPatch):
+    """
+    Tests lazy_import defers importing until first use
+    """
+    # modules which are already imported are returned as-is
+    assert lazy_import("json") is json
+
+    monkeypatch.delitem(sys.modules, "colorsys", raising=False)
+    colorsys = lazy_import("colorsys")
+    assert isinstance(colorsys, LazyModule)
+    assert "colorsys" not in sys.modules
+
+    # the first attribute access (from any number of threads) imports it
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(colorsys.rgb_to_hsv(1, 0, 0)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [(0.0, 1.0, 1.0)] * 8
+    assert "colorsys" in sys.modules
+    assert "rgb_to_hsv" in dir(colorsys)
+
+    # later changes to the module are seen through the lazy module
+    monkeypatch.setattr(sys.modules["colorsys"], "rgb_to_hsv", lambda *_: "patched")
+    assert colorsys.rgb_to_hsv(1, 0, 0) == "patched"
+
+    with pytest.raises(AttributeError):
+        _ = colorsys.missing
+    with pytest.raises(ModuleNotFoundError):
+        _ = lazy_import("hetionet_utils.missing").attribute
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "hetionet_utils.cli",
+        "hetionet_utils.combination",
+        "hetionet_utils.concurrency",
+        "hetionet_utils.database",
+        "hetionet_utils.estimate",
+        "hetionet_utils.pipeline",
+        "hetionet_utils.sql",
+    ],
+)
+def test_import_budget(module: str):
+    """
+    Tests lightweight modules import within budget without
+    loading heavy dependencies
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import sys, {module}; "
+            f"print([name for name in {HEAVY_MODULES!r} if name in sys.modules])",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+    # -X importtime reports "self | cumulative | module" in microseconds
+    cumulative = {
+        name.strip(): int(total)
+        for _, total, name in (
+            line.removeprefix("import time:").split("|")
+            for line in result.stderr.splitlines()[1:]
+            if line.startswith("import time:")
+        )
+    }
+    assert cumulative[module] / 1e6 < IMPORT_BUDGET_SECONDS
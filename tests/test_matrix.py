@@ -0,0 +1,94 @@
+"""
+Tests for matrix.py
+"""
+
+import json
+import pathlib
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils.matrix import (
+    ScoreMatrices,
+    matrix_filename,
+    read_axis,
+    write_score_matrices,
+)
+
+
+def test_read_axis(tmp_path: pathlib.Path):
+    """
+    Tests read_axis
+    """
+    axis_file = tmp_path / "Gene.csv"
+    axis_file.write_text("id,name\n10,NAT2\n1,A1BG\n")
+
+    assert read_axis(axis_file) == ["10", "1"]
+    assert read_axis([10, 1]) == ["10", "1"]
+
+
+@pytest.mark.parametrize(
+    "metapath, value, expected",
+    [
+        ("BPpGiG", "dwpc", "BPpGiG.dwpc.npy"),
+        ("BPpGr>G", "p_value", "BPpGr%3EG.p_value.npy"),
+    ],
+)
+def test_matrix_filename(metapath: str, value: str, expected: str):
+    """
+    Tests matrix_filename
+    """
+    assert matrix_filename(metapath, value) == expected
+
+
+def test_write_score_matrices(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests write_score_matrices and ScoreMatrices
+    """
+    # rows and columns use an order which differs from the data
+    # and include identifiers without data
+    rows = ["GO:0000002", "GO:0000000", "GO:0000009"]
+    columns = ["4", "2", "1", "3", "99"]
+    axes_file = write_score_matrices(
+        fixture_metapath_data,
+        rows=rows,
+        columns=columns,
+        output_dir=tmp_path / "matrices",
+        metapaths=["BPpGiG", "BPpG"],
+        batch_size=5,
+    )
+
+    axes = json.loads(axes_file.read_text())
+    assert axes["shape"] == [3, 5]
+    assert list(axes["metapaths"]) == ["BPpGiG", "BPpG"]
+
+    matrices = ScoreMatrices(tmp_path / "matrices")
+    dwpc = matrices.matrix("BPpG", "dwpc")
+    assert dwpc.dtype == np.float32
+    assert isinstance(dwpc, np.memmap)
+
+    expected = {
+        (row["metapath_id"], row["source_identifier"], row["target_identifier"]): row
+        for row in pq.read_table(fixture_metapath_data).to_pylist()
+    }
+    for metapath in ("BPpGiG", "BPpG"):
+        for value in ("dwpc", "p_value"):
+            matrix = matrices.matrix(metapath, value)
+            for row_position, row in enumerate(rows):
+                for column_position, column in enumerate(columns):
+                    key = (metapath, row, column)
+                    if key in expected:
+                        assert matrix[row_position, column_position] == pytest.approx(
+                            expected[key][value], rel=1e-6
+                        )
+                    else:
+                        assert np.isnan(matrix[row_position, column_position])
+
+    row = matrices.row("BPpG", "GO:0000000")
+    assert row.shape == (5,)
+    assert row[matrices.column_position(1)] == pytest.approx(
+        expected[("BPpG", "GO:0000000", "1")]["dwpc"], rel=1e-6
+    )
@@ -0,0 +1,81 @@
+"""
+Tests for metagraph.py
+"""
+
+import pytest
+
+from hetionet_utils.metagraph import (
+    MetapathStep,
+    build_metapath_cypher,
+    parse_metapath,
+)
+
+
+@pytest.mark.parametrize(
+    "metapath, expected_steps",
+    [
+        # Case 1: single edge in canonical order
+        (
+            "GpBP",
+            [MetapathStep("G", "BP", "GpBP", "PARTICIPATES_GpBP", "both", False)],
+        ),
+        # Case 2: reversed and overridden edge names
+        (
+            "BPpGdAdG",
+            [
+                MetapathStep("BP", "G", "GpBP", "PARTICIPATES_GpBP", "both", True),
+                MetapathStep("G", "A", "AdG", "DOWNREGULATES_AdG", "both", True),
+                MetapathStep("A", "G", "AdG", "DOWNREGULATES_AdG", "both", False),
+            ],
+        ),
+        # Case 3: directed edges
+        (
+            "Gr>G<rG",
+            [
+                MetapathStep("G", "G", "GrG", "REGULATES_GrG", "forward", False),
+                MetapathStep("G", "G", "GrG", "REGULATES_GrG", "backward", False),
+            ],
+        ),
+        # Case 4: edge names which depend on node kinds
+        (
+            "PCiCpD",
+            [
+                MetapathStep("PC", "C", "PCiC", "INCLUDES_PCiC", "both", False),
+                MetapathStep("C", "D", "CpD", "PALLIATES_CpD", "both", False),
+            ],
+        ),
+    ],
+)
+def test_parse_metapath(metapath: str, expected_steps: list):
+    """
+    Tests parse_metapath
+    """
+    assert parse_metapath(metapath) == expected_steps
+
+
+@pytest.mark.parametrize(
+    "metapath",
+    ["", "BP", "BPpG>", "BPxG", "XpG", "GrG", "BPp>G", "BPpGdBP"],
+)
+def test_parse_metapath_invalid(metapath: str):
+    """
+    Tests parse_metapath with malformed or unknown metapaths
+    """
+    with pytest.raises(ValueError):
+        parse_metapath(metapath)
+
+
+def test_build_metapath_cypher():
+    """
+    Tests build_metapath_cypher
+    """
+    query = build_metapath_cypher("BPpGr>G", damping=0.4)
+
+    assert (
+        "MATCH path = (n0:`Biological Process`)-[:PARTICIPATES_GpBP]-(n1:`Gene`)"
+        "-[:REGULATES_GrG]->(n2:`Gene`)"
+    ) in query
+    assert "size([(n1)-[:REGULATES_GrG]->() | 1])" in query
+    assert "size([()-[:REGULATES_GrG]->(n2) | 1])" in query
+    assert "n2.identifier AS target_id" in query
+    assert "degree ^ -0.4" in query
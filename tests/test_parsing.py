@@ -0,0 +1,84 @@
+"""
+Tests for parsing.py
+"""
+
+import json
+
+import pyarrow as pa
+import pytest
+
+from hetionet_utils.parsing import (
+    SHARED_MEMORY_DIR,
+    ArrowParsePool,
+    metapath_content_to_arrow,
+)
+
+CONTENT = json.dumps(
+    {
+        "paths": [
+            {"metapath": "BPpG", "node_ids": [1, 2], "PDP": 0.5, "DWPC": 1.0},
+            {"metapath": "BPpG", "node_ids": [1, 3], "PDP": 0.25, "DWPC": 1.0},
+        ]
+    }
+).encode()
+
+SCHEMA = pa.schema(
+    [
+        ("source_id", pa.string()),
+        ("target_id", pa.int64()),
+        ("PDP", pa.float32()),
+        ("score", pa.float64()),
+    ]
+)
+
+
+def test_metapath_content_to_arrow():
+    """
+    Tests metapath_content_to_arrow
+    """
+    table = metapath_content_to_arrow(CONTENT, "GO:0000002", 1)
+    assert table.column_names == [
+        "metapath",
+        "node_ids",
+        "PDP",
+        "DWPC",
+        "source_id",
+        "target_id",
+    ]
+    assert table["node_ids"].to_pylist() == [[1, 2], [1, 3]]
+    assert table["target_id"].to_pylist() == [1, 1]
+
+    # conforming to a schema selects, casts and fills columns
+    table = metapath_content_to_arrow(CONTENT, "GO:0000002", 1, schema=SCHEMA)
+    assert table.schema == SCHEMA
+    assert table.to_pylist() == [
+        {"source_id": "GO:0000002", "target_id": 1, "PDP": 0.5, "score": None},
+        {"source_id": "GO:0000002", "target_id": 1, "PDP": 0.25, "score": None},
+    ]
+
+    empty = metapath_content_to_arrow(b'{"paths": []}', "GO:0000002", 1, SCHEMA)
+    assert empty.schema == SCHEMA
+    assert empty.num_rows == 0
+
+
+def test_arrow_parse_pool():
+    """
+    Tests ArrowParsePool
+    """
+    expected = metapath_content_to_arrow(CONTENT, "GO:0000002", 1, schema=SCHEMA)
+    with ArrowParsePool(processes=2, schema=SCHEMA) as pool:
+        assert pool.parse(CONTENT, "GO:0000002", 1).equals(expected)
+
+        # shared memory blocks are unlinked once read
+        future = pool.submit(CONTENT, "GO:0000002", 1)
+        name, _ = future.result()
+        assert pool.result(future).equals(expected)
+        assert not (SHARED_MEMORY_DIR / name).exists()
+
+        tables = list(
+            pool.map([(CONTENT, "GO:0000002", target) for target in range(5)])
+        )
+        assert [table["target_id"][0].as_py() for table in tables] == list(range(5))
+
+        with pytest.raises(json.JSONDecodeError):
+            pool.parse(b"not json", "GO:0000002", 1)
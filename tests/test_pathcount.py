@@ -0,0 +1,182 @@
+"""
+Tests for pathcount.py
+"""
+
+import pathlib
+from typing import Iterator, List
+
+import duckdb
+import pytest
+import requests
+
+from hetionet_utils.buildcache import BuildCache
+from hetionet_utils.pathcount import (
+    archive_step,
+    database_step,
+    download_archive,
+    duckdb_config,
+    export_step,
+    extract_dump_tables,
+    index_step,
+    list_dump_tables,
+    load_dump_tables,
+    table_files,
+    table_steps,
+    verify_archive,
+)
+
+TABLE_NAMES = [
+    "public.dj_hetmech_app_node",
+    "public.dj_hetmech_app_metapath",
+    "public.dj_hetmech_app_degreegroupedpermutation",
+    "public.dj_hetmech_app_pathcount",
+    "public.dj_hetmech_app_empty",
+]
+
+
+def test_duckdb_config():
+    """
+    Tests duckdb_config
+    """
+    assert duckdb_config() == {}
+    assert duckdb_config(threads=2, memory_limit="1GB") == {
+        "threads": 2,
+        "memory_limit": "1GB",
+    }
+
+
+def test_download_archive(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Tests download_archive
+    """
+
+    class FakeResponse:
+        def __init__(self, chunks: List[bytes], error: bool = False) -> None:
+            self.chunks = chunks
+            self.error = error
+
+        def raise_for_status(self) -> None:
+            if self.error:
+                raise requests.HTTPError("404")
+
+        def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+            yield from self.chunks
+
+    monkeypatch.setattr(
+        requests, "get", lambda url, stream: FakeResponse([b"abc", b"", b"def"])
+    )
+    path = download_archive("https://example.org/dump.sql.gz", tmp_path / "dump.gz")
+    assert path.read_bytes() == b"abcdef"
+    assert not (tmp_path / "dump.gz.part").exists()
+
+    monkeypatch.setattr(
+        requests, "get", lambda url, stream: FakeResponse([], error=True)
+    )
+    with pytest.raises(requests.HTTPError):
+        download_archive("https://example.org/dump.sql.gz", tmp_path / "other.gz")
+    assert not (tmp_path / "other.gz").exists()
+
+
+def test_verify_archive(fixture_pg_dump: pathlib.Path, tmp_path: pathlib.Path):
+    """
+    Tests verify_archive
+    """
+    assert verify_archive(fixture_pg_dump)
+
+    truncated = tmp_path / "truncated.sql.gz"
+    truncated.write_bytes(fixture_pg_dump.read_bytes()[:-20])
+    assert not verify_archive(truncated)
+
+
+def test_list_dump_tables(fixture_pg_dump: pathlib.Path):
+    """
+    Tests list_dump_tables
+    """
+    assert list_dump_tables(fixture_pg_dump) == TABLE_NAMES
+    assert list_dump_tables(fixture_pg_dump, expected_table_count=2) == TABLE_NAMES[:2]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_extract_and_load_dump_tables(
+    fixture_pg_dump: pathlib.Path, tmp_path: pathlib.Path, workers: int
+):
+    """
+    Tests extract_dump_tables and load_dump_tables
+    """
+    tables_dir = tmp_path / "tables"
+    files = extract_dump_tables(
+        fixture_pg_dump, TABLE_NAMES, tables_dir, workers=workers
+    )
+    assert files == [table_files(name, tables_dir) for name in TABLE_NAMES]
+
+    create_file, copy_file = table_files("public.dj_hetmech_app_node", tables_dir)
+    assert create_file.read_text().startswith("CREATE TABLE public.dj_hetmech_app_node")
+    assert copy_file.read_text() == "1\tGO:0000001\n2\tGO:0000002\n3\t1\n4\t2\n"
+
+    database = tmp_path / "connectivity-search.duckdb"
+    expected = {
+        "dj_hetmech_app_node": 4,
+        "dj_hetmech_app_metapath": 2,
+        "dj_hetmech_app_degreegroupedpermutation": 1,
+        "dj_hetmech_app_pathcount": 3,
+        "dj_hetmech_app_empty": 0,
+    }
+    assert (
+        load_dump_tables(database, TABLE_NAMES, tables_dir, config={"threads": 1})
+        == expected
+    )
+
+    # loading again neither recreates nor repopulates the tables
+    assert load_dump_tables(database, TABLE_NAMES, tables_dir) == expected
+    with duckdb.connect(str(database)) as ddb:
+        assert ddb.execute(
+            "SELECT sum(dwpc) FROM dj_hetmech_app_pathcount"
+        ).fetchone() == (1.875,)
+
+
+def test_build_steps(fixture_pg_dump: pathlib.Path, tmp_path: pathlib.Path):
+    """
+    Tests archive_step, table_steps, database_step, export_step and
+    index_step with a BuildCache
+    """
+    sql_file = tmp_path / "dump.sql.gz"
+    sql_file.write_bytes(fixture_pg_dump.read_bytes())
+    tables_dir = tmp_path / "tables"
+    database = tmp_path / "connectivity-search.duckdb"
+    target_file = tmp_path / "metapath-data.parquet"
+    cache = BuildCache(tmp_path / "manifest.json")
+
+    def build() -> List[str]:
+        rebuilt = cache.build([archive_step(sql_file, "https://example.org/dump")])
+        rebuilt += cache.build(table_steps(sql_file, TABLE_NAMES, tables_dir))
+        rebuilt += cache.build([database_step(database, TABLE_NAMES, tables_dir)])
+        rebuilt += cache.build([export_step(database, target_file)])
+        rebuilt += cache.build([index_step(target_file)])
+        return rebuilt
+
+    # the complete archive is kept, with every later step built
+    assert build() == [
+        *(f"table:{name}" for name in TABLE_NAMES),
+        "database",
+        "export",
+        "index",
+    ]
+    assert cache.result("export")["rows"] == 3
+    assert build() == []
+
+    # a half-written table is rebuilt, and as its content is then the
+    # same as before, the steps derived from it are not
+    _, copy_file = table_files("public.dj_hetmech_app_pathcount", tables_dir)
+    copy_file.write_text(copy_file.read_text()[:5])
+    assert build() == ["table:public.dj_hetmech_app_pathcount"]
+    with duckdb.connect(str(database)) as ddb:
+        assert ddb.execute(
+            "SELECT sum(dwpc) FROM dj_hetmech_app_pathcount"
+        ).fetchone() == (1.875,)
+
+    # a changed export parameter rebuilds the export, whose changed
+    # content rebuilds the index
+    assert cache.build([export_step(database, target_file, profile="compact")]) == [
+        "export"
+    ]
+    assert cache.build([index_step(target_file)]) == ["index"]
@@ -0,0 +1,95 @@
+"""
+Tests for paths.py
+"""
+
+import numpy as np
+import pytest
+
+from hetionet_utils.graph import HetionetLocalGraph
+from hetionet_utils.metagraph import parse_metapath
+from hetionet_utils.paths import MetapathPathEnumerator, reverse_step
+
+
+@pytest.mark.parametrize(
+    "metapath, reversed_metapath",
+    [("BPpG", "GpBP"), ("BPpGr>G", "G<rGpBP"), ("GdAdG", "GdAdG")],
+)
+def test_reverse_step(metapath: str, reversed_metapath: str):
+    """
+    Tests reverse_step against parsing the reversed metapath
+    """
+    assert [
+        reverse_step(step) for step in reversed(parse_metapath(metapath))
+    ] == parse_metapath(reversed_metapath)
+
+
+@pytest.mark.parametrize(
+    "metapath, target",
+    [
+        ("BPpG", 1),
+        ("BPpGiG", 3),
+        ("BPpGr>G", 2),
+        ("BPpG<rG", 1),
+        ("BPpGiGiG", 1),
+        ("BPpGdAdG", 3),
+        ("BPpGiGdAdG", 1),
+    ],
+)
+def test_enumerate_pair_matches_source(
+    fixture_HetionetLocalGraph: HetionetLocalGraph, metapath: str, target: int
+):
+    """
+    Tests MetapathPathEnumerator.enumerate joining from both ends
+    matches walking from the source alone
+    """
+    enumerator = MetapathPathEnumerator(fixture_HetionetLocalGraph)
+    source_position, target_position = 0, target
+
+    from_source = enumerator.enumerate(source_position, metapath)
+    keep = from_source.nodes[:, -1] == target_position
+    pair = enumerator.enumerate(source_position, metapath, target_position)
+
+    assert len(pair.pdp) > 0
+    for expected, result in zip(from_source, pair):
+        np.testing.assert_allclose(result, expected[keep])
+
+
+def test_enumerate_wrong_metanode(fixture_HetionetLocalGraph: HetionetLocalGraph):
+    """
+    Tests MetapathPathEnumerator.enumerate raising for nodes which are not
+    of the metapath's source or target metanode
+    """
+    enumerator = MetapathPathEnumerator(fixture_HetionetLocalGraph)
+    # position 0 is the Biological Process and position 1 a Gene
+    with pytest.raises(ValueError, match="rather than BP"):
+        enumerator.enumerate(1, "BPpGiG")
+    with pytest.raises(ValueError, match="rather than G"):
+        enumerator.enumerate(0, "BPpGiG", target_position=0)
+
+
+def test_enumerate_top_k_and_min_pdp(fixture_HetionetLocalGraph: HetionetLocalGraph):
+    """
+    Tests MetapathPathEnumerator.enumerate top-k selection and cut-off
+    """
+    enumerator = MetapathPathEnumerator(fixture_HetionetLocalGraph)
+
+    # gene 3 is reached through two paths with equal PDP
+    paths = enumerator.enumerate(0, "BPpGiG", top_k=1)
+    assert paths.nodes.tolist() == [[0, 1, 3]]
+    assert paths.path_count.tolist() == [2.0]
+    assert paths.dwpc.tolist() == pytest.approx([1.0])
+
+    # both paths fall below the cut-off
+    assert len(enumerator.enumerate(0, "BPpGiG", min_pdp=0.6).pdp) == 0
+    assert len(enumerator.enumerate(0, "BPpGiG", 3, min_pdp=0.5).pdp) == 2
+
+
+def test_enumerate_damping(fixture_HetionetLocalGraph: HetionetLocalGraph):
+    """
+    Tests MetapathPathEnumerator damping
+    """
+    paths = MetapathPathEnumerator(fixture_HetionetLocalGraph, damping=0).enumerate(
+        0, "BPpGiG"
+    )
+    assert paths.pdp.tolist() == [1.0, 1.0]
+    assert paths.dwpc.tolist() == [2.0, 2.0]
@@ -0,0 +1,118 @@
+"""
+Tests for pipeline.py
+"""
+
+import threading
+import time
+from typing import Iterator, List, Optional
+
+import pytest
+
+from hetionet_utils.pipeline import Pipeline, Stage
+
+
+@pytest.mark.parametrize("workers, batch_size", [(1, None), (4, None), (3, 4)])
+def test_pipeline(workers: int, batch_size: Optional[int]):
+    """
+    Tests Pipeline runs every item through each stage
+    """
+    written: List[List[int]] = []
+    pipeline = Pipeline(
+        [
+            Stage("double", lambda item: item * 2, workers=workers),
+            Stage("increment", lambda item: item + 1, workers=workers),
+            Stage(
+                "write",
+                lambda items: written.append(items) or len(items),
+                batch_size=batch_size or 1,
+            ),
+        ],
+        queue_size=2,
+    )
+
+    assert sum(pipeline.run(range(50))) == 50
+    assert sorted(item for batch in written for item in batch) == [
+        item * 2 + 1 for item in range(50)
+    ]
+    assert all(len(batch) <= (batch_size or 1) for batch in written)
+
+    metrics = pipeline.metrics()
+    assert [metrics[name]["items"] for name in ["double", "increment", "write"]] == [
+        50,
+        50,
+        50,
+    ]
+
+
+def test_pipeline_overlaps_stages():
+    """
+    Tests Pipeline runs stages concurrently
+    """
+    # each stage sleeps, so running stages one after another would take
+    # at least 2 * items * delay
+    delay, items = 0.01, 20
+    pipeline = Pipeline(
+        [
+            Stage("fetch", lambda item: time.sleep(delay) or item),
+            Stage("write", lambda item: time.sleep(delay) or item),
+        ]
+    )
+    start = time.perf_counter()
+    assert list(pipeline.run(range(items))) == list(range(items))
+    assert time.perf_counter() - start < 1.5 * items * delay
+
+
+def test_pipeline_backpressure():
+    """
+    Tests Pipeline bounds the items read ahead of a slow stage
+    """
+    produced = []
+    release = threading.Event()
+
+    def source() -> Iterator[int]:
+        for item in range(100):
+            produced.append(item)
+            yield item
+
+    pipeline = Pipeline(
+        [Stage("slow", lambda item: release.wait() and item)], queue_size=2
+    )
+    results = pipeline.run(source())
+    thread = threading.Thread(target=lambda: next(results))
+    thread.start()
+    time.sleep(0.2)
+
+    # one item in the stage and up to queue_size waiting plus one
+    # being put by the source
+    assert len(produced) <= 4
+    release.set()
+    thread.join()
+    assert len(list(results)) == 99
+
+
+@pytest.mark.parametrize("failing_stage", [0, 1])
+def test_pipeline_error(failing_stage: int):
+    """
+    Tests Pipeline raises the first error from a stage
+    """
+
+    def fail(item: int) -> int:
+        if item == 5:
+            raise ValueError("bad item")
+        return item
+
+    stages = [Stage("first", lambda item: item), Stage("second", lambda item: item)]
+    stages[failing_stage] = stages[failing_stage]._replace(func=fail)
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(Pipeline(stages, queue_size=2).run(range(1000)))
+
+
+def test_pipeline_validation():
+    """
+    Tests Pipeline validates its stages
+    """
+    with pytest.raises(ValueError):
+        Pipeline([])
+    with pytest.raises(ValueError):
+        Pipeline([Stage("none", lambda item: item, workers=0)])
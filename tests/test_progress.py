@@ -0,0 +1,144 @@
+"""
+Tests for progress.py
+"""
+
+import gzip
+import pathlib
+from typing import List
+
+import duckdb
+import pytest
+
+from hetionet_utils.progress import (
+    ProgressReader,
+    ProgressTracker,
+    ProgressUpdate,
+    execute_with_progress,
+    format_progress,
+    open_with_progress,
+)
+from hetionet_utils.sql import (
+    extract_and_write_sql_block,
+    remove_first_and_last_line_of_file,
+)
+
+
+@pytest.mark.parametrize(
+    "update, expected",
+    [
+        (
+            ProgressUpdate("extract", 12_000_000, 100_000_000, 3.0),
+            "extract: 12.0/100.0 MB (12.0%) at 4.0 MB/s, ETA 0:00:22",
+        ),
+        (
+            ProgressUpdate("extract", 0, 100_000_000, 0.0),
+            "extract: 0.0/100.0 MB (0.0%) at 0.0 MB/s, ETA unknown",
+        ),
+        (
+            ProgressUpdate("load", 5_000_000, 5_000_000, 61.0, finished=True),
+            "load: 5.0/5.0 MB (100.0%) at 0.1 MB/s, done in 0:01:01",
+        ),
+    ],
+)
+def test_format_progress(update: ProgressUpdate, expected: str):
+    """
+    Tests format_progress
+    """
+    assert format_progress(update) == expected
+
+
+def test_progress_tracker():
+    """
+    Tests ProgressTracker throttles updates and finishes once
+    """
+    updates: List[ProgressUpdate] = []
+    tracker = ProgressTracker(100, updates.append, label="step", interval=0)
+    tracker.advance(10)
+    tracker.advance(15)
+    tracker.finish()
+    tracker.finish()
+    assert [update.done for update in updates] == [10, 25, 25]
+    assert [update.finished for update in updates] == [False, False, True]
+
+    updates.clear()
+    tracker = ProgressTracker(100, updates.append, interval=3600)
+    tracker.advance(50)
+    tracker.finish()
+    assert [update.done for update in updates] == [50]
+
+
+def test_open_with_progress(tmp_path: pathlib.Path):
+    """
+    Tests open_with_progress reports the compressed bytes read
+    """
+    (path := tmp_path / "dump.sql.gz").write_bytes(
+        gzip.compress(("row\n" * 10_000).encode())
+    )
+
+    # without a callback the file is not wrapped
+    with open_with_progress(str(path)) as file:
+        assert not isinstance(file, ProgressReader)
+
+    updates: List[ProgressUpdate] = []
+    with open_with_progress(
+        str(path), updates.append, label="dump", interval=0
+    ) as file, gzip.open(file, "rt") as f:
+        assert sum(1 for _ in f) == 10_000
+
+    assert updates[-1].finished
+    assert updates[-1].label == "dump"
+    assert updates[-1].done == updates[-1].total == path.stat().st_size
+
+
+def test_sql_progress(tmp_path: pathlib.Path):
+    """
+    Tests the sql extractors report progress
+    """
+    sql_file = tmp_path / "dump.sql.gz"
+    with gzip.open(sql_file, "wt") as f:
+        f.write("COPY public.table (a) FROM stdin;\n1\n2\n\\.\n")
+
+    updates: List[ProgressUpdate] = []
+    output_file = str(tmp_path / "copy.tsv")
+    assert extract_and_write_sql_block(
+        str(sql_file), "COPY public.table", "\\.", output_file, progress=updates.append
+    )
+    assert remove_first_and_last_line_of_file(output_file, progress=updates.append)
+
+    assert pathlib.Path(output_file).read_text() == "1\n2\n"
+    assert [update.label for update in updates] == [
+        "extract COPY public.table",
+        f"trim {output_file}",
+    ]
+    assert all(update.finished for update in updates)
+
+
+def test_execute_with_progress(tmp_path: pathlib.Path):
+    """
+    Tests execute_with_progress
+    """
+    (tsv := tmp_path / "data.tsv").write_text("".join(f"{i}\n" for i in range(100)))
+    updates: List[ProgressUpdate] = []
+    with duckdb.connect() as ddb:
+        ddb.execute("CREATE TABLE t (a INTEGER)")
+        execute_with_progress(
+            ddb,
+            f"COPY t FROM '{tsv}' (DELIMITER '\t', HEADER false)",
+            updates.append,
+            total=tsv.stat().st_size,
+            label="load t",
+            interval=0.01,
+        )
+        assert ddb.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 100
+        # the progress settings of the connection are restored
+        assert ddb.execute(
+            "SELECT current_setting('enable_progress_bar'), "
+            "current_setting('enable_progress_bar_print')"
+        ).fetchone() == (False, True)
+
+        with pytest.raises(duckdb.CatalogException):
+            execute_with_progress(ddb, "SELECT * FROM missing", updates.append)
+
+    assert updates[-1] == updates[-1]._replace(
+        label="load t", done=tsv.stat().st_size, finished=True
+    )
@@ -0,0 +1,81 @@
+"""
+Tests for query.py
+"""
+
+import pathlib
+
+import pyarrow as pa
+import pytest
+
+from hetionet_utils.index import build_identifier_index
+from hetionet_utils.query import MetapathDataQuery
+
+
+def test_pair(fixture_metapath_data: pathlib.Path):
+    """
+    Tests MetapathDataQuery.pair by identifier and ID
+    """
+    with MetapathDataQuery(fixture_metapath_data, threads=1) as query:
+        result = query.pair("GO:0000001", 2)
+        assert isinstance(result, pa.Table)
+        assert result["metapath_id"].to_pylist() == ["BPpG", "BPpGcG", "BPpGiG"]
+        assert set(result["target_identifier"].to_pylist()) == {"2"}
+
+        # internal IDs give the same rows
+        assert query.pair(101, 2, by="id").equals(result)
+
+        # no rows for unknown pairs
+        assert query.pair("GO:0000001", 99).num_rows == 0
+
+        with pytest.raises(ValueError):
+            query.pair("GO:0000001", 2, by="name")
+
+
+def test_top_targets(fixture_metapath_data: pathlib.Path):
+    """
+    Tests MetapathDataQuery.top_targets
+    """
+    with MetapathDataQuery(fixture_metapath_data) as query:
+        result = query.top_targets("GO:0000002", "BPpGiG", k=2)
+        expected = query.query(
+            """
+            SELECT target_identifier, adjusted_p_value
+            FROM metapath_data
+            WHERE source_identifier = ? AND metapath_id = ?
+            ORDER BY adjusted_p_value, dwpc DESC
+            """,
+            ["GO:0000002", "BPpGiG"],
+        )
+
+        assert result.num_rows == 2
+        assert (
+            result["target_identifier"].to_pylist()
+            == expected["target_identifier"].to_pylist()[:2]
+        )
+
+
+def test_by_metapath(fixture_metapath_data: pathlib.Path):
+    """
+    Tests MetapathDataQuery.by_metapath
+    """
+    with MetapathDataQuery(fixture_metapath_data) as query:
+        result = query.by_metapath("BPpGcG")
+        assert result.num_rows == 12
+        assert set(result["metapath_id"].to_pylist()) == {"BPpGcG"}
+
+
+def test_indexed_lookups(fixture_metapath_data: pathlib.Path):
+    """
+    Tests MetapathDataQuery lookups using an identifier index match scans
+    """
+    index_file = build_identifier_index(fixture_metapath_data)
+
+    with MetapathDataQuery(fixture_metapath_data) as scan, MetapathDataQuery(
+        fixture_metapath_data, index_file=index_file
+    ) as indexed:
+        assert indexed.index is not None
+        assert indexed.pair("GO:0000000", 4).equals(scan.pair("GO:0000000", 4))
+        assert indexed.top_targets("GO:0000001", "BPpG", k=3).equals(
+            scan.top_targets("GO:0000001", "BPpG", k=3)
+        )
+        assert indexed.pair("GO:9999999", 4).num_rows == 0
@@ -0,0 +1,169 @@
+"""
+Tests for scan.py
+"""
+
+import pathlib
+from typing import Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils.export import export_pathcount_parquet
+from hetionet_utils.scan import (
+    TopKAccumulator,
+    iter_top_k,
+    scan_batches,
+    scan_top_k,
+)
+
+
+def test_scan_batches(fixture_metapath_data: pathlib.Path):
+    """
+    Tests scan_batches
+    """
+    predicate = (pc.field("source_identifier") == "GO:0000001") & (
+        pc.field("adjusted_p_value") < 0.5
+    )
+    batches = list(
+        scan_batches(
+            fixture_metapath_data,
+            predicate=predicate,
+            columns=["id", "adjusted_p_value"],
+            batch_size=2,
+        )
+    )
+    expected = [
+        row["id"]
+        for row in pq.read_table(fixture_metapath_data).to_pylist()
+        if row["source_identifier"] == "GO:0000001" and row["adjusted_p_value"] < 0.5
+    ]
+
+    assert all(batch.num_rows <= 2 for batch in batches)
+    assert batches[0].schema.names == ["id", "adjusted_p_value"]
+    assert sorted(pa.Table.from_batches(batches)["id"].to_pylist()) == sorted(expected)
+
+
+@pytest.mark.parametrize(
+    "key, k, ascending",
+    [
+        ("source_identifier", 2, True),
+        ("target_identifier", 3, False),
+        (None, 5, True),
+        ("metapath_id", 100, True),
+    ],
+)
+def test_scan_top_k(
+    fixture_metapath_data: pathlib.Path,
+    key: Optional[str],
+    k: int,
+    ascending: bool,
+):
+    """
+    Tests scan_top_k against a sort of the whole table
+    """
+    result = scan_top_k(
+        fixture_metapath_data,
+        key=key,
+        k=k,
+        sort_by="dwpc",
+        ascending=ascending,
+        columns=["id", "dwpc"],
+        batch_size=5,
+    )
+
+    rows = pq.read_table(fixture_metapath_data).to_pylist()
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[key] if key else None, []).append(row)
+    expected = sorted(
+        row["id"]
+        for group in groups.values()
+        for row in sorted(group, key=lambda row: row["dwpc"], reverse=not ascending)[:k]
+    )
+
+    assert result.schema.names == ["id", "dwpc"]
+    assert sorted(result["id"].to_pylist()) == expected
+
+
+def test_iter_top_k(fixture_metapath_data: pathlib.Path):
+    """
+    Tests iter_top_k yields bounded, incremental results
+    """
+    results = list(
+        iter_top_k(
+            fixture_metapath_data,
+            key="source_identifier",
+            k=1,
+            sort_by="adjusted_p_value",
+            predicate=pc.field("metapath_id") == "BPpG",
+            batch_size=4,
+        )
+    )
+
+    assert len(results) > 1
+    assert all(result.num_rows <= 3 for result in results)
+    assert results[-1]["source_identifier"].to_pylist() == [
+        "GO:0000000",
+        "GO:0000001",
+        "GO:0000002",
+    ]
+
+
+def test_top_k_accumulator():
+    """
+    Tests TopKAccumulator
+    """
+    accumulator = TopKAccumulator(key="key", k=2, sort_by="score")
+    assert accumulator.result() is None
+
+    accumulator.update(pa.table({"key": ["a", "b", "a"], "score": [3, 1, 2]}))
+    accumulator.update(pa.record_batch({"key": ["a", "b", "b"], "score": [1, 5, 0]}))
+    assert accumulator.result().to_pydict() == {
+        "key": ["a", "a", "b", "b"],
+        "score": [1, 2, 0, 1],
+    }
+
+    with pytest.raises(ValueError):
+        TopKAccumulator(key="key", k=0, sort_by="score")
+
+
+def test_scan_top_k_compact(
+    fixture_pathcount_duckdb: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests scan_top_k keyed by dictionary-encoded columns of a compact export
+    """
+    export_pathcount_parquet(fixture_pathcount_duckdb, tmp_path / "default.parquet")
+    export_pathcount_parquet(
+        fixture_pathcount_duckdb, tmp_path / "compact.parquet", profile="compact"
+    )
+
+    results = [
+        scan_top_k(
+            tmp_path / f"{profile}.parquet",
+            key="source_identifier",
+            k=2,
+            sort_by="dwpc",
+            ascending=False,
+            columns=["source_identifier", "id"],
+            batch_size=2,
+        )
+        for profile in ["default", "compact"]
+    ]
+    assert pa.types.is_dictionary(results[1]["source_identifier"].type)
+    assert results[1].num_rows == 4
+    assert sorted(results[1]["id"].to_pylist()) == sorted(results[0]["id"].to_pylist())
+
+    # unmatched predicates give empty tables with the requested columns
+    empty = scan_top_k(
+        tmp_path / "compact.parquet",
+        key="metapath_id",
+        k=1,
+        sort_by="dwpc",
+        predicate=pc.field("dwpc") < -1,
+        columns=["metapath_id", "dwpc"],
+    )
+    assert empty.num_rows == 0
+    assert empty.column_names == ["metapath_id", "dwpc"]
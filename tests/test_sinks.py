@@ -0,0 +1,144 @@
+"""
+Tests for sinks.py
+"""
+
+import pathlib
+
+import duckdb
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pytest
+
+from hetionet_utils.sinks import (
+    DuckDBSink,
+    LanceDBSink,
+    ParquetDatasetSink,
+    ResultSink,
+    open_sink,
+)
+
+SCHEMA = pa.schema([("source_id", pa.string()), ("score", pa.float64())])
+
+
+def make_table(start: int, rows: int) -> pa.Table:
+    """
+    Make a results table with scores start to start + rows.
+    """
+    return pa.table(
+        {
+            "score": pa.array(range(start, start + rows), pa.int64()),
+            "source_id": [f"GO:{index:07d}" for index in range(start, start + rows)],
+        }
+    )
+
+
+def test_result_sink():
+    """
+    Tests ResultSink requires subclasses to implement writing and reading
+    """
+    with pytest.raises(TypeError):
+        ResultSink()
+
+
+def test_parquet_dataset_sink(tmp_path: pathlib.Path):
+    """
+    Tests ParquetDatasetSink rolls files and conforms results to the schema
+    """
+    directory = tmp_path / "results"
+    with ParquetDatasetSink(directory, schema=SCHEMA, max_file_rows=25) as sink:
+        for start in range(0, 100, 10):
+            sink.write(make_table(start, 10))
+        assert sink.rows_written == 100
+        # only complete files are visible to readers
+        assert len(list(directory.glob("*.parquet"))) == 3
+
+    assert [path.name for path in sink.files] == [
+        f"part-{index:05d}.parquet" for index in range(4)
+    ]
+    assert not list(directory.glob("*.tmp"))
+    table = ds.dataset(directory).to_table()
+    assert table.schema == SCHEMA
+    assert sorted(table["score"].to_pylist()) == list(range(100))
+
+    # appending continues numbering after existing files
+    with ParquetDatasetSink(directory, mode="append") as sink:
+        sink.write(make_table(100, 5))
+    assert sink.files == [directory / "part-00004.parquet"]
+    assert ds.dataset(directory).count_rows() == 105
+    assert sink.read().num_rows == 105
+
+    # overwriting removes existing files (and those of interrupted runs)
+    (directory / "part-00009.parquet.tmp").write_bytes(b"partial")
+    with ParquetDatasetSink(directory, max_file_bytes=1) as sink:
+        sink.write(make_table(0, 5))
+        sink.write(make_table(5, 5))
+    assert len(list(directory.glob("*.parquet"))) == 2
+    assert not list(directory.glob("*.tmp"))
+    assert ds.dataset(directory).count_rows() == 10
+
+    with pytest.raises(ValueError):
+        sink.write(make_table(0, 1))
+
+
+def test_duckdb_sink(tmp_path: pathlib.Path):
+    """
+    Tests DuckDBSink appends results to a table
+    """
+    database = tmp_path / "results.duckdb"
+    with DuckDBSink(database, "metapath results") as sink:
+        sink.write(make_table(0, 10).select(["source_id", "score"]))
+        sink.write(make_table(10, 10).select(["source_id", "score"]))
+
+    with DuckDBSink(database, "metapath results", mode="append") as sink:
+        # columns are matched by name
+        sink.write(make_table(20, 10))
+        assert sink.read().num_rows == 30
+    # results may be read after the sink is closed
+    assert sum(sink.read()["score"].to_pylist()) == sum(range(30))
+
+    with duckdb.connect(str(database)) as ddb:
+        assert ddb.execute(
+            'SELECT count(*), sum(score) FROM "metapath results"'
+        ).fetchone() == (30, sum(range(30)))
+
+    with DuckDBSink(database, "metapath results", schema=SCHEMA):
+        pass
+    with duckdb.connect(str(database)) as ddb:
+        assert ddb.execute('SELECT count(*) FROM "metapath results"').fetchone() == (0,)
+
+
+def test_lancedb_sink(tmp_path: pathlib.Path):
+    """
+    Tests LanceDBSink buffers and adds results to a table
+    """
+    pytest.importorskip("lancedb")
+    with LanceDBSink(
+        tmp_path / "lancedb", "results", schema=SCHEMA, min_rows_per_add=15
+    ) as sink:
+        for start in range(0, 50, 10):
+            sink.write(make_table(start, 10))
+    assert sink._table.count_rows() == 50
+    assert sink.read().num_rows == 50
+
+    # appending without a schema or writes reads the existing table
+    with LanceDBSink(tmp_path / "lancedb", "results", mode="append") as sink:
+        assert sink.schema == SCHEMA
+        assert sink.read().num_rows == 50
+
+    # overwriting without a schema or writes removes the existing table
+    with LanceDBSink(tmp_path / "lancedb", "results") as sink:
+        assert sink.read().num_rows == 0
+    with LanceDBSink(tmp_path / "lancedb", "results", mode="append") as sink:
+        assert sink.read().num_rows == 0
+
+
+def test_open_sink(tmp_path: pathlib.Path):
+    """
+    Tests open_sink
+    """
+    with open_sink("parquet", directory=tmp_path / "results") as sink:
+        assert isinstance(sink, ParquetDatasetSink)
+    with pytest.raises(ValueError):
+        open_sink("csv")
+    with pytest.raises(ValueError):
+        open_sink("parquet", directory=tmp_path, mode="replace")
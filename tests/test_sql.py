@@ -7,12 +7,17 @@ import pathlib
 import tempfile
 from typing import Optional
 
+import duckdb
 import pytest
 from utils import create_temp_file
 
 from hetionet_utils.sql import (
+    duckdb_setting,
     extract_and_write_sql_block,
+    parquet_compression,
+    quote_sql_string,
     remove_first_and_last_line_of_file,
+    sql_literal,
 )
 
 
@@ -152,3 +157,69 @@ def test_remove_first_and_last_line_of_file(file_content: str, expected_output:
 
         # Assert the result matches the expected output
         assert result == expected_output
+
+
+def test_quote_sql_string():
+    """
+    Tests quote_sql_string
+    """
+    assert quote_sql_string("it's") == "'it''s'"
+    assert quote_sql_string(pathlib.Path("a/b.parquet")) == "'a/b.parquet'"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "NULL"),
+        (True, "TRUE"),
+        (3, "3"),
+        (0.5, "0.5"),
+        ("GO:0000002", "'GO:0000002'"),
+        ("x' OR 'a' = 'a", "'x'' OR ''a'' = ''a'"),
+    ],
+)
+def test_sql_literal(value: object, expected: str):
+    """
+    Tests sql_literal
+    """
+    assert sql_literal(value) == expected
+
+
+def test_sql_literal_unsupported():
+    """
+    Tests sql_literal with an unsupported type
+    """
+    with pytest.raises(TypeError):
+        sql_literal([1, 2])
+
+
+def test_parquet_compression():
+    """
+    Tests parquet_compression
+    """
+    assert parquet_compression("ZSTD") == "zstd"
+    with pytest.raises(ValueError):
+        parquet_compression("zstd); DROP TABLE x; --")
+
+
+def test_duckdb_setting():
+    """
+    Tests duckdb_setting
+    """
+    with duckdb.connect() as ddb:
+        with duckdb_setting(ddb, "preserve_insertion_order", False):
+            assert ddb.execute(
+                "SELECT current_setting('preserve_insertion_order')"
+            ).fetchone() == (False,)
+
+        # the previous value is restored after errors too
+        threads = ddb.execute("SELECT current_setting('threads')").fetchone()
+        with pytest.raises(RuntimeError), duckdb_setting(ddb, "threads", 2):
+            raise RuntimeError("failed")
+        assert ddb.execute("SELECT current_setting('threads')").fetchone() == threads
+        assert ddb.execute(
+            "SELECT current_setting('preserve_insertion_order')"
+        ).fetchone() == (True,)
+
+        with pytest.raises(ValueError), duckdb_setting(ddb, "threads = 1; SET x", 1):
+            pass
@@ -0,0 +1,169 @@
+"""
+Tests for subset.py
+"""
+
+import json
+import os
+import pathlib
+
+import duckdb
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils.scan import scan_top_k
+from hetionet_utils.subset import (
+    MANIFEST_FILE,
+    extract_metapath_subset,
+    refresh_metapath_partitions,
+)
+
+
+@pytest.mark.parametrize("metapaths_format", ["list", "arrow", "csv"])
+def test_extract_metapath_subset(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path, metapaths_format: str
+):
+    """
+    Tests extract_metapath_subset
+    """
+    metapaths = ["BPpGiG", "BPpG", "BPpG", "BPpGr>G"]
+    expected_ids = [
+        row["id"]
+        for row in pq.read_table(fixture_metapath_data).to_pylist()
+        if row["metapath_id"] in metapaths
+    ]
+    if metapaths_format == "arrow":
+        metapaths = pa.table({"metapath": metapaths, "other": range(len(metapaths))})
+    elif metapaths_format == "csv":
+        (path := tmp_path / "metapaths.csv").write_text(
+            "\n".join(["metapath", *metapaths])
+        )
+        metapaths = path
+
+    # output paths containing quotes are escaped
+    output_file = tmp_path / "it's a subset.parquet"
+
+    assert extract_metapath_subset(
+        metapath_data=fixture_metapath_data,
+        metapaths=metapaths,
+        output_file=output_file,
+    ) == len(expected_ids)
+    assert sorted(pq.read_table(output_file)["id"].to_pylist()) == expected_ids
+
+
+def test_extract_metapath_subset_existing_connection(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests extract_metapath_subset leaves an existing connection open
+    """
+    with duckdb.connect() as ddb:
+        extract_metapath_subset(
+            fixture_metapath_data, ["BPpGcG"], tmp_path / "out.parquet", ddb=ddb
+        )
+        assert ddb.execute("SELECT COUNT(*) FROM metapaths").fetchone()[0] == 1
+        # settings changed for the copy are restored
+        assert ddb.execute(
+            "SELECT current_setting('preserve_insertion_order')"
+        ).fetchone() == (True,)
+        refresh_metapath_partitions(
+            fixture_metapath_data, ["BPpGcG"], tmp_path / "partitions", ddb=ddb
+        )
+        assert ddb.execute(
+            "SELECT current_setting('preserve_insertion_order')"
+        ).fetchone() == (True,)
+
+
+def test_extract_metapath_subset_invalid_compression(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests extract_metapath_subset and refresh_metapath_partitions
+    with an unknown compression codec
+    """
+    compression = "zstd); COPY metapaths TO 'x.csv' (FORMAT csv"
+    with pytest.raises(ValueError):
+        extract_metapath_subset(
+            fixture_metapath_data,
+            ["BPpG"],
+            tmp_path / "out.parquet",
+            compression=compression,
+        )
+    with pytest.raises(ValueError):
+        refresh_metapath_partitions(
+            fixture_metapath_data, ["BPpG"], tmp_path / "out", compression=compression
+        )
+
+
+def _read_partitions(output_dir: pathlib.Path) -> dict:
+    """
+    Count the rows of each metapath across partition files,
+    restoring metapath_id from the partition directories.
+    """
+    metapaths = (
+        ds.dataset(output_dir, format="parquet", partitioning="hive")
+        .to_table(columns=["metapath_id"])["metapath_id"]
+        .to_pylist()
+    )
+    with duckdb.connect() as ddb:
+        assert sorted(metapaths) == sorted(
+            metapath
+            for (metapath,) in ddb.execute(
+                f"SELECT metapath_id FROM read_parquet('{output_dir}/*/*.parquet')"
+            ).fetchall()
+        )
+    return {metapath: metapaths.count(metapath) for metapath in set(metapaths)}
+
+
+def test_refresh_metapath_partitions(
+    fixture_metapath_data: pathlib.Path, tmp_path: pathlib.Path
+):
+    """
+    Tests refresh_metapath_partitions only extracts changed metapaths
+    """
+    output_dir = tmp_path / "subset"
+
+    assert refresh_metapath_partitions(
+        fixture_metapath_data,
+        ["BPpG", "BPpGiG", "BPpGr>G"],
+        output_dir,
+        ignore=["BPpGiG"],
+    ) == {"added": ["BPpG", "BPpGr>G"], "removed": [], "unchanged": []}
+    assert _read_partitions(output_dir) == {"BPpG": 12}
+    manifest = json.loads((output_dir / MANIFEST_FILE).read_text())
+    assert manifest["partitions"]["BPpG"]["rows"] == 12
+    assert manifest["partitions"]["BPpGr>G"] == {"partition": None, "rows": 0}
+
+    # unchanged partitions are not rewritten
+    (unchanged_file,) = output_dir.glob("metapath_id=BPpG/*.parquet")
+    modified = unchanged_file.stat().st_mtime_ns
+
+    assert refresh_metapath_partitions(
+        fixture_metapath_data, ["BPpG", "BPpGcG"], output_dir
+    ) == {"added": ["BPpGcG"], "removed": ["BPpGr>G"], "unchanged": ["BPpG"]}
+    assert _read_partitions(output_dir) == {"BPpG": 12, "BPpGcG": 12}
+    assert unchanged_file.stat().st_mtime_ns == modified
+    assert not (output_dir / ".staging").exists()
+
+    assert refresh_metapath_partitions(
+        fixture_metapath_data, ["BPpGcG"], output_dir
+    ) == {"added": [], "removed": ["BPpG"], "unchanged": ["BPpGcG"]}
+    assert _read_partitions(output_dir) == {"BPpGcG": 12}
+
+    # scans key partitioned results by the restored metapath_id
+    top = scan_top_k(output_dir, key="metapath_id", k=2, sort_by="dwpc")
+    assert top["metapath_id"].to_pylist() == ["BPpGcG", "BPpGcG"]
+
+    # partitions missing from the manifest (such as those left by an
+    # interrupted run) are removed
+    (output_dir / "metapath_id=BPpG").mkdir()
+    refresh_metapath_partitions(fixture_metapath_data, ["BPpGcG"], output_dir)
+    assert not (output_dir / "metapath_id=BPpG").exists()
+
+    # changes to the source data rebuild every partition
+    os.utime(fixture_metapath_data, ns=(0, 0))
+    assert refresh_metapath_partitions(
+        fixture_metapath_data, ["BPpGcG"], output_dir
+    ) == {"added": ["BPpGcG"], "removed": [], "unchanged": []}
+    assert _read_partitions(output_dir) == {"BPpGcG": 12}
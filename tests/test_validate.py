@@ -0,0 +1,112 @@
+"""
+Tests for validate.py
+"""
+
+import math
+import pathlib
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from hetionet_utils.validate import validate_gather_results
+
+
+@pytest.fixture
+def gather_results(fixture_metapath_data: pathlib.Path) -> pa.Table:
+    """
+    Gather results (two paths per combination) whose DWPCs agree with
+    the precalculated data, except for one combination which disagrees
+    and one which has no precalculated data.
+    """
+    rows = pq.read_table(fixture_metapath_data).to_pylist()
+    dwpc = {
+        (row["source_identifier"], row["target_identifier"], row["metapath_id"]): row[
+            "dwpc"
+        ]
+        for row in rows
+    }
+    dwpc[("GO:0000000", "1", "BPpG")] += 1.0
+    dwpc[("GO:0000009", "1", "BPpG")] = 0.5
+
+    paths = [
+        {
+            "source_id": source,
+            "target_id": int(target),
+            "metapath": metapath,
+            "PDP": pdp,
+        }
+        for (source, target, metapath), value in dwpc.items()
+        for pdp in (value / 4, 3 * value / 4)
+    ]
+    return pa.Table.from_pylist(paths)
+
+
+def test_validate_gather_results(
+    fixture_metapath_data: pathlib.Path,
+    gather_results: pa.Table,
+    tmp_path: pathlib.Path,
+):
+    """
+    Tests validate_gather_results
+    """
+    report = validate_gather_results(gather_results, fixture_metapath_data)
+    assert (report.checked, report.matched, report.mismatched, report.missing) == (
+        37,
+        35,
+        1,
+        1,
+    )
+    assert report.agreement == 35 / 36
+    assert report.mismatches().select(
+        ["source_identifier", "target_identifier", "metapath_id"]
+    ).to_pylist() == [
+        {
+            "source_identifier": "GO:0000000",
+            "target_identifier": "1",
+            "metapath_id": "BPpG",
+        }
+    ]
+    assert report.mismatches()["abs_difference"].to_pylist() == [pytest.approx(1.0)]
+    assert report.agreeing_metapaths() == ["BPpGcG", "BPpGiG"]
+    assert report.comparisons["api_paths"].to_pylist() == [2] * 37
+
+    # sampling is repeatable and reads Parquet directories
+    gather_dir = tmp_path / "gather"
+    gather_dir.mkdir()
+    pq.write_table(gather_results, gather_dir / "part-00000.parquet")
+    sample = validate_gather_results(gather_dir, fixture_metapath_data, sample_size=10)
+    assert sample.checked == 10
+    assert sample.comparisons.equals(
+        validate_gather_results(
+            gather_results, fixture_metapath_data, sample_size=10
+        ).comparisons
+    )
+
+    # results without a metapath column use the given metapath
+    # and a DWPC column takes precedence over summed PDP values
+    single = gather_results.filter(
+        pa.compute.equal(gather_results["metapath"], "BPpGiG")
+    ).drop_columns(["metapath"])
+    single = single.append_column("DWPC", pa.nulls(single.num_rows, pa.float64()))
+    report = validate_gather_results(single, fixture_metapath_data, metapath="BPpGiG")
+    assert (report.checked, report.matched) == (12, 12)
+
+    report = validate_gather_results(
+        single.set_column(
+            single.schema.get_field_index("DWPC"),
+            "DWPC",
+            pa.array([100.0] * single.num_rows),
+        ),
+        fixture_metapath_data,
+        metapath="BPpGiG",
+    )
+    assert report.mismatched == 12
+    assert report.agreeing_metapaths() == []
+
+    with pytest.raises(ValueError):
+        validate_gather_results(single, fixture_metapath_data)
+
+    empty = validate_gather_results(gather_results.slice(0, 0), fixture_metapath_data)
+    assert empty.checked == 0
+    assert math.isnan(empty.agreement)